@@ -0,0 +1,208 @@
+"""
+ECOMARKET — punto de entrada único (monitor, sse, sync, bench)
+
+Problema: cada script de las semanas se corre por separado y al importarse
+jala todo (aiohttp, httpx, requests, pandas, tabulate) aunque solo se vaya a
+imprimir una tabla o la ayuda. En las invocaciones cortas de cron del
+monitor, la mayor parte del tiempo se iba en importar.
+
+DECISIONES DE DISEÑO:
+1. IMPORTS PEREZOSOS: este archivo solo importa os y sys al cargarse. Cada
+   subcomando importa su módulo (y con él aiohttp, httpx o requests) dentro
+   de su función, así que `ecomarket.py sync --help` o `bench --lista` no
+   pagan por el cliente async ni por el SSE. test_ecomarket.py lo vigila con
+   `python -X importtime` contra un presupuesto de arranque.
+
+2. SOBRE LOS MÓDULOS QUE YA EXISTEN: los subcomandos llaman a los main() de
+   cada semana (o a sus funciones públicas) sin copiar lógica. Las carpetas se
+   agregan a sys.path solo cuando se necesitan, como en los bench; los RETO IA
+   que repiten nombre de archivo (monitor.py, receptor_alertas_v2.py) se
+   cargan por ruta.
+
+3. PENSADO PARA CRON: --duracion corta el monitor o el receptor tras N
+   segundos cancelando su main(), para que corran sus finally (outbox de
+   alertas, checkpoint SSE) y el proceso salga limpio.
+
+Uso: python ecomarket.py monitor [--tipo inventario|polling] [--duracion 60] [--api URL]
+     python ecomarket.py sse [--receptor multiplex|servicio|hub] [--duracion 60]
+     python ecomarket.py sync listar [--categoria miel] | sync buscar NOMBRE
+     python ecomarket.py bench --lista | bench formatos --productos 20000
+"""
+
+import os
+import sys
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+# carpetas con módulos que los demás importan por nombre (codec_json, validadores, ...)
+CARPETAS = (
+    "semana-2", os.path.join("semana-2", "RETO IA #4"), os.path.join("semana-2", "RETO IA #3"),
+    "semana-3", "semana-4", "semana-5", "semana-6",
+)
+
+MONITORES = {
+    "inventario": "semana-5/monitor_pedidos.py",           # MonitorInventario (aiohttp)
+    "polling": "semana-4/RETO IA #3/monitor.py",            # ServicioPolling (httpx)
+}
+RECEPTORES = {
+    "multiplex": "semana-7/RETO IA #3/receptor_alertas_v2.py",   # ClienteSSEMultiplex
+    "servicio": "semana-6/RETO IA #1/monitor.py",                # ServicioSSE
+    "hub": "semana-6/sse_hub.py",                                # HubSSE
+}
+# benchmarks que no siguen el patrón semana-*/bench_*.py
+BENCH_EXTRA = {
+    "sync_vs_async": "semana-3/RETO IA #9/benchmark_sync_vs_async.py",
+    "pool_conexiones": "semana-3/RETO IA #10/smart_session.py",
+}
+
+
+def _preparar_rutas() -> None:
+    for carpeta in CARPETAS:
+        ruta = os.path.join(RAIZ, carpeta)
+        if ruta not in sys.path:
+            sys.path.insert(0, ruta)
+
+
+def cargar(ruta: str):
+    """Importa un archivo por ruta (relativa a la raíz); para los RETO IA con nombres repetidos."""
+    import importlib.util
+
+    _preparar_rutas()
+    completa = os.path.join(RAIZ, ruta)
+    nombre = "ecomarket_" + os.path.splitext(ruta)[0].replace("/", "_").replace(" ", "").replace("#", "")
+    if nombre in sys.modules:
+        return sys.modules[nombre]
+    spec = importlib.util.spec_from_file_location(nombre, completa)
+    modulo = importlib.util.module_from_spec(spec)
+    sys.modules[nombre] = modulo
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def _correr(main, duracion: float | None) -> None:
+    """asyncio.run(main()) con corte opcional a los `duracion` segundos."""
+    import asyncio
+
+    async def con_limite():
+        try:
+            await asyncio.wait_for(main(), duracion)
+        except asyncio.TimeoutError:
+            print(f"⏱️ {duracion:g}s cumplidos, saliendo")
+
+    try:
+        asyncio.run(con_limite())
+    except KeyboardInterrupt:
+        pass
+
+
+# --- Subcomandos ---
+
+def cmd_monitor(opciones) -> None:
+    modulo = cargar(MONITORES[opciones.tipo])
+    if opciones.api:
+        if opciones.tipo != "inventario":
+            sys.exit("❌ --api solo aplica a --tipo inventario")
+        modulo.BASE_URL = opciones.api
+    _correr(modulo.main, opciones.duracion)
+
+
+def cmd_sse(opciones) -> None:
+    _correr(cargar(RECEPTORES[opciones.receptor]).main, opciones.duracion)
+
+
+def cmd_sync(opciones) -> None:
+    _preparar_rutas()
+    import cliente_ecomarket as cliente
+
+    if opciones.api:
+        cliente.API_URL = opciones.api
+    if opciones.accion == "listar":
+        productos = cliente.listar_productos(opciones.categoria, opciones.productor)
+    else:
+        productos = cliente.buscar_productos(opciones.nombre)
+    if opciones.json:
+        from codec_json import dumps_bytes
+
+        sys.stdout.buffer.write(dumps_bytes(productos) + b"\n")
+        return
+    print(f"{'ID':>6} | {'Nombre':<40} | {'Categoría':<10} | {'Precio':>9}")
+    print("-" * 74)
+    for p in productos:
+        print(f"{p['id']:>6} | {p['nombre'][:40]:<40} | {p.get('categoria', ''):<10} | {p['precio']:>9.2f}")
+    print(f"\n📦 {len(productos)} producto(s)")
+
+
+def benchmarks() -> dict:
+    """nombre -> ruta relativa de cada benchmark (sin importarlos)."""
+    encontrados = {}
+    for semana in sorted(os.listdir(RAIZ)):
+        carpeta = os.path.join(RAIZ, semana)
+        if not semana.startswith("semana-") or not os.path.isdir(carpeta):
+            continue
+        for archivo in sorted(os.listdir(carpeta)):
+            if archivo.startswith("bench_") and archivo.endswith(".py"):
+                encontrados[archivo[len("bench_"):-3]] = f"{semana}/{archivo}"
+    encontrados.update(BENCH_EXTRA)
+    return encontrados
+
+
+def cmd_bench(opciones) -> None:
+    import runpy
+
+    disponibles = benchmarks()
+    if opciones.lista or not opciones.nombre:
+        for nombre, ruta in disponibles.items():
+            print(f"{nombre:<24} {ruta}")
+        return
+    if opciones.nombre not in disponibles:
+        sys.exit(f"❌ Benchmark '{opciones.nombre}' no existe. Usa: {', '.join(disponibles)}")
+    ruta = os.path.join(RAIZ, disponibles[opciones.nombre])
+    _preparar_rutas()
+    sys.path.insert(0, os.path.dirname(ruta))
+    sys.argv = [ruta, *opciones.args]
+    runpy.run_path(ruta, run_name="__main__")
+
+
+def crear_parser():
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="ecomarket", description=__doc__.splitlines()[1].strip())
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    monitor = sub.add_parser("monitor", help="monitor de inventario por polling")
+    monitor.add_argument("--tipo", choices=MONITORES, default="inventario")
+    monitor.add_argument("--duracion", type=float, default=None, help="segundos antes de salir (cron)")
+    monitor.add_argument("--api", help="BASE_URL de la API (solo --tipo inventario)")
+    monitor.set_defaults(funcion=cmd_monitor)
+
+    sse = sub.add_parser("sse", help="receptor de eventos SSE")
+    sse.add_argument("--receptor", choices=RECEPTORES, default="multiplex")
+    sse.add_argument("--duracion", type=float, default=None, help="segundos antes de salir (cron)")
+    sse.set_defaults(funcion=cmd_sse)
+
+    sync = sub.add_parser("sync", help="cliente síncrono: listar o buscar productos")
+    sync.add_argument("--api", help="API_URL del cliente")
+    sync.add_argument("--json", action="store_true", help="imprime la respuesta como JSON")
+    acciones = sync.add_subparsers(dest="accion", required=True)
+    listar = acciones.add_parser("listar")
+    listar.add_argument("--categoria")
+    listar.add_argument("--productor", type=int)
+    buscar = acciones.add_parser("buscar")
+    buscar.add_argument("nombre")
+    sync.set_defaults(funcion=cmd_sync)
+
+    bench = sub.add_parser("bench", help="corre un benchmark de las semanas")
+    bench.add_argument("--lista", action="store_true", help="muestra los benchmarks disponibles")
+    bench.add_argument("nombre", nargs="?")
+    bench.add_argument("args", nargs=argparse.REMAINDER, help="argumentos para el benchmark")
+    bench.set_defaults(funcion=cmd_bench)
+    return parser
+
+
+def main(argv=None) -> None:
+    opciones = crear_parser().parse_args(argv)
+    opciones.funcion(opciones)
+
+
+if __name__ == "__main__":
+    main()
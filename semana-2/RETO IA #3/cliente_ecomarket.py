@@ -1,5 +1,15 @@
 import requests
-from typing import List, Dict, Any, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Iterable, Union
+# Decodificador rápido (orjson si está instalado, si no la librería estándar)
+from codec_json import loads
+# MessagePack si el servidor lo ofrece, JSON si no (se decide por el Content-Type)
+from negociacion_formato import aceptar, decodificar
+# Cuerpos JSON (comprimidos con gzip/br/zstd si se activó usar_subidas y pasan el umbral)
+from compresion_http import cuerpo_json
+# Write-behind para PATCH repetidos del mismo producto (ver buffer_actualizaciones)
+from buffer_escrituras import BufferEscrituras
+from validadores import CATEGORIAS_VALIDAS
 
 # ============================================================
 # ECO-MARKET API CLIENT (Versión Pythonic & Resiliente)
@@ -21,18 +31,78 @@ class ConflictError(EcoMarketError):
 
 # --- 1. OPERACIONES DE LECTURA ---
 
-def listar_productos() -> List[Dict]:
-    """Obtiene la lista completa de productos."""
-    response = requests.get(f"{API_URL}/productos")
+def listar_productos(categoria: str = None, productor_id: int = None) -> List[Dict]:
+    """Obtiene la lista de productos (completa, o filtrada por categoría y/o productor)."""
+    params = {k: v for k, v in (("categoria", categoria), ("productor_id", productor_id)) if v is not None}
+    response = requests.get(f"{API_URL}/productos", params=params, headers={"Accept": aceptar()})
     response.raise_for_status()
-    return response.json()
+    return decodificar(response.content, response.headers.get("Content-Type"))
+
+# --- 1b. DESCARGA PARTICIONADA DEL CATÁLOGO ---
+# Un solo GET /productos trae y decodifica todo el catálogo en serie. Partido
+# por los filtros que ya acepta la API (categoria o productor_id), cada
+# partición se descarga y decodifica en paralelo y el tiempo total baja casi
+# en proporción al número de particiones en catálogos grandes.
+
+def particiones(por: str = "categoria", productores: Iterable[int] = None) -> List[Dict]:
+    """
+    Filtros que juntos cubren el catálogo: uno por cada CATEGORIAS_VALIDAS, o
+    uno por productor_id (la API filtra por id exacto, así que `productores`
+    debe ser el rango completo de ids, p. ej. range(1, 201)).
+    """
+    if por == "categoria":
+        return [{"categoria": c} for c in CATEGORIAS_VALIDAS]
+    if por == "productor":
+        if productores is None:
+            raise ValueError("Para particionar por productor indica el rango de productor_id")
+        return [{"productor_id": p} for p in productores]
+    raise ValueError(f"Partición '{por}' no válida. Usa 'categoria' o 'productor'")
+
+def fusionar_por_id(partes: Iterable[List[Dict]]) -> List[Dict]:
+    """
+    Une las particiones sin repetir ids. Si un producto aparece en dos (cambió
+    de categoría a media descarga) se queda la primera aparición, en el orden
+    de las particiones.
+    """
+    productos = {}
+    for parte in partes:
+        for producto in parte:
+            productos.setdefault(producto["id"], producto)
+    return list(productos.values())
+
+def listar_productos_particionado(por: str = "categoria", productores: Iterable[int] = None,
+                                  max_hilos: int = 16) -> List[Dict]:
+    """
+    Catálogo completo descargando las particiones en paralelo (hilos: requests
+    suelta el GIL mientras espera la red). Si una partición falla se lanza su
+    error: un catálogo incompleto no debe pasar por completo.
+    """
+    filtros = particiones(por, productores)
+    with ThreadPoolExecutor(max_workers=min(max_hilos, len(filtros))) as pool:
+        return fusionar_por_id(pool.map(lambda params: listar_productos(**params), filtros))
+
+# Réplica local opcional (ver usar_replica): None = cada búsqueda va a la red
+_replica = None
+
+def usar_replica(activar: bool = True, max_edad: float = 30.0):
+    """
+    Activa (o desactiva) la réplica local del catálogo para buscar_productos:
+    se descarga una vez, se valida con ETag cuando tiene más de `max_edad`
+    segundos y las búsquedas se contestan en memoria, ordenadas por relevancia.
+    """
+    global _replica
+    from replica_catalogo import ReplicaCatalogo
+    _replica = ReplicaCatalogo(f"{API_URL}/productos", max_edad=max_edad) if activar else None
+    return _replica
 
 def buscar_productos(nombre: str = "") -> List[Dict]:
-    """Busca productos por coincidencia de nombre usando Query Params."""
+    """Busca productos por coincidencia de nombre usando Query Params (o la réplica local)."""
+    if _replica is not None:
+        return _replica.buscar(nombre)
     params = {"nombre": nombre} if nombre else {}
-    response = requests.get(f"{API_URL}/productos", params=params)
+    response = requests.get(f"{API_URL}/productos", params=params, headers={"Accept": aceptar()})
     response.raise_for_status()
-    return response.json()
+    return decodificar(response.content, response.headers.get("Content-Type"))
 
 # --- 2. OPERACIONES DE ESCRITURA (CRUD) ---
 
@@ -41,42 +111,54 @@ def crear_producto(datos: Dict[str, Any]) -> Dict:
     POST /productos
     Crea un producto. Lanza ConflictError si el SKU o nombre ya existe.
     """
-    headers = {"Content-Type": "application/json"}
-    response = requests.post(f"{API_URL}/productos", json=datos, headers=headers)
+    cuerpo, headers = cuerpo_json(datos)
+    response = requests.post(f"{API_URL}/productos", data=cuerpo, headers=headers)
     
     if response.status_code == 409:
-        raise ConflictError(f"El producto ya existe: {response.json().get('detail', 'Error de conflicto')}")
+        raise ConflictError(f"El producto ya existe: {loads(response.content).get('detail', 'Error de conflicto')}")
     
     response.raise_for_status() # Verifica 201 Created
-    return response.json()
+    return loads(response.content)
 
 def actualizar_producto_total(producto_id: int, datos: Dict[str, Any]) -> Dict:
     """
     PUT /productos/{id}
     Reemplazo total del recurso. Requiere todos los campos en 'datos'.
     """
-    headers = {"Content-Type": "application/json"}
-    response = requests.put(f"{API_URL}/productos/{producto_id}", json=datos, headers=headers)
+    cuerpo, headers = cuerpo_json(datos)
+    response = requests.put(f"{API_URL}/productos/{producto_id}", data=cuerpo, headers=headers)
     
     if response.status_code == 404:
         raise ResourceNotFoundError(f"No se puede actualizar: Producto {producto_id} no existe.")
     
     response.raise_for_status()
-    return response.json()
+    return loads(response.content)
 
 def actualizar_producto_parcial(producto_id: int, campos: Dict[str, Any]) -> Dict:
     """
     PATCH /productos/{id}
     Modificación parcial. Solo envía los campos que deseas cambiar.
     """
-    headers = {"Content-Type": "application/json"}
-    response = requests.patch(f"{API_URL}/productos/{producto_id}", json=campos, headers=headers)
+    cuerpo, headers = cuerpo_json(campos)
+    response = requests.patch(f"{API_URL}/productos/{producto_id}", data=cuerpo, headers=headers)
     
     if response.status_code == 404:
         raise ResourceNotFoundError(f"No se encontró producto {producto_id} para modificar.")
     
     response.raise_for_status()
-    return response.json()
+    return loads(response.content)
+
+def buffer_actualizaciones(max_pendientes: int = 100, max_espera: float = 1.0,
+                           concurrencia: int = 8, al_flush=None) -> BufferEscrituras:
+    """
+    Buffer que junta las llamadas a actualizar_producto_parcial del mismo
+    producto en un solo PATCH (gana el último valor de cada campo):
+
+        with buffer_actualizaciones() as buffer:
+            for producto_id, precio in nuevos_precios:
+                buffer.actualizar(producto_id, {"precio": precio})
+    """
+    return BufferEscrituras(actualizar_producto_parcial, max_pendientes, max_espera, concurrencia, al_flush)
 
 def eliminar_producto(producto_id: int) -> bool:
     """
@@ -0,0 +1,48 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+requests = pytest.importorskip("requests")
+responses = pytest.importorskip("responses")
+
+AQUI = Path(__file__).resolve().parent
+for carpeta in (AQUI, AQUI.parent, AQUI.parent / "RETO IA #4"):
+    if str(carpeta) not in sys.path:
+        sys.path.insert(0, str(carpeta))
+
+from cliente_ecomarket import API_URL, fusionar_por_id, listar_productos_particionado, particiones   # noqa: E402
+from validadores import CATEGORIAS_VALIDAS   # noqa: E402
+
+
+def test_particiones_por_categoria_y_por_productor():
+    assert particiones() == [{"categoria": c} for c in CATEGORIAS_VALIDAS]
+    assert particiones("productor", range(1, 4)) == [{"productor_id": p} for p in (1, 2, 3)]
+    with pytest.raises(ValueError):
+        particiones("productor")
+
+
+def test_fusionar_por_id_conserva_la_primera_aparicion():
+    partes = [[{"id": 1, "categoria": "miel"}], [{"id": 1, "categoria": "frutas"}, {"id": 2}]]
+    assert fusionar_por_id(partes) == [{"id": 1, "categoria": "miel"}, {"id": 2}]
+
+
+@responses.activate
+def test_listar_productos_particionado_une_sin_repetidos():
+    """Una petición por categoría; un id que aparece en dos particiones se queda una vez."""
+    for n, categoria in enumerate(CATEGORIAS_VALIDAS):
+        productos = [{"id": n * 10 + 1, "categoria": categoria}, {"id": 99, "categoria": categoria}]
+        responses.add(responses.GET, f"{API_URL}/productos", json=productos, status=200,
+                      match=[responses.matchers.query_param_matcher({"categoria": categoria})])
+    resultado = listar_productos_particionado()
+    assert len(responses.calls) == len(CATEGORIAS_VALIDAS)
+    assert sorted(p["id"] for p in resultado) == [1, 11, 21, 31, 41, 99]
+
+
+@responses.activate
+def test_listar_productos_particionado_falla_si_falta_una_particion():
+    for productor_id, status in ((1, 200), (2, 500)):
+        responses.add(responses.GET, f"{API_URL}/productos", json=[], status=status,
+                      match=[responses.matchers.query_param_matcher({"productor_id": str(productor_id)})])
+    with pytest.raises(requests.exceptions.HTTPError):
+        listar_productos_particionado(por="productor", productores=[1, 2])
@@ -1,5 +1,11 @@
 import pytest
-from validadores import validar_producto, ValidationError
+from validadores import validar_producto, validar_lista_productos, Producto, ValidationError
+
+PRODUCTO = {
+    "id": 7, "nombre": "Miel de Abeja", "precio": 150.0, "categoria": "miel",
+    "productor": {"id": 3, "nombre": "Apiario Nayarit"}, "disponible": True,
+    "creado_en": "2024-01-15T10:00:00Z",
+}
 
 def test_fallo_campo_requerido():
     """Caso 1: Falta un campo esencial (categoria)"""
@@ -46,4 +52,35 @@ def test_fallo_fecha_invalida():
     }
     with pytest.raises(ValidationError) as excinfo:
         validar_producto(producto_fecha_mal)
-    assert "creado_en no es una fecha ISO 8601 válida" in str(excinfo.value)
\ No newline at end of file
+    assert "creado_en no es una fecha ISO 8601 válida" in str(excinfo.value)
+
+def test_registro_compacto_conserva_api_de_dict():
+    """Caso 6: registro=True da un Producto con __slots__ que sigue hablando dict"""
+    p = validar_producto(dict(PRODUCTO, stock=4), registro=True)
+    assert isinstance(p, Producto) and not hasattr(p, "__dict__")
+    assert p.precio == p["precio"] == 150.0 and p["productor"]["nombre"] == "Apiario Nayarit"
+    assert p.get("descripcion", "-") == "-" and "descripcion" not in p
+    assert p["stock"] == 4 and "stock" in p                # llaves fuera del contrato se conservan
+    assert p == dict(PRODUCTO, stock=4) and p.a_dict() == dict(PRODUCTO, stock=4)
+    # null explícito del servidor: la llave sigue ahí con None, como en el dict
+    con_nulo = dict(PRODUCTO, descripcion=None, productor={"id": 3, "nombre": None})
+    n = validar_producto(con_nulo, registro=True)
+    assert n == con_nulo and "descripcion" in n and n["descripcion"] is None
+    assert set(n) == set(con_nulo) and n["productor"].keys() == ["id", "nombre"]
+    # el resto de la API de dict
+    copia = n.copy()
+    assert copia.pop("descripcion") is None and "descripcion" not in copia and "descripcion" in n
+    assert copia.pop("x", None) is None
+    with pytest.raises(KeyError):
+        copia.pop("x")
+    assert copia.setdefault("disponible", False) is True and copia.setdefault("lote", 9) == 9
+    copia.update({"precio": 99.0}, descripcion="Multiflora")
+    del copia["lote"]
+    assert copia == dict(con_nulo, precio=99.0, descripcion="Multiflora")
+
+def test_lista_comparte_productores_y_valida_igual():
+    """Caso 7: una lista de registros comparte el Productor repetido; los errores no cambian"""
+    productos = validar_lista_productos([dict(PRODUCTO, id=i) for i in range(3)], registro=True)
+    assert productos[0].productor is productos[2].productor
+    with pytest.raises(ValidationError):
+        validar_lista_productos([dict(PRODUCTO, precio=0)], registro=True)
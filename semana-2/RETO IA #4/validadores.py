@@ -1,3 +1,16 @@
+"""
+Validación del contrato de Producto y, opcionalmente, registros compactos.
+
+Un catálogo de 1M productos como dicts (más el dict anidado de `productor`)
+ocupa varios GB. Con registro=True el mismo paso que valida construye un
+Producto con __slots__: sin __dict__ por producto, la categoría apunta a la
+cadena canónica de CATEGORIAS_VALIDAS y los productores repetidos de una
+lista se comparten. Los registros siguen hablando "dict" (p["precio"],
+p.get(...), "campo" in p, items(), pop/update/setdefault/copy, a_dict())
+para el código existente. Un campo que el servidor manda como null sigue
+presente con valor None, igual que en el dict original.
+"""
+
 from datetime import datetime
 from typing import List, Dict, Any
 
@@ -8,7 +21,196 @@ class ValidationError(Exception):
     """Excepción para errores de contrato de datos."""
     pass
 
-def validar_producto(data: Dict[str, Any]) -> Dict:
+
+class _RegistroDict:
+    """
+    API de dict sobre un registro con __slots__. Un campo en None es una
+    llave ausente, salvo que esté en `_nulos` (el servidor lo mandó como
+    null). Las llaves que no son campos van a `_extra`. Los dos solo
+    existen si hacen falta.
+    """
+    __slots__ = ()
+    CAMPOS: tuple = ()
+
+    def __getitem__(self, clave):
+        if clave in self.CAMPOS:
+            valor = getattr(self, clave)
+            if valor is not None or (self._nulos and clave in self._nulos):
+                return valor
+        elif self._extra and clave in self._extra:
+            return self._extra[clave]
+        raise KeyError(clave)
+
+    def __setitem__(self, clave, valor):
+        if clave in self.CAMPOS:
+            setattr(self, clave, valor)
+            if valor is None:
+                self._nulos = (self._nulos or frozenset()) | {clave}
+            elif self._nulos and clave in self._nulos:
+                self._nulos = self._nulos - {clave} or None
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[clave] = valor
+
+    def __delitem__(self, clave):
+        if clave not in self:
+            raise KeyError(clave)
+        if clave in self.CAMPOS:
+            setattr(self, clave, None)
+            if self._nulos and clave in self._nulos:
+                self._nulos = self._nulos - {clave} or None
+        else:
+            del self._extra[clave]
+
+    def pop(self, clave, *defecto):
+        try:
+            valor = self[clave]
+        except KeyError:
+            if defecto:
+                return defecto[0]
+            raise
+        del self[clave]
+        return valor
+
+    def setdefault(self, clave, defecto=None):
+        try:
+            return self[clave]
+        except KeyError:
+            self[clave] = defecto
+            return defecto
+
+    def update(self, otro=(), **campos):
+        pares = otro.items() if hasattr(otro, "keys") else otro
+        for clave, valor in pares:
+            self[clave] = valor
+        for clave, valor in campos.items():
+            self[clave] = valor
+
+    def copy(self):
+        """Copia superficial del mismo tipo (como dict.copy: los anidados se comparten)."""
+        nuevo = object.__new__(type(self))
+        for campo in type(self).__slots__:
+            setattr(nuevo, campo, getattr(self, campo))
+        if nuevo._extra is not None:
+            nuevo._extra = dict(nuevo._extra)
+        return nuevo
+
+    def get(self, clave, defecto=None):
+        try:
+            return self[clave]
+        except KeyError:
+            return defecto
+
+    def __contains__(self, clave):
+        try:
+            self[clave]
+        except KeyError:
+            return False
+        return True
+
+    def keys(self):
+        nulos = self._nulos or ()
+        return [c for c in self.CAMPOS if getattr(self, c) is not None or c in nulos] + list(self._extra or ())
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def values(self):
+        return [self[c] for c in self.keys()]
+
+    def items(self):
+        return [(c, self[c]) for c in self.keys()]
+
+    def a_dict(self) -> Dict:
+        """Copia como dict plano (anidados incluidos), p. ej. para serializar."""
+        return {c: v.a_dict() if isinstance(v, _RegistroDict) else v for c, v in self.items()}
+
+    def __eq__(self, otro):
+        if isinstance(otro, _RegistroDict):
+            otro = otro.a_dict()
+        return self.a_dict() == otro
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.a_dict()!r})"
+
+
+class Productor(_RegistroDict):
+    __slots__ = ("id", "nombre", "_extra", "_nulos")
+    CAMPOS = ("id", "nombre")
+
+    def __init__(self, id, nombre=None, _extra=None, _nulos=None):
+        self.id = id
+        self.nombre = nombre
+        self._extra = _extra
+        self._nulos = _nulos
+
+
+class Producto(_RegistroDict):
+    __slots__ = ("id", "nombre", "precio", "categoria", "descripcion", "productor_id",
+                 "productor", "disponible", "creado_en", "_extra", "_nulos")
+    CAMPOS = ("id", "nombre", "precio", "categoria", "descripcion", "productor_id",
+              "productor", "disponible", "creado_en")
+
+    def __init__(self, id, nombre, precio, categoria, descripcion=None, productor_id=None,
+                 productor=None, disponible=None, creado_en=None, _extra=None, _nulos=None):
+        self.id = id
+        self.nombre = nombre
+        self.precio = precio
+        self.categoria = categoria
+        self.descripcion = descripcion
+        self.productor_id = productor_id
+        self.productor = productor
+        self.disponible = disponible
+        self.creado_en = creado_en
+        self._extra = _extra
+        self._nulos = _nulos
+
+    @classmethod
+    def desde_dict(cls, data: Dict[str, Any], productores: Dict | None = None) -> "Producto":
+        """
+        Arma el registro desde un dict ya validado. `productores` es un caché
+        (id, nombre) -> Productor para compartir los repetidos de una lista
+        (compartidos: modificar uno los modifica en todos sus productos).
+        """
+        extra = None
+        if not data.keys() <= _CAMPOS_PRODUCTO:
+            extra = {k: v for k, v in data.items() if k not in _CAMPOS_PRODUCTO}
+        productor = data.get("productor")
+        if isinstance(productor, dict):
+            if productores is not None and productor.keys() == _CAMPOS_PRODUCTOR:
+                clave = (productor["id"], productor["nombre"])
+                productor = productores.get(clave) or productores.setdefault(
+                    clave, Productor(*clave, _nulos=_nulos(productor, _CAMPOS_PRODUCTOR)))
+            else:
+                productor = Productor(productor.get("id"), productor.get("nombre"),
+                                      {k: v for k, v in productor.items() if k not in _CAMPOS_PRODUCTOR} or None,
+                                      _nulos(productor, _CAMPOS_PRODUCTOR))
+        return cls(
+            data["id"], data["nombre"], data["precio"], _CATEGORIA_CANONICA[data["categoria"]],
+            data.get("descripcion"), data.get("productor_id"), productor,
+            data.get("disponible"), data.get("creado_en"), extra, _nulos(data, _CAMPOS_PRODUCTO),
+        )
+
+
+_CAMPOS_PRODUCTO = frozenset(Producto.CAMPOS)
+_CAMPOS_PRODUCTOR = frozenset(Productor.CAMPOS)
+_CATEGORIA_CANONICA = {c: c for c in CATEGORIAS_VALIDAS}
+
+
+def _nulos(data: Dict, campos: frozenset) -> frozenset | None:
+    """Campos que llegaron como null explícito (lo normal: ninguno, sin costo extra)."""
+    if None not in data.values():
+        return None
+    return frozenset(c for c, v in data.items() if v is None and c in campos) or None
+
+def validar_producto(data: Dict[str, Any], registro: bool = False, _productores: Dict | None = None):
+    """Regresa el mismo dict si es válido, o un Producto compacto con registro=True."""
     if not isinstance(data, dict):
         raise ValidationError("El producto no es un diccionario válido.")
 
@@ -48,9 +250,13 @@ def validar_producto(data: Dict[str, Any]) -> Dict:
     if errores:
         raise ValidationError(" | ".join(errores))
     
+    if registro:
+        return Producto.desde_dict(data, _productores)
     return data
 
-def validar_lista_productos(data: Any) -> List[Dict]:
+def validar_lista_productos(data: Any, registro: bool = False) -> List:
     if not isinstance(data, list):
         raise ValidationError(f"Se esperaba lista, se obtuvo {type(data).__name__}")
-    return [validar_producto(item) for item in data]
\ No newline at end of file
+    # un caché por lista: los productos del mismo productor comparten su registro
+    productores = {} if registro else None
+    return [validar_producto(item, registro, productores) for item in data]
\ No newline at end of file
@@ -0,0 +1,84 @@
+"""
+BENCHMARK: repricing con PATCH directos vs. BufferEscrituras
+
+Simula un job de precios que manda `--rondas` ajustes (precio y a veces
+stock) a cada uno de `--productos` productos, como hacen hoy los jobs: un
+actualizar_producto_parcial por ajuste. El "servidor" tarda `--latencia`
+por PATCH. Compara contra el mismo job pasando por BufferEscrituras y
+verifica que el estado final del servidor sea idéntico.
+
+Uso: python bench_buffer_escrituras.py [--productos 200] [--rondas 10] [--latencia 0.005]
+                                      [--concurrencia 8] [--max-pendientes 1000]
+"""
+
+import argparse
+import random
+import threading
+import time
+
+from buffer_escrituras import BufferEscrituras
+
+
+class ServidorSimulado:
+    def __init__(self, latencia: float):
+        self.latencia = latencia
+        self.patches = 0
+        self.estado: dict = {}
+        self._candado = threading.Lock()
+
+    def patch(self, producto_id, campos):
+        time.sleep(self.latencia)
+        with self._candado:
+            self.patches += 1
+            self.estado.setdefault(producto_id, {}).update(campos)
+        return campos
+
+
+def ajustes(productos: int, rondas: int) -> list[tuple]:
+    azar = random.Random(7)
+    lista = []
+    for ronda in range(rondas):
+        for producto_id in range(productos):
+            campos = {"precio": round(azar.uniform(10, 500), 2)}
+            if azar.random() < 0.3:
+                campos["stock"] = azar.randint(0, 100)
+            lista.append((producto_id, campos))
+    return lista
+
+
+def main():
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    args.add_argument("--productos", type=int, default=200)
+    args.add_argument("--rondas", type=int, default=10)
+    args.add_argument("--latencia", type=float, default=0.005, help="segundos por PATCH")
+    args.add_argument("--concurrencia", type=int, default=8)
+    args.add_argument("--max-pendientes", type=int, default=1000)
+    opciones = args.parse_args()
+    trabajo = ajustes(opciones.productos, opciones.rondas)
+    print(f"🧪 {len(trabajo):,} ajustes sobre {opciones.productos} productos, "
+          f"{opciones.latencia * 1000:.0f} ms por PATCH\n")
+
+    directo = ServidorSimulado(opciones.latencia)
+    inicio = time.perf_counter()
+    for producto_id, campos in trabajo:
+        directo.patch(producto_id, campos)
+    t_directo = time.perf_counter() - inicio
+
+    con_buffer = ServidorSimulado(opciones.latencia)
+    inicio = time.perf_counter()
+    with BufferEscrituras(con_buffer.patch, max_pendientes=opciones.max_pendientes,
+                          concurrencia=opciones.concurrencia) as buffer:
+        for producto_id, campos in trabajo:
+            buffer.actualizar(producto_id, campos)
+    t_buffer = time.perf_counter() - inicio
+
+    print(f"{'Estrategia':<22} | {'PATCH':>7} | {'Tiempo':>8} | {'Mismo estado':>12}")
+    print("-" * 60)
+    print(f"{'Directo (uno por uno)':<22} | {directo.patches:>7,} | {t_directo:>7.2f}s | {'-':>12}")
+    print(f"{'BufferEscrituras':<22} | {con_buffer.patches:>7,} | {t_buffer:>7.2f}s | "
+          f"{'sí' if con_buffer.estado == directo.estado else 'NO':>12}")
+    print(f"\n📊 {buffer.metricas()}")
+
+
+if __name__ == "__main__":
+    main()
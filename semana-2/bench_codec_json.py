@@ -0,0 +1,95 @@
+"""
+BENCHMARK: codec_json (orjson / estándar) sobre payloads SSE de EcoMarket
+
+Mide eventos/s decodificando la mezcla típica de una tormenta de stock
+(precio-actualizado y stock-critico) con:
+  - json.loads de la librería estándar (lo que hacían los receptores)
+  - codec_json.loads con orjson (si está instalado)
+  - JSONPerezoso: solo se decodifican los eventos que un handler lee
+    (aquí, un módulo de compras que solo atiende stock-critico)
+
+Uso: python bench_codec_json.py [--eventos 500000] [--stock 0.2]
+"""
+
+import argparse
+import json
+import random
+import time
+
+import codec_json
+from codec_json import JSONPerezoso
+
+
+def generar_payloads(n: int, proporcion_stock: float) -> list[tuple[str, str]]:
+    azar = random.Random(7)
+    eventos = []
+    for i in range(n):
+        if azar.random() < proporcion_stock:
+            cuerpo = {
+                "producto_id": f"B{i % 997}", "nombre": "Miel orgánica 500g", "almacen": "Tepic-Centro",
+                "stock_actual": azar.randint(0, 5), "stock_minimo": 10, "status": "BAJO_MINIMO",
+            }
+            eventos.append(("stock-critico", json.dumps(cuerpo)))
+        else:
+            anterior = round(azar.uniform(20, 500), 2)
+            cuerpo = {
+                "producto_id": f"A{i % 997}", "precio_anterior": anterior,
+                "precio_nuevo": round(anterior * azar.uniform(0.9, 1.1), 2),
+                "moneda": "MXN", "timestamp": "2026-03-27T15:00:00Z",
+            }
+            eventos.append(("precio-actualizado", json.dumps(cuerpo)))
+    return eventos
+
+
+def decodificar_todo(eventos, loads) -> int:
+    total = 0
+    for _, crudo in eventos:
+        total += len(loads(crudo))
+    return total
+
+
+def decodificar_perezoso(eventos) -> int:
+    # Solo el handler de stock-critico lee el payload; los demás eventos se ignoran
+    total = 0
+    for tipo, crudo in eventos:
+        data = JSONPerezoso(crudo)
+        if tipo == "stock-critico":
+            total += data["stock_actual"] >= 0
+    return total
+
+
+def medir(nombre, funcion, *args):
+    inicio = time.perf_counter()
+    funcion(*args)
+    duracion = time.perf_counter() - inicio
+    return nombre, duracion, len(args[0]) / duracion
+
+
+def main():
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    args.add_argument("--eventos", type=int, default=500_000)
+    args.add_argument("--stock", type=float, default=0.2, help="proporción de stock-critico")
+    opciones = args.parse_args()
+
+    eventos = generar_payloads(opciones.eventos, opciones.stock)
+    print(f"🧪 {opciones.eventos:,} payloads ({opciones.stock:.0%} stock-critico)\n")
+
+    resultados = [medir("json.loads (estándar)", decodificar_todo, eventos, json.loads)]
+    if codec_json.orjson is not None:
+        codec_json.usar("orjson")
+        resultados.append(medir("codec_json (orjson)", decodificar_todo, eventos, codec_json.loads))
+        resultados.append(medir("JSONPerezoso (orjson)", decodificar_perezoso, eventos))
+    else:
+        print("⚠️ orjson no instalado: solo se compara la librería estándar.\n")
+    codec_json.usar("json")
+    resultados.append(medir("JSONPerezoso (estándar)", decodificar_perezoso, eventos))
+
+    base = resultados[0][2]
+    print(f"{'Decodificador':<26} | {'Tiempo':>8} | {'Eventos/s':>12} | {'Relativo':>8}")
+    print("-" * 64)
+    for nombre, duracion, por_segundo in resultados:
+        print(f"{nombre:<26} | {duracion:>7.2f}s | {por_segundo:>12,.0f} | {por_segundo / base:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
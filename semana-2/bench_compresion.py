@@ -0,0 +1,80 @@
+"""
+BENCHMARK: compresión de cuerpos JSON del catálogo por enlaces lentos
+
+Arma un catálogo realista (nombre, descripción, productor anidado, fechas)
+y, para cada códec disponible (gzip siempre; br y zstd si están instalados)
+en varios niveles, mide:
+  - tamaño y razón de compresión
+  - CPU de comprimir (lo que paga la tienda al subir) y de descomprimir por
+    bloques de 64 KB (lo que paga quien recibe)
+  - tiempo total estimado = comprimir + transferir + descomprimir para cada
+    enlace de `--enlaces` Mbps (subida de una tienda: 1-20 Mbps)
+
+Uso: python bench_compresion.py [--productos 20000] [--enlaces 1,5,20]
+"""
+
+import argparse
+import random
+import time
+
+from codec_json import dumps_bytes
+from compresion_http import comprimir, descomprimir, disponibles
+
+NIVELES = {"gzip": (1, 6, 9), "br": (1, 5, 9), "zstd": (1, 3, 10)}
+PALABRAS = ("orgánico", "artesanal", "de temporada", "sin conservadores", "cosecha local",
+            "empaque reciclable", "productor certificado", "libre de pesticidas")
+
+
+def catalogo(n: int) -> bytes:
+    azar = random.Random(7)
+    categorias = ["frutas", "verduras", "lacteos", "miel", "conservas"]
+    return dumps_bytes([
+        {"id": i, "nombre": f"{azar.choice(['Miel', 'Queso', 'Café', 'Mermelada'])} {i}",
+         "descripcion": " ".join(azar.sample(PALABRAS, 4)).capitalize() + ".",
+         "precio": round(azar.uniform(10, 500), 2), "categoria": azar.choice(categorias),
+         "productor": {"id": azar.randint(1, 300), "nombre": f"Productor {azar.randint(1, 300)}"},
+         "disponible": azar.random() > 0.1, "creado_en": f"2024-0{azar.randint(1, 9)}-1{azar.randint(0, 9)}T10:00:00Z"}
+        for i in range(1, n + 1)
+    ])
+
+
+def medir(datos: bytes, codificacion: str, nivel: int) -> tuple:
+    inicio = time.perf_counter()
+    comprimido = comprimir(datos, codificacion, nivel)
+    t_comprimir = time.perf_counter() - inicio
+    bloques = [comprimido[i:i + 65536] for i in range(0, len(comprimido), 65536)]
+    inicio = time.perf_counter()
+    plano = b"".join(descomprimir(bloques, codificacion))
+    t_descomprimir = time.perf_counter() - inicio
+    assert plano == datos
+    return len(comprimido), t_comprimir, t_descomprimir
+
+
+def main():
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    args.add_argument("--productos", type=int, default=20_000)
+    args.add_argument("--enlaces", default="1,5,20", help="Mbps separados por coma")
+    opciones = args.parse_args()
+    enlaces = [float(m) for m in opciones.enlaces.split(",")]
+
+    datos = catalogo(opciones.productos)
+    print(f"🧪 {opciones.productos:,} productos = {len(datos) / 1e6:.2f} MB de JSON; "
+          f"códecs disponibles: {', '.join(disponibles())}\n")
+    titulos = "".join(f" | {f'{m:g} Mbps':>9}" for m in enlaces)
+    print(f"{'Códec':<10} | {'Tamaño':>9} | {'Razón':>6} | {'Comprimir':>9} | {'Descomp.':>9}{titulos}")
+    print("-" * (54 + 12 * len(enlaces)))
+
+    filas = [("ninguno", len(datos), 0.0, 0.0)]
+    for codificacion in disponibles():
+        for nivel in NIVELES[codificacion]:
+            filas.append((f"{codificacion}-{nivel}", *medir(datos, codificacion, nivel)))
+    for nombre, tamano, t_comprimir, t_descomprimir in filas:
+        totales = "".join(
+            f" | {t_comprimir + tamano * 8 / (m * 1e6) + t_descomprimir:>8.2f}s" for m in enlaces
+        )
+        print(f"{nombre:<10} | {tamano / 1e6:>7.2f}MB | {len(datos) / tamano:>5.1f}x | "
+              f"{t_comprimir * 1000:>7.0f}ms | {t_descomprimir * 1000:>7.0f}ms{totales}")
+
+
+if __name__ == "__main__":
+    main()
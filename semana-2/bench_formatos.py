@@ -0,0 +1,66 @@
+"""
+BENCHMARK: MessagePack vs. JSON para /productos y /inventario
+
+Levanta ServidorFormatos con un catálogo sintético y pide cada recurso con
+Accept de JSON y de MessagePack. Reporta los bytes en el cable (lo que el
+servidor mandó de verdad, ya negociado) y el tiempo de decodificar la
+respuesta con decodificar(), como lo hacen los clientes. JSON se mide con
+la librería estándar y con orjson (si está instalado); si msgpack no está
+instalado, el servidor contesta JSON y así se reporta (fallback).
+
+Uso: python bench_formatos.py [--productos 50000] [--repeticiones 5]
+"""
+
+import argparse
+import time
+import urllib.request
+
+import codec_json
+import negociacion_formato
+from negociacion_formato import MIME_JSON, MIME_MSGPACK, decodificar
+from servidor_formatos import ServidorFormatos, catalogo_sintetico
+
+
+def pedir(url: str, accept: str) -> tuple[bytes, str]:
+    peticion = urllib.request.Request(url, headers={"Accept": accept})
+    with urllib.request.urlopen(peticion) as respuesta:
+        return respuesta.read(), respuesta.headers.get("Content-Type")
+
+
+def main():
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    args.add_argument("--productos", type=int, default=50_000)
+    args.add_argument("--repeticiones", type=int, default=5)
+    opciones = args.parse_args()
+
+    servidor = ServidorFormatos(*catalogo_sintetico(opciones.productos))
+    base = f"http://127.0.0.1:{servidor.iniciar()}/api"
+    print(f"🧪 {opciones.productos:,} productos; msgpack "
+          f"{'instalado' if negociacion_formato.msgpack else 'NO instalado (se negocia JSON)'}\n")
+
+    escenarios = [("JSON (json)", MIME_JSON, "json")]
+    if codec_json.orjson is not None:
+        escenarios.append(("JSON (orjson)", MIME_JSON, "orjson"))
+    escenarios.append(("MessagePack", f"{MIME_MSGPACK}, {MIME_JSON};q=0.9", None))
+
+    print(f"{'Recurso':<13} | {'Formato pedido':<14} | {'Recibido':<20} | {'Bytes':>10} | {'Decodificar':>11}")
+    print("-" * 82)
+    anterior = codec_json.BACKEND
+    try:
+        for recurso in ("productos", "v1/inventario"):
+            for nombre, accept, backend in escenarios:
+                codec_json.usar(backend or anterior)
+                cuerpo, tipo = pedir(f"{base}/{recurso}", accept)
+                inicio = time.perf_counter()
+                for _ in range(opciones.repeticiones):
+                    decodificar(cuerpo, tipo)
+                decodificar_ms = (time.perf_counter() - inicio) / opciones.repeticiones * 1000
+                print(f"{recurso:<13} | {nombre:<14} | {tipo:<20} | {len(cuerpo):>10,} | {decodificar_ms:>9.1f}ms")
+    finally:
+        codec_json.usar(anterior)
+        servidor.detener()
+    print(f"\n📊 Bytes enviados por formato: {servidor.bytes_enviados}")
+
+
+if __name__ == "__main__":
+    main()
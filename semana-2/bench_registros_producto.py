@@ -0,0 +1,81 @@
+"""
+BENCHMARK: catálogo como dicts vs. registros compactos (Producto con __slots__)
+
+Decodifica un catálogo sintético en JSON y lo valida de dos formas:
+  - validar_lista_productos(datos):                dicts (lo de siempre)
+  - validar_lista_productos(datos, registro=True): Producto/Productor compactos
+Reporta la memoria que queda retenida (tracemalloc, tras soltar el JSON
+crudo), el tiempo de decodificar y validar y el de leer `precio` de todo el catálogo con
+p["precio"] y con p.precio. La última columna extrapola a 1M de productos.
+
+Uso: python bench_registros_producto.py [--productos 200000] [--productores 500]
+"""
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "RETO IA #4"))
+
+from codec_json import dumps_bytes, loads                      # noqa: E402
+from validadores import CATEGORIAS_VALIDAS, validar_lista_productos  # noqa: E402
+
+
+def catalogo_json(n: int, productores: int) -> bytes:
+    return dumps_bytes([
+        {"id": i, "nombre": f"Producto orgánico {i}", "precio": round(10 + i % 500 * 0.37, 2),
+         "categoria": CATEGORIAS_VALIDAS[i % len(CATEGORIAS_VALIDAS)],
+         "productor": {"id": 1 + i % productores, "nombre": f"Productor {1 + i % productores}"},
+         "disponible": i % 7 != 0, "creado_en": "2024-01-15T10:00:00Z"}
+        for i in range(1, n + 1)
+    ])
+
+
+def medir(crudo: bytes, registro: bool) -> tuple:
+    # tiempo sin tracemalloc (lo frena); la memoria en una segunda pasada
+    inicio = time.perf_counter()
+    validar_lista_productos(loads(crudo), registro=registro)
+    validar = time.perf_counter() - inicio
+    gc.collect()
+    tracemalloc.start()
+    productos = validar_lista_productos(loads(crudo), registro=registro)
+    gc.collect()
+    memoria = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    inicio = time.perf_counter()
+    sum(p["precio"] for p in productos)
+    por_llave = time.perf_counter() - inicio
+    por_atributo = None
+    if registro:
+        inicio = time.perf_counter()
+        sum(p.precio for p in productos)
+        por_atributo = time.perf_counter() - inicio
+    return memoria, validar, por_llave, por_atributo
+
+
+def main():
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    args.add_argument("--productos", type=int, default=200_000)
+    args.add_argument("--productores", type=int, default=500)
+    opciones = args.parse_args()
+
+    crudo = catalogo_json(opciones.productos, opciones.productores)
+    print(f"🧪 {opciones.productos:,} productos ({len(crudo) / 1e6:.1f} MB de JSON), "
+          f"{opciones.productores} productores\n")
+    columna = "p['precio']"
+    print(f"{'Representación':<16} | {'Memoria':>9} | {'Validar':>8} | {columna:>11} | "
+          f"{'p.precio':>9} | {'Por 1M':>8}")
+    print("-" * 78)
+    for nombre, registro in (("dict", False), ("Producto", True)):
+        memoria, validar, por_llave, por_atributo = medir(crudo, registro)
+        atributo = f"{por_atributo * 1000:>7.1f}ms" if por_atributo is not None else f"{'-':>9}"
+        print(f"{nombre:<16} | {memoria / 1e6:>7.1f}MB | {validar:>7.2f}s | {por_llave * 1000:>9.1f}ms | "
+              f"{atributo} | {memoria / opciones.productos * 1e6 / 1e9:>6.2f}GB")
+
+
+if __name__ == "__main__":
+    main()
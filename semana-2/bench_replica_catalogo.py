@@ -0,0 +1,67 @@
+"""
+BENCHMARK: búsqueda en la réplica local del catálogo (por tecla)
+
+Arma un catálogo sintético de N productos con nombres realistas
+("Miel de Abeja Orgánica 123"), construye el IndiceBusqueda y simula a un
+usuario escribiendo consultas letra por letra ("m", "mi", "mie", ...), con
+y sin acentos y con un error de dedo. Reporta el tiempo de construcción y la
+latencia por búsqueda (p50/p99 en microsegundos), para comparar con el viaje
+de red de GET /productos?nombre=... que hacía cada tecla.
+
+Uso: python bench_replica_catalogo.py [--productos 50000] [--limite 20]
+"""
+
+import argparse
+import random
+import time
+
+from replica_catalogo import IndiceBusqueda
+
+BASES = ["Miel", "Manzana", "Mermelada", "Café", "Jabón", "Queso", "Leche", "Aguacate",
+         "Jitomate", "Nopal", "Chile", "Frijol", "Tortilla", "Cajeta", "Mezcal", "Vainilla"]
+DETALLES = ["de Abeja", "de Agave", "Orgánica", "Roja", "Artesanal", "de Cabra", "Ahumado",
+            "de Nayarit", "de Oaxaca", "Criollo", "Fresca", "Deshidratada", "en Almíbar"]
+CONSULTAS = ["miel de abeja", "MANZANA roja", "cafe organico", "mermelada en almibar", "mezcla"]
+
+
+def catalogo(n: int, azar: random.Random) -> list[tuple[int, str]]:
+    return [(i, f"{azar.choice(BASES)} {azar.choice(DETALLES)} {azar.choice(DETALLES)} {i}")
+            for i in range(1, n + 1)]
+
+
+def main():
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    args.add_argument("--productos", type=int, default=50_000)
+    args.add_argument("--limite", type=int, default=20)
+    opciones = args.parse_args()
+
+    productos = catalogo(opciones.productos, random.Random(7))
+    nombres = dict(productos)
+    indice = IndiceBusqueda()
+    inicio = time.perf_counter()
+    for producto_id, nombre in productos:
+        indice.agregar(producto_id, nombre)
+    construccion = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    indice.buscar("a")                         # la primera búsqueda arma el orden por largo
+    print(f"🧪 {opciones.productos:,} productos indexados en {construccion:.2f}s "
+          f"(+{(time.perf_counter() - inicio) * 1000:.0f} ms la primera búsqueda)\n")
+
+    print(f"{'Consulta (tecla a tecla)':<26} | {'Búsquedas':>9} | {'p50 µs':>8} | {'p99 µs':>8} | {'Top 1'}")
+    print("-" * 90)
+    for consulta in CONSULTAS:
+        tiempos = []
+        for largo in range(1, len(consulta) + 1):
+            parcial = consulta[:largo]
+            for _ in range(20):
+                inicio = time.perf_counter()
+                ids = indice.buscar(parcial, opciones.limite)
+                tiempos.append(time.perf_counter() - inicio)
+        tiempos.sort()
+        top = nombres[ids[0]] if ids else "-"
+        print(f"{consulta:<26} | {len(tiempos):>9} | {tiempos[len(tiempos) // 2] * 1e6:>8.0f} | "
+              f"{tiempos[int(len(tiempos) * 0.99)] * 1e6:>8.0f} | {top}")
+
+
+if __name__ == "__main__":
+    main()
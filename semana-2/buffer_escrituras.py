@@ -0,0 +1,221 @@
+"""
+BUFFER DE ESCRITURAS (WRITE-BEHIND) PARA PATCH — EcoMarket
+
+Problema: los jobs de precios llaman actualizar_producto_parcial(id, campos)
+muchas veces para el mismo producto en pocos segundos, y cada llamada es un
+PATCH propio. En un repricing masivo el servidor recibe decenas de PATCH por
+producto cuando solo importa el último valor de cada campo.
+
+DECISIONES DE DISEÑO:
+1. FUSIÓN POR PRODUCTO: las actualizaciones pendientes se guardan en un
+   dict id -> campos; una nueva actualización hace campos.update(nuevos),
+   así que gana la última escritura de CADA campo ({"precio": 10} seguido
+   de {"stock": 3} y {"precio": 12} se manda como {"precio": 12, "stock": 3}).
+
+2. TRES DISPAROS DE FLUSH: al juntar `max_pendientes` productos distintos,
+   `max_espera` segundos después de la primera actualización pendiente, o con
+   flush() explícito (y siempre al cerrar / salir del `with`).
+
+3. ENVÍO CONCURRENTE CON LÍMITE: un flush manda sus PATCH en paralelo con
+   hasta `concurrencia` en vuelo (hilos en la versión síncrona, semáforo en
+   la async). Los flush se serializan entre sí: un producto nunca tiene dos
+   PATCH en vuelo, así que el servidor los recibe en orden.
+
+4. REPORTE POR ITEM: flush() regresa un ResultadoEscritura por producto (ok,
+   respuesta o error, cuántas llamadas se fusionaron); los flush automáticos
+   lo entregan a `al_flush`. Un fallo no detiene a los demás ni se reintenta
+   solo: el reporte trae los campos para que el llamador decida.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict
+
+
+@dataclass
+class ResultadoEscritura:
+    producto_id: Any
+    campos: Dict
+    fusionadas: int               # llamadas a actualizar() que viajaron en este PATCH
+    respuesta: Any = None
+    error: Exception | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class _Pendientes:
+    """Parte común: fusión por producto y métricas."""
+
+    def __init__(self, max_pendientes: int, max_espera: float, concurrencia: int, al_flush: Callable | None):
+        if max_pendientes < 1 or concurrencia < 1:
+            raise ValueError("max_pendientes y concurrencia deben ser al menos 1")
+        self.max_pendientes = max_pendientes
+        self.max_espera = max_espera
+        self.concurrencia = concurrencia
+        self.al_flush = al_flush            # recibe el reporte de CADA flush (también los automáticos)
+        self._campos: dict = {}           # id -> campos fusionados (en orden de llegada)
+        self._llamadas: dict = {}         # id -> cuántas actualizaciones se fusionaron
+
+        self.recibidas = 0
+        self.enviadas = 0                 # PATCH realmente mandados
+        self.fallidas = 0
+        self.flushes = 0
+
+    def __len__(self):
+        return len(self._campos)
+
+    def _fusionar(self, producto_id, campos: Dict) -> bool:
+        """Guarda la actualización. Regresa True si ya toca flush por tamaño."""
+        self.recibidas += 1
+        if producto_id in self._campos:
+            self._campos[producto_id].update(campos)
+            self._llamadas[producto_id] += 1
+        else:
+            self._campos[producto_id] = dict(campos)
+            self._llamadas[producto_id] = 1
+        return len(self._campos) >= self.max_pendientes
+
+    def _tomar(self) -> list[tuple]:
+        lote = [(i, campos, self._llamadas[i]) for i, campos in self._campos.items()]
+        self._campos, self._llamadas = {}, {}
+        return lote
+
+    def _contar(self, resultados: list[ResultadoEscritura]) -> None:
+        self.flushes += 1
+        self.enviadas += len(resultados)
+        self.fallidas += sum(not r.ok for r in resultados)
+        if self.al_flush is not None:
+            self.al_flush(resultados)
+
+    def metricas(self) -> dict:
+        return {
+            "recibidas": self.recibidas,
+            "enviadas": self.enviadas,
+            "ahorradas": self.recibidas - sum(self._llamadas.values()) - self.enviadas,
+            "fallidas": self.fallidas,
+            "flushes": self.flushes,
+            "pendientes": len(self._campos),
+        }
+
+
+class BufferEscrituras(_Pendientes):
+    """
+    Versión síncrona (cliente_ecomarket, requests). `enviar(producto_id, campos)`
+    es quien hace el PATCH, p. ej. actualizar_producto_parcial. Un hilo
+    temporizador hace el flush por tiempo.
+    """
+
+    def __init__(self, enviar: Callable[[Any, Dict], Any], max_pendientes: int = 100,
+                 max_espera: float = 1.0, concurrencia: int = 8, al_flush: Callable | None = None):
+        super().__init__(max_pendientes, max_espera, concurrencia, al_flush)
+        self.enviar = enviar
+        self._candado = threading.Lock()          # protege los pendientes
+        self._candado_flush = threading.Lock()    # un flush a la vez (orden por producto)
+        self._temporizador: threading.Timer | None = None
+        self._pool = ThreadPoolExecutor(max_workers=concurrencia)
+
+    def actualizar(self, producto_id, campos: Dict) -> None:
+        """Encola un PATCH parcial. Si el buffer se llenó, hace el flush aquí mismo."""
+        with self._candado:
+            lleno = self._fusionar(producto_id, campos)
+            if self._temporizador is None and not lleno:
+                self._temporizador = threading.Timer(self.max_espera, self.flush)
+                self._temporizador.daemon = True
+                self._temporizador.start()
+        if lleno:
+            self.flush()
+
+    def flush(self) -> list[ResultadoEscritura]:
+        """Manda todo lo pendiente (en paralelo, con límite) y regresa el reporte por producto."""
+        with self._candado_flush:
+            with self._candado:
+                if self._temporizador is not None:
+                    self._temporizador.cancel()
+                    self._temporizador = None
+                lote = self._tomar()
+            if not lote:
+                return []
+            resultados = list(self._pool.map(self._enviar_uno, lote))
+            self._contar(resultados)
+            return resultados
+
+    def _enviar_uno(self, item: tuple) -> ResultadoEscritura:
+        producto_id, campos, fusionadas = item
+        try:
+            return ResultadoEscritura(producto_id, campos, fusionadas, respuesta=self.enviar(producto_id, campos))
+        except Exception as e:
+            return ResultadoEscritura(producto_id, campos, fusionadas, error=e)
+
+    def cerrar(self) -> list[ResultadoEscritura]:
+        resultados = self.flush()
+        self._pool.shutdown(wait=True)
+        return resultados
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+class BufferEscriturasAsync(_Pendientes):
+    """
+    Versión asyncio (cliente_async_ecomarket). `enviar` es una corrutina,
+    p. ej. lambda i, c: actualizar_producto_parcial(session, i, c). El flush
+    por tiempo lo hace una tarea del loop.
+    """
+
+    def __init__(self, enviar: Callable[[Any, Dict], Any], max_pendientes: int = 100,
+                 max_espera: float = 1.0, concurrencia: int = 8, al_flush: Callable | None = None):
+        super().__init__(max_pendientes, max_espera, concurrencia, al_flush)
+        self.enviar = enviar
+        self._candado_flush = asyncio.Lock()
+        self._temporizador: asyncio.Task | None = None
+
+    async def actualizar(self, producto_id, campos: Dict) -> None:
+        """Encola un PATCH parcial. Si el buffer se llenó, espera el flush (back-pressure)."""
+        if self._fusionar(producto_id, campos):
+            await self.flush()
+        elif self._temporizador is None:
+            self._temporizador = asyncio.create_task(self._flush_programado())
+
+    async def _flush_programado(self):
+        await asyncio.sleep(self.max_espera)
+        self._temporizador = None        # ya no se cancela: el flush corre completo
+        await self.flush()
+
+    async def flush(self) -> list[ResultadoEscritura]:
+        """Manda todo lo pendiente (en paralelo, con límite) y regresa el reporte por producto."""
+        async with self._candado_flush:
+            if self._temporizador is not None:
+                self._temporizador.cancel()
+            self._temporizador = None
+            lote = self._tomar()
+            if not lote:
+                return []
+            sem = asyncio.Semaphore(self.concurrencia)
+
+            async def enviar_uno(producto_id, campos, fusionadas):
+                async with sem:
+                    try:
+                        respuesta = await self.enviar(producto_id, campos)
+                        return ResultadoEscritura(producto_id, campos, fusionadas, respuesta=respuesta)
+                    except Exception as e:
+                        return ResultadoEscritura(producto_id, campos, fusionadas, error=e)
+
+            resultados = await asyncio.gather(*(enviar_uno(*item) for item in lote))
+            self._contar(resultados)
+            return resultados
+
+    async def cerrar(self) -> list[ResultadoEscritura]:
+        return await self.flush()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.cerrar()
@@ -0,0 +1,154 @@
+"""
+CODEC JSON INTERCAMBIABLE — EcoMarket
+
+Problema: cada receptor SSE hace json.loads por evento (_procesar_evento,
+_procesar_bloque, _dispatch) y los clientes usan response.json(). En una
+tormenta de cambios de stock, decodificar JSON es lo que más CPU consume.
+
+DECISIONES DE DISEÑO:
+1. BACKEND OPCIONAL: Si orjson está instalado se usa (varias veces más
+   rápido y acepta bytes directo, sin decodificar a str antes). Si no, se
+   cae a la librería estándar sin que nadie cambie su código. La variable
+   de entorno ECOMARKET_JSON=json fuerza la estándar (útil para comparar).
+
+2. MISMA INTERFAZ QUE json: loads() y dumps() regresan/aceptan lo mismo que
+   la estándar (dumps regresa str) y los errores de decodificación siguen
+   siendo ValueError, así que los `except` existentes no cambian.
+
+3. DECODIFICACIÓN PEREZOSA: JSONPerezoso envuelve el texto crudo de un
+   evento y solo lo decodifica la primera vez que un handler lee un campo.
+   Si el router no tiene handler para ese evento (o el predicado no pide el
+   payload), el JSON nunca se decodifica.
+
+4. REGISTROS COMPACTOS: los objetos con a_dict() (Producto de validadores)
+   se serializan como su dict, así que se pueden mandar tal cual.
+"""
+
+import json
+import os
+
+try:
+    import orjson
+except ImportError:  # backend opcional
+    orjson = None
+
+BACKENDS = ("orjson", "json")
+
+
+def _elegir() -> str:
+    preferido = os.environ.get("ECOMARKET_JSON", "").lower()
+    if preferido == "json" or orjson is None:
+        return "json"
+    return "orjson"
+
+
+BACKEND = _elegir()
+_loads = json.loads
+_dumps_rapido = None
+
+
+def usar(backend: str) -> None:
+    """Cambia el backend en caliente ("orjson" o "json"), p. ej. para comparar."""
+    global BACKEND, _loads, _dumps_rapido
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend '{backend}' no válido. Usa uno de {BACKENDS}")
+    if backend == "orjson" and orjson is None:
+        raise ValueError("orjson no está instalado (pip install orjson)")
+    BACKEND = backend
+    if backend == "orjson":
+        _loads, _dumps_rapido = orjson.loads, orjson.dumps
+    else:
+        _loads, _dumps_rapido = json.loads, None
+
+
+def loads(datos):
+    """Decodifica str o bytes (mismo contrato que json.loads)."""
+    return _loads(datos)
+
+
+def _como_dict(obj):
+    if hasattr(obj, "a_dict"):
+        return obj.a_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj) -> str:
+    """Serializa a str compacto (mismo contrato que json.dumps)."""
+    if _dumps_rapido is not None:
+        return dumps_bytes(obj).decode("utf-8")
+    return json.dumps(obj, default=_como_dict)
+
+
+def dumps_bytes(obj) -> bytes:
+    """Serializa directo a bytes UTF-8 (cuerpos HTTP, archivos)."""
+    if _dumps_rapido is not None:
+        try:
+            return _dumps_rapido(obj, default=_como_dict)
+        except TypeError:
+            pass   # tipos que orjson no acepta (p. ej. llaves no-str): la estándar decide
+    return json.dumps(obj, ensure_ascii=False, default=_como_dict).encode("utf-8")
+
+
+usar(BACKEND)
+
+
+_SIN_DECODIFICAR = object()
+
+
+class JSONPerezoso:
+    """
+    Payload de un evento que se decodifica en el primer acceso.
+
+    Se comporta como el dict decodificado para lo que usan los handlers
+    (data["campo"], data.get(...), "campo" in data, iteración); `valor` da el
+    objeto completo (lista, número...). Un JSON inválido lanza ValueError en
+    ese primer acceso, dentro del handler que lo pidió.
+    """
+    __slots__ = ("crudo", "_valor")
+
+    def __init__(self, crudo):
+        self.crudo = crudo
+        self._valor = _SIN_DECODIFICAR
+
+    @property
+    def decodificado(self) -> bool:
+        return self._valor is not _SIN_DECODIFICAR
+
+    @property
+    def valor(self):
+        if self._valor is _SIN_DECODIFICAR:
+            self._valor = loads(self.crudo)
+        return self._valor
+
+    def __getitem__(self, clave):
+        return self.valor[clave]
+
+    def get(self, clave, defecto=None):
+        return self.valor.get(clave, defecto)
+
+    def __contains__(self, clave):
+        return clave in self.valor
+
+    def __iter__(self):
+        return iter(self.valor)
+
+    def __len__(self):
+        return len(self.valor)
+
+    def keys(self):
+        return self.valor.keys()
+
+    def items(self):
+        return self.valor.items()
+
+    def __eq__(self, otro):
+        if isinstance(otro, JSONPerezoso):
+            otro = otro.valor
+        return self.valor == otro
+
+    __hash__ = None
+
+    def __repr__(self):
+        if self.decodificado:
+            return repr(self._valor)
+        return f"JSONPerezoso({self.crudo!r})"
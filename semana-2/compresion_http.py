@@ -0,0 +1,216 @@
+"""
+COMPRESIÓN DE CUERPOS HTTP (gzip / br / zstd) — EcoMarket
+
+Problema: ni el cliente con requests ni el de aiohttp negocian compresión.
+Un GET /productos del catálogo completo viaja como JSON plano, y las tiendas
+suben datos por enlaces lentos (ADSL, 4G compartido) donde el ancho de banda
+es lo que manda, no la CPU.
+
+DECISIONES DE DISEÑO:
+1. CÓDECS OPCIONALES: gzip siempre está (zlib de la librería estándar); br
+   (pip install brotli) y zstd (pip install zstandard) se usan si están
+   instalados, igual que orjson en codec_json. aceptadas() arma el
+   Accept-Encoding solo con lo que este proceso SÍ sabe descomprimir.
+
+2. RESPUESTAS: la librería HTTP (urllib3, aiohttp, httpx) ya descomprime
+   por bloques conforme llegan los bytes; aquí solo se anuncia qué
+   aceptamos. Descompresor es el mismo trabajo incremental para quien lee
+   el stream crudo (servidores locales, benchmarks), con un límite de
+   tamaño contra "bombas" de descompresión. El límite se aplica DURANTE la
+   descompresión, no al final de cada bloque: gzip usa max_length y
+   unconsumed_tail, br output_buffer_limit, y zstd (sin tope de salida en
+   su API) se alimenta en tramos cuya expansión máxima cabe en lo que falta.
+   Un bloque de 200 KB que infla a 200 MB se corta al pasar el límite.
+
+3. SUBIDAS OPCIONALES CON UMBRAL: comprimir el cuerpo de un POST/PUT/PATCH
+   requiere que el servidor acepte Content-Encoding en peticiones, así que
+   está apagado por defecto: usar_subidas("gzip") o la variable de entorno
+   ECOMARKET_COMPRIMIR_SUBIDAS=gzip. Aun encendido, los cuerpos menores a
+   `umbral` bytes van planos (un producto suelto no gana nada y paga CPU).
+   LIMITACIÓN: la API no tiene un endpoint de alta por lote, así que
+   crear_multiples_productos sigue mandando un POST pequeño por producto y
+   sus cuerpos casi nunca pasan el umbral. Hoy la compresión de subidas
+   solo se activa en cuerpos grandes sueltos (PUT de un producto con
+   descripción o imágenes embebidas); el ahorro de bench_compresion.py
+   (5 MB de JSON) es el de la descarga del catálogo, no el de esas altas.
+   Un valor de ECOMARKET_COMPRIMIR_SUBIDAS que este proceso no sabe
+   comprimir (p. ej. br sin el paquete brotli) se avisa con un warning y
+   deja las subidas planas: no rompe el import de los clientes.
+"""
+
+import logging
+import os
+import zlib
+
+from codec_json import dumps_bytes
+
+log = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:  # códec opcional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # códec opcional
+    zstandard = None
+
+# En orden de preferencia para Accept-Encoding
+CODIFICACIONES = ("zstd", "br", "gzip")
+UMBRAL = 1024                      # bytes: debajo de esto no se comprime la subida
+LIMITE_DESCOMPRIMIDO = 256 * 2**20  # 256 MB: más que eso es una bomba, no un catálogo
+NIVELES = {"gzip": 6, "br": 5, "zstd": 3}
+_TRAMO = 2**20                      # salida máxima por llamada al descompresor
+_EXPANSION_ZSTD = 2**15             # peor caso zstd: un bloque RLE de 128 KB en 4 bytes
+
+
+def disponibles() -> tuple:
+    """Códecs que este proceso puede usar (gzip siempre)."""
+    instalados = {"zstd": zstandard is not None, "br": brotli is not None, "gzip": True}
+    return tuple(c for c in CODIFICACIONES if instalados[c])
+
+
+def aceptadas(soportadas=None) -> str:
+    """
+    Valor de Accept-Encoding. `soportadas` limita a lo que la librería HTTP
+    sabe descomprimir (p. ej. aiohttp no conoce zstd).
+    """
+    return ", ".join(c for c in disponibles() if soportadas is None or c in soportadas)
+
+
+def _validar(codificacion: str) -> str:
+    codificacion = codificacion.lower()
+    if codificacion not in disponibles():
+        raise ValueError(f"Codificación '{codificacion}' no disponible. Usa una de {disponibles()}")
+    return codificacion
+
+
+def comprimir(datos: bytes, codificacion: str = "gzip", nivel: int | None = None) -> bytes:
+    codificacion = _validar(codificacion)
+    nivel = NIVELES[codificacion] if nivel is None else nivel
+    if codificacion == "gzip":
+        compresor = zlib.compressobj(nivel, zlib.DEFLATED, 31)   # wbits 31: formato gzip
+        return compresor.compress(datos) + compresor.flush()
+    if codificacion == "br":
+        return brotli.compress(datos, quality=nivel)
+    return zstandard.ZstdCompressor(level=nivel).compress(datos)
+
+
+class Descompresor:
+    """
+    Descompresión incremental: alimentar(bloque) regresa los bytes que ya se
+    pueden entregar y terminar() verifica que el stream no quedó cortado.
+    """
+
+    def __init__(self, codificacion: str, limite: int = LIMITE_DESCOMPRIMIDO):
+        self.codificacion = _validar(codificacion)
+        self.limite = limite
+        self.entrada = 0
+        self.salida = 0
+        if self.codificacion == "gzip":
+            self._objeto = zlib.decompressobj(31)
+        elif self.codificacion == "br":
+            self._objeto = brotli.Decompressor()
+        else:
+            self._objeto = zstandard.ZstdDecompressor().decompressobj()
+
+    def alimentar(self, bloque: bytes) -> bytes:
+        self.entrada += len(bloque)
+        partes = []
+        if self.codificacion == "gzip":
+            datos = bloque
+            while True:
+                tope = self._tope()
+                parte = self._objeto.decompress(datos, tope)
+                self._contar(parte, partes)
+                datos = self._objeto.unconsumed_tail
+                if not datos and len(parte) < tope:
+                    break
+        elif self.codificacion == "br":
+            self._contar(self._objeto.process(bloque, output_buffer_limit=self._tope()), partes)
+            while not self._objeto.can_accept_more_data():
+                self._contar(self._objeto.process(b"", output_buffer_limit=self._tope()), partes)
+        else:
+            vista = memoryview(bloque)
+            inicio = 0
+            while inicio < len(vista):
+                paso = max(4, (self.limite - self.salida) // _EXPANSION_ZSTD)
+                self._contar(self._objeto.decompress(vista[inicio:inicio + paso]), partes)
+                inicio += paso
+        return b"".join(partes)
+
+    def _tope(self) -> int:
+        # +1: un byte de más basta para saber que se pasó del límite
+        return min(_TRAMO, self.limite - self.salida + 1)
+
+    def _contar(self, parte: bytes, partes: list) -> None:
+        self.salida += len(parte)
+        if self.salida > self.limite:
+            raise ValueError(f"Cuerpo descomprimido mayor a {self.limite} bytes")
+        if parte:
+            partes.append(parte)
+
+    def terminar(self) -> bytes:
+        if self.codificacion == "gzip":
+            resto = self._objeto.flush()
+            if not self._objeto.eof:
+                raise ValueError("Stream gzip incompleto")
+            return resto
+        if self.codificacion == "br" and not self._objeto.is_finished():
+            raise ValueError("Stream br incompleto")
+        if self.codificacion == "zstd" and not self._objeto.eof:
+            raise ValueError("Stream zstd incompleto")
+        return b""
+
+
+def descomprimir(bloques, codificacion: str | None, limite: int = LIMITE_DESCOMPRIMIDO):
+    """Generador: bloques comprimidos -> bloques planos (sin codificación, pasan igual)."""
+    if not codificacion or codificacion == "identity":
+        yield from bloques
+        return
+    descompresor = Descompresor(codificacion, limite)
+    for bloque in bloques:
+        salida = descompresor.alimentar(bloque)
+        if salida:
+            yield salida
+    resto = descompresor.terminar()
+    if resto:
+        yield resto
+
+
+_subidas: str | None = None
+_umbral = UMBRAL
+
+
+def usar_subidas(codificacion: str | None, umbral: int = UMBRAL) -> None:
+    """Enciende (p. ej. "gzip") o apaga (None) la compresión de cuerpos de petición."""
+    global _subidas, _umbral
+    _subidas = _validar(codificacion) if codificacion else None
+    _umbral = umbral
+
+
+def cuerpo_json(obj, codificacion: str | None = None, umbral: int | None = None) -> tuple[bytes, dict]:
+    """
+    Cuerpo JSON listo para `data=` con sus headers. Se comprime si hay
+    codificación (la explícita o la de usar_subidas) y pasa del umbral.
+    """
+    datos = dumps_bytes(obj)
+    headers = {"Content-Type": "application/json"}
+    codificacion = codificacion or _subidas
+    if codificacion and len(datos) >= (_umbral if umbral is None else umbral):
+        datos = comprimir(datos, codificacion)
+        headers["Content-Encoding"] = codificacion
+    return datos, headers
+
+
+def _subidas_de_entorno() -> None:
+    codificacion = os.environ.get("ECOMARKET_COMPRIMIR_SUBIDAS") or None
+    try:
+        usar_subidas(codificacion)
+    except ValueError as e:
+        log.warning("ECOMARKET_COMPRIMIR_SUBIDAS ignorada (%s); las subidas van sin comprimir", e)
+        usar_subidas(None)
+
+
+_subidas_de_entorno()
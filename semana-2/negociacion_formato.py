@@ -0,0 +1,116 @@
+"""
+NEGOCIACIÓN DE FORMATO: MessagePack o JSON — EcoMarket
+
+Problema: /productos y /inventario se decodifican como JSON en cada cliente
+(response.json(), await resp.json()). Con inventarios grandes, el tiempo de
+decodificar y los bytes en el cable pesan; MessagePack es binario, más
+compacto y se decodifica sin parsear texto.
+
+DECISIONES DE DISEÑO:
+1. NEGOCIACIÓN HTTP NORMAL: el cliente manda
+   Accept: application/msgpack, application/json;q=0.9 y decide cómo
+   decodificar por el Content-Type de la RESPUESTA, no por lo que pidió. Un
+   servidor que no conoce MessagePack contesta JSON y todo sigue igual
+   (fallback transparente, sin reintentos).
+
+2. OPCIONAL COMO orjson: si msgpack no está instalado solo se pide JSON.
+   ECOMARKET_FORMATO=json fuerza JSON (para comparar) y usar() lo cambia en
+   caliente, igual que codec_json.
+
+3. UN SOLO PUNTO PARA LOS TRES CLIENTES: decodificar(cuerpo, content_type)
+   lo usan el cliente síncrono, el async y MonitorInventario; leer() es la
+   versión para respuestas de aiohttp / TransporteHTTP2. elegir() y
+   codificar() son el lado servidor (servidor_formatos.py y pruebas).
+"""
+
+import os
+
+from codec_json import dumps_bytes, loads
+
+try:
+    import msgpack
+except ImportError:  # formato opcional
+    msgpack = None
+
+FORMATOS = ("msgpack", "json")
+MIME_JSON = "application/json"
+MIME_MSGPACK = "application/msgpack"
+MIMES_MSGPACK = (MIME_MSGPACK, "application/x-msgpack", "application/vnd.msgpack")
+
+
+def _elegir() -> str:
+    if os.environ.get("ECOMARKET_FORMATO", "").lower() == "json" or msgpack is None:
+        return "json"
+    return "msgpack"
+
+
+FORMATO = _elegir()
+
+
+def usar(formato: str) -> None:
+    """Cambia el formato preferido ("msgpack" o "json")."""
+    global FORMATO
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato '{formato}' no válido. Usa uno de {FORMATOS}")
+    if formato == "msgpack" and msgpack is None:
+        raise ValueError("msgpack no está instalado (pip install msgpack)")
+    FORMATO = formato
+
+
+def aceptar() -> str:
+    """Valor del header Accept para GET de catálogo/inventario."""
+    if FORMATO == "msgpack":
+        return f"{MIME_MSGPACK}, {MIME_JSON};q=0.9"
+    return MIME_JSON
+
+
+def _mime(content_type: str | None) -> str:
+    return (content_type or "").split(";", 1)[0].strip().lower()
+
+
+def decodificar(cuerpo: bytes, content_type: str | None):
+    """Decodifica según el Content-Type de la respuesta (JSON si no dice otra cosa)."""
+    if _mime(content_type) in MIMES_MSGPACK:
+        if msgpack is None:
+            raise ValueError("La respuesta viene en MessagePack y msgpack no está instalado")
+        try:
+            return msgpack.unpackb(cuerpo, raw=False, strict_map_key=False)
+        except (msgpack.UnpackException, msgpack.ExtraData) as e:
+            raise ValueError(f"MessagePack inválido: {e}") from e
+    return loads(cuerpo)
+
+
+async def leer(response):
+    """await response.json() pero respetando el formato negociado (aiohttp o TransporteHTTP2)."""
+    return decodificar(await response.read(), response.headers.get("Content-Type"))
+
+
+def elegir(accept: str | None) -> str:
+    """
+    Lado servidor: "msgpack" si el cliente lo acepta con calidad >= JSON y
+    aquí está instalado; si no, "json".
+    """
+    calidades = {}
+    for parte in (accept or "").split(","):
+        mime, *parametros = [p.strip() for p in parte.split(";")]
+        calidad = 1.0
+        for parametro in parametros:
+            nombre, _, valor = parametro.partition("=")
+            if nombre.strip() == "q":
+                try:
+                    calidad = float(valor)
+                except ValueError:
+                    calidad = 0.0
+        calidades[mime.lower()] = calidad
+    q_msgpack = max((calidades.get(m, 0.0) for m in MIMES_MSGPACK), default=0.0)
+    q_json = max(calidades.get(MIME_JSON, 0.0), calidades.get("*/*", 0.0), 0.0 if accept else 1.0)
+    if msgpack is not None and q_msgpack > 0 and q_msgpack >= q_json:
+        return "msgpack"
+    return "json"
+
+
+def codificar(obj, formato: str) -> tuple[bytes, str]:
+    """Lado servidor: (cuerpo, Content-Type)."""
+    if formato == "msgpack":
+        return msgpack.packb(obj, use_bin_type=True), MIME_MSGPACK
+    return dumps_bytes(obj), MIME_JSON
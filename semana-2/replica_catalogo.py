@@ -0,0 +1,310 @@
+"""
+RÉPLICA LOCAL DEL CATÁLOGO CON BÚSQUEDA — EcoMarket
+
+Problema: buscar_productos(nombre) hace un viaje a la API por cada tecla que
+escribe el usuario en el buscador. El catálogo cambia poco y el ETag ya nos
+dice cuándo cambió: la búsqueda se puede contestar en memoria.
+
+DECISIONES DE DISEÑO:
+1. ÍNDICE INVERTIDO NORMALIZADO: los nombres se pasan a minúsculas y sin
+   acentos ("Miel de Abeja" ~ "miel de abeja" ~ "MIÉL"), se parten en tokens y
+   se indexan tres veces: token completo, cada prefijo (búsqueda mientras se
+   escribe) y trigramas (tolera errores de dedo: "manzna" encuentra "manzana").
+
+2. RANKING: cada palabra de la consulta debe aparecer en el nombre (AND).
+   Puntúa más la palabra exacta que el prefijo, y el prefijo más que el
+   parecido por trigramas; desempata el nombre que EMPIEZA con la consulta y
+   luego el más corto. Los puntajes se calculan por grupos con operaciones de
+   conjuntos (no producto por producto) y solo se sacan los `limite` mejores:
+   así "m" sobre 50 mil productos sigue en el orden de un milisegundo.
+
+3. FRESCURA POR ETAG: la réplica se considera fresca `max_edad` segundos
+   desde la última validación. Solo si está vieja, buscar() manda un GET
+   condicional (If-None-Match): un 304 solo renueva la edad; un 200 aplica el
+   delta (se re-indexan únicamente los productos cuyo nombre cambió). Un
+   ServicioPolling existente puede alimentarla con observar().
+
+4. OPT-IN: cliente_ecomarket.buscar_productos sigue yendo a la red salvo que
+   se active con usar_replica().
+"""
+
+import heapq
+import re
+import time
+import unicodedata
+from collections import defaultdict
+from itertools import islice
+
+from negociacion_formato import aceptar, decodificar
+
+_PALABRA = re.compile(r"\w+")
+MAX_PREFIJO = 12          # prefijos más largos casi nunca aportan y cuestan memoria
+SIMILITUD_MINIMA = 0.4    # Jaccard de trigramas entre la palabra buscada y la del catálogo
+
+PUNTOS_EXACTO = 3.0
+PUNTOS_PREFIJO = 2.0
+PUNTOS_INICIO = 0.5       # el nombre empieza con la consulta
+GRUPO_GRANDE = 256        # desde aquí conviene recorrer el orden global que ordenar el grupo
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas y sin acentos: 'Miel de Abeja Ñ' -> 'miel de abeja n'."""
+    descompuesto = unicodedata.normalize("NFKD", texto.casefold())
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def trigramas(palabra: str) -> set[str]:
+    marcada = f" {palabra} "          # los bordes también cuentan ("mie" al inicio)
+    return {marcada[i:i + 3] for i in range(len(marcada) - 2)}
+
+
+class IndiceBusqueda:
+    def __init__(self):
+        self._nombres: dict = {}                                  # id -> nombre normalizado
+        self._tokens: dict[str, set] = defaultdict(set)
+        self._prefijos: dict[str, set] = defaultdict(set)
+        self._inicios: dict[str, set] = defaultdict(set)         # prefijos del nombre completo
+        self._trigramas: dict[str, set] = defaultdict(set)       # trigrama -> palabras del vocabulario
+        self._posicion: dict | None = None                        # id -> lugar por (largo, nombre)
+        self._orden: list = []
+
+    def __len__(self):
+        return len(self._nombres)
+
+    def agregar(self, producto_id, nombre: str) -> None:
+        self.quitar(producto_id)
+        normalizado = normalizar(nombre)
+        self._nombres[producto_id] = normalizado
+        self._posicion = None
+        for largo in range(1, min(len(normalizado), MAX_PREFIJO) + 1):
+            self._inicios[normalizado[:largo]].add(producto_id)
+        for palabra in _PALABRA.findall(normalizado):
+            if palabra not in self._tokens:
+                for trigrama in trigramas(palabra):
+                    self._trigramas[trigrama].add(palabra)
+            self._tokens[palabra].add(producto_id)
+            for largo in range(1, min(len(palabra), MAX_PREFIJO) + 1):
+                self._prefijos[palabra[:largo]].add(producto_id)
+
+    def quitar(self, producto_id) -> None:
+        normalizado = self._nombres.pop(producto_id, None)
+        if normalizado is None:
+            return
+        self._posicion = None
+        _descartar(self._inicios, producto_id,
+                   (normalizado[:largo] for largo in range(1, min(len(normalizado), MAX_PREFIJO) + 1)))
+        for palabra in _PALABRA.findall(normalizado):
+            ids = self._tokens.get(palabra)
+            if ids is None:
+                continue
+            ids.discard(producto_id)
+            if not ids:
+                del self._tokens[palabra]
+                for trigrama in trigramas(palabra):
+                    self._trigramas[trigrama].discard(palabra)
+            _descartar(self._prefijos, producto_id,
+                       (palabra[:largo] for largo in range(1, min(len(palabra), MAX_PREFIJO) + 1)))
+
+    def _con_prefijo(self, indice: dict, texto: str, palabras: bool) -> set:
+        """Ids cuyo nombre (o alguna palabra) empieza con `texto`."""
+        if len(texto) <= MAX_PREFIJO:
+            return indice.get(texto, set())
+        # más largo que lo indexado: se filtra con el nombre completo
+        return {i for i in indice.get(texto[:MAX_PREFIJO], ())
+                if (any(p.startswith(texto) for p in _PALABRA.findall(self._nombres[i]))
+                    if palabras else self._nombres[i].startswith(texto))}
+
+    def _parecidos(self, palabra: str) -> dict:
+        """id -> similitud por trigramas (sobre el vocabulario, no sobre los productos)."""
+        puntos = {}
+        if len(palabra) < 3:
+            return puntos
+        propios = trigramas(palabra)
+        cuenta = defaultdict(int)
+        for trigrama in propios:
+            for candidata in self._trigramas.get(trigrama, ()):
+                cuenta[candidata] += 1
+        for candidata, comunes in cuenta.items():
+            similitud = comunes / len(propios | trigramas(candidata))
+            # las que empiezan con la palabra ya cuentan como prefijo (más puntos)
+            if similitud >= SIMILITUD_MINIMA and not candidata.startswith(palabra):
+                for producto_id in self._tokens[candidata]:
+                    if similitud > puntos.get(producto_id, 0):
+                        puntos[producto_id] = similitud
+        return puntos
+
+    def buscar(self, consulta: str, limite: int | None = 20) -> list:
+        """Ids ordenados por relevancia (todas las palabras de la consulta deben coincidir)."""
+        consulta_normal = normalizar(consulta).strip()
+        terminos = [(self._tokens.get(p, set()), self._con_prefijo(self._prefijos, p, True), self._parecidos(p))
+                    for p in _PALABRA.findall(consulta_normal)]
+        if not terminos:
+            return []
+
+        # Candidatos: intersección de conjuntos, de la palabra más rara a la más común.
+        # Los conjuntos del índice nunca se modifican aquí (ni se copian si no hace falta).
+        terminos.sort(key=lambda t: len(t[1]) + len(t[2]))
+        candidatos = None
+        for _, prefijo, parecidos in terminos:
+            if candidatos is None:
+                candidatos = prefijo | parecidos.keys() if parecidos else prefijo
+            elif parecidos:
+                candidatos = {i for i in candidatos if i in prefijo or i in parecidos}
+            else:
+                candidatos = candidatos & prefijo
+            if not candidatos:
+                return []
+
+        # Puntaje por grupos: cada palabra parte los grupos en exacto/prefijo/parecido
+        # con operaciones de conjuntos; solo los parecidos se puntúan uno por uno
+        grupos = {0.0: candidatos}
+        for exactos, prefijo, parecidos in terminos:
+            siguientes = {}
+            for puntos, grupo in grupos.items():
+                exacto = grupo & exactos
+                if len(exacto) == len(grupo):
+                    _juntar(siguientes, puntos + PUNTOS_EXACTO, grupo)
+                    continue
+                _juntar(siguientes, puntos + PUNTOS_EXACTO, exacto)
+                if parecidos:
+                    _juntar(siguientes, puntos + PUNTOS_PREFIJO, (grupo & prefijo) - exacto)
+                    por_similitud = defaultdict(set)
+                    for producto_id in grupo - prefijo:
+                        por_similitud[parecidos[producto_id]].add(producto_id)
+                    for similitud, ids in por_similitud.items():
+                        _juntar(siguientes, puntos + similitud, ids)
+                else:
+                    # sin parecidos todo el grupo ya empieza con la palabra
+                    _juntar(siguientes, puntos + PUNTOS_PREFIJO, grupo - exacto if exacto else grupo)
+            grupos = siguientes
+        inicio = self._con_prefijo(self._inicios, consulta_normal, False)
+        finales = {}
+        for puntos, grupo in grupos.items():
+            con_inicio = grupo & inicio if inicio else ()
+            _juntar(finales, puntos + PUNTOS_INICIO, con_inicio)
+            _juntar(finales, puntos, grupo - con_inicio if con_inicio else grupo)
+
+        # Del mejor grupo al peor; dentro del grupo, el nombre más corto primero
+        if self._posicion is None:
+            self._orden = sorted(self._nombres, key=lambda i: (len(self._nombres[i]), self._nombres[i]))
+            self._posicion = {producto_id: lugar for lugar, producto_id in enumerate(self._orden)}
+        resultado = []
+        for puntos in sorted(finales, reverse=True):
+            faltan = len(candidatos) if limite is None else limite - len(resultado)
+            if faltan <= 0:
+                break
+            grupo = finales[puntos]
+            if len(grupo) > GRUPO_GRANDE and faltan < len(grupo):
+                # grupo enorme ("m"): recorrer el orden global hasta juntar los que faltan
+                resultado.extend(islice((i for i in self._orden if i in grupo), faltan))
+            else:
+                resultado.extend(heapq.nsmallest(faltan, grupo, key=self._posicion.__getitem__))
+        return resultado
+
+
+def _juntar(grupos: dict, puntos: float, ids) -> None:
+    """grupos[puntos] |= ids sin modificar ningún conjunto existente (pueden ser del índice)."""
+    if ids:
+        actual = grupos.get(puntos)
+        grupos[puntos] = ids if actual is None else actual | ids
+
+
+def _descartar(indice: dict, producto_id, claves) -> None:
+    for clave in claves:
+        ids = indice.get(clave)
+        if ids is not None:
+            ids.discard(producto_id)
+            if not ids:
+                del indice[clave]
+
+
+class ReplicaCatalogo:
+    def __init__(self, url: str, max_edad: float = 30.0, sesion=None, timeout: float = 10.0):
+        """
+        :param url: endpoint del catálogo completo (p. ej. f"{API_URL}/productos").
+        :param max_edad: segundos que una validación con el servidor se da por buena.
+        :param sesion: requests.Session (o el módulo requests, por defecto).
+        """
+        if sesion is None:
+            import requests as sesion
+        self.url = url
+        self.max_edad = max_edad
+        self.sesion = sesion
+        self.timeout = timeout
+        self.etag: str | None = None
+        self.validada_en: float | None = None     # time.monotonic() de la última validación
+        self.indice = IndiceBusqueda()
+        self._productos: dict = {}
+
+        self.busquedas = 0
+        self.descargas = 0          # 200: catálogo nuevo
+        self.no_modificado = 0      # 304: solo se renovó la edad
+
+    def __len__(self):
+        return len(self._productos)
+
+    @property
+    def fresca(self) -> bool:
+        return self.validada_en is not None and time.monotonic() - self.validada_en < self.max_edad
+
+    def aplicar(self, productos: list[dict], etag: str | None = None) -> int:
+        """Reemplaza el catálogo por `productos` re-indexando solo lo que cambió. Regresa cuántos cambiaron."""
+        cambiados = 0
+        nuevos = {}
+        for producto in productos:
+            producto_id = producto["id"]
+            nuevos[producto_id] = producto
+            anterior = self._productos.get(producto_id)
+            if anterior is None or anterior.get("nombre") != producto.get("nombre"):
+                self.indice.agregar(producto_id, producto.get("nombre") or "")
+            if anterior != producto:
+                cambiados += 1
+        for producto_id in self._productos.keys() - nuevos.keys():
+            self.indice.quitar(producto_id)
+            cambiados += 1
+        self._productos = nuevos
+        if etag is not None:
+            self.etag = etag
+        self.validada_en = time.monotonic()
+        return cambiados
+
+    def refrescar(self) -> bool:
+        """GET condicional. Regresa True si el catálogo cambió (200), False con 304."""
+        headers = {"Accept": aceptar()}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        response = self.sesion.get(self.url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304:
+            self.no_modificado += 1
+            self.validada_en = time.monotonic()
+            return False
+        response.raise_for_status()
+        self.descargas += 1
+        productos = decodificar(response.content, response.headers.get("Content-Type"))
+        self.aplicar(productos, response.headers.get("ETag"))
+        return True
+
+    def observar(self, servicio) -> None:
+        """Se alimenta de un ServicioPolling (semana-4) que ya consulta el catálogo con ETag."""
+        servicio.suscribir(
+            "datos_actualizados", lambda productos: self.aplicar(productos, servicio.ultimo_etag)
+        )
+
+    def buscar(self, nombre: str = "", limite: int | None = None) -> list[dict]:
+        """Como GET /productos?nombre=...: va al servidor solo si la réplica está vieja."""
+        if not self.fresca:
+            self.refrescar()
+        self.busquedas += 1
+        if not nombre.strip():
+            return list(self._productos.values())
+        return [self._productos[i] for i in self.indice.buscar(nombre, limite)]
+
+    def metricas(self) -> dict:
+        return {
+            "productos": len(self._productos),
+            "busquedas": self.busquedas,
+            "descargas": self.descargas,
+            "no_modificado": self.no_modificado,
+            "etag": self.etag,
+            "fresca": self.fresca,
+        }
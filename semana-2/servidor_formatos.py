@@ -0,0 +1,137 @@
+"""
+SERVIDOR SIMULADO CON NEGOCIACIÓN DE FORMATO — EcoMarket
+
+API de juguete en 127.0.0.1 (librería estándar, un hilo por conexión) que
+sirve GET .../productos y GET .../inventario en MessagePack o JSON según el
+header Accept, con ETag / If-None-Match (304) como la API real. Sirve para
+probar contra ella los tres clientes (cliente_ecomarket, cliente_async_ecomarket
+y MonitorInventario) y para medir bytes en el cable (bench_formatos.py).
+
+Uso: python servidor_formatos.py [--productos 20000] [--puerto 8790]
+     (API_URL = http://127.0.0.1:8790/api, BASE_URL = http://127.0.0.1:8790/api/v1)
+"""
+
+import argparse
+import hashlib
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from negociacion_formato import codificar, elegir
+
+CATEGORIAS = ["frutas", "verduras", "lacteos", "miel", "conservas"]
+ALMACENES = ["Tepic-Centro", "Guadalajara-Norte", "CDMX-Sur"]
+
+
+def catalogo_sintetico(n: int, semilla: int = 7) -> tuple[list[dict], dict]:
+    """(productos, inventario) con la forma de openapi.yaml y de /inventario."""
+    azar = random.Random(semilla)
+    productos = [
+        {"id": i, "nombre": f"Producto orgánico {i}", "precio": round(azar.uniform(10, 500), 2),
+         "categoria": CATEGORIAS[i % len(CATEGORIAS)],
+         "productor": {"id": 1 + i % 300, "nombre": f"Productor {1 + i % 300}"},
+         "disponible": azar.random() > 0.1, "creado_en": "2024-01-15T10:00:00Z"}
+        for i in range(1, n + 1)
+    ]
+    inventario = {"productos": [
+        {"id": i, "nombre": f"Producto orgánico {i}", "stock": azar.randint(0, 200),
+         "stock_minimo": 20, "status": "OK" if azar.random() > 0.05 else "BAJO_MINIMO",
+         "almacen": ALMACENES[i % len(ALMACENES)]}
+        for i in range(1, n + 1)
+    ]}
+    return productos, inventario
+
+
+class ServidorFormatos:
+    def __init__(self, productos: list[dict], inventario: dict, puerto: int = 0):
+        self.recursos = {"productos": productos, "inventario": inventario}
+        self.puerto = puerto
+        self.bytes_enviados = {"json": 0, "msgpack": 0}
+        self.respuestas = {"json": 0, "msgpack": 0, "304": 0}
+        self._cache: dict = {}                      # (recurso, consulta, formato) -> (cuerpo, tipo, etag)
+        self._candado = threading.Lock()
+        self._http: ThreadingHTTPServer | None = None
+
+    def iniciar(self) -> int:
+        servidor = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                servidor._atender(self)
+
+            def log_message(self, *args):
+                pass   # sin una línea por petición en consola
+
+        self._http = ThreadingHTTPServer(("127.0.0.1", self.puerto), Manejador)
+        self._http.daemon_threads = True
+        threading.Thread(target=self._http.serve_forever, daemon=True).start()
+        self.puerto = self._http.server_address[1]
+        return self.puerto
+
+    def detener(self) -> None:
+        self._http.shutdown()
+        self._http.server_close()
+
+    def _cuerpo(self, recurso: str, consulta: str, formato: str) -> tuple:
+        clave = (recurso, consulta, formato)
+        if clave not in self._cache:
+            datos = self.recursos[recurso]
+            filtros = {k: v[0] for k, v in parse_qs(consulta).items()}
+            if recurso == "productos" and filtros:
+                datos = [p for p in datos
+                         if filtros.get("categoria", p["categoria"]) == p["categoria"]
+                         and filtros.get("nombre", "").lower() in p["nombre"].lower()]
+            cuerpo, tipo = codificar(datos, formato)
+            # el ETag identifica el contenido, no el formato: un 304 vale para ambos
+            etag = '"%s"' % hashlib.sha1(codificar(datos, "json")[0]).hexdigest()[:16]
+            self._cache[clave] = (cuerpo, tipo, etag)
+        return self._cache[clave]
+
+    def _atender(self, peticion: BaseHTTPRequestHandler) -> None:
+        partes = urlsplit(peticion.path)
+        recurso = partes.path.rstrip("/").rsplit("/", 1)[-1]
+        if recurso not in self.recursos:
+            peticion.send_error(404)
+            return
+        formato = elegir(peticion.headers.get("Accept"))
+        cuerpo, tipo, etag = self._cuerpo(recurso, partes.query, formato)
+        if peticion.headers.get("If-None-Match") == etag:
+            with self._candado:
+                self.respuestas["304"] += 1
+            peticion.send_response(304)
+            peticion.send_header("ETag", etag)
+            peticion.send_header("Content-Length", "0")
+            peticion.end_headers()
+            return
+        with self._candado:
+            self.respuestas[formato] += 1
+            self.bytes_enviados[formato] += len(cuerpo)
+        peticion.send_response(200)
+        peticion.send_header("Content-Type", tipo)
+        peticion.send_header("Content-Length", str(len(cuerpo)))
+        peticion.send_header("ETag", etag)
+        peticion.send_header("Vary", "Accept")
+        peticion.end_headers()
+        peticion.wfile.write(cuerpo)
+
+
+def main():
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    args.add_argument("--productos", type=int, default=20_000)
+    args.add_argument("--puerto", type=int, default=8790)
+    opciones = args.parse_args()
+    servidor = ServidorFormatos(*catalogo_sintetico(opciones.productos), puerto=opciones.puerto)
+    puerto = servidor.iniciar()
+    print(f"🛰️ Sirviendo {opciones.productos:,} productos en http://127.0.0.1:{puerto}/api "
+          f"(MessagePack o JSON según Accept). Ctrl+C para salir.")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        servidor.detener()
+
+
+if __name__ == "__main__":
+    main()
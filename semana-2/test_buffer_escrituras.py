@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from buffer_escrituras import BufferEscrituras, BufferEscriturasAsync
+
+
+class ServidorFalso:
+    """Registra cada PATCH y cuántos hubo en vuelo a la vez."""
+
+    def __init__(self, demora=0.0, falla_con=()):
+        self.patches, self.demora, self.falla_con = [], demora, set(falla_con)
+        self.en_vuelo = self.en_vuelo_max = 0
+        self._candado = threading.Lock()
+
+    def patch(self, producto_id, campos):
+        with self._candado:
+            self.en_vuelo += 1
+            self.en_vuelo_max = max(self.en_vuelo_max, self.en_vuelo)
+        time.sleep(self.demora)
+        with self._candado:
+            self.en_vuelo -= 1
+            self.patches.append((producto_id, dict(campos)))
+        if producto_id in self.falla_con:
+            raise LookupError(f"Producto {producto_id} no existe")
+        return {"id": producto_id, **campos}
+
+    async def patch_async(self, producto_id, campos):
+        self.en_vuelo += 1
+        self.en_vuelo_max = max(self.en_vuelo_max, self.en_vuelo)
+        await asyncio.sleep(self.demora)
+        self.en_vuelo -= 1
+        self.patches.append((producto_id, dict(campos)))
+        return {"id": producto_id, **campos}
+
+
+def test_gana_la_ultima_escritura_de_cada_campo():
+    servidor = ServidorFalso()
+    with BufferEscrituras(servidor.patch, max_espera=60) as buffer:
+        buffer.actualizar(1, {"precio": 10})
+        buffer.actualizar(2, {"precio": 5})
+        buffer.actualizar(1, {"stock": 3})
+        buffer.actualizar(1, {"precio": 12})
+        reporte = buffer.flush()
+    assert sorted(servidor.patches) == [(1, {"precio": 12, "stock": 3}), (2, {"precio": 5})]
+    assert [(r.producto_id, r.fusionadas, r.ok) for r in reporte] == [(1, 3, True), (2, 1, True)]
+    assert buffer.metricas()["ahorradas"] == 2
+
+
+def test_flush_por_tamano_con_limite_de_concurrencia():
+    servidor = ServidorFalso(demora=0.02)
+    buffer = BufferEscrituras(servidor.patch, max_pendientes=10, max_espera=60, concurrencia=3)
+    for i in range(10):
+        buffer.actualizar(i, {"precio": i})
+    assert len(servidor.patches) == 10 and len(buffer) == 0     # el décimo disparó el flush
+    assert servidor.en_vuelo_max == 3
+    buffer.cerrar()
+
+
+def test_flush_por_tiempo_entrega_el_reporte():
+    servidor = ServidorFalso(falla_con={2})
+    reportes = []
+    buffer = BufferEscrituras(servidor.patch, max_espera=0.05, al_flush=reportes.append)
+    buffer.actualizar(1, {"precio": 10})
+    buffer.actualizar(2, {"precio": 20})
+    time.sleep(0.3)
+    assert len(reportes) == 1
+    ok, fallo = reportes[0]
+    assert ok.ok and not fallo.ok and isinstance(fallo.error, LookupError)   # un fallo no tumba al resto
+    assert buffer.metricas()["fallidas"] == 1
+    buffer.cerrar()
+
+
+def test_version_async_fusiona_y_respeta_el_limite():
+    async def escenario():
+        servidor = ServidorFalso(demora=0.01)
+        async with BufferEscriturasAsync(servidor.patch_async, max_pendientes=50, max_espera=0.05,
+                                         concurrencia=4) as buffer:
+            for ronda in range(5):
+                for i in range(20):
+                    await buffer.actualizar(i, {"precio": ronda})
+            await asyncio.sleep(0.2)                           # flush por tiempo
+            assert len(servidor.patches) == 20
+        assert dict(servidor.patches) == {i: {"precio": 4} for i in range(20)}
+        assert servidor.en_vuelo_max == 4
+        assert buffer.metricas()["recibidas"] == 100 and buffer.metricas()["enviadas"] == 20
+
+    asyncio.run(escenario())
+
+
+def test_parametros_invalidos():
+    with pytest.raises(ValueError):
+        BufferEscriturasAsync(lambda i, c: None, concurrencia=0)
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+import codec_json
+from codec_json import JSONPerezoso
+
+PRECIO = '{"producto_id": "A1", "precio_anterior": 100, "precio_nuevo": 94.5, "nombre": "Café de Nayarit"}'
+
+
+@pytest.fixture(params=["json", "orjson"])
+def backend(request):
+    if request.param == "orjson" and codec_json.orjson is None:
+        pytest.skip("orjson no instalado")
+    anterior = codec_json.BACKEND
+    codec_json.usar(request.param)
+    yield request.param
+    codec_json.usar(anterior)
+
+
+def test_mismo_resultado_que_la_estandar(backend):
+    assert codec_json.loads(PRECIO) == json.loads(PRECIO)
+    assert codec_json.loads(PRECIO.encode()) == json.loads(PRECIO)
+    assert json.loads(codec_json.dumps({"nombre": "Café", "stock": 3})) == {"nombre": "Café", "stock": 3}
+    # llaves no-str: orjson las rechaza y se resuelve con la estándar
+    assert json.loads(codec_json.dumps_bytes({1: "a"})) == {"1": "a"}
+
+
+def test_objetos_con_a_dict_se_serializan_como_dict(backend):
+    class Registro:
+        def a_dict(self):
+            return {"id": 1, "precio": 35.5}
+
+    assert json.loads(codec_json.dumps([Registro()])) == [{"id": 1, "precio": 35.5}]
+    with pytest.raises(TypeError):
+        codec_json.dumps_bytes(object())
+
+
+def test_json_invalido_es_value_error(backend):
+    with pytest.raises(ValueError):
+        codec_json.loads("{data fragmentada")
+
+
+def test_backend_no_valido():
+    with pytest.raises(ValueError):
+        codec_json.usar("simplejson")
+
+
+def test_perezoso_solo_decodifica_al_leer():
+    data = JSONPerezoso(PRECIO)
+    assert not data.decodificado
+    assert data["producto_id"] == "A1"
+    assert data.decodificado
+    assert data.get("moneda", "MXN") == "MXN"
+    assert "precio_nuevo" in data and len(data) == 4
+    assert data == json.loads(PRECIO)
+
+
+def test_perezoso_invalido_falla_al_primer_acceso():
+    data = JSONPerezoso("no es json")
+    with pytest.raises(ValueError):
+        data.get("producto_id")
@@ -0,0 +1,85 @@
+import gzip
+import json
+import tracemalloc
+
+import pytest
+
+import compresion_http
+from compresion_http import Descompresor, aceptadas, comprimir, cuerpo_json, descomprimir
+
+CATALOGO = json.dumps([{"id": i, "nombre": f"Miel de Abeja {i}", "precio": 150.0, "categoria": "miel"}
+                       for i in range(500)]).encode()
+
+
+def en_bloques(datos, tamano=1000):
+    return [datos[i:i + tamano] for i in range(0, len(datos), tamano)]
+
+
+@pytest.fixture(params=["gzip", "br", "zstd"])
+def codificacion(request):
+    if request.param not in compresion_http.disponibles():
+        pytest.skip(f"{request.param} no instalado")
+    return request.param
+
+
+def test_ida_y_vuelta_por_bloques(codificacion):
+    comprimido = comprimir(CATALOGO, codificacion)
+    assert len(comprimido) < len(CATALOGO) / 5
+    assert b"".join(descomprimir(en_bloques(comprimido), codificacion)) == CATALOGO
+
+
+def test_gzip_es_el_estandar():
+    assert gzip.decompress(comprimir(CATALOGO, "gzip")) == CATALOGO
+    assert "gzip" in aceptadas() and aceptadas(("gzip",)) == "gzip"
+    assert list(descomprimir([b"plano"], None)) == [b"plano"]
+
+
+def test_stream_cortado_y_bomba():
+    comprimido = comprimir(CATALOGO, "gzip")
+    with pytest.raises(ValueError):
+        list(descomprimir([comprimido[:-20]], "gzip"))
+    descompresor = Descompresor("gzip", limite=1000)
+    with pytest.raises(ValueError):
+        descompresor.alimentar(comprimido)
+
+
+def test_bomba_se_corta_sin_inflar_el_bloque_entero(codificacion):
+    bomba = comprimir(bytes(50 * 2**20), codificacion, nivel=1)     # 50 MB de ceros
+    assert len(bomba) < 2**20
+    descompresor = Descompresor(codificacion, limite=2**20)
+    tracemalloc.start()
+    try:
+        with pytest.raises(ValueError):
+            descompresor.alimentar(bomba)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert descompresor.salida < 4 * 2**20          # antes: los 50 MB completos
+    assert pico < 8 * 2**20
+
+
+def test_subidas_solo_arriba_del_umbral():
+    compresion_http.usar_subidas("gzip", umbral=1024)
+    try:
+        chico, headers_chico = cuerpo_json({"precio": 12})
+        grande, headers_grande = cuerpo_json(json.loads(CATALOGO))
+    finally:
+        compresion_http.usar_subidas(None)
+    assert json.loads(chico) == {"precio": 12} and "Content-Encoding" not in headers_chico
+    assert headers_grande["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(grande)) == json.loads(CATALOGO)
+    # apagado por defecto: el servidor debe aceptar cuerpos comprimidos
+    assert "Content-Encoding" not in cuerpo_json(json.loads(CATALOGO))[1]
+
+
+def test_codificacion_no_disponible():
+    with pytest.raises(ValueError):
+        comprimir(CATALOGO, "lzma")
+
+
+def test_codificacion_de_entorno_no_instalada_no_rompe_el_import(monkeypatch, caplog):
+    monkeypatch.setenv("ECOMARKET_COMPRIMIR_SUBIDAS", "lzma")
+    with caplog.at_level("WARNING"):
+        compresion_http._subidas_de_entorno()
+    assert "ECOMARKET_COMPRIMIR_SUBIDAS" in caplog.text
+    assert "Content-Encoding" not in cuerpo_json(json.loads(CATALOGO))[1]
@@ -0,0 +1,68 @@
+import urllib.request
+
+import pytest
+
+import negociacion_formato
+from negociacion_formato import MIME_JSON, MIME_MSGPACK, codificar, decodificar, elegir
+from servidor_formatos import ServidorFormatos, catalogo_sintetico
+
+PIDE_MSGPACK = f"{MIME_MSGPACK}, {MIME_JSON};q=0.9"
+
+
+@pytest.fixture
+def servidor():
+    servidor = ServidorFormatos(*catalogo_sintetico(50))
+    servidor.base = f"http://127.0.0.1:{servidor.iniciar()}/api"
+    yield servidor
+    servidor.detener()
+
+
+def pedir(url, headers):
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers)) as respuesta:
+            return respuesta.status, respuesta.headers, respuesta.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, b""
+
+
+def test_servidor_elige_por_accept():
+    esperado = "msgpack" if negociacion_formato.msgpack else "json"
+    assert elegir(PIDE_MSGPACK) == esperado
+    assert elegir("application/x-msgpack;q=0.5, application/json") == "json"
+    assert elegir("*/*") == elegir(None) == elegir("") == "json"
+
+
+def test_sin_content_type_msgpack_se_decodifica_json():
+    assert decodificar(b'{"productos": []}', "application/json; charset=utf-8") == {"productos": []}
+    assert decodificar(b"[1, 2]", None) == [1, 2]
+
+
+def test_fallback_transparente_contra_el_servidor(servidor):
+    # el cliente pide MessagePack; con o sin msgpack instalado lo que llega se decodifica igual
+    status, headers, cuerpo = pedir(f"{servidor.base}/v1/inventario", {"Accept": PIDE_MSGPACK})
+    inventario = decodificar(cuerpo, headers["Content-Type"])
+    assert status == 200 and len(inventario["productos"]) == 50
+    status, _, _ = pedir(f"{servidor.base}/v1/inventario",
+                         {"Accept": MIME_JSON, "If-None-Match": headers["ETag"]})
+    assert status == 304                                  # el ETag no depende del formato
+
+
+def test_filtros_de_productos(servidor):
+    _, headers, cuerpo = pedir(f"{servidor.base}/productos?categoria=miel", {"Accept": MIME_JSON})
+    productos = decodificar(cuerpo, headers["Content-Type"])
+    assert productos and {p["categoria"] for p in productos} == {"miel"}
+
+
+def test_msgpack_ida_y_vuelta_y_mas_chico():
+    pytest.importorskip("msgpack")
+    productos, _ = catalogo_sintetico(200)
+    cuerpo, tipo = codificar(productos, "msgpack")
+    assert tipo == MIME_MSGPACK and decodificar(cuerpo, tipo) == productos
+    assert len(cuerpo) < len(codificar(productos, "json")[0])
+    with pytest.raises(ValueError):
+        decodificar(cuerpo[:-10], tipo)
+
+
+def test_formato_no_valido():
+    with pytest.raises(ValueError):
+        negociacion_formato.usar("xml")
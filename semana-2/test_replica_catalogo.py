@@ -0,0 +1,83 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from replica_catalogo import IndiceBusqueda, ReplicaCatalogo, normalizar
+
+CATALOGO = [
+    {"id": 1, "nombre": "Miel de Abeja", "categoria": "miel"},
+    {"id": 2, "nombre": "Miel de Agave Orgánica", "categoria": "miel"},
+    {"id": 3, "nombre": "Manzana Roja", "categoria": "frutas"},
+    {"id": 4, "nombre": "Mermelada de Manzana", "categoria": "conservas"},
+    {"id": 5, "nombre": "Jabón de miel", "categoria": "miel"},
+]
+
+
+class ServidorFalso:
+    """Sesión tipo requests: GET /productos con ETag; cuenta los viajes."""
+
+    def __init__(self, productos, etag='"v1"'):
+        self.productos, self.etag, self.peticiones = productos, etag, []
+
+    def get(self, url, headers=None, timeout=None):
+        self.peticiones.append(dict(headers or {}))
+        if (headers or {}).get("If-None-Match") == self.etag:
+            return SimpleNamespace(status_code=304, headers={}, content=b"")
+        return SimpleNamespace(status_code=200, headers={"ETag": self.etag},
+                               content=json.dumps(self.productos).encode(), raise_for_status=lambda: None)
+
+
+@pytest.fixture
+def indice():
+    indice = IndiceBusqueda()
+    for p in CATALOGO:
+        indice.agregar(p["id"], p["nombre"])
+    return indice
+
+
+def test_normaliza_acentos_y_mayusculas():
+    assert normalizar("MIÉL de Ábeja Ñ") == "miel de abeja n"
+
+
+def test_prefijos_mientras_se_escribe(indice):
+    assert indice.buscar("m") == [3, 1, 4, 2, 5]     # los que empiezan con "m" primero, luego el más corto
+    assert indice.buscar("mi") == [1, 2, 5]
+    assert indice.buscar("MIÉL abe") == [1]          # todas las palabras deben coincidir
+
+
+def test_errores_de_dedo_por_trigramas(indice):
+    assert indice.buscar("manzna") == [3, 4]
+    assert indice.buscar("organica") == [2]
+    assert indice.buscar("zzz") == []
+
+
+def test_quitar_y_renombrar(indice):
+    indice.quitar(1)
+    indice.agregar(3, "Pera")
+    assert indice.buscar("abeja") == [] and indice.buscar("manzana") == [4]
+    assert indice.buscar("pera") == [3]
+
+
+def test_solo_va_al_servidor_si_la_replica_esta_vieja():
+    servidor = ServidorFalso(CATALOGO)
+    replica = ReplicaCatalogo("http://x/api/productos", max_edad=60, sesion=servidor)
+    assert [p["id"] for p in replica.buscar("miel")] == [1, 2, 5]
+    assert [p["id"] for p in replica.buscar("miel abeja")] == [1]
+    assert len(servidor.peticiones) == 1
+
+    replica.validada_en -= 61                          # ya venció: GET condicional
+    replica.buscar("pera")
+    assert servidor.peticiones[-1]["If-None-Match"] == '"v1"'
+    assert replica.metricas()["no_modificado"] == 1 and replica.fresca
+
+
+def test_un_200_aplica_el_delta():
+    servidor = ServidorFalso(CATALOGO)
+    replica = ReplicaCatalogo("http://x/api/productos", max_edad=0, sesion=servidor)
+    replica.refrescar()
+    servidor.productos = CATALOGO[1:] + [{"id": 6, "nombre": "Café Orgánico", "categoria": "otros"}]
+    servidor.etag = '"v2"'
+    assert replica.refrescar() is True
+    assert [p["id"] for p in replica.buscar("organico")] == [6, 2]
+    assert replica.buscar("abeja") == [] and replica.etag == '"v2"'
@@ -1,7 +1,6 @@
 import asyncio
 import aiohttp
 import time
-import pandas as pd
 from typing import Dict
 
 class SmartSession(aiohttp.ClientSession):
@@ -70,6 +69,7 @@ async def main():
         res = await run_benchmark(size)
         results.append(res)
     
+    import pandas as pd  # solo para imprimir la tabla: no se paga al importar SmartSession
     df = pd.DataFrame(results)
     print(df.to_string(index=False))
 
@@ -1,58 +1,96 @@
 import asyncio
-import aiohttp
 import time
 from typing import List, Dict, Any, Tuple
+from codec_json import loads
+# aiohttp (HTTP/1.1) o HTTP/2 multiplexado: ver transporte_http.crear_sesion
+from transporte_http import Sesion, crear_sesion
+from compresion_http import cuerpo_json
+# MessagePack si el servidor lo ofrece, JSON si no (ver negociacion_formato)
+from negociacion_formato import aceptar, leer
 # Importamos tus recursos de la Semana 2
 from validadores import validar_producto, ValidationError 
 from cliente_ecomarket import (
-    API_URL, ResourceNotFoundError, ConflictError, EcoMarketError
+    API_URL, ResourceNotFoundError, ConflictError, EcoMarketError,
+    particiones, fusionar_por_id
 )
+from buffer_escrituras import BufferEscriturasAsync
 
 # --- CLIENTE ASÍNCRONO ---
+# `session` puede ser una aiohttp.ClientSession o un TransporteHTTP2: las
+# funciones solo usan la parte de la interfaz que ambos comparten.
 
-async def listar_productos(session: aiohttp.ClientSession, categoria: str = None) -> List[Dict]:
+async def listar_productos(session: Sesion, categoria: str = None, productor_id: int = None) -> List[Dict]:
     params = {"categoria": categoria} if categoria else {}
-    async with session.get(f"{API_URL}/productos", params=params) as response:
+    if productor_id is not None:
+        params["productor_id"] = productor_id
+    async with session.get(f"{API_URL}/productos", params=params, headers={"Accept": aceptar()}) as response:
         response.raise_for_status()
-        return await response.json()
+        return await leer(response)
 
-async def obtener_producto(session: aiohttp.ClientSession, producto_id: int) -> Dict:
-    async with session.get(f"{API_URL}/productos/{producto_id}") as response:
+async def listar_productos_particionado(session: Sesion, por: str = "categoria", productores=None,
+                                        concurrencia: int = 16) -> List[Dict]:
+    """
+    Catálogo completo en paralelo: una petición por categoría (o por productor_id),
+    cada partición se decodifica en cuanto llega y al final se unen sin ids
+    repetidos. Si una partición falla se lanza su error (nada de catálogos a medias).
+    """
+    sem = asyncio.Semaphore(concurrencia)
+
+    async def descargar(params):
+        async with sem:
+            return await listar_productos(session, **params)
+
+    partes = await asyncio.gather(*(descargar(p) for p in particiones(por, productores)))
+    return fusionar_por_id(partes)
+
+async def obtener_producto(session: Sesion, producto_id: int) -> Dict:
+    async with session.get(f"{API_URL}/productos/{producto_id}", headers={"Accept": aceptar()}) as response:
         if response.status == 404:
             raise ResourceNotFoundError(f"Producto {producto_id} no encontrado")
         response.raise_for_status()
-        data = await response.json()
+        data = await leer(response)
         return validar_producto(data) # Validación original
 
-async def crear_producto(session: aiohttp.ClientSession, datos: Dict[str, Any]) -> Dict:
-    async with session.post(f"{API_URL}/productos", json=datos) as response:
+async def crear_producto(session: Sesion, datos: Dict[str, Any]) -> Dict:
+    cuerpo, headers = cuerpo_json(datos)
+    async with session.post(f"{API_URL}/productos", data=cuerpo, headers=headers) as response:
         if response.status == 409:
             raise ConflictError("El producto ya existe")
         response.raise_for_status()
-        return await response.json()
+        return await response.json(loads=loads)
 
-async def actualizar_producto_total(session: aiohttp.ClientSession, producto_id: int, datos: Dict[str, Any]) -> Dict:
-    async with session.put(f"{API_URL}/productos/{producto_id}", json=datos) as response:
+async def actualizar_producto_total(session: Sesion, producto_id: int, datos: Dict[str, Any]) -> Dict:
+    cuerpo, headers = cuerpo_json(datos)
+    async with session.put(f"{API_URL}/productos/{producto_id}", data=cuerpo, headers=headers) as response:
         if response.status == 404: raise ResourceNotFoundError(f"ID {producto_id} no existe")
         response.raise_for_status()
-        return await response.json()
+        return await response.json(loads=loads)
 
-async def actualizar_producto_parcial(session: aiohttp.ClientSession, producto_id: int, campos: Dict[str, Any]) -> Dict:
-    async with session.patch(f"{API_URL}/productos/{producto_id}", json=campos) as response:
+async def actualizar_producto_parcial(session: Sesion, producto_id: int, campos: Dict[str, Any]) -> Dict:
+    cuerpo, headers = cuerpo_json(campos)
+    async with session.patch(f"{API_URL}/productos/{producto_id}", data=cuerpo, headers=headers) as response:
         if response.status == 404: raise ResourceNotFoundError(f"ID {producto_id} no existe")
         response.raise_for_status()
-        return await response.json()
+        return await response.json(loads=loads)
+
+def buffer_actualizaciones(session: Sesion, max_pendientes: int = 100, max_espera: float = 1.0,
+                           concurrencia: int = 8, al_flush=None) -> BufferEscriturasAsync:
+    """PATCH parciales fusionados por producto (ver cliente_ecomarket.buffer_actualizaciones)."""
+    return BufferEscriturasAsync(
+        lambda producto_id, campos: actualizar_producto_parcial(session, producto_id, campos),
+        max_pendientes, max_espera, concurrencia, al_flush,
+    )
 
-async def eliminar_producto(session: aiohttp.ClientSession, producto_id: int) -> bool:
+async def eliminar_producto(session: Sesion, producto_id: int) -> bool:
     async with session.delete(f"{API_URL}/productos/{producto_id}") as response:
         if response.status == 404: raise ResourceNotFoundError(f"ID {producto_id} no existe")
         return response.status == 204
 
 # --- FUNCIONES DE CARGA MASIVA Y DASHBOARD ---
 
-async def cargar_dashboard() -> Dict:
+async def cargar_dashboard(transporte: str = None) -> Dict:
     """Carga productos, categorías y perfil en paralelo."""
-    async with aiohttp.ClientSession() as session:
+    async with crear_sesion(transporte) as session:
         tareas = [
             listar_productos(session),
             session.get(f"{API_URL}/categorias"), # Simulado
@@ -71,8 +109,12 @@ async def cargar_dashboard() -> Dict:
                 dashboard["datos"][nombre] = res
         return dashboard
 
-async def crear_multiples_productos(lista_productos: List[Dict]) -> Tuple[List, List]:
-    """Crea productos con un límite de 5 peticiones simultáneas."""
+async def crear_multiples_productos(lista_productos: List[Dict], transporte: str = None) -> Tuple[List, List]:
+    """
+    Crea productos con un límite de 5 peticiones simultáneas.
+    Es un POST por producto (la API no tiene alta por lote): cada cuerpo es
+    pequeño y queda bajo el umbral de compresión de subidas.
+    """
     sem = asyncio.Semaphore(5)
     creados, fallidos = [], []
 
@@ -84,7 +126,7 @@ async def crear_multiples_productos(lista_productos: List[Dict]) -> Tuple[List,
             except Exception as e:
                 fallidos.append({"item": datos.get('nombre'), "error": str(e)})
 
-    async with aiohttp.ClientSession() as session:
+    async with crear_sesion(transporte) as session:
         await asyncio.gather(*(tarea_con_semaforo(session, p) for p in lista_productos))
     
     return creados, fallidos
\ No newline at end of file
@@ -111,4 +111,15 @@ async def test_reuso_de_sesion_cerrada(mock_api):
     async with aiohttp.ClientSession() as session:
         pass
     with pytest.raises(RuntimeError):
-        await listar_productos(session)
\ No newline at end of file
+        await listar_productos(session)
+@pytest.mark.asyncio
+async def test_catalogo_particionado_por_categoria(mock_api):
+    """Las 5 categorías se piden en paralelo y se unen sin ids repetidos."""
+    from cliente_async_ecomarket import listar_productos_particionado
+    from validadores import CATEGORIAS_VALIDAS
+    for n, categoria in enumerate(CATEGORIAS_VALIDAS):
+        mock_api.get(f"{API_URL}/productos?categoria={categoria}",
+                     payload=[{"id": n + 1}, {"id": 99}])
+    async with aiohttp.ClientSession() as session:
+        res = await listar_productos_particionado(session)
+    assert sorted(p["id"] for p in res) == [1, 2, 3, 4, 5, 99]
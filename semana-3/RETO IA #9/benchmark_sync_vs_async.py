@@ -1,14 +1,13 @@
 import asyncio
 import time
-import requests
-import aiohttp
 import statistics
-from tabulate import tabulate # pip install tabulate
+# requests, aiohttp y tabulate se importan donde se usan: importar este módulo no los carga
 
 API_MOCK_DELAY = 0.2  # 200ms de latencia simulada
 
 # --- CLIENTE SÍNCRONO (Requests) ---
 def run_sync_bench(n_requests):
+    import requests
     inicio = time.perf_counter()
     with requests.Session() as session:
         for _ in range(n_requests):
@@ -18,6 +17,7 @@ def run_sync_bench(n_requests):
 
 # --- CLIENTE ASÍNCRONO (aiohttp) ---
 async def run_async_bench(n_requests):
+    import aiohttp
     inicio = time.perf_counter()
     async with aiohttp.ClientSession() as session:
         async def fetch():
@@ -39,6 +39,7 @@ def comparar(n_peticiones):
     return [n_peticiones, f"{t_sync:.3f}s", f"{t_async:.3f}s", f"{speedup:.1f}x"]
 
 if __name__ == "__main__":
+    from tabulate import tabulate # pip install tabulate
     headers = ["Peticiones", "Tiempo Síncrono", "Tiempo Asíncrono", "Speedup"]
     resultados = [comparar(n) for n in [1, 5, 20, 50]]
     
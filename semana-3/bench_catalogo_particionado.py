@@ -0,0 +1,114 @@
+"""
+BENCHMARK: catálogo completo en un GET vs. descarga particionada
+
+Compara, contra un servidor local con un catálogo sintético grande:
+  - listar_productos(session):                 un GET /productos, todo en serie
+  - listar_productos_particionado(por="categoria"): 5 GET en paralelo
+  - listar_productos_particionado(por="productor"): un GET por productor_id
+
+El servidor (ServidorLocal de bench_transporte_http) filtra por categoria y
+productor_id como indica openapi.yaml y tarda `--latencia` más el tiempo de
+mandar el cuerpo a `--mbps` por conexión: lo que limita a un solo GET grande
+en una API real (consulta + serialización + ventana TCP de un socket). El
+cliente sí decodifica de verdad cada respuesta.
+
+Requiere aiohttp (o httpx[http2] con --transporte http2).
+
+Uso: python bench_catalogo_particionado.py [--productos 50000] [--productores 40]
+                                           [--mbps 20] [--latencia 0.05]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+AQUI = Path(__file__).resolve().parent
+RAIZ = AQUI.parent
+# el cliente async importa validadores y cliente_ecomarket por nombre (semana-2)
+for carpeta in (RAIZ / "semana-2", RAIZ / "semana-2" / "RETO IA #4", RAIZ / "semana-2" / "RETO IA #3",
+                AQUI, AQUI / "RETO IA #3"):
+    if str(carpeta) not in sys.path:
+        sys.path.insert(0, str(carpeta))
+
+import cliente_async_ecomarket as cliente                 # noqa: E402
+from bench_transporte_http import ServidorLocal           # noqa: E402
+from codec_json import dumps_bytes                         # noqa: E402
+from transporte_http import crear_sesion                   # noqa: E402
+from validadores import CATEGORIAS_VALIDAS                 # noqa: E402
+
+
+class ServidorCatalogo(ServidorLocal):
+    def __init__(self, productos: int, productores: int, mbps: float, latencia: float):
+        super().__init__(retardo=latencia)
+        self.bytes_por_s = mbps * 1e6 / 8
+        self.catalogo = [
+            {"id": i, "nombre": f"Producto {i}", "precio": 10.0 + i % 50,
+             "categoria": CATEGORIAS_VALIDAS[i % len(CATEGORIAS_VALIDAS)],
+             "productor": {"id": 1 + i % productores, "nombre": f"Productor {1 + i % productores}"},
+             "disponible": True, "creado_en": "2024-01-15T10:00:00Z"}
+            for i in range(1, productos + 1)
+        ]
+        self._cache: dict[str, bytes] = {}
+
+    async def _responder(self, ruta: str) -> bytes:
+        consulta = urlsplit(ruta).query
+        cuerpo = self._cache.get(consulta)
+        if cuerpo is None:
+            filtros = {k: v[0] for k, v in parse_qs(consulta).items()}
+            cuerpo = self._cache[consulta] = dumps_bytes([
+                p for p in self.catalogo
+                if filtros.get("categoria", p["categoria"]) == p["categoria"]
+                and int(filtros.get("productor_id", p["productor"]["id"])) == p["productor"]["id"]
+            ])
+        await asyncio.sleep(self.retardo + len(cuerpo) / self.bytes_por_s)
+        return cuerpo
+
+
+async def main():
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    args.add_argument("--productos", type=int, default=50_000)
+    args.add_argument("--productores", type=int, default=40)
+    args.add_argument("--mbps", type=float, default=20.0, help="ancho de banda por conexión")
+    args.add_argument("--latencia", type=float, default=0.05, help="segundos fijos por petición")
+    args.add_argument("--transporte", default="aiohttp", choices=["aiohttp", "http2"])
+    opciones = args.parse_args()
+
+    servidor = ServidorCatalogo(opciones.productos, opciones.productores, opciones.mbps, opciones.latencia)
+    # las funciones del cliente arman la URL con la constante del módulo
+    cliente.API_URL = f"http://127.0.0.1:{await servidor.iniciar()}/api"
+    print(f"🧪 Catálogo de {opciones.productos:,} productos, {opciones.productores} productores, "
+          f"{opciones.mbps} Mbps por conexión, latencia {opciones.latencia * 1000:.0f} ms\n")
+
+    escenarios = [
+        ("Un GET (completo)", lambda s: cliente.listar_productos(s)),
+        ("5 categorías", lambda s: cliente.listar_productos_particionado(s)),
+        (f"{opciones.productores} productores", lambda s: cliente.listar_productos_particionado(
+            s, por="productor", productores=range(1, opciones.productores + 1))),
+    ]
+    resultados = []
+    ids_base = None
+    extra = {"h2c": True} if opciones.transporte == "http2" else {}
+    for nombre, descargar in escenarios:
+        async with crear_sesion(opciones.transporte, **extra) as session:
+            await descargar(session)                       # calienta caché del servidor y conexiones
+            inicio = time.perf_counter()
+            productos = await descargar(session)
+            duracion = time.perf_counter() - inicio
+        ids = {p["id"] for p in productos}
+        ids_base = ids_base or ids
+        resultados.append((nombre, duracion, len(productos), ids == ids_base))
+    await servidor.detener()
+
+    base = resultados[0][1]
+    print(f"{'Estrategia':<20} | {'Tiempo':>8} | {'Productos':>9} | {'Mismo catálogo':>14} | {'Aceleración':>11}")
+    print("-" * 74)
+    for nombre, duracion, total, igual in resultados:
+        print(f"{nombre:<20} | {duracion:>7.2f}s | {total:>9,} | {'sí' if igual else 'NO':>14} | "
+              f"{base / duracion:>10.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
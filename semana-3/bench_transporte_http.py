@@ -0,0 +1,210 @@
+"""
+BENCHMARK: pool aiohttp (HTTP/1.1) vs. HTTP/2 multiplexado
+
+Lanza N GET /productos/{id} en paralelo (el fan-out de 500 obtener_producto)
+contra un servidor local que habla HTTP/1.1 y HTTP/2 sin TLS (h2c) y tarda
+`--retardo` segundos en responder cada petición, como una API real. Mide:
+  - sockets que abrió el cliente (contados del lado del servidor)
+  - latencia p50/p99 por petición (incluye la espera en el pool)
+  - peticiones/s del fan-out completo
+
+Escenarios: aiohttp con TCPConnector(limit=100) (el default de
+ClientSession) y limit=20, y TransporteHTTP2 con 1 y 4 conexiones. El
+servidor anuncia el máximo de streams simultáneos por conexión de h2 (100
+por defecto), así que con 500 en vuelo HTTP/2 también llega a abrir más
+de un socket si se le permite.
+
+Requiere aiohttp y httpx[http2] (h2 también lo usa el servidor local); un
+escenario cuya librería falte se reporta como error y se sigue con el resto.
+
+Uso: python bench_transporte_http.py [--peticiones 500] [--retardo 0.05]
+"""
+
+import argparse
+import asyncio
+import time
+
+from codec_json import dumps_bytes, loads
+from transporte_http import crear_sesion
+
+PREFACIO_H2 = b"PRI * HTTP/2.0"
+
+
+class ServidorLocal:
+    """API de juguete en 127.0.0.1: HTTP/1.1 keep-alive y h2c en el mismo puerto."""
+
+    def __init__(self, retardo: float = 0.05):
+        self.retardo = retardo
+        self._servidor: asyncio.AbstractServer | None = None
+        self._tareas: set = set()
+        self.reiniciar()
+
+    def reiniciar(self) -> None:
+        self.conexiones = 0
+        self.abiertas = 0
+        self.abiertas_max = 0
+
+    async def iniciar(self) -> int:
+        self._servidor = await asyncio.start_server(self._atender, "127.0.0.1", 0)
+        return self._servidor.sockets[0].getsockname()[1]
+
+    async def detener(self) -> None:
+        self._servidor.close()
+        await self._servidor.wait_closed()
+
+    async def _responder(self, ruta: str) -> bytes:
+        """Cuerpo de la respuesta a GET `ruta` (las subclases simulan otras APIs)."""
+        await asyncio.sleep(self.retardo)
+        return self._cuerpo(ruta)
+
+    @staticmethod
+    def _cuerpo(ruta: str) -> bytes:
+        ultimo = ruta.rstrip("/").rsplit("/", 1)[-1]
+        producto_id = int(ultimo) if ultimo.isdigit() else 0
+        return dumps_bytes({"id": producto_id, "nombre": f"Producto {producto_id}",
+                            "precio": 10.0 + producto_id % 7, "categoria": "miel"})
+
+    async def _atender(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.conexiones += 1
+        self.abiertas += 1
+        self.abiertas_max = max(self.abiertas_max, self.abiertas)
+        try:
+            linea = await reader.readline()
+            if linea.startswith(PREFACIO_H2):
+                await self._atender_h2(reader, writer, linea)
+            else:
+                await self._atender_h1(reader, writer, linea)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.abiertas -= 1
+            writer.close()
+
+    async def _atender_h1(self, reader, writer, linea: bytes) -> None:
+        while linea:
+            cabeceras = {}
+            while (cabecera := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                nombre, _, valor = cabecera.decode("latin-1").partition(":")
+                cabeceras[nombre.strip().lower()] = valor.strip()
+            if int(cabeceras.get("content-length", 0)):
+                await reader.readexactly(int(cabeceras["content-length"]))
+            cuerpo = await self._responder(linea.split()[1].decode())
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                         b"Content-Length: %d\r\n\r\n%s" % (len(cuerpo), cuerpo))
+            await writer.drain()
+            linea = await reader.readline()
+
+    async def _atender_h2(self, reader, writer, inicio: bytes) -> None:
+        import h2.config
+        import h2.connection
+        import h2.events
+        import h2.exceptions
+
+        conexion = h2.connection.H2Connection(
+            h2.config.H2Configuration(client_side=False, header_encoding="utf-8")
+        )
+        conexion.initiate_connection()
+        rutas = {}
+
+        async def responder(stream_id: int, ruta: str) -> None:
+            cuerpo = await self._responder(ruta)
+            try:
+                conexion.send_headers(stream_id, [
+                    (":status", "200"), ("content-type", "application/json"),
+                    ("content-length", str(len(cuerpo))),
+                ])
+                conexion.send_data(stream_id, cuerpo, end_stream=True)
+            except h2.exceptions.StreamClosedError:
+                return   # el cliente canceló el stream
+            writer.write(conexion.data_to_send())
+
+        datos = inicio
+        while datos:
+            for evento in conexion.receive_data(datos):
+                if isinstance(evento, h2.events.RequestReceived):
+                    rutas[evento.stream_id] = dict(evento.headers)[":path"]
+                elif isinstance(evento, h2.events.DataReceived):
+                    conexion.acknowledge_received_data(evento.flow_controlled_length, evento.stream_id)
+                elif isinstance(evento, h2.events.StreamEnded):
+                    tarea = asyncio.create_task(responder(evento.stream_id, rutas.pop(evento.stream_id)))
+                    self._tareas.add(tarea)
+                    tarea.add_done_callback(self._tareas.discard)
+                elif isinstance(evento, h2.events.ConnectionTerminated):
+                    writer.write(conexion.data_to_send())
+                    return
+            writer.write(conexion.data_to_send())
+            await writer.drain()
+            datos = await reader.read(65536)
+
+
+def percentil(ordenados: list[float], q: float) -> float:
+    if not ordenados:
+        return float("nan")
+    return ordenados[min(len(ordenados) - 1, int(q * len(ordenados)))]
+
+
+async def medir(nombre: str, fabrica, servidor: ServidorLocal, url: str, peticiones: int) -> dict:
+    servidor.reiniciar()
+    latencias = []
+
+    async def obtener(session, producto_id):
+        inicio = time.perf_counter()
+        async with session.get(f"{url}/productos/{producto_id}") as response:
+            response.raise_for_status()
+            await response.json(loads=loads)
+        latencias.append(time.perf_counter() - inicio)
+
+    try:
+        session = fabrica()
+    except ImportError as e:
+        return {"escenario": nombre, "error": f"falta {e.name}" if e.name else str(e)}
+    async with session:
+        inicio = time.perf_counter()
+        resultados = await asyncio.gather(
+            *(obtener(session, i) for i in range(1, peticiones + 1)), return_exceptions=True
+        )
+        duracion = time.perf_counter() - inicio
+
+    latencias.sort()
+    return {
+        "escenario": nombre,
+        "sockets": servidor.conexiones,
+        "simultaneos": servidor.abiertas_max,
+        "p50_ms": percentil(latencias, 0.50) * 1000,
+        "p99_ms": percentil(latencias, 0.99) * 1000,
+        "req_s": len(latencias) / duracion,
+        "errores": sum(isinstance(r, Exception) for r in resultados),
+    }
+
+
+async def main():
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    args.add_argument("--peticiones", type=int, default=500)
+    args.add_argument("--retardo", type=float, default=0.05, help="segundos que tarda el servidor por petición")
+    opciones = args.parse_args()
+
+    servidor = ServidorLocal(opciones.retardo)
+    url = f"http://127.0.0.1:{await servidor.iniciar()}/api"
+    escenarios = [
+        ("aiohttp limit=100", lambda: crear_sesion("aiohttp", limite=100)),
+        ("aiohttp limit=20", lambda: crear_sesion("aiohttp", limite=20)),
+        ("http2 1 conexión", lambda: crear_sesion("http2", conexiones=1, h2c=True)),
+        ("http2 4 conexiones", lambda: crear_sesion("http2", conexiones=4, h2c=True)),
+    ]
+    print(f"🧪 {opciones.peticiones} GET en paralelo, servidor con {opciones.retardo * 1000:.0f} ms por petición\n")
+    resultados = [await medir(nombre, fabrica, servidor, url, opciones.peticiones) for nombre, fabrica in escenarios]
+    await servidor.detener()
+
+    print(f"{'Escenario':<20} | {'Sockets':>7} | {'Simult.':>7} | {'p50 ms':>7} | {'p99 ms':>7} | "
+          f"{'Req/s':>8} | {'Errores':>7}")
+    print("-" * 82)
+    for r in resultados:
+        if "error" in r:
+            print(f"{r['escenario']:<20} | ❌ {r['error']}")
+            continue
+        print(f"{r['escenario']:<20} | {r['sockets']:>7} | {r['simultaneos']:>7} | {r['p50_ms']:>7.1f} | "
+              f"{r['p99_ms']:>7.1f} | {r['req_s']:>8,.0f} | {r['errores']:>7}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
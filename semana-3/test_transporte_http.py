@@ -0,0 +1,120 @@
+import asyncio
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from bench_transporte_http import ServidorLocal
+from transporte_http import (
+    ErrorConexionHTTP, ErrorHTTP, ErrorTimeoutHTTP, RespuestaHTTP2, TransporteHTTP2, _Peticion, crear_sesion
+)
+
+
+def respuesta_httpx(status=200, contenido=b'{"id": 1}'):
+    return SimpleNamespace(status_code=status, content=contenido, text=contenido.decode(),
+                           headers={}, url="http://x/api/productos/1", http_version="HTTP/2",
+                           reason_phrase="Not Found" if status == 404 else "OK")
+
+
+def test_transporte_desconocido(monkeypatch):
+    with pytest.raises(ValueError):
+        crear_sesion("smtp")
+    monkeypatch.setenv("ECOMARKET_TRANSPORTE", "smtp")
+    with pytest.raises(ValueError):
+        crear_sesion()
+
+
+def test_respuesta_con_interfaz_de_aiohttp():
+    async def escenario():
+        async def enviar(status):
+            return RespuestaHTTP2(respuesta_httpx(status))
+
+        respuesta = await _Peticion(enviar(200))          # como `await session.get(...)`
+        async with _Peticion(enviar(404)) as no_existe:    # como `async with session.get(...)`
+            pass
+        return respuesta, await respuesta.json(), no_existe
+
+    respuesta, datos, no_existe = asyncio.run(escenario())
+    respuesta.raise_for_status()
+    assert datos == {"id": 1} and no_existe.status == 404
+    with pytest.raises(ErrorHTTP) as error:
+        no_existe.raise_for_status()
+    assert error.value.status == 404
+
+
+def test_errores_de_httpx_salen_como_los_de_aiohttp():
+    httpx = pytest.importorskip("httpx")
+    aiohttp = pytest.importorskip("aiohttp")
+
+    def servidor(peticion):
+        if peticion.url.path.endswith("/caido"):
+            raise httpx.ConnectError("Connection refused", request=peticion)
+        if peticion.url.path.endswith("/lento"):
+            raise httpx.ReadTimeout("timed out", request=peticion)
+        return httpx.Response(404)
+
+    async def escenario():
+        errores = []
+        cliente = httpx.AsyncClient(transport=httpx.MockTransport(servidor))
+        async with TransporteHTTP2(cliente=cliente) as session:
+            for ruta in ("caido", "lento", "no-existe"):
+                try:
+                    async with session.get(f"http://x/api/{ruta}") as response:
+                        response.raise_for_status()
+                except aiohttp.ClientError as e:   # lo que atrapa el código escrito para aiohttp
+                    errores.append(e)
+        return errores
+
+    caido, lento, no_existe = asyncio.run(escenario())
+    assert isinstance(caido, ErrorConexionHTTP) and isinstance(caido, aiohttp.ClientConnectionError)
+    assert isinstance(lento, ErrorTimeoutHTTP) and isinstance(lento, asyncio.TimeoutError)
+    assert isinstance(no_existe, aiohttp.ClientResponseError) and no_existe.status == 404
+    assert "404" in str(no_existe) and "no-existe" in str(no_existe)
+
+
+def test_avisa_si_no_se_negocia_http2(caplog):
+    httpx = pytest.importorskip("httpx")
+
+    async def escenario():
+        cliente = httpx.AsyncClient(transport=httpx.MockTransport(lambda p: httpx.Response(200, json={})))
+        async with TransporteHTTP2(cliente=cliente) as session:
+            for _ in range(3):
+                await session.get("http://x/api/productos")
+            return session.metricas()
+
+    with caplog.at_level(logging.WARNING, logger="transporte_http"):
+        metricas = asyncio.run(escenario())
+    assert metricas["version"] == "HTTP/1.1"
+    avisos = [r for r in caplog.records if "no HTTP/2" in r.getMessage()]
+    assert len(avisos) == 1   # una vez, no por petición
+
+
+def fan_out(tipo, peticiones, **opciones):
+    async def escenario():
+        servidor = ServidorLocal(retardo=0.01)
+        url = f"http://127.0.0.1:{await servidor.iniciar()}/api"
+
+        async def obtener(session, producto_id):
+            async with session.get(f"{url}/productos/{producto_id}") as response:
+                response.raise_for_status()
+                return (await response.json())["id"]
+
+        async with crear_sesion(tipo, **opciones) as session:
+            ids = await asyncio.gather(*(obtener(session, i) for i in range(1, peticiones + 1)))
+        await servidor.detener()
+        return ids, servidor.conexiones
+
+    return asyncio.run(escenario())
+
+
+def test_http2_multiplexa_en_un_socket():
+    pytest.importorskip("httpx")
+    pytest.importorskip("h2")
+    ids, sockets = fan_out("http2", 80, conexiones=1, h2c=True)
+    assert ids == list(range(1, 81)) and sockets == 1
+
+
+def test_aiohttp_abre_un_socket_por_peticion_en_vuelo():
+    pytest.importorskip("aiohttp")
+    ids, sockets = fan_out("aiohttp", 80, limite=20)
+    assert ids == list(range(1, 81)) and sockets == 20
@@ -0,0 +1,253 @@
+"""
+TRANSPORTE HTTP INTERCAMBIABLE: aiohttp (HTTP/1.1) o HTTP/2 — EcoMarket
+
+Problema: cliente_async_ecomarket.py corre sobre aiohttp con HTTP/1.1, que
+atiende UNA petición por socket a la vez. Lanzar 500 obtener_producto en
+paralelo abre cientos de sockets o hace cola detrás de
+TCPConnector(limit=...) (ver SmartSession). La nota 5 de semana-7 #3 ya
+apuntaba a la multiplexación de HTTP/2.
+
+DECISIONES DE DISEÑO:
+1. MISMA INTERFAZ QUE aiohttp.ClientSession: las funciones del cliente
+   reciben una `session` y solo usan get/post/put/patch/delete (con
+   `async with` o `await`), response.status, raise_for_status() y
+   `await response.json(loads=...)`. TransporteHTTP2 implementa ese
+   subconjunto, así que el cliente no cambia y una ClientSession sigue
+   funcionando igual (los tests con aioresponses también).
+
+2. HTTP/2 CON httpx: un AsyncClient(http2=True) manda todas las peticiones
+   como streams de UNA conexión; solo abre otra (hasta `conexiones`) cuando
+   la primera llega al máximo de streams simultáneos que anuncia el
+   servidor. Requiere `pip install httpx[http2]` y se importa solo al crear
+   el transporte: quien use aiohttp no necesita httpx.
+
+3. ELECCIÓN EN UN SOLO LUGAR: crear_sesion(tipo) arma la sesión ("aiohttp"
+   o "http2"). Sin tipo se usa la variable de entorno ECOMARKET_TRANSPORTE
+   (por defecto aiohttp), igual que ECOMARKET_JSON en codec_json.
+
+4. h2c PARA PRUEBAS LOCALES: sobre http:// no hay TLS ni ALPN para negociar
+   HTTP/2; con h2c=True se habla HTTP/2 directo ("prior knowledge"). Es lo
+   que usa bench_transporte_http.py contra su servidor local.
+
+5. COMPRESIÓN: las dos sesiones anuncian Accept-Encoding con los códecs de
+   compresion_http que su librería sabe descomprimir (aiohttp: gzip y br;
+   httpx además zstd) y descomprimen por bloques al leer. Los cuerpos ya
+   comprimidos se mandan con `data=` y su Content-Encoding.
+
+6. MISMAS EXCEPCIONES: un `except aiohttp.ClientConnectionError` (como en
+   monitor_pedidos o pipeline_alertas) tiene que atrapar lo mismo con
+   ECOMARKET_TRANSPORTE=http2. Por eso ErrorHTTP hereda de
+   aiohttp.ClientResponseError, los fallos de red de httpx salen como
+   ErrorConexionHTTP (un ClientConnectionError) y los timeouts como
+   ErrorTimeoutHTTP, que además es asyncio.TimeoutError (igual que
+   aiohttp.ServerTimeoutError). Sin aiohttp instalado las bases son
+   Exception y ConnectionError.
+
+7. SIN ALPN NO HAY MULTIPLEXACIÓN: si el servidor no acepta h2 por ALPN,
+   httpx cae a HTTP/1.1 y con `conexiones` sockets (1 por defecto) TODO el
+   fan-out va en fila. La primera respuesta que no sea HTTP/2 deja un
+   warning en el log (una sola vez) y metricas() expone la versión
+   negociada: en ese caso conviene crear_sesion("aiohttp").
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any
+
+from codec_json import dumps_bytes, loads as _loads
+from compresion_http import aceptadas
+
+TRANSPORTES = ("aiohttp", "http2")
+
+log = logging.getLogger(__name__)
+
+try:
+    from aiohttp import ClientConnectionError as _BaseConexion, ClientResponseError as _BaseRespuesta
+except ImportError:   # quien no usa aiohttp no lo necesita para atrapar estos errores
+    _BaseConexion, _BaseRespuesta = ConnectionError, Exception
+
+# Lo que reciben las funciones del cliente: aiohttp.ClientSession o TransporteHTTP2
+Sesion = Any
+
+
+class ErrorHTTP(_BaseRespuesta):
+    """Respuesta 4xx/5xx en HTTP/2: es un aiohttp.ClientResponseError (si aiohttp está instalado)."""
+
+    def __init__(self, status: int, url: str, mensaje: str = "", headers=None):
+        Exception.__init__(self, status, url)
+        self.status = status
+        self.url = url
+        self.message = mensaje
+        self.headers = headers
+        self.request_info = None   # httpx no tiene RequestInfo; la url va en self.url
+        self.history = ()
+
+    def __str__(self) -> str:
+        return f"{self.status}, message={self.message!r}, url={self.url!r}"
+
+    def __repr__(self) -> str:
+        return f"ErrorHTTP({self.status!r}, {self.url!r}, {self.message!r})"
+
+
+class ErrorConexionHTTP(_BaseConexion):
+    """Fallo de red en HTTP/2 (conexión rechazada, cortada...): un aiohttp.ClientConnectionError."""
+
+
+class ErrorTimeoutHTTP(ErrorConexionHTTP, asyncio.TimeoutError):
+    """Timeout en HTTP/2: como aiohttp.ServerTimeoutError, también es asyncio.TimeoutError."""
+
+
+class RespuestaHTTP2:
+    """Lo que el cliente usa de aiohttp.ClientResponse, sobre un httpx.Response ya leído."""
+
+    def __init__(self, respuesta):
+        self._respuesta = respuesta
+        self.status = respuesta.status_code
+        self.headers = respuesta.headers
+        self.url = str(respuesta.url)
+        self.version = respuesta.http_version
+
+    def raise_for_status(self) -> None:
+        if self.status >= 400:
+            raise ErrorHTTP(self.status, self.url, self._respuesta.reason_phrase, self.headers)
+
+    async def read(self) -> bytes:
+        return self._respuesta.content
+
+    async def text(self) -> str:
+        return self._respuesta.text
+
+    async def json(self, loads=_loads):
+        return loads(self._respuesta.content)
+
+    def release(self) -> None:
+        pass   # el cuerpo ya se leyó completo; no hay conexión que devolver
+
+
+class _Peticion:
+    """Como el _RequestContextManager de aiohttp: se puede usar con `await` o con `async with`."""
+
+    def __init__(self, corrutina):
+        self._corrutina = corrutina
+
+    def __await__(self):
+        return self._corrutina.__await__()
+
+    async def __aenter__(self) -> RespuestaHTTP2:
+        return await self._corrutina
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+
+class TransporteHTTP2:
+    def __init__(self, conexiones: int = 1, h2c: bool = False, timeout: float = 30.0, cliente=None):
+        """
+        :param conexiones: máximo de conexiones HTTP/2 (se abre otra solo si la
+                           anterior llegó a su límite de streams simultáneos).
+        :param h2c: HTTP/2 sin TLS (prior knowledge), para servidores locales.
+        :param timeout: segundos por petición.
+        :param cliente: httpx.AsyncClient ya armado (tests); si no, se crea uno.
+        """
+        import httpx   # httpx[http2]: solo lo necesita este transporte
+
+        self._httpx = httpx
+        self.conexiones = conexiones
+        self._cliente = cliente or httpx.AsyncClient(
+            http1=not h2c, http2=True, timeout=timeout, headers={"Accept-Encoding": aceptadas()},
+            limits=httpx.Limits(max_connections=conexiones, max_keepalive_connections=conexiones),
+        )
+        self.version = None        # la de la primera respuesta: "HTTP/2" o el fallback
+        self.closed = False
+        self.peticiones = 0
+        self.en_vuelo = 0
+        self.en_vuelo_max = 0
+
+    def request(self, metodo: str, url: str, params=None, json=None, data=None, headers=None) -> _Peticion:
+        return _Peticion(self._enviar(metodo, url, params, json, data, headers))
+
+    def get(self, url: str, **opciones) -> _Peticion:
+        return self.request("GET", url, **opciones)
+
+    def post(self, url: str, **opciones) -> _Peticion:
+        return self.request("POST", url, **opciones)
+
+    def put(self, url: str, **opciones) -> _Peticion:
+        return self.request("PUT", url, **opciones)
+
+    def patch(self, url: str, **opciones) -> _Peticion:
+        return self.request("PATCH", url, **opciones)
+
+    def delete(self, url: str, **opciones) -> _Peticion:
+        return self.request("DELETE", url, **opciones)
+
+    async def _enviar(self, metodo, url, params, json, data, headers) -> RespuestaHTTP2:
+        if self.closed:
+            raise RuntimeError("Session is closed")   # mismo error que aiohttp
+        contenido = data
+        if json is not None:
+            contenido = dumps_bytes(json)
+            headers = {**(headers or {}), "Content-Type": "application/json"}
+        self.peticiones += 1
+        self.en_vuelo += 1
+        self.en_vuelo_max = max(self.en_vuelo_max, self.en_vuelo)
+        try:
+            respuesta = await self._cliente.request(
+                metodo, url, params=params, content=contenido, headers=headers
+            )
+        except self._httpx.TimeoutException as e:
+            raise ErrorTimeoutHTTP(f"{metodo} {url}: {e!r}") from e
+        except self._httpx.TransportError as e:
+            raise ErrorConexionHTTP(f"{metodo} {url}: {e!r}") from e
+        finally:
+            self.en_vuelo -= 1
+        if self.version is None:
+            self.version = respuesta.http_version
+            if self.version != "HTTP/2":
+                log.warning("⚠️ El servidor respondió %s, no HTTP/2: con %d conexión(es) las "
+                            "peticiones van en fila; usa crear_sesion('aiohttp') o más conexiones",
+                            self.version, self.conexiones)
+        return RespuestaHTTP2(respuesta)
+
+    def conexiones_abiertas(self) -> int | None:
+        # httpx no lo expone: se mira el pool de httpcore (como SmartSession.pool_stats)
+        pool = getattr(self._cliente._transport, "_pool", None)
+        return len(pool.connections) if pool is not None else None
+
+    def metricas(self) -> dict:
+        return {
+            "peticiones": self.peticiones,
+            "en_vuelo_max": self.en_vuelo_max,
+            "conexiones_abiertas": self.conexiones_abiertas(),
+            "conexiones_max": self.conexiones,
+            "version": self.version,
+        }
+
+    async def close(self) -> None:
+        self.closed = True
+        await self._cliente.aclose()
+
+    async def __aenter__(self) -> "TransporteHTTP2":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+
+def crear_sesion(tipo: str | None = None, limite: int = 100, conexiones: int = 1,
+                 h2c: bool = False, **opciones) -> Sesion:
+    """
+    Sesión para las funciones de cliente_async_ecomarket.
+
+    :param tipo: "aiohttp" (HTTP/1.1, pool de `limite` sockets) o "http2"
+                 (`conexiones` multiplexadas). Por defecto ECOMARKET_TRANSPORTE o aiohttp.
+    """
+    tipo = (tipo or os.environ.get("ECOMARKET_TRANSPORTE") or "aiohttp").lower()
+    if tipo not in TRANSPORTES:
+        raise ValueError(f"Transporte '{tipo}' no válido. Usa uno de {TRANSPORTES}")
+    if tipo == "http2":
+        return TransporteHTTP2(conexiones=conexiones, h2c=h2c, **opciones)
+    import aiohttp
+    opciones.setdefault("headers", {"Accept-Encoding": aceptadas(("br", "gzip"))})
+    return aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=limite), **opciones)
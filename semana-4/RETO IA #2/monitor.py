@@ -1,24 +1,23 @@
 import asyncio
 import time
 import httpx  # pip install httpx
+from ejecutor_observadores import EjecutorObservadores, HILO, modo_de
+from codec_json import loads
 
 # Clase base proporcionada en el material
 class Observable:
     def __init__(self):
         self._observadores = {}
+        self._ejecutor = EjecutorObservadores()
 
-    def suscribir(self, evento, callback):
+    def suscribir(self, evento, callback, modo=None):
         if evento not in self._observadores:
             self._observadores[evento] = []
-        self._observadores[evento].append(callback)
+        self._observadores[evento].append((callback, modo_de(callback, modo)))
 
     def notificar(self, evento, datos):
         if evento in self._observadores:
-            for cb in self._observadores[evento]:
-                try:
-                    cb(datos)
-                except Exception as e:
-                    print(f"❌ Error en observador: {e}")
+            self._ejecutor.despachar(self._observadores[evento], datos)
 
 class ServicioPolling(Observable):
     def __init__(self, url, intervalo_base=5):
@@ -41,7 +40,7 @@ class ServicioPolling(Observable):
                     self.ultimo_etag = resp.headers.get("ETag")
                     self.intervalo_actual = self.intervalo_base
                     print(f"🔄 [200 OK] Datos nuevos. Reset intervalo a {self.intervalo_actual}s")
-                    self.notificar("datos_actualizados", resp.json())
+                    self.notificar("datos_actualizados", loads(resp.content))
                 
                 elif resp.status_code == 304:
                     self.intervalo_actual = min(self.intervalo_actual * 1.5, self.intervalo_max)
@@ -66,6 +65,9 @@ class ServicioPolling(Observable):
 
     def detener(self):
         self._activo = False
+        # detener() corre dentro del loop: no esperamos a los observadores HILO/PROCESO
+        # que sigan corriendo, y los que aún estaban en cola se cancelan
+        self._ejecutor.cerrar(esperar=False)
         print("🛑 Deteniendo monitor limpiamente...")
 
 # --- ETAPA 2: Integración ---
@@ -89,7 +91,7 @@ async def main():
     
     # Suscribimos las funciones independientes (Fase Aplica)
     monitor.suscribir("datos_actualizados", observador_ui)
-    monitor.suscribir("datos_actualizados", observador_alertas)
+    monitor.suscribir("datos_actualizados", observador_alertas, modo=HILO)
     monitor.suscribir("error_servidor", observador_logs)
     monitor.suscribir("timeout", observador_logs)
 
@@ -2,10 +2,11 @@
 DECISIONES DE DISEÑO — MONITOR DE INVENTARIO ECOMARKET
 =======================================================
 INTERVALO_BASE = 5s
-  → Trade-off: Los callbacks de los observadores se ejecutan síncronamente. 
+  → Trade-off: Los callbacks INLINE se ejecutan síncronamente dentro del loop.
     Si un observador (como el de logs) tarda 2s, el ciclo efectivo sube a 7s.
-    Decisión: 5s es un balance aceptable para inventario; en sistemas críticos 
-    se requeriría que los callbacks fueran asíncronos para no bloquear el loop.
+    Decisión: 5s es un balance aceptable para inventario; los observadores
+    pesados se suscriben con modo HILO o PROCESO (ver ejecutor_observadores.py)
+    para que el ciclo no dependa de lo que tarden.
 
 INTERVALO_MAX = 60s
   → Trade-off: El cliente descansa y ahorra batería/datos, pero la información 
@@ -27,32 +28,31 @@ BACKOFF ADAPTATIVO (1.5x / 2x)
 import asyncio
 import time
 import httpx  
+from ejecutor_observadores import EjecutorObservadores, HILO, modo_de
+from diagnostico_loop import DiagnosticoLoop
+from codec_json import loads
 
 class Observable:
     """Implementación del Patrón Observer para desacoplar lógica."""
     def __init__(self):
-        # Diccionario para almacenar eventos y sus listas de callbacks
+        # Diccionario para almacenar eventos y sus listas de (callback, modo)
         self._observadores = {}
+        self._ejecutor = EjecutorObservadores()
 
-    def suscribir(self, evento, callback):
-        """Agrega un interesado a un evento específico."""
+    def suscribir(self, evento, callback, modo=None):
+        """Agrega un interesado a un evento específico (modo: inline/hilo/proceso)."""
         if evento not in self._observadores:
             self._observadores[evento] = []
-        self._observadores[evento].append(callback)
+        self._observadores[evento].append((callback, modo_de(callback, modo)))
 
     def notificar(self, evento, datos):
-        """Ejecuta los callbacks asociados al evento."""
+        """Ejecuta los callbacks INLINE y agenda los de HILO/PROCESO sin esperarlos."""
         if evento in self._observadores:
-            for cb in self._observadores[evento]:
-                try:
-                    # Se ejecutan de forma síncrona según el diseño actual
-                    cb(datos)
-                except Exception as e:
-                    # Un observador roto no debe detener a los demás
-                    print(f"❌ Error en observador: {e}")
+            # Un observador roto no debe detener a los demás (lo cuida el ejecutor)
+            self._ejecutor.despachar(self._observadores[evento], datos)
 
 class ServicioPolling(Observable):
-    def __init__(self, url, intervalo_base=5):
+    def __init__(self, url, intervalo_base=5, diagnostico=None):
         super().__init__()
         self.url = url
         self.intervalo_base = intervalo_base
@@ -60,6 +60,8 @@ class ServicioPolling(Observable):
         self.intervalo_max = 60
         self.ultimo_etag = None
         self._activo = False
+        # Lag del loop y observadores INLINE que lo acaparan (diagnostico_loop)
+        self.diagnostico = diagnostico
 
     async def _consultar(self):
         """Lógica central de petición con ETag y Backoff."""
@@ -76,7 +78,7 @@ class ServicioPolling(Observable):
                     self.ultimo_etag = resp.headers.get("ETag")
                     self.intervalo_actual = self.intervalo_base
                     print(f"🔄 [200 OK] Datos nuevos detectados. Intervalo reset a {self.intervalo_actual}s")
-                    self.notificar("datos_actualizados", resp.json())
+                    self.notificar("datos_actualizados", loads(resp.content))
                 
                 elif resp.status_code == 304:
                     # Sin cambios: Aplicamos backoff incremental
@@ -99,14 +101,24 @@ class ServicioPolling(Observable):
         """Ciclo principal de vida del monitor."""
         self._activo = True
         print(f"🚀 Iniciando monitor en {self.url}...")
-        while self._activo:
-            await self._consultar()
-            # Espera no bloqueante usando asyncio
-            await asyncio.sleep(self.intervalo_actual)
+        if self.diagnostico:
+            self.diagnostico.iniciar()
+        try:
+            while self._activo:
+                await self._consultar()
+                # Espera no bloqueante usando asyncio
+                await asyncio.sleep(self.intervalo_actual)
+        finally:
+            if self.diagnostico:
+                self.diagnostico.detener()
+                print(f"🩺 Diagnóstico del loop: {self.diagnostico.metricas()}")
 
     def detener(self):
         """Detención limpia mediante bandera."""
         self._activo = False
+        # detener() corre dentro del loop: no esperamos a los observadores HILO/PROCESO
+        # que sigan corriendo, y los que aún estaban en cola se cancelan
+        self._ejecutor.cerrar(esperar=False)
         print("🛑 Deteniendo monitor limpiamente...")
 
 # --- ETAPA 2: Funciones Independientes (Observadores) ---
@@ -129,11 +141,11 @@ def observador_logs(mensaje):
 
 async def main():
     # Contra JSONPlaceholder para validar lógica de red
-    monitor = ServicioPolling("https://jsonplaceholder.typicode.com/posts")
+    monitor = ServicioPolling("https://jsonplaceholder.typicode.com/posts", diagnostico=DiagnosticoLoop())
     
     # Registro de observadores (Cumpliendo desacoplamiento)
     monitor.suscribir("datos_actualizados", observador_ui)
-    monitor.suscribir("datos_actualizados", observador_alertas)
+    monitor.suscribir("datos_actualizados", observador_alertas, modo=HILO)
     monitor.suscribir("error_servidor", observador_logs)
     monitor.suscribir("error_red", observador_logs)
 
@@ -0,0 +1,127 @@
+"""
+BENCHMARK: eventos/s con log por evento (print, logging síncrono, cola + hilo)
+
+Simula una tormenta de eventos de stock: el handler decodifica el JSON del
+evento y escribe una línea de log, como los receptores SSE y el monitor.
+Mide, en el hilo que procesa (el del event loop en los receptores):
+  - eventos/s con el log apagado (techo)
+  - print por evento a un archivo con buffer de línea (como una terminal)
+  - logging síncrono con FileHandler (lo que hacía basicConfig)
+  - log_estructurado: cola + hilo escritor JSON, sin muestreo, 1/100 y 1000/s
+y el tiempo hasta que el hilo escritor termina de vaciar la cola, las
+líneas escritas y las descartadas por cola llena.
+
+Uso: python bench_log_estructurado.py [--eventos 200000] [--capacidad 10000]
+"""
+
+import argparse
+import logging
+import os
+import random
+import tempfile
+import time
+
+from log_estructurado import RegistroAsincrono, RegistroEventos
+
+try:
+    from codec_json import loads
+except ImportError:  # semana-2 fuera del path
+    from json import loads
+
+
+def eventos_sinteticos(n: int) -> list[bytes]:
+    azar = random.Random(7)
+    return [
+        b'{"producto_id": %d, "stock_actual": %d, "almacen": "Tepic-Centro"}' % (azar.randint(1, 5000), azar.randint(0, 20))
+        for _ in range(n)
+    ]
+
+
+def logger_aislado(nombre: str) -> logging.Logger:
+    logger = logging.getLogger(f"bench.{nombre}")
+    logger.propagate = False
+    logger.handlers.clear()
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def escenario(nombre: str, eventos: list[bytes], carpeta: str, capacidad: int):
+    """Regresa (handler, cerrar) para el escenario; cerrar() -> (escritas, descartadas)."""
+    ruta = os.path.join(carpeta, nombre.replace("/", "-") + ".log")
+    if nombre == "sin log":
+        return (lambda crudo: loads(crudo)), (lambda: (0, 0))
+
+    if nombre == "print por evento":
+        salida = open(ruta, "w", buffering=1, encoding="utf-8")
+
+        def handler(crudo):
+            data = loads(crudo)
+            print(f"⚠️ Stock reportado: {data['stock_actual']} ({data['producto_id']})", file=salida)
+
+        def cerrar():
+            salida.close()
+            return len(eventos), 0
+        return handler, cerrar
+
+    logger = logger_aislado(nombre)
+    if nombre == "logging síncrono":
+        manejador = logging.FileHandler(ruta, encoding="utf-8")
+        manejador.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
+        logger.addHandler(manejador)
+
+        def handler(crudo):
+            data = loads(crudo)
+            logger.info(f"⚠️ Stock reportado: {data['stock_actual']} ({data['producto_id']})")
+
+        def cerrar():
+            manejador.close()
+            return len(eventos), 0
+        return handler, cerrar
+
+    registro = RegistroAsincrono(ruta, capacidad=capacidad, logger=logger).iniciar()
+    muestreo, por_segundo = {"cola + hilo": (1, None), "cola + 1/100": (100, None),
+                             "cola + 1000/s": (1, 1000)}[nombre]
+    por_evento = RegistroEventos(logger, muestreo=muestreo, por_segundo=por_segundo)
+
+    def handler(crudo):
+        data = loads(crudo)
+        por_evento.info("⚠️ Stock reportado", producto_id=data["producto_id"],
+                        stock_actual=data["stock_actual"])
+
+    def cerrar():
+        registro.detener()
+        metricas = registro.metricas()
+        return metricas["escritos"], metricas["descartados"]
+    return handler, cerrar
+
+
+def main():
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    args.add_argument("--eventos", type=int, default=200_000)
+    args.add_argument("--capacidad", type=int, default=10_000, help="registros en la cola del log")
+    opciones = args.parse_args()
+
+    eventos = eventos_sinteticos(opciones.eventos)
+    print(f"🧪 {opciones.eventos:,} eventos de stock; capacidad de la cola {opciones.capacidad:,}\n")
+    print(f"{'Escenario':<18} | {'Eventos/s':>10} | {'vs. sin log':>11} | {'Hasta vaciar':>12} | "
+          f"{'Escritas':>9} | {'Descartadas':>11}")
+    print("-" * 86)
+    base = None
+    with tempfile.TemporaryDirectory() as carpeta:
+        for nombre in ("sin log", "print por evento", "logging síncrono",
+                       "cola + hilo", "cola + 1/100", "cola + 1000/s"):
+            handler, cerrar = escenario(nombre, eventos, carpeta, opciones.capacidad)
+            inicio = time.perf_counter()
+            for crudo in eventos:
+                handler(crudo)
+            procesar = time.perf_counter() - inicio
+            escritas, descartadas = cerrar()
+            vaciar = time.perf_counter() - inicio
+            tasa = len(eventos) / procesar
+            base = base or tasa
+            print(f"{nombre:<18} | {tasa:>10,.0f} | {tasa / base:>10.0%} | {vaciar * 1000:>10.0f}ms | "
+                  f"{escritas:>9,} | {descartadas:>11,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+DIAGNÓSTICO DEL EVENT LOOP — EcoMarket
+
+Problema: MonitorInventario, ServicioPolling, ServicioSSE y ClienteSSEMultiplex
+corren para siempre en un solo event loop y solo reportan con print/logging.
+Cuando un callback acapara el loop (un observador INLINE pesado, decodificar
+un inventario enorme) no hay forma de verlo: solo se nota que el polling se
+atrasa y que el vigilante SSE declara muertos streams que estaban vivos.
+
+DECISIONES DE DISEÑO:
+1. LAG POR MUESTREO: una tarea duerme `intervalo` y mide cuánto tarde
+   despertó respecto a lo programado. Es exactamente el retraso que sufren
+   los timers del polling y del vigilante. Se guardan las últimas `muestras`
+   para p50/p95 y el máximo histórico; en cada muestra se cuentan las tareas
+   vivas (asyncio.all_tasks).
+
+2. TIEMPO POR PASO: mientras hay un diagnóstico activo se envuelve
+   Handle._run, lo que el loop ejecuta en cada vuelta, y solo se mide si el
+   handle es de un loop diagnosticado (los demás pagan un dict.get). Si el
+   callback es el paso de una Task se acumula por coroutine (__qualname__):
+   pasos, tiempo total y el paso más largo. Así se ve QUÉ coroutine no suelta
+   el loop, no solo que alguien lo hace.
+
+3. STACK DEL CALLBACK LENTO: cuando el callback termina ya no hay stack que
+   ver. Un hilo vigía revisa cada umbral/2 si el loop lleva más de `umbral`
+   en el mismo callback y en ese momento toma el frame del hilo del loop
+   (sys._current_frames): el stack señala la línea que está bloqueando. Si el
+   vigía no alcanzó a verlo, queda dónde se suspendió la coroutine (su cadena
+   de awaits).
+   Cada callback lento se registra con WARNING y su stack.
+
+4. SALIDA: metricas() regresa un snapshot (dict, como el pipeline y el
+   vigilante SSE) y cada `intervalo_log` segundos se escribe una línea de
+   resumen con logging.
+
+5. COMPARTIBLE: iniciar()/detener() cuentan referencias, así varios servicios
+   del mismo loop pueden recibir el mismo DiagnosticoLoop. Sin diagnóstico
+   activo Handle._run vuelve a ser el original: costo cero.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from asyncio import events
+from collections import deque
+
+log = logging.getLogger(__name__)
+
+_RUN_ORIGINAL = events.Handle._run
+_ACTIVOS: dict = {}                      # loop -> DiagnosticoLoop
+_DIR_ASYNCIO = os.path.dirname(asyncio.__file__)
+
+
+def _run_medido(handle):
+    diagnostico = _ACTIVOS.get(handle._loop)
+    if diagnostico is None:
+        return _RUN_ORIGINAL(handle)
+    actual = (handle, time.perf_counter())
+    diagnostico._actual = actual
+    try:
+        return _RUN_ORIGINAL(handle)
+    finally:
+        diagnostico._actual = None
+        diagnostico._medir(actual)
+
+
+def _describir(handle) -> tuple[str, asyncio.Task | None]:
+    """(nombre, tarea) del callback: la coroutine si es el paso de una Task."""
+    callback = handle._callback
+    tarea = getattr(callback, "__self__", None)
+    if isinstance(tarea, asyncio.Task):
+        coro = tarea.get_coro()
+        return getattr(coro, "__qualname__", repr(coro)), tarea
+    return getattr(callback, "__qualname__", None) or repr(callback), None
+
+
+def _stack_propio(frames) -> list[str]:
+    """Formatea el stack sin los frames de asyncio ni de este módulo."""
+    propios = [f for f in frames if not f.filename.startswith(_DIR_ASYNCIO) and f.filename != __file__]
+    return traceback.format_list(propios)
+
+
+def _stack_de_tarea(tarea: asyncio.Task) -> list[str]:
+    """Dónde quedó suspendida la tarea, siguiendo la cadena de awaits hasta el fondo."""
+    frames = []
+    coro = tarea.get_coro()
+    while getattr(coro, "cr_frame", None) is not None:
+        frames.append((coro.cr_frame, coro.cr_frame.f_lineno))
+        coro = coro.cr_await
+    return _stack_propio(traceback.StackSummary.extract(frames))
+
+
+class _PorCallback:
+    """Pasos, tiempo total y paso más largo de una coroutine o callback."""
+    __slots__ = ("pasos", "total", "maximo")
+
+    def __init__(self):
+        self.pasos = 0
+        self.total = 0.0
+        self.maximo = 0.0
+
+
+class DiagnosticoLoop:
+    def __init__(self, intervalo: float = 0.5, umbral: float = 0.1, intervalo_log: float | None = 60.0,
+                 muestras: int = 240, max_lentos: int = 20):
+        self.intervalo = intervalo
+        self.umbral = umbral
+        self.intervalo_log = intervalo_log
+        self.lag_max = 0.0
+        self.tareas = 0
+        self.tareas_max = 0
+        self.callbacks = 0
+        self.lentos = 0
+        self.ultimos_lentos: deque = deque(maxlen=max_lentos)
+        self._lags: deque = deque(maxlen=muestras)
+        self._por_callback: dict[str, _PorCallback] = {}
+        self._actual = None                # (handle, inicio) del callback en curso
+        self._stack_vigia = None           # (actual, stack) que tomó el hilo vigía
+        self._referencias = 0
+        self._loop = None
+        self._muestreo = None
+        self._fin = threading.Event()
+
+    def iniciar(self) -> None:
+        """Empieza a medir el loop en curso (llamar desde una coroutine del loop)."""
+        self._referencias += 1
+        if self._referencias > 1:
+            return
+        self._loop = asyncio.get_running_loop()
+        if _ACTIVOS.setdefault(self._loop, self) is not self:
+            self._referencias = 0
+            raise RuntimeError("Este event loop ya tiene otro DiagnosticoLoop activo")
+        events.Handle._run = _run_medido
+        self._muestreo = self._loop.create_task(self._muestrear(), name="diagnostico-loop")
+        # un Event por arranque: un vigía anterior que aún no despierta igual termina
+        self._fin = threading.Event()
+        threading.Thread(target=self._vigilar, args=(threading.get_ident(), self._fin),
+                         name="diagnostico-vigia", daemon=True).start()
+
+    def detener(self) -> None:
+        if self._referencias == 0:
+            return
+        self._referencias -= 1
+        if self._referencias:
+            return
+        _ACTIVOS.pop(self._loop, None)
+        if not _ACTIVOS:
+            events.Handle._run = _RUN_ORIGINAL
+        self._muestreo.cancel()
+        self._fin.set()
+        if self.intervalo_log:
+            log.info(self.linea())
+
+    async def _muestrear(self) -> None:
+        loop = asyncio.get_running_loop()
+        siguiente_log = loop.time() + self.intervalo_log if self.intervalo_log else None
+        while True:
+            esperado = loop.time() + self.intervalo
+            await asyncio.sleep(self.intervalo)
+            lag = max(0.0, loop.time() - esperado)
+            self._lags.append(lag)
+            self.lag_max = max(self.lag_max, lag)
+            self.tareas = len(asyncio.all_tasks(loop))
+            self.tareas_max = max(self.tareas_max, self.tareas)
+            if siguiente_log is not None and loop.time() >= siguiente_log:
+                siguiente_log = loop.time() + self.intervalo_log
+                log.info(self.linea())
+
+    def _vigilar(self, hilo_loop: int, fin: threading.Event) -> None:
+        # corre en su propio hilo: solo lee _actual y toma el frame del hilo del loop
+        while not fin.wait(self.umbral / 2):
+            actual = self._actual
+            if actual is None or time.perf_counter() - actual[1] < self.umbral:
+                continue
+            if self._stack_vigia is not None and self._stack_vigia[0] is actual:
+                continue
+            frame = sys._current_frames().get(hilo_loop)
+            if frame is not None:
+                self._stack_vigia = (actual, _stack_propio(traceback.extract_stack(frame)))
+
+    def _medir(self, actual) -> None:
+        handle, inicio = actual
+        duracion = time.perf_counter() - inicio
+        nombre, tarea = _describir(handle)
+        self.callbacks += 1
+        acumulado = self._por_callback.get(nombre)
+        if acumulado is None:
+            acumulado = self._por_callback[nombre] = _PorCallback()
+        acumulado.pasos += 1
+        acumulado.total += duracion
+        if duracion > acumulado.maximo:
+            acumulado.maximo = duracion
+        if duracion >= self.umbral:
+            self._registrar_lento(nombre, tarea, duracion, actual)
+
+    def _registrar_lento(self, nombre: str, tarea, duracion: float, actual) -> None:
+        vigia = self._stack_vigia
+        if vigia is not None and vigia[0] is actual:
+            stack = vigia[1]
+        elif tarea is not None:
+            stack = _stack_de_tarea(tarea)
+        else:
+            stack = []
+        self.lentos += 1
+        self.ultimos_lentos.append({
+            "callback": nombre, "duracion_ms": round(duracion * 1000, 3),
+            "cuando": time.time(), "stack": stack,
+        })
+        log.warning(f"[LOOP] {nombre} bloqueó el loop {duracion * 1000:.0f} ms "
+                    f"(umbral {self.umbral * 1000:.0f} ms)\n{''.join(stack).rstrip()}")
+
+    def _percentil(self, orden: list[float], p: float) -> float:
+        return orden[min(len(orden) - 1, int(p * len(orden)))] if orden else 0.0
+
+    def mas_lentos(self, n: int = 5) -> list[dict]:
+        """Las n coroutines/callbacks con el paso más largo."""
+        peores = sorted(self._por_callback.items(), key=lambda par: par[1].maximo, reverse=True)[:n]
+        return [
+            {"callback": nombre, "pasos": a.pasos, "max_ms": round(a.maximo * 1000, 3),
+             "promedio_ms": round(a.total / a.pasos * 1000, 3), "total_ms": round(a.total * 1000, 3)}
+            for nombre, a in peores
+        ]
+
+    def metricas(self) -> dict:
+        orden = sorted(self._lags)
+        return {
+            "lag_ms": {
+                "ultimo": round(self._lags[-1] * 1000, 3) if self._lags else None,
+                "p50": round(self._percentil(orden, 0.50) * 1000, 3),
+                "p95": round(self._percentil(orden, 0.95) * 1000, 3),
+                "max": round(self.lag_max * 1000, 3),
+            },
+            "tareas": self.tareas,
+            "tareas_max": self.tareas_max,
+            "callbacks": self.callbacks,
+            "lentos": self.lentos,
+            "umbral_ms": round(self.umbral * 1000, 3),
+            "mas_lentos": self.mas_lentos(),
+            "ultimo_lento": {k: v for k, v in self.ultimos_lentos[-1].items() if k != "stack"}
+            if self.ultimos_lentos else None,
+        }
+
+    def linea(self) -> str:
+        """Resumen de una línea para el log periódico."""
+        m = self.metricas()
+        peor = m["mas_lentos"][0] if m["mas_lentos"] else None
+        texto = (f"[LOOP] lag p50={m['lag_ms']['p50']:.1f}ms p95={m['lag_ms']['p95']:.1f}ms "
+                 f"max={m['lag_ms']['max']:.1f}ms | tareas={m['tareas']} (max {m['tareas_max']}) | "
+                 f"callbacks={m['callbacks']} lentos={m['lentos']}")
+        if peor:
+            texto += f" | paso más largo: {peor['callback']} {peor['max_ms']:.1f}ms"
+        return texto
@@ -0,0 +1,122 @@
+"""
+EJECUTOR DE OBSERVADORES — EcoMarket
+
+Problema: Observable.notificar ejecuta cada callback dentro del event loop.
+Si un observador hace trabajo pesado de CPU (reportes, análisis de payloads
+grandes), el loop se congela: el stream SSE deja de leerse y los timers del
+polling se atrasan.
+
+Solución: cada observador declara su MODO DE EJECUCIÓN al suscribirse:
+  - INLINE  -> se ejecuta en el loop (ideal para prints y trabajo ligero).
+  - HILO    -> se manda a un ThreadPoolExecutor (I/O bloqueante, librerías
+               que sueltan el GIL).
+  - PROCESO -> se manda a un ProcessPoolExecutor (CPU puro en Python).
+
+Trade-off: notificar() ya no espera a los observadores HILO/PROCESO, solo
+los agenda (submit tarda microsegundos). Los errores se reportan con un
+done-callback para que un observador roto no pase desapercibido.
+
+Para PROCESO el payload se serializa UNA sola vez por notificación
+(pickle protocolo 5) y esos mismos bytes viajan a todos los workers, en vez
+de re-serializar el dict completo por cada observador.
+"""
+
+import pickle
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+INLINE = "inline"
+HILO = "hilo"
+PROCESO = "proceso"
+MODOS_VALIDOS = (INLINE, HILO, PROCESO)
+
+
+def observador(modo=INLINE):
+    """Decorador para que la función declare su modo de ejecución."""
+    if modo not in MODOS_VALIDOS:
+        raise ValueError(f"Modo '{modo}' no válido. Usa uno de {MODOS_VALIDOS}")
+
+    def decorar(callback):
+        callback.modo_ejecucion = modo
+        return callback
+    return decorar
+
+
+def modo_de(callback, modo=None):
+    """Resuelve el modo: el explícito gana, luego el del decorador, luego INLINE."""
+    modo = modo or getattr(callback, "modo_ejecucion", INLINE)
+    if modo not in MODOS_VALIDOS:
+        raise ValueError(f"Modo '{modo}' no válido. Usa uno de {MODOS_VALIDOS}")
+    return modo
+
+
+def _ejecutar_en_proceso(callback, payload):
+    # Corre dentro del worker: deserializamos aquí, no en el event loop
+    return callback(pickle.loads(payload))
+
+
+class EjecutorObservadores:
+    """Despacha callbacks según su modo. Los pools se crean solo si se usan."""
+
+    def __init__(self, max_hilos=4, max_procesos=None):
+        self.max_hilos = max_hilos
+        self.max_procesos = max_procesos
+        self._hilos = None
+        self._procesos = None
+
+    def _pool(self, modo):
+        if modo == HILO:
+            if self._hilos is None:
+                self._hilos = ThreadPoolExecutor(
+                    max_workers=self.max_hilos, thread_name_prefix="observador"
+                )
+            return self._hilos
+        if self._procesos is None:
+            self._procesos = ProcessPoolExecutor(max_workers=self.max_procesos)
+        return self._procesos
+
+    def despachar(self, suscriptores, datos):
+        """
+        Ejecuta una lista de (callback, modo) con los mismos datos.
+        Regresa los futures de los observadores enviados a pools.
+        """
+        payload = None
+        futuros = []
+        for cb, modo in suscriptores:
+            if modo == INLINE:
+                try:
+                    cb(datos)
+                except Exception as e:
+                    # Un observador roto no debe detener a los demás
+                    print(f"❌ Error en observador: {e}")
+                continue
+
+            if modo == PROCESO:
+                if payload is None:
+                    payload = pickle.dumps(datos, protocol=5)
+                futuro = self._pool(PROCESO).submit(_ejecutar_en_proceso, cb, payload)
+            else:
+                futuro = self._pool(HILO).submit(cb, datos)
+
+            futuro.add_done_callback(self._reportar_error(cb))
+            futuros.append(futuro)
+        return futuros
+
+    @staticmethod
+    def _reportar_error(cb):
+        nombre = getattr(cb, "__name__", repr(cb))
+
+        def revisar(futuro):
+            if futuro.cancelled():
+                return
+            error = futuro.exception()
+            if error is not None:
+                print(f"❌ Error en observador '{nombre}': {error}")
+        return revisar
+
+    def cerrar(self, esperar=True):
+        """Libera los pools. Llamar al detener el monitor."""
+        for pool in (self._hilos, self._procesos):
+            if pool is not None:
+                pool.shutdown(wait=esperar, cancel_futures=not esperar)
+        self._hilos = None
+        self._procesos = None
@@ -0,0 +1,324 @@
+"""
+LOG ESTRUCTURADO SIN BLOQUEAR EL LOOP — EcoMarket
+
+Problema: monitor_pedidos.py escribe con logging.basicConfig directo a
+stderr desde el hilo del event loop, y los receptores SSE hacen un print con
+emoji por evento. En una tormenta de eventos (venta flash, replay tras un
+corte) la escritura a terminal o a archivo ocurre en el mismo hilo que lee
+el stream: el loop espera al disco y el lag crece con el volumen.
+
+DECISIONES DE DISEÑO:
+1. COLA + HILO ESCRITOR: configurar() instala en el logger raíz un handler
+   que solo mete el registro en una cola (SimpleQueue, sin el lock del
+   Handler). Un hilo aparte la vacía por lotes: serializa, escribe el lote
+   con un solo write() y hace un solo flush. Si la cola pasa de `capacidad`
+   el registro se descarta y se cuenta: el log nunca frena al loop.
+
+2. LO QUE EL HILO NO RESUELVE: en CPython el hilo escritor saca del loop la
+   ESPERA (write, flush, una terminal lenta), no la CPU: formatear sigue
+   compitiendo por el GIL. Por eso el camino caliente es barato a propósito
+   (punto 3) y los logs por evento se muestrean o se limitan (punto 5).
+
+3. FORMATO PEREZOSO Y SIN LogRecord: el handler no formatea; msg % args, la
+   fecha y el JSON se arman en el hilo escritor. RegistroEventos va más
+   lejos: si este handler es el ÚNICO en toda la cadena de loggers y nada
+   del camino puede cambiar el resultado (filtros, logger.disabled), encola
+   una tupla (hora, nivel, logger, msg, args, campos) sin crear el LogRecord
+   (la mitad del costo de un log.info). La cadena se revisa en cada llamada
+   (son 2 o 3 loggers), así que un addHandler/addFilter posterior se
+   respeta; si algo no cuadra, va por logger.log normal. Por eso en los
+   caminos calientes se escribe log.info("... %s", x) y no f-strings, y los
+   args deben ser valores que ya no cambian (ids, números, strings).
+
+4. JSON POR LÍNEA: {"ts", "nivel", "logger", "msg", ...campos}. Los campos
+   llegan con extra={"campos": {...}} o con RegistroEventos.info(msg, **campos)
+   y se serializan con codec_json (orjson si está; si semana-2 no está en el
+   path, con json de la librería estándar). exc_info sale como texto.
+
+5. MUESTREO Y LÍMITE PARA LOGS POR EVENTO: RegistroEventos decide antes de
+   construir nada: el primero y luego 1 de cada `muestreo`, y como máximo
+   `por_segundo` por mensaje (cubeta de fichas). Lo que se salta se cuenta y
+   viaja como "omitidos" en la siguiente línea de ese mensaje.
+
+6. CIERRE ORDENADO: detener() manda un centinela, espera a que el hilo
+   escriba lo pendiente y devuelve al logger sus handlers anteriores.
+"""
+
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+
+try:
+    from codec_json import dumps_bytes       # orjson si está instalado (semana-2)
+except ImportError:  # semana-2 fuera del path: JSON de la librería estándar
+    def dumps_bytes(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+_ATRIBUTOS_RECORD = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "campos"}
+_FIN = object()
+_segundo = (None, "")    # (segundo, texto) de la última fecha formateada
+
+
+def _fecha(creado: float) -> str:
+    global _segundo
+    segundo = int(creado)
+    if _segundo[0] != segundo:
+        _segundo = (segundo, time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(segundo)))
+    return f"{_segundo[1]}.{int((creado - segundo) * 1000):03d}"
+
+
+def _serializar(datos: dict) -> bytes:
+    try:
+        return dumps_bytes(datos) + b"\n"
+    except (TypeError, ValueError):
+        seguro = {k: v if isinstance(v, (str, int, float, bool, type(None))) else repr(v)
+                  for k, v in datos.items()}
+        return dumps_bytes(seguro) + b"\n"
+
+
+def _mensaje(msg, args) -> str:
+    if not args:
+        return str(msg)
+    if len(args) == 1 and isinstance(args[0], dict) and args[0]:
+        args = args[0]                # log.info("%(id)s", {"id": 1}), igual que LogRecord
+    try:
+        return str(msg) % args
+    except (TypeError, ValueError, KeyError):
+        return f"{msg} {args!r}"      # args que no cuadran con el formato
+
+
+def a_json(registro) -> bytes:
+    """Una línea JSON (con \\n) para un LogRecord o una tupla de RegistroEventos."""
+    if isinstance(registro, tuple):
+        creado, nivel, logger, msg, args, campos = registro
+        datos = {"ts": _fecha(creado), "nivel": logging.getLevelName(nivel), "logger": logger,
+                 "msg": _mensaje(msg, args)}
+        if campos:
+            datos.update(campos)
+        return _serializar(datos)
+
+    datos = {"ts": _fecha(registro.created), "nivel": registro.levelname, "logger": registro.name,
+             "msg": _mensaje(registro.msg, registro.args)}
+    # extra={...} suelto y extra={"campos": {...}} terminan como llaves del JSON
+    for clave, valor in registro.__dict__.items():
+        if clave not in _ATRIBUTOS_RECORD:
+            datos[clave] = valor
+    campos = getattr(registro, "campos", None)
+    if campos:
+        datos.update(campos)
+    if registro.exc_info:
+        datos["error"] = logging.Formatter().formatException(registro.exc_info)
+    return _serializar(datos)
+
+
+class ManejadorCola(logging.Handler):
+    """Handler del lado del loop: filtra y encola, nada más."""
+
+    def __init__(self, cola: queue.SimpleQueue, capacidad: int, nivel: int = logging.NOTSET):
+        super().__init__(nivel)
+        self.cola = cola
+        self.capacidad = capacidad
+        self.encolados = 0
+        self.descartados = 0
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        # sin acquire(): la cola ya es thread-safe y el lock por registro se nota en ráfagas
+        if not self.filter(record):
+            return False
+        self.emit(record)
+        return True
+
+    def emit(self, record) -> None:
+        """Encola un LogRecord (o la tupla de RegistroEventos) si hay lugar."""
+        if self.cola.qsize() >= self.capacidad:
+            self.descartados += 1
+            return
+        self.cola.put(record)
+        self.encolados += 1
+
+
+class RegistroAsincrono:
+    def __init__(self, destino=None, nivel: int = logging.INFO, capacidad: int = 10_000,
+                 lote: int = 512, logger: logging.Logger | None = None):
+        self.destino = destino            # None = stderr, str = ruta (append), o un stream binario
+        self.nivel = nivel
+        self.lote = lote
+        self.logger = logger or logging.getLogger()
+        self.escritos = 0
+        self.errores_escritura = 0
+        self._cola = queue.SimpleQueue()
+        self.manejador = ManejadorCola(self._cola, capacidad)
+        self._anteriores: list[logging.Handler] = []
+        self._nivel_anterior = None
+        self._archivo = None
+        self._hilo: threading.Thread | None = None
+
+    def iniciar(self) -> "RegistroAsincrono":
+        if isinstance(self.destino, str):
+            self._archivo = salida = open(self.destino, "ab")
+        elif self.destino is None:
+            salida = sys.stderr.buffer
+        else:
+            salida = self.destino
+        self._anteriores = list(self.logger.handlers)
+        for manejador in self._anteriores:
+            self.logger.removeHandler(manejador)
+        self._nivel_anterior = self.logger.level
+        self.logger.addHandler(self.manejador)
+        self.logger.setLevel(self.nivel)
+        self._hilo = threading.Thread(target=self._escribir, args=(salida,), name="log-escritor", daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self, timeout: float = 5.0) -> None:
+        """Escribe lo pendiente y devuelve el logger como estaba."""
+        if self._hilo is None:
+            return
+        self.logger.removeHandler(self.manejador)
+        for manejador in self._anteriores:
+            self.logger.addHandler(manejador)
+        self.logger.setLevel(self._nivel_anterior)
+        self._cola.put(_FIN)
+        self._hilo.join(timeout)
+        self._hilo = None
+        if self._archivo is not None:
+            self._archivo.close()
+
+    def _escribir(self, salida) -> None:
+        while True:
+            registros = [self._cola.get()]
+            try:
+                while len(registros) < self.lote:
+                    registros.append(self._cola.get_nowait())
+            except queue.Empty:
+                pass
+            fin = False
+            lineas = []
+            for registro in registros:
+                if registro is _FIN:
+                    fin = True
+                else:
+                    lineas.append(a_json(registro))
+            if lineas:
+                try:
+                    salida.write(b"".join(lineas))
+                    salida.flush()
+                    self.escritos += len(lineas)
+                except (OSError, ValueError):
+                    self.errores_escritura += len(lineas)   # disco lleno o stream cerrado: se pierde el lote
+            if fin:
+                return
+
+    def metricas(self) -> dict:
+        return {
+            "encolados": self.manejador.encolados,
+            "escritos": self.escritos,
+            "descartados": self.manejador.descartados,
+            "pendientes": self._cola.qsize(),
+            "errores_escritura": self.errores_escritura,
+        }
+
+
+def configurar(destino=None, nivel: int = logging.INFO, capacidad: int = 10_000,
+               lote: int = 512) -> RegistroAsincrono:
+    """Reemplaza basicConfig: JSON por línea, escrito desde un hilo aparte."""
+    return RegistroAsincrono(destino, nivel, capacidad, lote).iniciar()
+
+
+def _manejador_directo(logger: logging.Logger) -> ManejadorCola | None:
+    """
+    El ManejadorCola que recibiría los registros de `logger`, si es el único
+    handler de toda la cadena (hasta el primer propagate=False) y ni el
+    logger (disabled, filtros) ni el handler (filtros) pueden descartarlos.
+    """
+    if logger.disabled or logger.filters:
+        return None
+    encontrado = None
+    actual = logger
+    while actual is not None:
+        for manejador in actual.handlers:
+            if encontrado is not None or not isinstance(manejador, ManejadorCola) or manejador.filters:
+                return None
+            encontrado = manejador
+        if not actual.propagate:
+            break
+        actual = actual.parent
+    return encontrado
+
+
+class RegistroEventos:
+    """
+    Logs por evento con muestreo y límite por segundo, decididos antes de
+    construir el registro. Pensado para un solo hilo (el del loop); desde
+    varios hilos funciona, pero los conteos pueden desviarse un poco.
+    """
+
+    def __init__(self, logger, muestreo: int = 1, por_segundo: float | None = None):
+        self.logger = logger if isinstance(logger, logging.Logger) else logging.getLogger(logger)
+        self.muestreo = max(1, muestreo)
+        self.por_segundo = por_segundo
+        self.registrados = 0
+        self.muestreados = 0              # saltados por muestreo
+        self.limitados = 0                # saltados por el límite por segundo
+        self._vistos: dict[str, int] = {}
+        self._fichas: dict[str, list] = {}   # msg -> [fichas, último relleno]
+        self._omitidos: dict[str, int] = {}
+
+    def _hay_ficha(self, msg: str) -> bool:
+        ahora = time.monotonic()
+        cubeta = self._fichas.get(msg)
+        if cubeta is None:
+            cubeta = self._fichas[msg] = [self.por_segundo, ahora]
+        else:
+            cubeta[0] = min(self.por_segundo, cubeta[0] + (ahora - cubeta[1]) * self.por_segundo)
+            cubeta[1] = ahora
+        if cubeta[0] < 1:
+            return False
+        cubeta[0] -= 1
+        return True
+
+    def registrar(self, nivel: int, msg: str, *args, **campos) -> bool:
+        """True si el registro se mandó al log."""
+        return self._registrar(nivel, msg, args, campos)
+
+    def _registrar(self, nivel: int, msg: str, args: tuple, campos: dict) -> bool:
+        # recibe args/campos ya empacados: info() no paga volver a desempacarlos
+        if not self.logger.isEnabledFor(nivel):
+            return False
+        if self.muestreo > 1:
+            visto = self._vistos.get(msg, 0)
+            self._vistos[msg] = visto + 1
+            if visto % self.muestreo:
+                self.muestreados += 1
+                self._omitidos[msg] = self._omitidos.get(msg, 0) + 1
+                return False
+        if self.por_segundo is not None and not self._hay_ficha(msg):
+            self.limitados += 1
+            self._omitidos[msg] = self._omitidos.get(msg, 0) + 1
+            return False
+        if self._omitidos:
+            omitidos = self._omitidos.pop(msg, 0)
+            if omitidos:
+                campos["omitidos"] = omitidos
+        self.registrados += 1
+        manejador = _manejador_directo(self.logger)
+        if manejador is not None and nivel >= manejador.level:
+            manejador.emit((time.time(), nivel, self.logger.name, msg, args, campos))
+        else:
+            self.logger.log(nivel, msg, *args, extra={"campos": campos} if campos else None)
+        return True
+
+    def debug(self, msg: str, *args, **campos) -> bool:
+        return self._registrar(logging.DEBUG, msg, args, campos)
+
+    def info(self, msg: str, *args, **campos) -> bool:
+        return self._registrar(logging.INFO, msg, args, campos)
+
+    def warning(self, msg: str, *args, **campos) -> bool:
+        return self._registrar(logging.WARNING, msg, args, campos)
+
+    def metricas(self) -> dict:
+        return {"registrados": self.registrados, "muestreados": self.muestreados, "limitados": self.limitados}
@@ -0,0 +1,100 @@
+import asyncio
+import logging
+import time
+from asyncio import events
+
+import pytest
+from diagnostico_loop import DiagnosticoLoop
+
+
+def bloquear(segundos):
+    time.sleep(segundos)        # trabajo síncrono dentro del loop
+
+
+async def observador_pesado():
+    await asyncio.sleep(0.05)
+    bloquear(0.2)
+
+
+async def observador_ligero():
+    for _ in range(20):
+        await asyncio.sleep(0.005)
+
+
+def correr(escenario, **opciones):
+    diagnostico = DiagnosticoLoop(**{"intervalo": 0.02, "umbral": 0.1, "intervalo_log": None, **opciones})
+
+    async def principal():
+        diagnostico.iniciar()
+        try:
+            await escenario()
+        finally:
+            diagnostico.detener()
+
+    asyncio.run(principal())
+    return diagnostico
+
+
+def test_callback_lento_con_su_stack():
+    async def escenario():
+        await asyncio.gather(observador_pesado(), observador_ligero(), asyncio.sleep(0.35))
+
+    diagnostico = correr(escenario)
+    assert diagnostico.lentos == 1
+    lento = diagnostico.ultimos_lentos[-1]
+    assert lento["callback"] == "observador_pesado" and lento["duracion_ms"] >= 190
+    # el vigía tomó el stack mientras el loop seguía bloqueado: señala la línea culpable
+    assert any("bloquear" in linea and "time.sleep" in linea for linea in lento["stack"])
+
+
+def test_lag_tareas_y_pasos_por_coroutine():
+    async def escenario():
+        await asyncio.gather(observador_pesado(), observador_ligero(), asyncio.sleep(0.35))
+
+    metricas = correr(escenario).metricas()
+    assert metricas["lag_ms"]["max"] >= 150
+    assert metricas["tareas_max"] >= 3
+    peor, *resto = metricas["mas_lentos"]
+    assert peor["callback"] == "observador_pesado" and peor["max_ms"] >= 190
+    ligero = next(m for m in resto if m["callback"] == "observador_ligero")
+    assert ligero["pasos"] == 21 and ligero["max_ms"] < 50
+
+
+def test_sin_bloqueos_no_hay_lentos_y_se_restaura_handle_run():
+    original = events.Handle._run
+    diagnostico = correr(observador_ligero)
+    assert diagnostico.lentos == 0 and diagnostico.callbacks > 0
+    assert events.Handle._run is original
+
+
+def test_compartido_entre_servicios_y_linea_periodica(caplog):
+    diagnostico = DiagnosticoLoop(intervalo=0.01, intervalo_log=0.05)
+
+    async def servicio():
+        diagnostico.iniciar()
+        try:
+            await asyncio.sleep(0.12)
+        finally:
+            diagnostico.detener()
+
+    async def escenario():
+        await asyncio.gather(servicio(), servicio())
+
+    with caplog.at_level(logging.INFO, logger="diagnostico_loop"):
+        asyncio.run(escenario())
+    assert diagnostico._referencias == 0
+    lineas = [r.getMessage() for r in caplog.records if r.getMessage().startswith("[LOOP] lag")]
+    assert len(lineas) >= 2 and "tareas=" in lineas[0]
+
+
+def test_un_diagnostico_por_loop():
+    async def escenario():
+        primero = DiagnosticoLoop(intervalo_log=None)
+        primero.iniciar()
+        try:
+            with pytest.raises(RuntimeError):
+                DiagnosticoLoop().iniciar()
+        finally:
+            primero.detener()
+
+    asyncio.run(escenario())
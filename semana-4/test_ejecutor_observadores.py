@@ -0,0 +1,82 @@
+import threading
+import time
+
+import pytest
+from ejecutor_observadores import (
+    EjecutorObservadores, INLINE, HILO, PROCESO, observador, modo_de
+)
+
+
+def contar_productos(datos):
+    return len(datos["productos"])
+
+
+@pytest.fixture
+def ejecutor():
+    ej = EjecutorObservadores(max_hilos=2, max_procesos=1)
+    yield ej
+    ej.cerrar()
+
+
+def test_modo_por_decorador_y_explicito():
+    @observador(PROCESO)
+    def pesado(datos):
+        pass
+
+    assert modo_de(pesado) == PROCESO
+    assert modo_de(pesado, HILO) == HILO
+    assert modo_de(print) == INLINE
+    with pytest.raises(ValueError):
+        modo_de(print, "gpu")
+
+
+def test_inline_se_ejecuta_antes_de_regresar(ejecutor):
+    recibidos = []
+    ejecutor.despachar([(recibidos.append, INLINE)], {"id": 1})
+    assert recibidos == [{"id": 1}]
+
+
+def test_hilo_no_bloquea_el_despacho(ejecutor):
+    liberar = threading.Event()
+
+    def lento(datos):
+        liberar.wait(2)
+        return datos
+
+    inicio = time.perf_counter()
+    futuros = ejecutor.despachar([(lento, HILO)], "ok")
+    assert time.perf_counter() - inicio < 0.05
+    liberar.set()
+    assert futuros[0].result(timeout=2) == "ok"
+
+
+def test_error_en_observador_no_detiene_a_los_demas(ejecutor):
+    recibidos = []
+
+    def roto(datos):
+        raise RuntimeError("falla")
+
+    ejecutor.despachar([(roto, INLINE), (recibidos.append, INLINE)], 7)
+    assert recibidos == [7]
+
+
+def test_proceso_recibe_payload_serializado(ejecutor):
+    datos = {"productos": [{"id": i} for i in range(100)]}
+    futuros = ejecutor.despachar([(contar_productos, PROCESO)], datos)
+    assert futuros[0].result(timeout=30) == 100
+
+
+def test_cerrar_sin_esperar_no_bloquea_y_cancela_lo_encolado():
+    ej = EjecutorObservadores(max_hilos=1)
+    liberar = threading.Event()
+
+    def lento(datos):
+        liberar.wait(2)
+
+    corriendo, encolado = ej.despachar([(lento, HILO), (lento, HILO)], None)
+    inicio = time.perf_counter()
+    ej.cerrar(esperar=False)
+    assert time.perf_counter() - inicio < 0.05
+    assert encolado.cancelled()
+    liberar.set()
+    corriendo.result(timeout=2)
@@ -0,0 +1,141 @@
+import io
+import json
+import logging
+import threading
+import time
+
+import pytest
+from log_estructurado import RegistroAsincrono, RegistroEventos
+
+
+class Destino(io.BytesIO):
+    """Stream binario que puede atorarse (disco lento) hasta que se libere."""
+
+    def __init__(self):
+        super().__init__()
+        self.libre = threading.Event()
+        self.libre.set()
+
+    def write(self, datos):
+        self.libre.wait(5)
+        return super().write(datos)
+
+    def lineas(self):
+        return [json.loads(linea) for linea in self.getvalue().splitlines()]
+
+
+class HiloQueFormatea:
+    def __str__(self):
+        return threading.current_thread().name
+
+
+@pytest.fixture
+def destino():
+    return Destino()
+
+
+def iniciar(destino, **opciones):
+    logger = logging.getLogger(f"prueba.{id(destino)}")
+    logger.propagate = False
+    return RegistroAsincrono(destino, logger=logger, **opciones).iniciar(), logger
+
+
+def test_json_por_linea_con_campos_y_formato_en_el_hilo_escritor(destino):
+    registro, logger = iniciar(destino)
+    logger.info("stock de %s: %d", "miel", 3, extra={"campos": {"producto_id": 7}})
+    logger.warning("formateado en %s", HiloQueFormatea())
+    try:
+        raise ValueError("roto")
+    except ValueError:
+        logger.exception("fallo al procesar")
+    registro.detener()
+    primera, segunda, tercera = destino.lineas()
+    assert primera["msg"] == "stock de miel: 3" and primera["producto_id"] == 7
+    assert primera["nivel"] == "INFO" and primera["logger"] == logger.name and "ts" in primera
+    assert segunda["msg"] == "formateado en log-escritor"      # el loop no pagó el formato
+    assert "ValueError: roto" in tercera["error"]
+    assert registro.metricas()["escritos"] == 3
+
+
+def test_cola_llena_descarta_sin_bloquear(destino):
+    registro, logger = iniciar(destino, capacidad=5)
+    destino.libre.clear()                   # el disco se "atora"
+    inicio = time.perf_counter()
+    for i in range(200):
+        logger.info("evento %d", i)
+    assert time.perf_counter() - inicio < 0.5
+    destino.libre.set()
+    registro.detener()
+    metricas = registro.metricas()
+    assert metricas["descartados"] > 0
+    assert metricas["escritos"] + metricas["descartados"] == 200
+    assert len(destino.lineas()) == metricas["escritos"]
+
+
+def test_detener_devuelve_los_handlers(destino):
+    logger = logging.getLogger("prueba.handlers")
+    anterior = logging.NullHandler()
+    logger.addHandler(anterior)
+    registro = RegistroAsincrono(destino, logger=logger).iniciar()
+    assert logger.handlers == [registro.manejador]
+    registro.detener()
+    assert logger.handlers == [anterior]
+
+
+def test_muestreo_con_conteo_de_omitidos(destino):
+    registro, logger = iniciar(destino)
+    eventos = RegistroEventos(logger, muestreo=100)
+    for i in range(1000):
+        eventos.info("precio actualizado", producto_id=i)
+    registro.detener()
+    lineas = destino.lineas()
+    assert [l["producto_id"] for l in lineas] == list(range(0, 1000, 100))
+    assert "omitidos" not in lineas[0] and lineas[1]["omitidos"] == 99
+    assert eventos.metricas() == {"registrados": 10, "muestreados": 990, "limitados": 0}
+
+
+def test_limite_por_segundo_y_nivel_deshabilitado(destino):
+    registro, logger = iniciar(destino)
+    eventos = RegistroEventos(logger, por_segundo=20)
+    for _ in range(1000):
+        eventos.info("stock reportado")
+    assert not eventos.debug("no se crea el LogRecord")
+    registro.detener()
+    assert 20 <= eventos.registrados <= 25
+    assert eventos.limitados == 1000 - eventos.registrados
+
+
+class Captura(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.registros = []
+
+    def emit(self, record):
+        self.registros.append(record.getMessage())
+
+
+def test_atajo_respeta_filtros_disabled_y_otros_handlers(destino):
+    padre = logging.getLogger(f"prueba.padre.{id(destino)}")
+    padre.propagate = False
+    captura = Captura()
+    padre.addHandler(captura)
+    hijo = padre.getChild("hijo")          # propaga al padre
+    registro = RegistroAsincrono(destino, logger=hijo).iniciar()
+    eventos = RegistroEventos(hijo)
+
+    eventos.info("los dos %d", 1)           # handler del padre en la cadena: no hay atajo
+    padre.removeHandler(captura)
+    eventos.info("solo la cola %d", 2)      # ahora sí es el único destino
+    hijo.addFilter(lambda r: False)
+    eventos.info("filtrado %d", 3)
+    hijo.filters.clear()
+    hijo.disabled = True
+    eventos.info("deshabilitado %d", 4)
+    hijo.disabled = False
+    segundo = Captura()
+    hijo.addHandler(segundo)                # añadido después del primer atajo
+    eventos.info("otra vez los dos %d", 5)
+    registro.detener()
+
+    assert [l["msg"] for l in destino.lineas()] == ["los dos 1", "solo la cola 2", "otra vez los dos 5"]
+    assert captura.registros == ["los dos 1"] and segundo.registros == ["otra vez los dos 5"]
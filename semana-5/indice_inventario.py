@@ -0,0 +1,175 @@
+"""
+ÍNDICE EN MEMORIA DEL INVENTARIO — EcoMarket
+
+Problema: cada observador recorría inventario["productos"] completo con list
+comprehensions en cada actualización para encontrar lo BAJO_MINIMO, y
+ModuloCompras además agrupaba por almacén. Preguntar "todo lo BAJO_MINIMO del
+almacén X" costaba O(catálogo).
+
+DECISIONES DE DISEÑO:
+1. REGISTROS CON __slots__: ItemInventario guarda solo los campos que usamos,
+   sin el __dict__ de cada producto (mucho menos memoria que un dict por item).
+
+2. ÍNDICES SECUNDARIOS: status, almacén, (status, almacén) y las razones
+   stock/stock_minimo DISTINTAS en una lista ordenada, cada una con su cubeta
+   de ids (dict, en orden de llegada). Muchos productos con la misma razón
+   (INFINITO sin stock_minimo, o stock/mínimo uniforme) no cuestan nada:
+   quitar uno es borrar de su cubeta, sin recorrer ni mover una lista larga.
+   Las consultas cuestan O(resultado).
+
+3. ACTUALIZACIÓN INCREMENTAL: aplicar() compara cada producto contra su registro
+   y solo re-indexa los que cambiaron; los que desaparecen se sacan de todos
+   los índices. Los productos que cambiaron quedan en `ultimos_cambios` para
+   que los observadores procesen solo el delta.
+"""
+
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+INFINITO = float("inf")
+
+
+class ItemInventario:
+    __slots__ = ("id", "nombre", "stock", "stock_minimo", "status", "almacen")
+
+    def __init__(self, id, nombre, stock, stock_minimo, status, almacen):
+        self.id = id
+        self.nombre = nombre
+        self.stock = stock
+        self.stock_minimo = stock_minimo
+        self.status = status
+        self.almacen = almacen
+
+    @classmethod
+    def desde_dict(cls, p: dict) -> "ItemInventario":
+        return cls(
+            p["id"], p.get("nombre"), p.get("stock", 0), p.get("stock_minimo", 0),
+            p.get("status"), p.get("almacen"),
+        )
+
+    @property
+    def razon(self) -> float:
+        # stock / mínimo: < 1 significa que ya está por debajo
+        return self.stock / self.stock_minimo if self.stock_minimo else INFINITO
+
+    def _campos(self) -> tuple:
+        return (self.nombre, self.stock, self.stock_minimo, self.status, self.almacen)
+
+    def __repr__(self):
+        return f"ItemInventario(id={self.id!r}, stock={self.stock}/{self.stock_minimo}, status={self.status!r})"
+
+
+class IndiceInventario:
+    def __init__(self):
+        self._items: dict[int, ItemInventario] = {}
+        self._por_status: dict[str, dict[int, ItemInventario]] = defaultdict(dict)
+        self._por_almacen: dict[str, dict[int, ItemInventario]] = defaultdict(dict)
+        self._por_status_almacen: dict[tuple, dict[int, ItemInventario]] = defaultdict(dict)
+        # razones distintas, ordenadas, y una cubeta de ids por razón (los ids pueden
+        # ser int o str, así que no se comparan entre sí: no entran en la clave)
+        self._razones: list[float] = []
+        self._por_razon: dict[float, dict] = {}
+        self.ultimos_cambios: list[dict] = []
+        self.ultimos_eliminados: list[int] = []
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, producto_id):
+        return producto_id in self._items
+
+    def get(self, producto_id):
+        return self._items.get(producto_id)
+
+    # --- Mantenimiento ---
+
+    def _indexar(self, item: ItemInventario) -> None:
+        self._items[item.id] = item
+        self._por_status[item.status][item.id] = item
+        self._por_almacen[item.almacen][item.id] = item
+        self._por_status_almacen[(item.status, item.almacen)][item.id] = item
+        razon = item.razon
+        cubeta = self._por_razon.get(razon)
+        if cubeta is None:
+            cubeta = self._por_razon[razon] = {}
+            insort(self._razones, razon)
+        cubeta[item.id] = None
+
+    def _desindexar(self, item: ItemInventario) -> None:
+        del self._items[item.id]
+        for indice, clave in (
+            (self._por_status, item.status),
+            (self._por_almacen, item.almacen),
+            (self._por_status_almacen, (item.status, item.almacen)),
+        ):
+            grupo = indice[clave]
+            del grupo[item.id]
+            if not grupo:
+                del indice[clave]
+        razon = item.razon
+        cubeta = self._por_razon[razon]
+        del cubeta[item.id]
+        if not cubeta:
+            del self._por_razon[razon]
+            del self._razones[bisect_left(self._razones, razon)]
+
+    def aplicar(self, productos: list[dict], completo: bool = True) -> list[dict]:
+        """
+        Incorpora productos nuevos/modificados. Con completo=True la lista es el
+        inventario entero y lo que no venga se elimina. Regresa los cambios.
+        """
+        cambios = []
+        vistos = set()
+        for p in productos:
+            nuevo = ItemInventario.desde_dict(p)
+            vistos.add(nuevo.id)
+            actual = self._items.get(nuevo.id)
+            if actual is not None:
+                if actual._campos() == nuevo._campos():
+                    continue
+                self._desindexar(actual)
+            self._indexar(nuevo)
+            cambios.append(p)
+
+        eliminados = []
+        if completo and len(vistos) != len(self._items):
+            eliminados = [pid for pid in self._items if pid not in vistos]
+            for pid in eliminados:
+                self._desindexar(self._items[pid])
+
+        self.ultimos_cambios = cambios
+        self.ultimos_eliminados = eliminados
+        return cambios
+
+    # --- Consultas O(resultado) ---
+
+    def buscar(self, status: str | None = None, almacen: str | None = None) -> list[ItemInventario]:
+        if status is not None and almacen is not None:
+            grupo = self._por_status_almacen.get((status, almacen), {})
+        elif status is not None:
+            grupo = self._por_status.get(status, {})
+        elif almacen is not None:
+            grupo = self._por_almacen.get(almacen, {})
+        else:
+            grupo = self._items
+        return list(grupo.values())
+
+    def contar(self, status: str | None = None, almacen: str | None = None) -> int:
+        if status is not None and almacen is not None:
+            return len(self._por_status_almacen.get((status, almacen), ()))
+        if status is not None:
+            return len(self._por_status.get(status, ()))
+        if almacen is not None:
+            return len(self._por_almacen.get(almacen, ()))
+        return len(self._items)
+
+    def almacenes(self, status: str | None = None) -> list[str]:
+        if status is None:
+            return sorted(self._por_almacen, key=str)
+        return sorted({a for (s, a) in self._por_status_almacen if s == status}, key=str)
+
+    def por_razon(self, minimo: float = 0.0, maximo: float = 1.0) -> list[ItemInventario]:
+        """Productos con minimo <= stock/stock_minimo < maximo, del más crítico al menos."""
+        inicio = bisect_left(self._razones, minimo)
+        fin = bisect_left(self._razones, maximo)
+        return [self._items[pid] for razon in self._razones[inicio:fin] for pid in self._por_razon[razon]]
@@ -21,14 +21,45 @@ RESUMEN DE DECISIONES DE DISEÑO:
 5. POLLING ADAPTATIVO: Incremento por inactividad -> Trade-off: Latencia vs. Eficiencia. 
    Decisión: Si tras varios ciclos no hay cambios, el cliente baja la frecuencia de 
    muestreo automáticamente para ahorrar recursos y batería.
+
+6. ALERTAS POR TRANSICIÓN: 'ModuloAlertas' solo avisa cuando un producto entra a
+   BAJO_MINIMO, agrupa en ventanas y envía en paralelo con un outbox en disco
+   (ver pipeline_alertas.py). Un quiebre masivo ya no son miles de POST en serie.
+
+7. SNAPSHOT EN DISCO: El último inventario y su ETag se guardan en SQLite
+   (snapshot_inventario.py). Al reiniciar, el primer GET ya lleva If-None-Match
+   y solo se notifica lo que cambió de verdad: sin tormenta de alertas falsas.
+
+8. ÍNDICE EN MEMORIA: El monitor mantiene un IndiceInventario por delta
+   (indice_inventario.py); los observadores consultan "BAJO_MINIMO en almacén X"
+   en O(resultado) en lugar de recorrer todo el catálogo en cada actualización.
+
+9. FORMATO NEGOCIADO: El GET pide MessagePack (si msgpack está instalado) con
+   JSON como alternativa, y se decodifica según el Content-Type que conteste el
+   servidor (negociacion_formato.py). Un servidor solo-JSON sigue funcionando.
+
+10. DIAGNÓSTICO DEL LOOP: con diagnostico=DiagnosticoLoop() (semana-4) se mide
+    el lag del event loop y qué observador lo acapara; cada minuto queda una
+    línea [LOOP] en el log y los callbacks lentos salen con su stack.
+
+11. LOG SIN BLOQUEAR: main() usa log_estructurado.configurar() (semana-4) en vez
+    de basicConfig: el loop solo encola el registro y un hilo escribe JSON por
+    línea a stderr por lotes. Si el disco o la terminal se atoran, se descartan
+    registros (contados) en lugar de frenar el polling.
 """
 
 import asyncio
 import logging
 from abc import ABC, abstractmethod
-from datetime import datetime, timezone
 
 import aiohttp
+from diagnostico_loop import DiagnosticoLoop
+from log_estructurado import configurar
+from negociacion_formato import aceptar, decodificar
+
+from indice_inventario import IndiceInventario
+from pipeline_alertas import PipelineAlertas
+from snapshot_inventario import SnapshotInventario
 
 # Datos de conexión al servidor
 BASE_URL       = "http://ecomarket.local/api/v1"
@@ -37,11 +68,8 @@ INTERVALO_BASE = 5                # cada cuántos segundos consultamos
 INTERVALO_MAX  = 60               # no esperamos más de esto aunque haya backoff
 TIMEOUT        = 10               # si en 10 seg no responde, timeout
 
-# Para ver los logs en consola con fecha y nivel
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s"
-)
+# Los logs salen como JSON por línea desde un hilo aparte: main() llama a
+# configurar() en lugar de logging.basicConfig (ver nota 11)
 log = logging.getLogger(__name__)
 
 
@@ -57,12 +85,25 @@ class MonitorInventario:
     # Esta clase es el Observable del patrón Observer
     # mantiene la lista de quién quiere recibir notificaciones
 
-    def __init__(self):
+    def __init__(self, snapshot: SnapshotInventario | None = None,
+                 diagnostico: DiagnosticoLoop | None = None):
         self._observadores: list[Observador] = []
         self._ultimo_etag:   str | None = None   # para el header If-None-Match
         self._ultimo_estado: dict | None = None  # comparamos contra esto para ver si hubo cambio
+        # si hay snapshot en disco, arrancamos en caliente con su ETag; los productos
+        # se leen hasta que llegue un 200 y haya que comparar (ver _estado_previo)
+        self._snapshot = snapshot
+        # índice en memoria que los observadores consultan en vez de recorrer la lista
+        self.indice = IndiceInventario()
+        self._estado_cargado = snapshot is None
+        if snapshot is not None:
+            self._ultimo_etag = snapshot.etag
+            if self._ultimo_etag:
+                log.info(f"Arranque en caliente con ETag {self._ultimo_etag}")
         self._ejecutando:    bool = False
         self._intervalo:     float = INTERVALO_BASE
+        # lag del loop y callbacks lentos (observadores que no sueltan el loop)
+        self._diagnostico = diagnostico
 
     def suscribir(self, obs: Observador) -> None:
         # evitamos duplicados por si alguien suscribe el mismo observador dos veces
@@ -89,7 +130,7 @@ class MonitorInventario:
         # construimos los headers, el ETag solo va si ya tenemos uno guardado
         headers = {
             "Authorization": f"Bearer {TOKEN}",
-            "Accept": "application/json",
+            "Accept": aceptar(),
         }
         if self._ultimo_etag:
             headers["If-None-Match"] = self._ultimo_etag
@@ -101,14 +142,13 @@ class MonitorInventario:
                 async with session.get(f"{BASE_URL}/inventario", headers=headers) as resp:
 
                     if resp.status == 200:
-                        body = await resp.json()
+                        body = decodificar(await resp.read(), resp.headers.get("Content-Type"))
                         # validamos que venga el campo productos antes de usarlo
                         if body.get("productos") is None:
                             log.warning("Respuesta 200 sin campo 'productos', se ignora")
                             return None
                         # guardamos el nuevo ETag para la próxima consulta
                         self._ultimo_etag   = resp.headers.get("ETag")
-                        self._ultimo_estado = body
                         self._intervalo     = INTERVALO_BASE  # resetear backoff si había
                         log.info(f"Inventario recibido — {len(body['productos'])} productos")
                         return body
@@ -145,31 +185,50 @@ class MonitorInventario:
             log.error(f"Error inesperado en _consultar_inventario: {e}")
             return None
 
+    def _estado_previo(self) -> dict | None:
+        if not self._estado_cargado:
+            self._ultimo_estado  = self._snapshot.cargar()
+            self._estado_cargado = True
+            if self._ultimo_estado is not None:
+                self.indice.aplicar(self._ultimo_estado["productos"])
+        return self._ultimo_estado
+
     async def iniciar(self) -> None:
         self._ejecutando = True
         ciclos_sin_cambio = 0
         log.info("Monitor iniciado")
-
-        while self._ejecutando:
-            datos = await self._consultar_inventario()
-
-            if datos is not None:
-                # solo notificamos si el inventario realmente cambió
-                if datos != self._ultimo_estado:
-                    ciclos_sin_cambio = 0
-                    self._intervalo   = INTERVALO_BASE
-                    await self._notificar(datos)
+        if self._diagnostico is not None:
+            self._diagnostico.iniciar()
+        try:
+            while self._ejecutando:
+                datos = await self._consultar_inventario()
+
+                if datos is not None:
+                    previo = self._estado_previo()
+                    # el índice se actualiza por delta; ultimos_cambios queda para los observadores
+                    self.indice.aplicar(datos["productos"])
+                    # solo notificamos si el inventario realmente cambió
+                    if datos != previo:
+                        ciclos_sin_cambio = 0
+                        self._intervalo   = INTERVALO_BASE
+                        await self._notificar(datos)
+                    else:
+                        ciclos_sin_cambio += 1
+                    self._ultimo_estado = datos
+                    if self._snapshot is not None:
+                        self._snapshot.guardar(datos, self._ultimo_etag)
                 else:
                     ciclos_sin_cambio += 1
-            else:
-                ciclos_sin_cambio += 1
-                # si llevamos varios ciclos sin novedad, aumentamos el intervalo
-                if ciclos_sin_cambio >= 3:
-                    self._intervalo = min(self._intervalo * 1.5, INTERVALO_MAX)
-                    log.debug(f"Backoff adaptativo: intervalo={self._intervalo:.1f}s")
+                    # si llevamos varios ciclos sin novedad, aumentamos el intervalo
+                    if ciclos_sin_cambio >= 3:
+                        self._intervalo = min(self._intervalo * 1.5, INTERVALO_MAX)
+                        log.debug(f"Backoff adaptativo: intervalo={self._intervalo:.1f}s")
 
-            # sleep no bloqueante: el event loop puede atender otras cosas mientras esperamos
-            await asyncio.sleep(self._intervalo)
+                # sleep no bloqueante: el event loop puede atender otras cosas mientras esperamos
+                await asyncio.sleep(self._intervalo)
+        finally:
+            if self._diagnostico is not None:
+                self._diagnostico.detener()
 
     def detener(self) -> None:
         # solo cambiamos la bandera, el while termina solo al final del ciclo actual
@@ -178,76 +237,74 @@ class MonitorInventario:
 
 
 class ModuloCompras(Observador):
-    # imprime los productos bajo mínimo cuando llega una actualización
+    # imprime los productos bajo mínimo, agrupados por almacén, cuando llega una actualización
+    # consulta el índice del monitor: O(productos bajos), no O(catálogo)
+
+    def __init__(self, indice: IndiceInventario):
+        self._indice = indice
 
     async def actualizar(self, inventario: dict) -> None:
-        productos_bajos = [
-            p for p in inventario.get("productos", [])
-            if p.get("status") == "BAJO_MINIMO"
-        ]
-
-        if productos_bajos:
-            log.info(f"[COMPRAS] {len(productos_bajos)} producto(s) bajo mínimo:")
-            for p in productos_bajos:
-                print(
-                    f"  ⚠️  {p['nombre']} (ID: {p['id']}) — "
-                    f"Stock: {p['stock']} / Mínimo: {p['stock_minimo']} [{p['almacen']}]"
-                )
+        total = self._indice.contar(status="BAJO_MINIMO")
+
+        if total:
+            log.info(f"[COMPRAS] {total} producto(s) bajo mínimo:")
+            for almacen in self._indice.almacenes(status="BAJO_MINIMO"):
+                print(f"  [{almacen}]")
+                for p in self._indice.buscar(status="BAJO_MINIMO", almacen=almacen):
+                    print(
+                        f"    ⚠️  {p.nombre} (ID: {p.id}) — "
+                        f"Stock: {p.stock} / Mínimo: {p.stock_minimo}"
+                    )
         else:
             log.info("[COMPRAS] Todo el inventario en niveles normales")
 
 
 class ModuloAlertas(Observador):
-    # manda un POST al servidor por cada producto que esté bajo el mínimo
+    # avisa al servidor (POST /alertas) cuando un producto ENTRA a BAJO_MINIMO.
+    # el dedupe, la ventana de agrupación, el envío concurrente y el outbox
+    # durable viven en PipelineAlertas (pipeline_alertas.py)
 
-    async def actualizar(self, inventario: dict) -> None:
-        productos_bajos = [
-            p for p in inventario.get("productos", [])
-            if p.get("status") == "BAJO_MINIMO"
-        ]
-        for producto in productos_bajos:
-            await self._enviar_alerta(producto)
-
-    async def _enviar_alerta(self, producto: dict) -> None:
-        # armamos el payload con los 4 campos que pide el endpoint POST /alertas
-        payload = {
-            "producto_id":  producto["id"],
-            "stock_actual": producto["stock"],
-            "stock_minimo": producto["stock_minimo"],
-            "timestamp":    datetime.now(timezone.utc).isoformat(),
-        }
-        headers = {
-            "Authorization": f"Bearer {TOKEN}",
-            "Content-Type":  "application/json",
-        }
-        timeout = aiohttp.ClientTimeout(total=TIMEOUT)
+    def __init__(self, indice: IndiceInventario | None = None, modo_lote: bool = False):
+        self._indice = indice
+        self._pipeline = PipelineAlertas(BASE_URL, TOKEN, timeout=TIMEOUT, modo_lote=modo_lote)
 
-        try:
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.post(
-                    f"{BASE_URL}/alertas", json=payload, headers=headers
-                ) as resp:
-
-                    if resp.status == 201:
-                        log.info(f"[ALERTAS] Alerta enviada para {producto['id']} ({producto['nombre']})")
-                    elif resp.status == 422:
-                        # campos mal mandados, no tiene caso reintentar igual
-                        log.error(f"[ALERTAS] 422 - payload inválido para {producto['id']}, no se reintenta")
-                    else:
-                        log.warning(f"[ALERTAS] Respuesta inesperada {resp.status} para {producto['id']}")
+    async def actualizar(self, inventario: dict) -> None:
+        # con índice solo revisamos los productos que cambiaron en esta actualización;
+        # los que salieron del catálogo se olvidan (alerta pendiente y estado de "bajo")
+        if self._indice is not None:
+            productos = self._indice.ultimos_cambios
+            eliminados = self._indice.ultimos_eliminados
+        else:
+            productos = inventario.get("productos", [])
+            presentes = {p["id"] for p in productos}
+            eliminados = [pid for pid in self._pipeline.alertados if pid not in presentes]
+        nuevas = self._pipeline.registrar(productos, eliminados)
+        if nuevas:
+            log.info(f"[ALERTAS] {nuevas} producto(s) nuevos bajo mínimo, en cola de envío")
 
-        except (asyncio.TimeoutError, aiohttp.ClientConnectionError) as e:
-            log.warning(f"[ALERTAS] Error de red al enviar alerta: {e}")
+    def iniciar(self) -> None:
+        # lo que quedó en el outbox se envía ya, aunque el inventario no cambie
+        self._pipeline.iniciar()
 
-        except Exception as e:
-            log.error(f"[ALERTAS] Error inesperado: {e}")
+    async def cerrar(self) -> None:
+        await self._pipeline.cerrar()
 
 
 async def main():
-    monitor = MonitorInventario()
-    monitor.suscribir(ModuloCompras())
-    monitor.suscribir(ModuloAlertas())
-    await monitor.iniciar()
+    registro = configurar()
+    snapshot = SnapshotInventario()
+    monitor = MonitorInventario(snapshot=snapshot, diagnostico=DiagnosticoLoop())
+    alertas = ModuloAlertas(monitor.indice)
+    monitor.suscribir(ModuloCompras(monitor.indice))
+    monitor.suscribir(alertas)
+    alertas.iniciar()
+    try:
+        await monitor.iniciar()
+    finally:
+        # lo que no se alcance a enviar queda en el outbox para el próximo arranque
+        await alertas.cerrar()
+        snapshot.cerrar()
+        registro.detener()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,288 @@
+"""
+PIPELINE DE ALERTAS — EcoMarket (complemento de monitor_pedidos.py)
+
+Antes: ModuloAlertas mandaba un POST por producto BAJO_MINIMO, uno tras otro,
+abriendo una ClientSession nueva cada vez, y volvía a alertar el mismo
+producto en cada polling mientras siguiera bajo. Un quiebre masivo de 2,000
+SKUs tardaba minutos.
+
+DECISIONES DE DISEÑO:
+1. DEDUPLICACIÓN POR TRANSICIÓN: Solo se alerta cuando un producto ENTRA a
+   BAJO_MINIMO. Mientras siga bajo no se repite; si se recupera y vuelve a
+   caer, se alerta de nuevo.
+
+2. VENTANA DE AGRUPACIÓN: Las alertas se acumulan `ventana` segundos antes de
+   enviarse. Si un producto cae y se recupera dentro de la ventana, su alerta
+   pendiente se cancela (ya no hay nada que atender).
+
+3. ENVÍO CONCURRENTE ACOTADO: Una sola ClientSession con pool de conexiones
+   y un semáforo de `max_concurrentes` peticiones en vuelo. Lo que falla se
+   reintenta en el siguiente ciclo solo si el producto SIGUE bajo: si se
+   recuperó mientras se enviaba, la alerta vieja ya no se repite. La sesión
+   se puede inyectar (`session=`); entonces el pipeline no la cierra.
+
+4. MODO LOTE: Con `modo_lote=True` se manda POST /alertas/lote con hasta
+   `tamano_lote` alertas por petición ({"alertas": [...]}).
+
+5. OUTBOX DURABLE (SQLite): Cada alerta pendiente y el conjunto de productos
+   ya alertados se guardan en disco en una sola transacción por
+   actualización. Si el proceso se reinicia, las alertas no enviadas se
+   reintentan y no se re-alerta lo que ya se había avisado. Las recuperadas
+   no esperan a una nueva transición (con un inventario estable nunca
+   llegaría): iniciar(), ya dentro del loop, arranca el ciclo de envío.
+
+6. PRODUCTOS ELIMINADOS: un producto que sale del catálogo no vuelve a
+   aparecer como "recuperado", así que registrar(..., eliminados=ids) lo
+   trata igual: se cancela su alerta pendiente y se olvida que estaba bajo
+   (en memoria y en el outbox). Si algún día regresa bajo mínimo, se alerta.
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+from datetime import datetime, timezone
+
+import aiohttp
+
+log = logging.getLogger(__name__)
+
+STATUS_ALERTA = "BAJO_MINIMO"
+
+
+class OutboxAlertas:
+    """Persistencia mínima en SQLite: alertas pendientes + productos ya alertados."""
+
+    def __init__(self, ruta: str = "outbox_alertas.db"):
+        self._db = sqlite3.connect(ruta)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pendientes (producto_id INTEGER PRIMARY KEY, payload TEXT NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS alertados (producto_id INTEGER PRIMARY KEY)"
+        )
+        self._db.commit()
+
+    def cargar(self) -> tuple[dict[int, dict], set[int]]:
+        pendientes = {
+            pid: json.loads(payload)
+            for pid, payload in self._db.execute("SELECT producto_id, payload FROM pendientes")
+        }
+        alertados = {pid for (pid,) in self._db.execute("SELECT producto_id FROM alertados")}
+        return pendientes, alertados
+
+    def registrar_cambios(self, nuevas: dict[int, dict], recuperados: set[int]) -> None:
+        # Una sola transacción por actualización de inventario, no una por producto
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO pendientes VALUES (?, ?)",
+                [(pid, json.dumps(p)) for pid, p in nuevas.items()],
+            )
+            self._db.executemany(
+                "INSERT OR IGNORE INTO alertados VALUES (?)", [(pid,) for pid in nuevas]
+            )
+            self._db.executemany(
+                "DELETE FROM pendientes WHERE producto_id = ?", [(pid,) for pid in recuperados]
+            )
+            self._db.executemany(
+                "DELETE FROM alertados WHERE producto_id = ?", [(pid,) for pid in recuperados]
+            )
+
+    def confirmar_enviadas(self, enviadas: dict[int, dict]) -> None:
+        # Comparamos el payload para no borrar una alerta más nueva del mismo producto
+        with self._db:
+            self._db.executemany(
+                "DELETE FROM pendientes WHERE producto_id = ? AND payload = ?",
+                [(pid, json.dumps(p)) for pid, p in enviadas.items()],
+            )
+
+    def cerrar(self) -> None:
+        self._db.close()
+
+
+class PipelineAlertas:
+    def __init__(
+        self,
+        base_url: str,
+        token: str,
+        timeout: float = 10,
+        ventana: float = 2.0,
+        max_concurrentes: int = 20,
+        modo_lote: bool = False,
+        tamano_lote: int = 200,
+        ruta_outbox: str = "outbox_alertas.db",
+        session=None,
+    ):
+        self.base_url = base_url
+        self.token = token
+        self.timeout = timeout
+        self.ventana = ventana
+        self.max_concurrentes = max_concurrentes
+        self.modo_lote = modo_lote
+        self.tamano_lote = tamano_lote
+
+        self._outbox = OutboxAlertas(ruta_outbox)
+        self._pendientes, self._alertados = self._outbox.cargar()
+        if self._pendientes:
+            log.info(f"[ALERTAS] {len(self._pendientes)} alerta(s) pendientes recuperadas del outbox")
+
+        self._session: aiohttp.ClientSession | None = session
+        self._sesion_propia = session is None
+        self._tarea: asyncio.Task | None = None
+        self.enviadas = 0
+        self.fallidas = 0
+
+    # --- Entrada: se llama en cada actualización del monitor ---
+
+    def registrar(self, productos: list[dict], eliminados=()) -> int:
+        """
+        Detecta transiciones hacia/desde BAJO_MINIMO. Regresa cuántas alertas nuevas hay.
+
+        :param eliminados: ids que salieron del catálogo: su estado se descarta.
+        """
+        nuevas: dict[int, dict] = {}
+        recuperados: set[int] = {pid for pid in eliminados if pid in self._alertados}
+        ahora = datetime.now(timezone.utc).isoformat()
+
+        for p in productos:
+            pid = p["id"]
+            bajo = p.get("status") == STATUS_ALERTA
+            if bajo and pid not in self._alertados:
+                nuevas[pid] = {
+                    "producto_id":  pid,
+                    "stock_actual": p["stock"],
+                    "stock_minimo": p["stock_minimo"],
+                    "timestamp":    ahora,
+                }
+            elif not bajo and pid in self._alertados:
+                recuperados.add(pid)
+
+        if not nuevas and not recuperados:
+            return 0
+
+        self._outbox.registrar_cambios(nuevas, recuperados)
+        self._alertados.update(nuevas)
+        self._alertados -= recuperados
+        self._pendientes.update(nuevas)
+        for pid in recuperados:
+            self._pendientes.pop(pid, None)
+
+        self._asegurar_ciclo()
+        return len(nuevas)
+
+    def iniciar(self) -> None:
+        """Arranca el envío de lo recuperado del outbox. Llamar con el loop corriendo."""
+        if self._pendientes:
+            self._asegurar_ciclo()
+
+    def _asegurar_ciclo(self) -> None:
+        if self._tarea is None or self._tarea.done():
+            self._tarea = asyncio.get_running_loop().create_task(self._ciclo())
+
+    async def _ciclo(self) -> None:
+        # Cada `ventana` segundos vaciamos lo acumulado; si no queda nada, el ciclo termina
+        while self._pendientes:
+            await asyncio.sleep(self.ventana)
+            await self.vaciar()
+
+    # --- Salida: envío concurrente acotado ---
+
+    def _sesion(self) -> aiohttp.ClientSession:
+        if self._sesion_propia and (self._session is None or self._session.closed):
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_concurrentes),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={
+                    "Authorization": f"Bearer {self.token}",
+                    "Content-Type":  "application/json",
+                },
+            )
+        return self._session
+
+    async def vaciar(self) -> None:
+        """Envía todo lo pendiente. Lo que falle por red se queda para el siguiente ciclo."""
+        if not self._pendientes:
+            return
+        lote, self._pendientes = self._pendientes, {}
+
+        if self.modo_lote:
+            items = list(lote.items())
+            grupos = [dict(items[i:i + self.tamano_lote]) for i in range(0, len(items), self.tamano_lote)]
+        else:
+            grupos = [{pid: payload} for pid, payload in lote.items()]
+
+        sem = asyncio.Semaphore(self.max_concurrentes)
+        confirmadas: dict[int, dict] = {}
+
+        async def enviar(grupo):
+            async with sem:
+                if await self._post(grupo):
+                    confirmadas.update(grupo)
+
+        try:
+            await asyncio.gather(*(enviar(g) for g in grupos))
+        finally:
+            # también si nos cancelan a media ronda: lo no confirmado vuelve a la cola
+            reintentos = 0
+            for pid, payload in lote.items():
+                # solo si el producto sigue bajo (se recuperó mientras enviábamos: ya no aplica);
+                # si llegó una alerta más nueva mientras enviábamos, esa gana
+                if pid not in confirmadas and pid in self._alertados:
+                    self._pendientes.setdefault(pid, payload)
+                    reintentos += 1
+            self.enviadas += len(confirmadas)
+            self.fallidas += len(lote) - len(confirmadas)
+            self._outbox.confirmar_enviadas(confirmadas)
+            log.info(f"[ALERTAS] {len(confirmadas)} enviada(s), {reintentos} en espera de reintento")
+
+    async def _post(self, grupo: dict[int, dict]) -> bool:
+        """Regresa True si el grupo ya no debe reintentarse (enviado o rechazado por 422)."""
+        if self.modo_lote:
+            url, body = f"{self.base_url}/alertas/lote", {"alertas": list(grupo.values())}
+        else:
+            url, body = f"{self.base_url}/alertas", next(iter(grupo.values()))
+
+        try:
+            async with self._sesion().post(url, json=body) as resp:
+                if resp.status in (200, 201, 202):
+                    return True
+                if resp.status == 422:
+                    # campos mal mandados, no tiene caso reintentar igual
+                    log.error(f"[ALERTAS] 422 - payload inválido para {list(grupo)}, no se reintenta")
+                    return True
+                log.warning(f"[ALERTAS] Respuesta inesperada {resp.status} para {len(grupo)} alerta(s)")
+                return False
+
+        except (asyncio.TimeoutError, aiohttp.ClientConnectionError) as e:
+            log.warning(f"[ALERTAS] Error de red al enviar alerta: {e}")
+            return False
+
+        except Exception as e:
+            log.error(f"[ALERTAS] Error inesperado: {e}")
+            return False
+
+    async def cerrar(self) -> None:
+        """Último intento de envío y liberación de recursos. Lo no enviado queda en el outbox."""
+        if self._tarea is not None:
+            self._tarea.cancel()
+            await asyncio.gather(self._tarea, return_exceptions=True)
+            self._tarea = None
+        await self.vaciar()
+        if self._session is not None and self._sesion_propia:
+            await self._session.close()
+        self._outbox.cerrar()
+
+    @property
+    def alertados(self) -> frozenset:
+        """Productos que ya se avisaron y siguen bajo mínimo."""
+        return frozenset(self._alertados)
+
+    def metricas(self) -> dict:
+        return {
+            "pendientes": len(self._pendientes),
+            "alertados": len(self._alertados),
+            "enviadas": self.enviadas,
+            "fallidas": self.fallidas,
+        }
@@ -0,0 +1,90 @@
+"""
+SNAPSHOT LOCAL DEL INVENTARIO — EcoMarket (arranque en caliente del monitor)
+
+Problema: al reiniciar, MonitorInventario no tiene ETag ni último estado, así
+que descarga todo el inventario y notifica a los observadores como si todo
+hubiera cambiado (tormenta de alertas falsas).
+
+DECISIONES DE DISEÑO:
+1. SQLITE (stdlib): Un archivo local, una fila por producto (clave = id) y una
+   tabla `meta` para el ETag y los campos del cuerpo que no son productos.
+
+2. ETAG PRIMERO, PRODUCTOS DESPUÉS: Al arrancar solo se lee el ETag (una fila),
+   así el primer GET ya sale con If-None-Match. Los productos se cargan hasta
+   que llega un 200 y de verdad hay que comparar. Con un 304 el arranque
+   cuesta milisegundos.
+
+3. ESCRITURA POR DELTA: Se guarda una firma (JSON canónico) por producto; en
+   cada 200 solo se reescriben los productos que cambiaron o se movieron y se
+   borran los que desaparecieron, todo en una sola transacción.
+"""
+
+import json
+import sqlite3
+
+
+class SnapshotInventario:
+    def __init__(self, ruta: str = "snapshot_inventario.db"):
+        self._db = sqlite3.connect(ruta)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS productos "
+            "(id INTEGER PRIMARY KEY, posicion INTEGER NOT NULL, datos TEXT NOT NULL)"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT)")
+        self._db.commit()
+        # firmas en memoria: id -> (posicion, json); se llenan al cargar o guardar
+        self._firmas: dict[int, tuple[int, str]] | None = None
+
+    @property
+    def etag(self) -> str | None:
+        fila = self._db.execute("SELECT valor FROM meta WHERE clave = 'etag'").fetchone()
+        return fila[0] if fila else None
+
+    def cargar(self) -> dict | None:
+        """Reconstruye el último cuerpo de /inventario, o None si no hay snapshot."""
+        fila = self._db.execute("SELECT valor FROM meta WHERE clave = 'cuerpo'").fetchone()
+        if fila is None:
+            return None
+
+        cuerpo = json.loads(fila[0])
+        self._firmas = {}
+        productos = []
+        for pid, posicion, datos in self._db.execute(
+            "SELECT id, posicion, datos FROM productos ORDER BY posicion"
+        ):
+            self._firmas[pid] = (posicion, datos)
+            productos.append(json.loads(datos))
+        cuerpo["productos"] = productos
+        return cuerpo
+
+    def guardar(self, cuerpo: dict, etag: str | None) -> int:
+        """Persiste el nuevo estado. Regresa cuántos productos se reescribieron."""
+        if self._firmas is None:
+            self.cargar()
+            if self._firmas is None:
+                self._firmas = {}
+
+        nuevas: dict[int, tuple[int, str]] = {}
+        cambios = []
+        for posicion, p in enumerate(cuerpo.get("productos", [])):
+            firma = (posicion, json.dumps(p, sort_keys=True, separators=(",", ":")))
+            nuevas[p["id"]] = firma
+            if self._firmas.get(p["id"]) != firma:
+                cambios.append((p["id"], *firma))
+        borrados = [(pid,) for pid in self._firmas.keys() - nuevas.keys()]
+
+        resto = {k: v for k, v in cuerpo.items() if k != "productos"}
+        with self._db:
+            self._db.executemany("INSERT OR REPLACE INTO productos VALUES (?, ?, ?)", cambios)
+            self._db.executemany("DELETE FROM productos WHERE id = ?", borrados)
+            self._db.executemany(
+                "INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                [("etag", etag), ("cuerpo", json.dumps(resto))],
+            )
+        self._firmas = nuevas
+        return len(cambios) + len(borrados)
+
+    def cerrar(self) -> None:
+        self._db.close()
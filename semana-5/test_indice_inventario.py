@@ -0,0 +1,55 @@
+from indice_inventario import INFINITO, IndiceInventario
+
+
+def producto(pid, stock, almacen="Tepic", minimo=10):
+    status = "BAJO_MINIMO" if stock < minimo else "OK"
+    return {"id": pid, "nombre": f"P{pid}", "stock": stock, "stock_minimo": minimo,
+            "status": status, "almacen": almacen}
+
+
+def test_consulta_por_status_y_almacen():
+    indice = IndiceInventario()
+    indice.aplicar([producto(1, 2), producto(2, 50), producto(3, 1, "Xalisco")])
+    assert [p.id for p in indice.buscar(status="BAJO_MINIMO", almacen="Tepic")] == [1]
+    assert indice.contar(status="BAJO_MINIMO") == 2
+    assert indice.almacenes(status="BAJO_MINIMO") == ["Tepic", "Xalisco"]
+
+
+def test_aplicar_reporta_solo_el_delta_y_reindexa():
+    indice = IndiceInventario()
+    indice.aplicar([producto(i, 50) for i in range(100)])
+    cambios = indice.aplicar([producto(i, 3 if i == 42 else 50) for i in range(100)])
+    assert [p["id"] for p in cambios] == [42]
+    assert [p.id for p in indice.buscar(status="BAJO_MINIMO")] == [42]
+    assert indice.contar(status="OK") == 99
+
+
+def test_productos_que_desaparecen_salen_de_todos_los_indices():
+    indice = IndiceInventario()
+    indice.aplicar([producto(1, 2), producto(2, 2)])
+    indice.aplicar([producto(1, 2)])
+    assert indice.ultimos_eliminados == [2]
+    assert 2 not in indice
+    assert [p.id for p in indice.por_razon(0, 1)] == [1]
+
+
+def test_por_razon_ordena_del_mas_critico():
+    indice = IndiceInventario()
+    indice.aplicar([producto(1, 8), producto(2, 1), producto(3, 30), producto("A01", 5)])
+    assert [p.id for p in indice.por_razon(0, 1)] == [2, "A01", 1]
+
+
+def test_muchos_productos_con_la_misma_razon():
+    indice = IndiceInventario()
+    n = 10_000
+    indice.aplicar([producto(i, 50, minimo=0) for i in range(n)])       # sin mínimo: razón INFINITO
+    # cada actualización saca al producto de la cubeta compartida y lo vuelve a meter
+    cambios = indice.aplicar([producto(i, 51, minimo=0) for i in range(n)])
+    assert len(cambios) == n
+    assert indice._razones == [INFINITO] and len(indice._por_razon[INFINITO]) == n
+    # baja a la mitad y la otra mitad desaparece del catálogo
+    indice.aplicar([producto(i, 20, minimo=10) for i in range(0, n, 2)]
+                   + [producto(i, 5, minimo=10) for i in range(1, 10, 2)])
+    assert indice._razones == [0.5, 2.0] and len(indice) == n // 2 + 5
+    assert [p.id for p in indice.por_razon(0, 1)] == [1, 3, 5, 7, 9]
+    assert len(indice.por_razon(1, INFINITO)) == n // 2
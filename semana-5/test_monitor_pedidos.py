@@ -0,0 +1,79 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("aiohttp")
+aioresponses = pytest.importorskip("aioresponses")
+
+RAIZ = Path(__file__).resolve().parents[1]
+for carpeta in (RAIZ / "semana-2", RAIZ / "semana-4"):
+    if str(carpeta) not in sys.path:
+        sys.path.insert(0, str(carpeta))
+
+import monitor_pedidos                                   # noqa: E402
+from monitor_pedidos import MonitorInventario, Observador   # noqa: E402
+from snapshot_inventario import SnapshotInventario       # noqa: E402
+
+URL = f"{monitor_pedidos.BASE_URL}/inventario"
+INVENTARIO = {
+    "actualizado_en": "2026-03-27T15:00:00Z",
+    "productos": [
+        {"id": 1, "nombre": "Miel", "stock": 2, "stock_minimo": 5, "status": "BAJO_MINIMO", "almacen": "CDMX"},
+        {"id": 2, "nombre": "Café", "stock": 40, "stock_minimo": 5, "status": "OK", "almacen": "GDL"},
+    ],
+}
+
+
+class ObservadorEspia(Observador):
+    def __init__(self):
+        self.notificaciones = []
+
+    async def actualizar(self, inventario: dict) -> None:
+        self.notificaciones.append(inventario)
+
+
+def arrancar_en_caliente(tmp_path, monkeypatch, respuestas):
+    """Corre el monitor sobre un snapshot con ETag "v1" hasta agotar `respuestas`."""
+    monkeypatch.setattr(monitor_pedidos, "INTERVALO_BASE", 0.01)
+    ruta = str(tmp_path / "s.db")
+    snap = SnapshotInventario(ruta)
+    snap.guardar(INVENTARIO, '"v1"')
+    snap.cerrar()
+
+    snap = SnapshotInventario(ruta)
+    monitor = MonitorInventario(snapshot=snap)
+    espia = ObservadorEspia()
+    monitor.suscribir(espia)
+    enviados = []
+
+    def responder(url, **kwargs):
+        enviados.append(dict(kwargs["headers"]))
+        if len(enviados) == len(respuestas):
+            monitor.detener()
+        return respuestas[len(enviados) - 1]
+
+    with aioresponses.aioresponses() as m:
+        m.get(URL, callback=responder, repeat=True)
+        asyncio.run(asyncio.wait_for(monitor.iniciar(), 5))
+    snap.cerrar()
+    return monitor, espia, enviados
+
+
+def test_arranque_en_caliente_con_304_no_notifica(tmp_path, monkeypatch):
+    monitor, espia, enviados = arrancar_en_caliente(
+        tmp_path, monkeypatch, [aioresponses.CallbackResult(status=304)] * 2
+    )
+    assert enviados[0]["If-None-Match"] == '"v1"'
+    assert espia.notificaciones == []
+
+
+def test_arranque_en_caliente_con_200_sin_cambios_no_notifica(tmp_path, monkeypatch):
+    sin_cambios = aioresponses.CallbackResult(status=200, payload=INVENTARIO, headers={"ETag": '"v1"'})
+    monitor, espia, enviados = arrancar_en_caliente(tmp_path, monkeypatch, [sin_cambios])
+    assert enviados[0]["If-None-Match"] == '"v1"'
+    assert espia.notificaciones == []
+    # el índice quedó con el estado del snapshot, sin cambios que alertar
+    assert monitor.indice.ultimos_cambios == []
+    assert monitor.indice.contar(status="BAJO_MINIMO") == 1
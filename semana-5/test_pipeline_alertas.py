@@ -0,0 +1,211 @@
+import asyncio
+import contextlib
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("aiohttp")
+from pipeline_alertas import PipelineAlertas
+
+
+def producto(pid, status, stock=1):
+    return {"id": pid, "status": status, "stock": stock, "stock_minimo": 5}
+
+
+class SesionFalsa:
+    """Lo que PipelineAlertas usa de una ClientSession: post() con `async with`."""
+
+    def __init__(self, status=201, demora=0.0):
+        self.status = status
+        self.demora = demora
+        self.enviados = []            # (url, body)
+        self.en_vuelo = 0
+        self.en_vuelo_max = 0
+        self.durante_envio = None     # callback que corre a mitad de cada POST
+        self.closed = False
+
+    @contextlib.asynccontextmanager
+    async def post(self, url, json):
+        self.en_vuelo += 1
+        self.en_vuelo_max = max(self.en_vuelo_max, self.en_vuelo)
+        try:
+            await asyncio.sleep(self.demora)
+            if self.durante_envio is not None:
+                self.durante_envio()
+            self.enviados.append((url, json))
+            yield SimpleNamespace(status=self.status)
+        finally:
+            self.en_vuelo -= 1
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def ruta_outbox(tmp_path):
+    return str(tmp_path / "outbox.db")
+
+
+def test_solo_alerta_en_la_transicion(ruta_outbox):
+    async def escenario():
+        pipeline = PipelineAlertas("http://x", "t", ventana=60, ruta_outbox=ruta_outbox, session=SesionFalsa())
+        assert pipeline.registrar([producto(1, "BAJO_MINIMO"), producto(2, "NORMAL")]) == 1
+        # sigue bajo en el siguiente polling: no se repite
+        assert pipeline.registrar([producto(1, "BAJO_MINIMO")]) == 0
+        # se recupera y vuelve a caer: alerta otra vez
+        assert pipeline.registrar([producto(1, "NORMAL")]) == 0
+        assert pipeline.registrar([producto(1, "BAJO_MINIMO")]) == 1
+        await pipeline.cerrar()
+
+    asyncio.run(escenario())
+
+
+def test_recuperacion_dentro_de_la_ventana_cancela_la_alerta(ruta_outbox):
+    sesion = SesionFalsa()
+
+    async def escenario():
+        pipeline = PipelineAlertas("http://x", "t", ventana=60, ruta_outbox=ruta_outbox, session=sesion)
+        pipeline.registrar([producto(1, "BAJO_MINIMO")])
+        pipeline.registrar([producto(1, "NORMAL")])
+        metricas = pipeline.metricas()
+        await pipeline.cerrar()
+        return metricas
+
+    assert asyncio.run(escenario())["pendientes"] == 0
+    assert sesion.enviados == []
+
+
+def test_outbox_sobrevive_reinicio(ruta_outbox):
+    async def primera_vida():
+        # el servidor no responde bien: todo queda en el outbox
+        pipeline = PipelineAlertas("http://x", "t", ventana=60, ruta_outbox=ruta_outbox, session=SesionFalsa(503))
+        pipeline.registrar([producto(i, "BAJO_MINIMO") for i in range(2000)])
+        await pipeline.cerrar()
+
+    asyncio.run(primera_vida())
+
+    async def segunda_vida():
+        sesion = SesionFalsa()
+        pipeline = PipelineAlertas("http://x", "t", ruta_outbox=ruta_outbox, session=sesion)
+        recuperadas = pipeline.metricas()["pendientes"]
+        # lo ya alertado no se vuelve a alertar tras el reinicio
+        nuevas = pipeline.registrar([producto(5, "BAJO_MINIMO")])
+        await pipeline.cerrar()
+        return recuperadas, nuevas, len(sesion.enviados), sesion.closed
+
+    assert asyncio.run(segunda_vida()) == (2000, 0, 2000, False)   # la sesión inyectada no se cierra
+
+
+def test_producto_eliminado_cancela_y_olvida_su_alerta(ruta_outbox):
+    async def primera_vida():
+        # el servidor falla: lo pendiente queda en el outbox
+        pipeline = PipelineAlertas("http://x", "t", ventana=60, ruta_outbox=ruta_outbox, session=SesionFalsa(503))
+        pipeline.registrar([producto(1, "BAJO_MINIMO"), producto(2, "BAJO_MINIMO")])
+        pipeline.registrar([], eliminados=[1, 99])     # 99 nunca estuvo bajo: no pasa nada
+        metricas = pipeline.metricas()
+        await pipeline.cerrar()
+        return metricas, pipeline.alertados
+
+    metricas, alertados = asyncio.run(primera_vida())
+    assert metricas["pendientes"] == 1 and alertados == {2}
+
+    async def segunda_vida():
+        sesion = SesionFalsa()
+        pipeline = PipelineAlertas("http://x", "t", ventana=60, ruta_outbox=ruta_outbox, session=sesion)
+        recuperadas = pipeline.metricas()["pendientes"]
+        # vuelve al catálogo ya bajo mínimo: es una alerta nueva
+        nuevas = pipeline.registrar([producto(1, "BAJO_MINIMO")])
+        await pipeline.cerrar()
+        return recuperadas, nuevas, sorted(body["producto_id"] for _, body in sesion.enviados)
+
+    assert asyncio.run(segunda_vida()) == (1, 1, [1, 2])
+
+
+def test_recuperadas_del_outbox_se_envian_sin_nueva_transicion(ruta_outbox):
+    async def primera_vida():
+        pipeline = PipelineAlertas("http://x", "t", ventana=60, ruta_outbox=ruta_outbox, session=SesionFalsa(503))
+        pipeline.registrar([producto(1, "BAJO_MINIMO"), producto(2, "BAJO_MINIMO")])
+        await pipeline.cerrar()
+
+    asyncio.run(primera_vida())
+
+    async def segunda_vida():
+        sesion = SesionFalsa()
+        pipeline = PipelineAlertas("http://x", "t", ventana=0.05, ruta_outbox=ruta_outbox, session=sesion)
+        pipeline.iniciar()                  # inventario estable: registrar() no vuelve a llamarse
+        await asyncio.sleep(0.3)
+        enviados = sorted(body["producto_id"] for _, body in sesion.enviados)
+        metricas = pipeline.metricas()
+        await pipeline.cerrar()
+        return enviados, metricas
+
+    enviados, metricas = asyncio.run(segunda_vida())
+    assert enviados == [1, 2]               # antes de cerrar(): dentro de la ventana
+    assert metricas["pendientes"] == 0 and metricas["enviadas"] == 2
+
+
+def test_envio_concurrente_acotado(ruta_outbox):
+    sesion = SesionFalsa(demora=0.005)
+
+    async def escenario():
+        pipeline = PipelineAlertas("http://x", "t", ventana=60, max_concurrentes=5,
+                                   ruta_outbox=ruta_outbox, session=sesion)
+        assert pipeline.registrar([producto(i, "BAJO_MINIMO") for i in range(50)]) == 50
+        await pipeline.vaciar()
+        metricas = pipeline.metricas()
+        await pipeline.cerrar()
+        return metricas
+
+    metricas = asyncio.run(escenario())
+    assert sesion.en_vuelo_max == 5
+    assert sorted(body["producto_id"] for _, body in sesion.enviados) == list(range(50))
+    assert {url for url, _ in sesion.enviados} == {"http://x/alertas"}
+    assert metricas == {"pendientes": 0, "alertados": 50, "enviadas": 50, "fallidas": 0}
+
+
+def test_reintento_no_repite_productos_recuperados(ruta_outbox):
+    sesion = SesionFalsa(status=503)
+
+    async def escenario():
+        pipeline = PipelineAlertas("http://x", "t", ventana=60, ruta_outbox=ruta_outbox, session=sesion)
+        pipeline.registrar([producto(1, "BAJO_MINIMO"), producto(2, "BAJO_MINIMO")])
+        # el 2 se repone mientras el envío (que va a fallar) está en vuelo
+        sesion.durante_envio = lambda: pipeline.registrar([producto(1, "BAJO_MINIMO"), producto(2, "NORMAL")])
+        await pipeline.vaciar()
+        tras_fallo = pipeline.metricas()
+
+        sesion.status, sesion.durante_envio = 201, None
+        sesion.enviados.clear()
+        await pipeline.vaciar()
+        await pipeline.cerrar()
+        return tras_fallo, [body["producto_id"] for _, body in sesion.enviados]
+
+    tras_fallo, reenviados = asyncio.run(escenario())
+    assert tras_fallo["pendientes"] == 1 and tras_fallo["fallidas"] == 2
+    assert reenviados == [1]
+
+
+def test_modo_lote(ruta_outbox):
+    sesion = SesionFalsa()
+
+    async def escenario():
+        pipeline = PipelineAlertas("http://x", "t", ventana=60, modo_lote=True, tamano_lote=200,
+                                   ruta_outbox=ruta_outbox, session=sesion)
+        pipeline.registrar([producto(i, "BAJO_MINIMO") for i in range(450)])
+        await pipeline.cerrar()
+        return pipeline.metricas()
+
+    metricas = asyncio.run(escenario())
+    assert [url for url, _ in sesion.enviados] == ["http://x/alertas/lote"] * 3
+    assert sorted(len(body["alertas"]) for _, body in sesion.enviados) == [50, 200, 200]
+    assert metricas["enviadas"] == 450 and metricas["pendientes"] == 0
+
+
+def test_cerrar_espera_al_ciclo(ruta_outbox):
+    async def escenario():
+        pipeline = PipelineAlertas("http://x", "t", ventana=60, ruta_outbox=ruta_outbox, session=SesionFalsa())
+        pipeline.registrar([producto(1, "BAJO_MINIMO")])     # arranca el ciclo de ventana
+        await pipeline.cerrar()
+        return asyncio.all_tasks() - {asyncio.current_task()}
+
+    assert asyncio.run(escenario()) == set()
@@ -0,0 +1,37 @@
+from snapshot_inventario import SnapshotInventario
+
+
+def inventario(n, stock=10):
+    return {
+        "actualizado_en": "2026-03-27T15:00:00Z",
+        "productos": [{"id": i, "nombre": f"P{i}", "stock": stock, "status": "OK"} for i in range(n)],
+    }
+
+
+def test_sin_snapshot_no_hay_etag_ni_estado(tmp_path):
+    snap = SnapshotInventario(str(tmp_path / "s.db"))
+    assert snap.etag is None
+    assert snap.cargar() is None
+
+
+def test_reinicio_recupera_etag_y_cuerpo_identico(tmp_path):
+    ruta = str(tmp_path / "s.db")
+    snap = SnapshotInventario(ruta)
+    original = inventario(50)
+    snap.guardar(original, '"abc123"')
+    snap.cerrar()
+
+    snap = SnapshotInventario(ruta)
+    assert snap.etag == '"abc123"'
+    assert snap.cargar() == original
+
+
+def test_guardar_solo_reescribe_el_delta(tmp_path):
+    snap = SnapshotInventario(str(tmp_path / "s.db"))
+    cuerpo = inventario(100)
+    assert snap.guardar(cuerpo, '"v1"') == 100
+
+    cuerpo["productos"][7]["stock"] = 0
+    del cuerpo["productos"][-1]
+    assert snap.guardar(cuerpo, '"v2"') == 2
+    assert snap.cargar() == cuerpo
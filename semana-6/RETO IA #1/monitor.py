@@ -20,36 +20,62 @@
 import asyncio
 import time
 import httpx
+# Reutilizamos el ejecutor de la Semana 4 (modos inline / hilo / proceso)
+from diagnostico_loop import DiagnosticoLoop
+from log_estructurado import RegistroEventos, configurar
+from ejecutor_observadores import EjecutorObservadores, HILO, modo_de
+from sse_checkpoint import CheckpointSSE
+from sse_parser import COMENTARIO, ParserSSE
+from sse_reconexion import PoliticaReconexion, StreamCerrado
+from sse_watchdog import StreamMuerto, VigilanteSSE
 
 class Observable:
     """Implementación del Patrón Observer para desacoplar lógica de EcoMarket."""
     def __init__(self):
         self._observadores = {}
+        self._ejecutor = EjecutorObservadores()
 
-    def suscribir(self, evento, callback):
+    def suscribir(self, evento, callback, modo=None):
         if evento not in self._observadores:
             self._observadores[evento] = []
-        self._observadores[evento].append(callback)
+        self._observadores[evento].append((callback, modo_de(callback, modo)))
 
     def notificar(self, evento, datos):
+        # Los observadores pesados no bloquean la lectura del stream SSE
         if evento in self._observadores:
-            for cb in self._observadores[evento]:
-                try:
-                    cb(datos)
-                except Exception as e:
-                    print(f"❌ Error en observador: {e}")
+            self._ejecutor.despachar(self._observadores[evento], datos)
 
 class ServicioSSE(Observable):
-    def __init__(self, url):
+    def __init__(self, url, ruta_checkpoint=None, intervalo_ping=15.0, diagnostico=None):
         super().__init__()
         self.url = url
-        self.ultimo_id = None
+        # Checkpoint en disco: el Last-Event-ID sobrevive a un reinicio del proceso
+        self.checkpoint = CheckpointSSE(ruta_checkpoint) if ruta_checkpoint else None
+        self.ultimo_id = self.checkpoint.ultimo_id if self.checkpoint else None
         self._activo = False
+        # Sin bytes ni pings por 2 intervalos = conexión semiabierta: se reconecta ya
+        self.vigilante = VigilanteSSE(intervalo_ping)
+        # Reintentos con jitter: miles de monitores no vuelven todos en el mismo segundo
+        self.reconexion = PoliticaReconexion()
+        # Lag del loop: un observador INLINE lento atrasa la lectura y al vigilante
+        self.diagnostico = diagnostico
 
     async def iniciar(self):
         self._activo = True
         print(f"🚀 [EcoMarket] Iniciando Stream en {self.url}...")
-        
+        if self.checkpoint:
+            self.checkpoint.iniciar()
+        if self.diagnostico:
+            self.diagnostico.iniciar()
+        try:
+            await self._escuchar()
+        finally:
+            if self.diagnostico:
+                self.diagnostico.detener()
+                print(f"🩺 Diagnóstico del loop: {self.diagnostico.metricas()}")
+
+    async def _escuchar(self):
+        """Conecta, lee y reconecta mientras el servicio siga activo."""
         while self._activo:
             try:
                 # 1. Preparar Headers: Si hubo un corte, enviamos el último ID recibido
@@ -61,49 +87,75 @@ class ServicioSSE(Observable):
                     # 2. Conexión persistente: No cerramos el socket tras el primer byte
                     async with client.stream("GET", self.url, headers=headers) as response:
                         if response.status_code != 200:
-                            print(f"⚠️ Error {response.status_code}. Reintentando...")
-                            await asyncio.sleep(5)
+                            espera = self.reconexion.fallo()
+                            print(f"⚠️ Error {response.status_code}. Reintentando en {espera:.1f}s...")
+                            await asyncio.sleep(espera)
                             continue
 
                         print("🔗 Canal abierto. Escuchando cambios en inventario...")
+                        self.reconexion.exito()
                         
-                        # 3. Lectura por líneas (Protocolo text/event-stream)
-                        async for line in response.aiter_lines():
+                        # 3. Lectura de bytes crudos; el parser compartido arma los eventos
+                        parser = ParserSSE(emitir_comentarios=True, ultimo_id=self.ultimo_id)
+                        async for chunk in self.vigilante.vigilar(response.aiter_bytes()):
                             if not self._activo: break
-                            if not line.strip(): continue # Ignora saltos de línea de separación
-
-                            self._parsear_protocolo(line)
-
+                            for evento in parser.alimentar(chunk):
+                                self._procesar_evento(evento)
+                            self.reconexion.retry(parser.retry)
+                        if self._activo:
+                            # cierre limpio (reinicio del servidor): mismo backoff con jitter
+                            raise StreamCerrado("el servidor cerró el stream")
+
+            except StreamMuerto as e:
+                # El servidor sigue ahí; la conexión no. Tras una conexión estable el
+                # primer reintento es casi inmediato, con Last-Event-ID
+                espera = self.reconexion.fallo()
+                print(f"💀 Stream mudo ({e}). Reconectando desde {self.ultimo_id} en {espera:.1f}s...")
+                await asyncio.sleep(espera)
             except Exception as e:
-                # 4. Manejo de desconexión: El cliente espera y reconecta solo
-                print(f"⏳ Red inestable: {e}. Reintentando en 3s...")
-                await asyncio.sleep(3) 
+                # 4. Manejo de desconexión: jitter decorrelacionado + circuit breaker
+                espera = self.reconexion.fallo()
+                print(f"⏳ Red inestable: {e}. Reintentando en {espera:.1f}s...")
+                await asyncio.sleep(espera)
 
-    def _parsear_protocolo(self, line):
-        """Parsea los campos clave del estándar SSE."""
+        if self.checkpoint:
+            await self.checkpoint.cerrar()
+
+    def _procesar_evento(self, evento):
+        """Traduce los eventos del parser SSE a notificaciones del Observable."""
         # Comentarios (Pings)
-        if line.startswith(":"):
+        if evento.event == COMENTARIO:
             self.notificar("keep_alive", "Keep-alive: El servidor sigue ahí.")
             return
 
-        # Actualización de ID (Para persistencia en reconexión)
-        if line.startswith("id:"):
-            self.ultimo_id = line.replace("id:", "").strip()
+        # Evento repetido por el replay tras reconectar: ya se notificó, se ignora
+        if self.checkpoint and self.checkpoint.duplicado(evento.id):
             return
-        
-        # Datos del evento
-        if line.startswith("data:"):
-            payload = line.replace("data:", "").strip()
-            self.notificar("datos_actualizados", payload)
+
+        # Actualización de ID (Para persistencia en reconexión)
+        if evento.id is not None:
+            self.ultimo_id = evento.id
+
+        # Datos del evento (los 'data' multilínea ya vienen unidos con \n)
+        self.notificar("datos_actualizados", evento.data)
+        if self.checkpoint:
+            self.checkpoint.procesado(evento.id)
 
     def detener(self):
         self._activo = False
+        self._ejecutor.cerrar(esperar=False)
         print("🛑 Monitor SSE detenido.")
 
 # --- OBSERVADORES (Tus funciones de la Semana 4 siguen intactas) ---
 
+# Un print por evento frenaba la lectura del stream en ráfagas: se registra
+# 1 de cada 10 actualizaciones, escritas por el hilo de log_estructurado
+actualizaciones = RegistroEventos("monitor_sse", muestreo=10)
+
 def observador_ui(datos):
-    print(f"📺 [UI] Actualización recibida: {datos}")
+    # El mensaje se arma después, en el hilo escritor: se pasa un resumen que ya no
+    # cambia, no el objeto que otros observadores (o el hilo del ejecutor) pueden tocar
+    actualizaciones.info("📺 [UI] Actualización recibida (%d caracteres)", len(datos))
 
 def observador_alertas(datos):
     # Lógica para detectar stock bajo en tiempo real
@@ -113,12 +165,13 @@ def observador_alertas(datos):
 
 async def main():
     # URL de ejemplo (Cambiar por tu endpoint de Laravel/Node)
-    monitor = ServicioSSE("http://localhost:8000/api/alertas")
+    monitor = ServicioSSE("http://localhost:8000/api/alertas", diagnostico=DiagnosticoLoop())
     
     # Registro de observadores
     monitor.suscribir("datos_actualizados", observador_ui)
-    monitor.suscribir("datos_actualizados", observador_alertas)
+    monitor.suscribir("datos_actualizados", observador_alertas, modo=HILO)
 
+    registro = configurar()
     tarea = asyncio.create_task(monitor.iniciar())
     
     try:
@@ -126,6 +179,7 @@ async def main():
     finally:
         monitor.detener()
         await tarea
+        registro.detener()
 
 if __name__ == "__main__":
     try:
@@ -1,7 +1,13 @@
 import asyncio
+from contextlib import aclosing
 import time
 import httpx
-import json
+from codec_json import loads
+from sse_parser import ParserSSE
+from sse_checkpoint import CheckpointSSE
+from sse_pipeline import BLOQUEAR, PipelineSSE
+from sse_reconexion import PoliticaReconexion, StreamCerrado
+from sse_watchdog import StreamMuerto, VigilanteSSE
 
 class ReceptorAlertas:
     """
@@ -12,26 +18,55 @@ class ReceptorAlertas:
     cargar todo el cuerpo en RAM, permitiendo procesar streams infinitos.
     
     TRADE-OFF ETAPA 2 (Parsing): 
-    El procesamiento es síncrono. Si el procesamiento de un evento 'data' 
-    es muy pesado, bloqueará la lectura de la siguiente línea del stream.
+    Se leen bytes crudos (aiter_bytes) y el ParserSSE compartido arma los 
+    eventos. El lector solo encola en un PipelineSSE (cola acotada por tipo
+    de evento); los workers ejecutan _dispatch. Un evento que TARDA (el
+    worker cede el loop) ya no detiene la lectura; si la cola se llena, la
+    política decide si el lector espera (BLOQUEAR) o se descartan eventos.
+    _dispatch es síncrono: sin `ejecutor` corre en el loop y un evento con
+    mucho CPU sigue frenando la lectura mientras corre. Con
+    ejecutor=ThreadPoolExecutor(...) corre en un hilo y el loop sigue leyendo.
     
     TRADE-OFF ETAPA 3 (Reconexión): 
-    El backoff exponencial protege al servidor de denegación de servicio (DoS) 
-    involuntario cuando hay caídas masivas de clientes.
+    La PoliticaReconexion compartida (jitter decorrelacionado, 'retry:' del
+    servidor y circuit breaker) protege al servidor de denegación de servicio
+    (DoS) involuntario cuando hay caídas masivas de clientes.
+    Con hub=hub_para(url) no abre stream propio: lee del HubSSE compartido
+    (sse_hub), que mantiene una sola conexión por host.
     """
     
-    def __init__(self, url):
+    def __init__(self, url, capacidad_cola=1000, politica_cola=BLOQUEAR, ruta_checkpoint=None,
+                 intervalo_ping=15.0, ejecutor=None, hub=None):
         self.url = url
-        self.ultimo_id = None
-        self.retry_ms = 3000
+        self.hub = hub   # HubSSE compartido (sse_hub.hub_para); None = stream propio
+        # Con checkpoint en disco, un reinicio retoma desde el último evento PROCESADO
+        self.checkpoint = CheckpointSSE(ruta_checkpoint) if ruta_checkpoint else None
+        self.ultimo_id = self.checkpoint.ultimo_id if self.checkpoint else None
         self.activo = True
-        self.intentos = 0
-        self.max_intentos = 5
+        self.reconexion = PoliticaReconexion()
+        self.vigilante = VigilanteSSE(intervalo_ping)   # detecta streams mudos (TCP semiabierto)
+        self.pipeline = PipelineSSE(
+            self._dispatch, capacidad=capacidad_cola, politica=politica_cola, checkpoint=self.checkpoint,
+            ejecutor=ejecutor,
+        )
 
     async def iniciar(self):
         print(f"🚀 [{self._ts()}] Iniciando Receptor...")
-        
-        while self.activo and self.intentos < self.max_intentos:
+        if self.checkpoint:
+            self.checkpoint.iniciar()
+        try:
+            await self._ciclo_conexion()
+        finally:
+            await self.pipeline.detener()
+            if self.checkpoint:
+                await self.checkpoint.cerrar()
+            print(f"📊 [{self._ts()}] Métricas del pipeline: {self.pipeline.metricas()}")
+            print(f"💓 [{self._ts()}] Métricas de latidos: {self.vigilante.metricas()}")
+
+    async def _ciclo_conexion(self):
+        if self.hub is not None:
+            return await self._leer_del_hub()
+        while self.activo:
             headers = {
                 "Accept": "text/event-stream",
                 "Cache-Control": "no-cache"
@@ -53,44 +88,38 @@ class ReceptorAlertas:
                         if resp.status_code != 200:
                             raise Exception(f"HTTP {resp.status_code}")
 
-                        self.intentos = 0 # Reset de éxito
-                        buffer = {"id": None, "event": "message", "data": []}
+                        self.reconexion.exito()
+                        parser = ParserSSE(ultimo_id=self.ultimo_id)
 
-                        async for line in resp.aiter_lines():
+                        async for chunk in self.vigilante.vigilar(resp.aiter_bytes()):
                             if not self.activo: break
                             
-                            # ETAPA 2: Acumular hasta línea en blanco
-                            if not line.strip():
-                                if buffer["data"]:
-                                    self._dispatch(buffer)
-                                    buffer = {"id": None, "event": "message", "data": []}
-                                continue
-
-                            self._parse_line(line, buffer)
+                            # ETAPA 2: El parser acumula hasta línea en blanco
+                            for evento in parser.alimentar(chunk):
+                                self.ultimo_id = evento.id
+                                await self.pipeline.encolar(evento)
+                            self.reconexion.retry(parser.retry)
+                        if self.activo:
+                            # cierre limpio (reinicio del servidor): mismo backoff con jitter
+                            raise StreamCerrado("el servidor cerró el stream")
 
+            except StreamMuerto as e:
+                # Conexión semiabierta: tras una conexión estable el reintento es casi inmediato
+                espera = self.reconexion.fallo()
+                print(f"💀 [{self._ts()}] {e}. Reconectando desde {self.ultimo_id} en {espera:.1f}s...")
+                await asyncio.sleep(espera)
             except Exception as e:
-                self.intentos += 1
-                espera = (self.retry_ms / 1000) * (2 ** (self.intentos - 1))
-                print(f"🔌 [{self._ts()}] Error: {e}. Reconexión en {espera}s...")
+                espera = self.reconexion.fallo()
+                print(f"🔌 [{self._ts()}] Error: {e}. Reconexión en {espera:.1f}s "
+                      f"(circuito {self.reconexion.estado})...")
                 await asyncio.sleep(espera)
 
-    def _parse_line(self, line, buffer):
-        if line.startswith("id:"):
-            buffer["id"] = line[3:].strip()
-            self.ultimo_id = buffer["id"]
-        elif line.startswith("event:"):
-            buffer["event"] = line[6:].strip()
-        elif line.startswith("data:"):
-            buffer["data"].append(line[5:].strip())
-        elif line.startswith("retry:"):
-            self.retry_ms = int(line[6:].strip())
-
-    def _dispatch(self, buffer):
-        tipo = buffer["event"]
-        raw = "".join(buffer["data"])
+    def _dispatch(self, evento):
+        tipo = evento.event
+        raw = evento.data
         
         try:
-            data = json.loads(raw)
+            data = loads(raw)
         except:
             data = raw
 
@@ -101,6 +130,14 @@ class ReceptorAlertas:
         else:
             print(f"🔍 [INFO] Evento '{tipo}' recibido (sin manejador específico).")
 
+    async def _leer_del_hub(self):
+        # Sin socket propio: el hub (una conexión por host) reconecta y reparte por nosotros
+        async with aclosing(self.hub.recibir(desde_id=self.ultimo_id)) as eventos:
+            async for evento in eventos:
+                if not self.activo: break
+                self.ultimo_id = evento.id
+                await self.pipeline.encolar(evento)
+
     def _ts(self):
         return time.strftime("%H:%M:%S")
 
@@ -23,26 +23,56 @@ complejidad de estado y protocolos (WebSockets) que dificultan el balanceo de ca
 """
 
 import asyncio
+from contextlib import aclosing
 import time
 import httpx
-import json
+from codec_json import loads
+from sse_parser import ParserSSE
+from sse_checkpoint import CheckpointSSE
+from sse_pipeline import BLOQUEAR, PipelineSSE
+from sse_reconexion import PoliticaReconexion, StreamCerrado
+from sse_watchdog import StreamMuerto, VigilanteSSE
 
 class ReceptorAlertas:
-    def __init__(self, url):
+    def __init__(self, url, capacidad_cola=1000, politica_cola=BLOQUEAR, ruta_checkpoint=None,
+                 coalescer=None, ventana_coalescencia=0.1, intervalo_ping=15.0, ejecutor=None, hub=None):
         self.url = url
-        self.ultimo_id = None
-        self.retry_ms = 3000
+        self.hub = hub   # HubSSE compartido (sse_hub.hub_para); None = stream propio
+        # Con checkpoint en disco, un reinicio retoma desde el último evento PROCESADO
+        self.checkpoint = CheckpointSSE(ruta_checkpoint) if ruta_checkpoint else None
+        self.ultimo_id = self.checkpoint.ultimo_id if self.checkpoint else None
         self.activo = True
-        self.intentos = 0
-        self.max_intentos = 5
+        self.reconexion = PoliticaReconexion()
+        self.vigilante = VigilanteSSE(intervalo_ping)   # detecta streams mudos (TCP semiabierto)
+        # Lectura y procesamiento desacoplados: el lector encola, los workers procesan.
+        # _procesar_evento es síncrono: corre en el loop salvo que se pase un ejecutor (hilos)
+        # coalescer (opcional) junta ráfagas de precio-actualizado del mismo producto
+        self.pipeline = PipelineSSE(
+            self._procesar_evento, capacidad=capacidad_cola, politica=politica_cola,
+            checkpoint=self.checkpoint, coalescer=coalescer,
+            ventana_coalescencia=ventana_coalescencia, ejecutor=ejecutor,
+        )
 
     async def conectar(self):
         """
         Implementación del flujo SSE con recuperación de estado.
         """
         print(f"🚀 [{self._ts()}] Iniciando Receptor de Alertas...")
-        
-        while self.activo and self.intentos < self.max_intentos:
+        if self.checkpoint:
+            self.checkpoint.iniciar()
+        try:
+            await self._ciclo_conexion()
+        finally:
+            await self.pipeline.detener()
+            if self.checkpoint:
+                await self.checkpoint.cerrar()
+            print(f"📊 [{self._ts()}] Métricas del pipeline: {self.pipeline.metricas()}")
+            print(f"💓 [{self._ts()}] Métricas de latidos: {self.vigilante.metricas()}")
+
+    async def _ciclo_conexion(self):
+        if self.hub is not None:
+            return await self._leer_del_hub()
+        while self.activo:
             headers = {
                 "Accept": "text/event-stream",
                 "Cache-Control": "no-cache"
@@ -61,43 +91,38 @@ class ReceptorAlertas:
                             self.activo = False
                             break
                         
-                        self.intentos = 0 # Conexión exitosa, reseteamos contador
-                        buffer = {"id": None, "event": "message", "data": []}
+                        self.reconexion.exito() # Conexión exitosa
+                        parser = ParserSSE(ultimo_id=self.ultimo_id)
 
-                        # ETAPA 2: Parsing de eventos por tipo
-                        async for line in resp.aiter_lines():
+                        # ETAPA 2: Parsing de eventos por tipo (parser compartido sobre bytes)
+                        async for chunk in self.vigilante.vigilar(resp.aiter_bytes()):
                             if not self.activo: break
                             
-                            if not line.strip(): # Fin de bloque de evento (\n\n)
-                                if buffer["data"]:
-                                    self._procesar_evento(buffer)
-                                    buffer = {"id": None, "event": "message", "data": []}
-                                continue
-
-                            self._parse_linea(line, buffer)
-
+                            for evento in parser.alimentar(chunk):
+                                self.ultimo_id = evento.id
+                                await self.pipeline.encolar(evento)
+                            self.reconexion.retry(parser.retry)
+                        if self.activo:
+                            # cierre limpio (reinicio del servidor): mismo backoff con jitter
+                            raise StreamCerrado("el servidor cerró el stream")
+
+            except StreamMuerto as e:
+                # Conexión semiabierta: tras una conexión estable el reintento es casi inmediato
+                espera = self.reconexion.fallo()
+                print(f"💀 [{self._ts()}] {e}. Reconectando desde {self.ultimo_id} en {espera:.1f}s...")
+                await asyncio.sleep(espera)
             except Exception as e:
-                self.intentos += 1
-                # Backoff exponencial para no saturar el servidor de EcoMarket
-                espera = (self.retry_ms / 1000) * (2 ** (self.intentos - 1))
-                print(f"🔌 [{self._ts()}] Error: {e}. Reintentando en {espera}s...")
+                # Jitter decorrelacionado + circuit breaker para no saturar el servidor de EcoMarket
+                espera = self.reconexion.fallo()
+                print(f"🔌 [{self._ts()}] Error: {e}. Reintentando en {espera:.1f}s...")
                 await asyncio.sleep(espera)
 
-    def _parse_linea(self, line, buffer):
-        if line.startswith("id:"):
-            buffer["id"] = line[3:].strip()
-            self.ultimo_id = buffer["id"]
-        elif line.startswith("event:"):
-            buffer["event"] = line[6:].strip()
-        elif line.startswith("data:"):
-            buffer["data"].append(line[5:].strip())
-
-    def _procesar_evento(self, buffer):
-        tipo = buffer["event"]
-        data_raw = "".join(buffer["data"])
+    def _procesar_evento(self, evento):
+        tipo = evento.event
+        data_raw = evento.data
         
         try:
-            data = json.loads(data_raw)
+            data = loads(data_raw)
         except:
             data = data_raw
 
@@ -109,6 +134,14 @@ class ReceptorAlertas:
         else:
             print(f"🔍 [SISTEMA] Evento '{tipo}' recibido.")
 
+    async def _leer_del_hub(self):
+        # Sin socket propio: el hub (una conexión por host) reconecta y reparte por nosotros
+        async with aclosing(self.hub.recibir(desde_id=self.ultimo_id)) as eventos:
+            async for evento in eventos:
+                if not self.activo: break
+                self.ultimo_id = evento.id
+                await self.pipeline.encolar(evento)
+
     def _ts(self):
         return time.strftime("%H:%M:%S")
 
@@ -4,16 +4,34 @@ RECEPTOR ALERTAS ECOMARKET V2 — Decisiones de arquitectura
 TRADE-OFFS DE DISEÑO:
 - Escenario A (Escalabilidad): Se usa composición para el Observable. Esto permite 
   cambiar el motor de notificaciones (ej. a Redis o RabbitMQ) sin tocar la lógica SSE.
-- Escenario B (Legacy): El parser de líneas es tolerante a fallos; si el servidor 
-  legacy envía basura, el buffer se limpia sin tumbar el proceso.
-- Escenario C (3G): Implementa Backoff Exponencial (2^n) para evitar saturar la 
-  antena móvil en reconexiones infinitas.
+- Escenario B (Legacy): El parser (ParserSSE, compartido) es tolerante a fallos; 
+  si el servidor legacy envía basura, los campos desconocidos se ignoran sin 
+  tumbar el proceso.
+- Lectura desacoplada: el lector solo encola en un PipelineSSE (cola acotada 
+  por tipo de evento). Los suscriptores son síncronos: sin `ejecutor` corren
+  en el loop y uno con mucho CPU frena la lectura mientras corre. Con
+  ejecutor=ThreadPoolExecutor(...) corren en hilos, el socket se sigue
+  leyendo y workers_por_tipo > 1 sí da paralelismo (sin ejecutor el
+  pipeline lo rechaza).
+- Escenario C (3G): La PoliticaReconexion compartida (sse_reconexion) espera
+  con jitter decorrelacionado (respetando el 'retry:' del servidor) y, tras
+  varios fallos seguidos, abre un circuit breaker y se enfría antes de un
+  intento de prueba: no satura la antena móvil ni se rinde para siempre.
+  Un cierre limpio del servidor también pasa por esa espera.
+- Un socket por host: con hub=hub_para(url) el receptor no abre stream propio;
+  lee del HubSSE compartido (sse_hub), que ya reconecta con Last-Event-ID.
 """
 
 import asyncio
+from contextlib import aclosing
 import time
 import httpx
 import json
+from sse_hub import hub_para
+from sse_parser import ParserSSE
+from sse_pipeline import BLOQUEAR, PipelineSSE
+from sse_reconexion import PoliticaReconexion, StreamCerrado
+from sse_watchdog import StreamMuerto, VigilanteSSE
 
 class Observable:
     def __init__(self):
@@ -30,16 +48,35 @@ class Observable:
                 cb(datos)
 
 class ReceptorAlertasV2:
-    def __init__(self, url):
+    def __init__(self, url, capacidad_cola=1000, politica_cola=BLOQUEAR, workers_por_tipo=None,
+                 intervalo_ping=15.0, ejecutor=None, hub=None):
         self.url = url
+        self.hub = hub   # HubSSE compartido (sse_hub.hub_para); None = stream propio
         self.notifier = Observable() # Composición
         self.ultimo_id = None
         self.activo = True
-        self.reintentos = 0
+        self.reconexion = PoliticaReconexion()
+        self.vigilante = VigilanteSSE(intervalo_ping)   # timeout=None ya no significa sordo para siempre
+        self.pipeline = PipelineSSE(
+            self._notificar, capacidad=capacidad_cola, politica=politica_cola,
+            workers_por_tipo=workers_por_tipo, ejecutor=ejecutor,
+        )
+
+    def _notificar(self, evento):
+        self.notifier.notificar(evento.event, evento.data)
 
     async def conectar(self):
         print(f"🚀 [{self._ts()}] Conectando al Stream de EcoMarket...")
-        
+        try:
+            await self._ciclo_conexion()
+        finally:
+            await self.pipeline.detener()
+            print(f"📊 [{self._ts()}] Métricas del pipeline: {self.pipeline.metricas()}")
+            print(f"💓 [{self._ts()}] Métricas de latidos: {self.vigilante.metricas()}")
+
+    async def _ciclo_conexion(self):
+        if self.hub is not None:
+            return await self._leer_del_hub()
         while self.activo:
             headers = {"Accept": "text/event-stream"}
             if self.ultimo_id:
@@ -50,31 +87,42 @@ class ReceptorAlertasV2:
                 async with httpx.AsyncClient(timeout=None) as client:
                     async with client.stream("GET", self.url, headers=headers) as resp:
                         if resp.status_code == 204: break
-                        
-                        self.reintentos = 0
-                        buffer_data = []
-                        current_event = "message"
+                        if resp.status_code != 200:
+                            # el cuerpo de un error no es un stream SSE: reintento con backoff
+                            raise Exception(f"HTTP {resp.status_code}")
+
+                        self.reconexion.exito()
+                        parser = ParserSSE(ultimo_id=self.ultimo_id)
 
-                        async for line in resp.aiter_lines():
+                        async for chunk in self.vigilante.vigilar(resp.aiter_bytes()):
                             if not self.activo: break
                             
-                            if not line.strip(): # Fin de bloque \n\n
-                                if buffer_data:
-                                    payload = "".join(buffer_data)
-                                    self.notifier.notificar(current_event, payload)
-                                    buffer_data = []; current_event = "message"
-                                continue
-
-                            if line.startswith("id:"): self.ultimo_id = line[3:].strip()
-                            elif line.startswith("event:"): current_event = line[6:].strip()
-                            elif line.startswith("data:"): buffer_data.append(line[5:].strip())
-
+                            for evento in parser.alimentar(chunk):
+                                self.ultimo_id = evento.id
+                                await self.pipeline.encolar(evento)
+                            self.reconexion.retry(parser.retry)
+                        if self.activo:
+                            # cierre limpio (reinicio del servidor): mismo backoff con jitter
+                            raise StreamCerrado("el servidor cerró el stream")
+
+            except StreamMuerto as e:
+                # Conexión semiabierta: tras una conexión estable el reintento es casi inmediato
+                espera = self.reconexion.fallo()
+                print(f"💀 [{self._ts()}] {e}. Reconectando desde {self.ultimo_id} en {espera:.1f}s...")
+                await asyncio.sleep(espera)
             except Exception as e:
-                self.reintentos += 1
-                espera = min(30, 2 ** self.reintentos)
-                print(f"🔌 [{self._ts()}] Error de red. Reintento en {espera}s...")
+                espera = self.reconexion.fallo()
+                print(f"🔌 [{self._ts()}] Error de red. Reintento en {espera:.1f}s...")
                 await asyncio.sleep(espera)
 
+    async def _leer_del_hub(self):
+        # Sin socket propio: el hub (una conexión por host) reconecta y reparte por nosotros
+        async with aclosing(self.hub.recibir(desde_id=self.ultimo_id)) as eventos:
+            async for evento in eventos:
+                if not self.activo: break
+                self.ultimo_id = evento.id
+                await self.pipeline.encolar(evento)
+
     def _ts(self):
         return time.strftime("%H:%M:%S")
 
@@ -93,14 +141,20 @@ def suscriptor_logs(datos):
 # --- EJECUCIÓN ---
 
 async def main():
-    receptor = ReceptorAlertasV2("https://sse.dev/test")
+    # Un solo stream por host aunque haya más receptores en el proceso
+    hub = hub_para("https://sse.dev/test")
+    hub.iniciar()
+    receptor = ReceptorAlertasV2(hub.url, hub=hub)
     
     # Registro de los 3 suscriptores
     receptor.notifier.suscribir("precio-actualizado", suscriptor_ui)
     receptor.notifier.suscribir("stock-critico", suscriptor_alertas)
     receptor.notifier.suscribir("message", suscriptor_logs)
 
-    await receptor.conectar()
+    try:
+        await receptor.conectar()
+    finally:
+        await hub.detener()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,336 @@
+"""
+BENCHMARK: RECEPTORES SSE CONTRA EL SERVIDOR DE CARGA LOCAL
+
+Levanta servidor_carga_sse.py en otro proceso (para que su CPU no se mezcle
+con la del receptor), conecta K streams del receptor elegido en ESTE proceso
+y mide, hasta que cada stream recibe N eventos:
+  - eventos/s entregados a los handlers (sumando todos los streams)
+  - latencia extremo a extremo p50/p95/p99 (publicación en el servidor ->
+    handler), con el "ts" que trae cada evento
+  - CPU del proceso receptor (% de un núcleo) y memoria residente
+  - duplicados y huecos por stream (con --corte se verifica el replay)
+
+Receptores: servicio (semana-6 #1 ServicioSSE), alertas2 y alertas3
+(ReceptorAlertas de #2 y #3), alertas_v2 (#5), multiplex (semana-7 #3) y
+crudo (socket + ParserSSE, sin httpx: el techo del proceso). Con
+--receptor todos cada uno corre en su propio subproceso, contra el mismo
+servidor, para que la memoria y la CPU de uno no contaminen al siguiente.
+Los handlers de los receptores se sustituyen por el medidor: se mide el
+transporte y el pipeline, no los print de la demo.
+
+Los RETO IA importan codec_json (semana-2) y ejecutor_observadores
+(semana-4) por nombre; este script agrega esas carpetas a sys.path.
+
+Uso: python bench_receptores_sse.py [--receptor todos] [--streams 1] [--eventos 20000]
+                                    [--tasa 2000] [--tamano 256] [--ping 15] [--corte 0]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import json
+import os
+import resource
+import sys
+import time
+from functools import partial
+from pathlib import Path
+from urllib.parse import urlsplit
+
+AQUI = Path(__file__).resolve().parent
+RAIZ = AQUI.parent
+for carpeta in (RAIZ / "semana-2", RAIZ / "semana-4", AQUI):
+    if str(carpeta) not in sys.path:
+        sys.path.insert(0, str(carpeta))
+
+from codec_json import loads          # noqa: E402
+from sse_parser import ParserSSE      # noqa: E402
+
+
+# --- Medición ---
+
+class Medidor:
+    """Lo que llaman los handlers de todos los streams: cuenta, deduplica y toma latencias."""
+
+    def __init__(self, streams: int, objetivo: int):
+        self.objetivo = objetivo
+        self.latencias: list[float] = []
+        self.duplicados = 0
+        self.primero: float | None = None
+        self.ultimo: float | None = None
+        self._vistos = [set() for _ in range(streams)]
+        self.listo = asyncio.Event()
+
+    def registrar(self, stream: int, data) -> None:
+        ahora = time.time()
+        seq = data["seq"]
+        vistos = self._vistos[stream]
+        if seq in vistos:
+            self.duplicados += 1
+            return
+        vistos.add(seq)
+        self.latencias.append(ahora - data["ts"])
+        if self.primero is None:
+            self.primero = ahora
+        self.ultimo = ahora
+        if len(self.latencias) >= self.objetivo:
+            self.listo.set()
+
+    def huecos(self) -> int:
+        """Eventos que faltan entre el primero y el último recibido de cada stream."""
+        return sum(max(v) - min(v) + 1 - len(v) for v in self._vistos if v)
+
+
+def percentil(ordenados: list[float], q: float) -> float:
+    if not ordenados:
+        return float("nan")
+    return ordenados[min(len(ordenados) - 1, int(q * len(ordenados)))]
+
+
+def cpu_segundos() -> float:
+    uso = resource.getrusage(resource.RUSAGE_SELF)
+    return uso.ru_utime + uso.ru_stime
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:   # fuera de Linux: el pico (ru_maxrss está en KB en Linux, bytes en macOS)
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico / 2**20 if sys.platform == "darwin" else pico / 1024
+
+
+# --- Adaptadores: crean un receptor cuyo handler es el medidor ---
+
+def _cargar(ruta: str, nombre: str):
+    spec = importlib.util.spec_from_file_location(nombre, RAIZ / ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def _servicio(url, registrar, ping):
+    modulo = _cargar("semana-6/RETO IA #1/monitor.py", "bench_servicio")
+    servicio = modulo.ServicioSSE(url, intervalo_ping=ping)
+    servicio.suscribir("datos_actualizados", lambda crudo: registrar(loads(crudo)))
+    return servicio.iniciar(), servicio.detener
+
+
+def _alertas(ruta, nombre, metodo, arranque):
+    def crear(url, registrar, ping):
+        modulo = _cargar(ruta, nombre)
+        # subclase: el pipeline guarda el método ligado al construirse
+        medido = type("ReceptorMedido", (modulo.ReceptorAlertas,),
+                      {metodo: lambda self, evento: registrar(loads(evento.data))})
+        receptor = medido(url, intervalo_ping=ping)
+
+        def detener():
+            receptor.activo = False
+        return getattr(receptor, arranque)(), detener
+    return crear
+
+
+def _alertas_v2(url, registrar, ping):
+    modulo = _cargar("semana-6/RETO IA #5/receptor_alertas_v2.py", "bench_alertas_v2")
+    receptor = modulo.ReceptorAlertasV2(url, intervalo_ping=ping)
+    for tipo in ("precio-actualizado", "stock-critico"):
+        receptor.notifier.suscribir(tipo, lambda crudo: registrar(loads(crudo)))
+
+    def detener():
+        receptor.activo = False
+    return receptor.conectar(), detener
+
+
+def _multiplex(url, registrar, ping):
+    modulo = _cargar("semana-7/RETO IA #3/receptor_alertas_v2.py", "bench_multiplex")
+    router = modulo.EventRouter()
+    router.registrar("*", registrar)      # JSONPerezoso: data["seq"] decodifica ahí
+    partes = urlsplit(url)
+    cliente = modulo.ClienteSSEMultiplex(
+        f"{partes.scheme}://{partes.netloc}{partes.path}",
+        ["precio-actualizado", "stock-critico"], router, intervalo_ping=ping,
+    )
+
+    def detener():
+        cliente.activo = False
+    return cliente.iniciar(), detener
+
+
+async def _leer_crudo(url, registrar):
+    partes = urlsplit(url)
+    ruta = partes.path + (f"?{partes.query}" if partes.query else "")
+    ultimo_id = None
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(partes.hostname, partes.port)
+        except OSError:
+            await asyncio.sleep(0.1)
+            continue
+        cabeceras = f"GET {ruta} HTTP/1.1\r\nHost: {partes.netloc}\r\nAccept: text/event-stream\r\n"
+        if ultimo_id:
+            cabeceras += f"Last-Event-ID: {ultimo_id}\r\n"
+        writer.write((cabeceras + "\r\n").encode())
+        parser = ParserSSE(ultimo_id=ultimo_id)
+        try:
+            await reader.readuntil(b"\r\n\r\n")
+            while chunk := await reader.read(65536):
+                for evento in parser.alimentar(chunk):
+                    registrar(loads(evento.data))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+        ultimo_id = parser.ultimo_id
+        await asyncio.sleep((parser.retry or 100) / 1000)
+
+
+def _crudo(url, registrar, ping):
+    return _leer_crudo(url, registrar), lambda: None
+
+
+RECEPTORES = {
+    "crudo": _crudo,
+    "servicio": _servicio,
+    "alertas2": _alertas("semana-6/RETO IA #2/receptor_alertas.py", "bench_alertas2", "_dispatch", "iniciar"),
+    "alertas3": _alertas("semana-6/RETO IA #3/receptor_alertas.py", "bench_alertas3", "_procesar_evento", "conectar"),
+    "alertas_v2": _alertas_v2,
+    "multiplex": _multiplex,
+}
+
+
+# --- Ejecución ---
+
+async def medir(nombre: str, url: str, streams: int, eventos: int, ping: float,
+                timeout: float, verboso: bool = False) -> dict:
+    medidor = Medidor(streams, streams * eventos)
+    with contextlib.ExitStack() as pila:
+        if not verboso:   # los print de los receptores no deben medirse (ni quedar abiertos)
+            pila.enter_context(contextlib.redirect_stdout(pila.enter_context(open(os.devnull, "w"))))
+        rss_inicial = rss_mb()
+        receptores = [RECEPTORES[nombre](url, partial(medidor.registrar, i), ping) for i in range(streams)]
+        cpu_inicial = cpu_segundos()
+        inicio = time.perf_counter()
+        tareas = [asyncio.create_task(corrutina) for corrutina, _ in receptores]
+        try:
+            await asyncio.wait_for(medidor.listo.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        duracion = time.perf_counter() - inicio
+        cpu = cpu_segundos() - cpu_inicial
+        rss_final = rss_mb()
+        for _, detener in receptores:
+            detener()
+        for tarea in tareas:
+            tarea.cancel()
+        await asyncio.gather(*tareas, return_exceptions=True)
+
+    latencias = sorted(medidor.latencias)
+    ventana = (medidor.ultimo - medidor.primero) if len(latencias) > 1 else 0
+    return {
+        "receptor": nombre,
+        "streams": streams,
+        "recibidos": len(latencias),
+        "completo": medidor.listo.is_set(),
+        "eventos_s": len(latencias) / ventana if ventana else 0.0,
+        "p50_ms": percentil(latencias, 0.50) * 1000,
+        "p95_ms": percentil(latencias, 0.95) * 1000,
+        "p99_ms": percentil(latencias, 0.99) * 1000,
+        "cpu_pct": 100 * cpu / duracion,
+        "rss_mb": rss_final,
+        "rss_delta_mb": rss_final - rss_inicial,
+        "duplicados": medidor.duplicados,
+        "huecos": medidor.huecos(),
+    }
+
+
+async def lanzar_servidor(opciones) -> asyncio.subprocess.Process:
+    entorno = dict(os.environ)
+    entorno["PYTHONPATH"] = os.pathsep.join(
+        [str(AQUI)] + ([entorno["PYTHONPATH"]] if entorno.get("PYTHONPATH") else [])
+    )
+    proceso = await asyncio.create_subprocess_exec(
+        sys.executable, str(AQUI / "servidor_carga_sse.py"),
+        "--puerto", str(opciones.puerto), "--tasa", str(opciones.tasa),
+        "--tamano", str(opciones.tamano), "--ping", str(opciones.ping),
+        "--corte", str(opciones.corte), "--replay", str(opciones.replay),
+        stdout=asyncio.subprocess.PIPE, env=entorno,
+    )
+    await proceso.stdout.readline()    # el banner sale cuando ya está escuchando
+    return proceso
+
+
+async def medir_en_subproceso(nombre: str, url: str, opciones) -> dict:
+    proceso = await asyncio.create_subprocess_exec(
+        sys.executable, __file__, "--receptor", nombre, "--url", url, "--json",
+        "--streams", str(opciones.streams), "--eventos", str(opciones.eventos),
+        "--ping", str(opciones.ping), "--timeout", str(opciones.timeout),
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+    )
+    salida, errores = await proceso.communicate()
+    try:
+        return json.loads(salida.decode().strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        # p. ej. ModuleNotFoundError: httpx no está instalado
+        motivo = (errores.decode().strip().splitlines() or [f"código {proceso.returncode}"])[-1]
+        return {"receptor": nombre, "error": motivo}
+
+
+def imprimir(resultados: list[dict], opciones) -> None:
+    print(f"\n📈 {opciones.streams} stream(s) x {opciones.eventos:,} eventos | servidor a "
+          f"{opciones.tasa:,.0f} ev/s, {opciones.tamano} B, ping {opciones.ping}s, corte {opciones.corte or '-'}\n")
+    print(f"{'Receptor':<11} | {'Eventos/s':>10} | {'p50 ms':>7} | {'p95 ms':>7} | {'p99 ms':>7} | "
+          f"{'CPU':>5} | {'RSS MB':>7} | {'Dup':>4} | {'Huecos':>6}")
+    print("-" * 92)
+    for r in resultados:
+        if "error" in r:
+            print(f"{r['receptor']:<11} | ❌ {r['error']}")
+            continue
+        marca = "" if r["completo"] else "  ⏱️ timeout"
+        print(f"{r['receptor']:<11} | {r['eventos_s']:>10,.0f} | {r['p50_ms']:>7.1f} | {r['p95_ms']:>7.1f} | "
+              f"{r['p99_ms']:>7.1f} | {r['cpu_pct']:>4.0f}% | {r['rss_mb']:>7.1f} | {r['duplicados']:>4} | "
+              f"{r['huecos']:>6}{marca}")
+
+
+async def main():
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    args.add_argument("--receptor", default="todos", choices=["todos", *RECEPTORES])
+    args.add_argument("--streams", type=int, default=1, help="streams del receptor en este proceso")
+    args.add_argument("--eventos", type=int, default=20_000, help="eventos a recibir por stream")
+    args.add_argument("--tasa", type=float, default=2000, help="eventos por segundo del servidor")
+    args.add_argument("--tamano", type=int, default=256, help="bytes de data por evento")
+    args.add_argument("--ping", type=float, default=15.0)
+    args.add_argument("--corte", type=int, default=0, help="el servidor corta cada conexión tras N eventos")
+    args.add_argument("--replay", type=int, default=10000)
+    args.add_argument("--puerto", type=int, default=8799)
+    args.add_argument("--timeout", type=float, default=120.0, help="segundos máximos por receptor")
+    args.add_argument("--url", default=None, help="usar un servidor ya levantado")
+    args.add_argument("--json", action="store_true", help="una línea JSON (uso interno de 'todos')")
+    args.add_argument("--verboso", action="store_true", help="no silenciar los print de los receptores")
+    opciones = args.parse_args()
+
+    servidor = None
+    url = opciones.url
+    if url is None:
+        servidor = await lanzar_servidor(opciones)
+        url = f"http://127.0.0.1:{opciones.puerto}/eventos"
+    try:
+        if opciones.receptor == "todos":
+            resultados = [await medir_en_subproceso(nombre, url, opciones) for nombre in RECEPTORES]
+        else:
+            resultados = [await medir(opciones.receptor, url, opciones.streams, opciones.eventos,
+                                      opciones.ping, opciones.timeout, opciones.verboso)]
+    finally:
+        if servidor is not None:
+            servidor.terminate()
+            await servidor.wait()
+
+    if opciones.json:
+        print(json.dumps(resultados[0]))
+    else:
+        imprimir(resultados, opciones)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,118 @@
+"""
+SIMULACIÓN: reconexión de 10,000 clientes tras un reinicio del servidor
+
+Todos los clientes pierden el stream en t=0. El servidor tarda `--caida`
+segundos en volver y después solo acepta `--capacidad` conexiones por segundo
+(el resto se rechaza y cuenta como fallo). Se compara cómo reparte cada
+estrategia los intentos en el tiempo:
+  - ServicioSSE:         3s fijos
+  - ReceptorAlertas:     retry_ms * 2**(n-1), máximo 5 intentos
+  - ClienteSSEMultiplex: min(30, 2**n), máximo 5 intentos
+  - PoliticaReconexion:  jitter decorrelacionado + primer reintento rápido + circuit breaker
+
+Es una simulación de eventos discretos (sin red ni asyncio): corre en segundos.
+
+Uso: python bench_reconexion.py [--clientes 10000] [--caida 5] [--capacidad 2000]
+"""
+
+import argparse
+import heapq
+import random
+from collections import Counter
+
+from sse_reconexion import PoliticaReconexion
+
+RANURA = 0.1   # segundos por ranura para medir picos y capacidad
+
+
+def fijo(_n):
+    return 3.0
+
+
+def receptor_alertas(n):
+    return None if n > 5 else 3.0 * 2 ** (n - 1)
+
+
+def multiplex(n):
+    return None if n > 5 else min(30, 2 ** n)
+
+
+def simular(clientes: int, caida: float, capacidad: int, estrategia, semilla: int = 7) -> dict:
+    """estrategia: función n_fallo -> espera (None = se rinde), o "politica"."""
+    politicas = {}
+    fallos = [0] * clientes
+    cola = []
+    for c in range(clientes):
+        if estrategia == "politica":
+            politicas[c] = p = PoliticaReconexion(azar=random.Random(semilla * 100_003 + c))
+            p.exito(ahora=-3600)                  # llevaban una hora conectados
+            espera = p.fallo(ahora=0.0)
+        else:
+            fallos[c] = 1
+            espera = estrategia(1)
+        heapq.heappush(cola, (espera, c))
+
+    por_ranura = capacidad * RANURA
+    aceptados = Counter()
+    intentos = Counter()
+    reconectados = []
+    abandonados = 0
+    total = 0
+    while cola:
+        t, c = heapq.heappop(cola)
+        total += 1
+        ranura = int(t / RANURA)
+        intentos[ranura] += 1
+        if t >= caida and aceptados[ranura] < por_ranura:
+            aceptados[ranura] += 1
+            reconectados.append(t)
+            continue
+        if estrategia == "politica":
+            espera = politicas[c].fallo(ahora=t)
+        else:
+            fallos[c] += 1
+            espera = estrategia(fallos[c])
+            if espera is None:
+                abandonados += 1
+                continue
+        heapq.heappush(cola, (t + espera, c))
+
+    reconectados.sort()
+    def percentil(q):
+        return reconectados[min(len(reconectados) - 1, int(q * len(reconectados)))] if reconectados else float("nan")
+    return {
+        "intentos": total,
+        "pico": max(intentos.values()) / RANURA,
+        "p50": percentil(0.50),
+        "p99": percentil(0.99),
+        "ultimo": reconectados[-1] if reconectados else float("nan"),
+        "abandonados": abandonados,
+    }
+
+
+def main():
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    args.add_argument("--clientes", type=int, default=10_000)
+    args.add_argument("--caida", type=float, default=5.0, help="segundos que el servidor está abajo")
+    args.add_argument("--capacidad", type=int, default=2000, help="conexiones aceptadas por segundo")
+    opciones = args.parse_args()
+
+    print(f"🧪 {opciones.clientes:,} clientes, servidor abajo {opciones.caida}s, "
+          f"acepta {opciones.capacidad:,} conexiones/s\n")
+    estrategias = [
+        ("ServicioSSE (3s fijos)", fijo),
+        ("ReceptorAlertas (3s·2^n)", receptor_alertas),
+        ("Multiplex min(30, 2^n)", multiplex),
+        ("PoliticaReconexion", "politica"),
+    ]
+    print(f"{'Estrategia':<26} | {'Intentos':>8} | {'Pico/s':>8} | {'p50':>6} | {'p99':>6} | {'Último':>7} | {'Rendidos':>8}")
+    print("-" * 88)
+    for nombre, estrategia in estrategias:
+        r = simular(opciones.clientes, opciones.caida, opciones.capacidad, estrategia)
+        print(f"{nombre:<26} | {r['intentos']:>8,} | {r['pico']:>8,.0f} | {r['p50']:>5.1f}s | "
+              f"{r['p99']:>5.1f}s | {r['ultimo']:>6.1f}s | {r['abandonados']:>8,}")
+    print("\nPico/s: intentos por segundo en la peor ventana de 100 ms (lo que ve el balanceador).")
+
+
+if __name__ == "__main__":
+    main()
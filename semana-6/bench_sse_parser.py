@@ -0,0 +1,143 @@
+"""
+BENCHMARK: ParserSSE (bytes) vs. parsers anteriores por línea
+
+Genera un stream sintético de N eventos (por defecto 1,000,000) con la mezcla
+típica de EcoMarket (precio-actualizado, stock-critico y pings), lo parte en
+chunks de 64 KB como llegaría por aiter_bytes() y mide eventos/s de:
+  - ParserSSE (nuevo, compartido)
+  - Estilo ReceptorAlertas (semana-6): aiter_lines + startswith + dict/lista por evento
+  - Estilo ClienteSSEMultiplex (semana-7): aiter_lines + split(":", 1)
+
+Para los parsers por línea se simula aiter_lines() decodificando cada chunk y
+partiendo en líneas, que es lo que hace httpx por dentro.
+
+Uso: python bench_sse_parser.py [--eventos 1000000] [--chunk 65536]
+"""
+
+import argparse
+import json
+import time
+
+from sse_parser import ParserSSE
+
+
+def generar_stream(n: int) -> bytes:
+    partes = []
+    for i in range(n):
+        if i % 50 == 0:
+            partes.append(b": ping\n\n")
+        if i % 10 == 0:
+            cuerpo = {"producto_id": f"B{i % 997}", "stock_actual": i % 5}
+            partes.append(f"id: {i}\nevent: stock-critico\ndata: {json.dumps(cuerpo)}\n\n".encode())
+        else:
+            cuerpo = {"producto_id": f"A{i % 997}", "precio_anterior": 100, "precio_nuevo": 100 + i % 9}
+            partes.append(f"id: {i}\nevent: precio-actualizado\ndata: {json.dumps(cuerpo)}\n\n".encode())
+    return b"".join(partes)
+
+
+def en_chunks(stream: bytes, tamano: int) -> list[bytes]:
+    return [stream[i:i + tamano] for i in range(0, len(stream), tamano)]
+
+
+def lineas_como_httpx(chunks):
+    # equivalente simplificado a response.aiter_lines()
+    resto = ""
+    for chunk in chunks:
+        texto = resto + chunk.decode("utf-8")
+        lineas = texto.splitlines(keepends=True)
+        resto = lineas.pop() if lineas and not lineas[-1].endswith("\n") else ""
+        for linea in lineas:
+            yield linea.rstrip("\r\n")
+
+
+# --- Parsers contra los que comparamos ---
+
+def parser_nuevo(chunks) -> int:
+    parser = ParserSSE()
+    total = 0
+    for chunk in chunks:
+        total += len(parser.alimentar(chunk))
+    return total
+
+
+def parser_receptor_alertas(chunks) -> int:
+    total = 0
+    buffer = {"id": None, "event": "message", "data": []}
+    for line in lineas_como_httpx(chunks):
+        if not line.strip():
+            if buffer["data"]:
+                "".join(buffer["data"])
+                total += 1
+                buffer = {"id": None, "event": "message", "data": []}
+            continue
+        if line.startswith("id:"):
+            buffer["id"] = line[3:].strip()
+        elif line.startswith("event:"):
+            buffer["event"] = line[6:].strip()
+        elif line.startswith("data:"):
+            buffer["data"].append(line[5:].strip())
+        elif line.startswith("retry:"):
+            int(line[6:].strip())
+    return total
+
+
+def parser_multiplex(chunks) -> int:
+    total = 0
+    buffer = {"id": None, "event": "message", "data": []}
+    for linea in lineas_como_httpx(chunks):
+        if not linea.strip():
+            if buffer["data"]:
+                "".join(buffer["data"])
+                total += 1
+            buffer = {"id": None, "event": "message", "data": []}
+            continue
+        if linea.startswith(":"):
+            continue
+        if ":" not in linea:
+            campo, valor = linea, ""
+        else:
+            campo, valor = linea.split(":", 1)
+            campo, valor = campo.strip(), valor.strip()
+        if campo == "id":
+            buffer["id"] = valor
+        elif campo == "event":
+            buffer["event"] = valor
+        elif campo == "data":
+            buffer["data"].append(valor)
+    return total
+
+
+def medir(nombre, funcion, chunks, esperados):
+    inicio = time.perf_counter()
+    total = funcion(chunks)
+    duracion = time.perf_counter() - inicio
+    assert total == esperados, f"{nombre}: {total} eventos, se esperaban {esperados}"
+    return nombre, duracion, total / duracion
+
+
+def main():
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    args.add_argument("--eventos", type=int, default=1_000_000)
+    args.add_argument("--chunk", type=int, default=64 * 1024)
+    opciones = args.parse_args()
+
+    print(f"🧪 Generando stream de {opciones.eventos:,} eventos...")
+    stream = generar_stream(opciones.eventos)
+    chunks = en_chunks(stream, opciones.chunk)
+    print(f"   {len(stream) / 1e6:.1f} MB en {len(chunks):,} chunks de {opciones.chunk} bytes\n")
+
+    resultados = [
+        medir("ParserSSE (bytes)", parser_nuevo, chunks, opciones.eventos),
+        medir("ReceptorAlertas (líneas)", parser_receptor_alertas, chunks, opciones.eventos),
+        medir("ClienteSSEMultiplex (split)", parser_multiplex, chunks, opciones.eventos),
+    ]
+
+    base = resultados[0][2]
+    print(f"{'Parser':<30} | {'Tiempo':>8} | {'Eventos/s':>12} | {'Relativo':>8}")
+    print("-" * 68)
+    for nombre, duracion, por_segundo in resultados:
+        print(f"{nombre:<30} | {duracion:>7.2f}s | {por_segundo:>12,.0f} | {por_segundo / base:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
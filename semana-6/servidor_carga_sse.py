@@ -0,0 +1,136 @@
+"""
+SERVIDOR DE CARGA SSE LOCAL — EcoMarket
+
+Problema: todos los receptores apuntan a https://sse.dev/test o a
+localhost:8000, que mandan unos pocos eventos por minuto. No hay forma de
+saber cuántos streams o eventos por segundo aguanta un proceso, ni de
+reproducir cortes y replays de forma controlada.
+
+DECISIONES DE DISEÑO:
+1. REUSAR HubSSE: el servidor es un HubSSE sin upstream, alimentado por un
+   productor sintético. Así el framing, los pings, el buffer de replay por
+   Last-Event-ID y la expulsión de lentos son exactamente los de producción.
+
+2. TASA CONSTANTE POR LOTES: el productor despierta cada `tick` (10 ms) y
+   publica los eventos que "debe" según el reloj (tasa * transcurrido), así
+   que un tick atrasado se compensa en el siguiente en vez de bajar la tasa.
+
+3. PAYLOAD MEDIBLE: cada evento lleva "seq" (consecutivo global) y "ts"
+   (time.time() al publicar) para que el harness mida latencia extremo a
+   extremo, huecos y duplicados. "relleno" completa el tamaño pedido.
+   Mezcla típica: 90% precio-actualizado, 10% stock-critico.
+
+4. CORTES FORZADOS: con --corte N cada conexión se cierra tras N eventos;
+   el cliente debe reconectar con Last-Event-ID y no perder nada (el 'retry:'
+   que se anuncia es --retry-ms).
+
+Uso: python servidor_carga_sse.py [--tasa 1000] [--tamano 256] [--ping 15]
+                                  [--corte 0] [--replay 10000] [--puerto 8765]
+El endpoint queda en http://127.0.0.1:<puerto>/eventos
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from sse_hub import HubSSE
+from sse_parser import EventoSSE
+
+TICK = 0.01
+
+
+class GeneradorCarga:
+    def __init__(self, hub: HubSSE, tasa: float = 1000.0, tamano: int = 256,
+                 proporcion_stock: float = 0.1):
+        """
+        :param tasa: eventos por segundo a publicar.
+        :param tamano: bytes aproximados del campo data de cada evento.
+        :param proporcion_stock: fracción de eventos stock-critico.
+        """
+        self.hub = hub
+        self.tasa = tasa
+        self.tamano = tamano
+        self.cada_stock = max(1, round(1 / proporcion_stock)) if proporcion_stock else 0
+        self.seq = 0
+
+    def evento(self) -> EventoSSE:
+        self.seq += 1
+        n = self.seq
+        if self.cada_stock and n % self.cada_stock == 0:
+            tipo = "stock-critico"
+            cuerpo = {"producto_id": f"B{n % 997}", "producto": f"Producto {n % 997}",
+                      "stock": n % 5, "stock_actual": n % 5}
+        else:
+            tipo = "precio-actualizado"
+            cuerpo = {"producto_id": f"A{n % 997}", "producto": f"Producto {n % 997}",
+                      "precio": 100 + n % 9, "precio_anterior": 100, "precio_nuevo": 100 + n % 9}
+        cuerpo["seq"] = n
+        cuerpo["ts"] = time.time()
+        data = json.dumps(cuerpo, separators=(",", ":"))
+        falta = self.tamano - len(data) - len(',"relleno":""')
+        if falta > 0:
+            cuerpo["relleno"] = "x" * falta
+            data = json.dumps(cuerpo, separators=(",", ":"))
+        return EventoSSE(tipo, data, str(n))
+
+    async def producir(self, duracion: float | None = None) -> None:
+        """Publica a `tasa` eventos/s hasta que se cancele (o pase `duracion`)."""
+        inicio = time.monotonic()
+        while True:
+            transcurrido = time.monotonic() - inicio
+            if duracion is not None and transcurrido >= duracion:
+                return
+            debidos = int(self.tasa * transcurrido) - self.seq
+            for _ in range(debidos):
+                self.hub.publicar(self.evento())
+            await asyncio.sleep(TICK)
+
+
+async def levantar(puerto: int = 8765, tasa: float = 1000.0, tamano: int = 256,
+                   ping: float = 15.0, corte: int | None = None, replay: int = 10000,
+                   retry_ms: int = 100, host: str = "127.0.0.1"):
+    """Arranca hub + productor. Regresa (hub, generador, tarea del productor)."""
+    hub = HubSSE(f"carga://{host}:{puerto}", replay=replay, intervalo_ping=ping)
+    hub.retry_ms = retry_ms
+    await hub.servir(puerto, host, max_eventos_conexion=corte or None)
+    generador = GeneradorCarga(hub, tasa, tamano)
+    tarea = asyncio.create_task(generador.producir())
+    return hub, generador, tarea
+
+
+async def main():
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    args.add_argument("--puerto", type=int, default=8765)
+    args.add_argument("--tasa", type=float, default=1000, help="eventos por segundo")
+    args.add_argument("--tamano", type=int, default=256, help="bytes de data por evento")
+    args.add_argument("--ping", type=float, default=15.0, help="segundos entre ': ping'")
+    args.add_argument("--corte", type=int, default=0, help="cerrar cada conexión tras N eventos (0 = nunca)")
+    args.add_argument("--replay", type=int, default=10000, help="eventos guardados para Last-Event-ID")
+    args.add_argument("--retry-ms", type=int, default=100, help="'retry:' anunciado a los clientes")
+    args.add_argument("--duracion", type=float, default=None, help="segundos (por defecto, hasta Ctrl+C)")
+    opciones = args.parse_args()
+
+    hub, generador, tarea = await levantar(
+        opciones.puerto, opciones.tasa, opciones.tamano, opciones.ping,
+        opciones.corte, opciones.replay, opciones.retry_ms,
+    )
+    print(f"🏭 Carga SSE en http://127.0.0.1:{opciones.puerto}/eventos "
+          f"({opciones.tasa:.0f} ev/s, {opciones.tamano} B, ping {opciones.ping}s, "
+          f"corte {opciones.corte or '-'})", flush=True)
+    try:
+        if opciones.duracion is not None:
+            await asyncio.sleep(opciones.duracion)
+        else:
+            await tarea
+    finally:
+        tarea.cancel()
+        await hub.detener()
+        print(f"📊 Métricas del hub: {hub.metricas()} | publicados por el generador: {generador.seq}")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,173 @@
+"""
+CHECKPOINT DURABLE DE LAST-EVENT-ID — EcoMarket
+
+Problema: `ultimo_id` vivía solo en memoria. Si el proceso se reiniciaba, el
+stream volvía a empezar (reprocesando todo) o, si se guardaba el id del
+último evento LEÍDO, se saltaban los que estaban en cola sin procesar.
+
+DECISIONES DE DISEÑO:
+1. MARCA DE AGUA: Cada evento recibe un número de secuencia al llegar. El
+   checkpoint solo avanza hasta el último evento tal que TODOS los anteriores
+   ya se procesaron (con varios workers terminan en desorden). Un evento que
+   se leyó pero nunca llegó a procesarse (cancelado()) FRENA la marca de agua
+   en el id anterior a él: así el Last-Event-ID guardado hace que el servidor
+   lo repita. Cuando la repetición llega, ocupa el mismo lugar en la
+   secuencia y al procesarse la marca sigue avanzando.
+
+2. VENTANA DE IDEMPOTENCIA: Se recuerdan los últimos N ids vistos. Tras una
+   reconexión o un reinicio, el servidor repite desde el checkpoint; los ids
+   que ya se procesaron se descartan en vez de re-ejecutarse.
+
+3. FSYNC AGRUPADO: Marcar un evento solo toca memoria. Una tarea de fondo
+   escribe a disco como máximo cada `intervalo` segundos y solo si hubo
+   cambios (archivo temporal + fsync + os.replace, en un hilo para no
+   bloquear el loop). A decenas de miles de eventos/s son ~5 escrituras/s.
+"""
+
+import asyncio
+import json
+import os
+from collections import OrderedDict, deque
+
+
+class CheckpointSSE:
+    def __init__(self, ruta: str = "checkpoint_sse.json", intervalo: float = 0.2, ventana: int = 4096):
+        self.ruta = ruta
+        self.intervalo = intervalo
+        self.ultimo_id: str | None = None     # último id con todo lo anterior ya procesado
+        self.duplicados = 0
+
+        self._seq = 0
+        self._en_vuelo: OrderedDict[int, list] = OrderedDict()   # seq -> [id, terminado]
+        self._cancelados: dict[str, int] = {}                     # id -> seq que lo espera
+        self._vistos: set[str] = set()
+        self._orden_vistos: deque[str] = deque()
+        self._procesados: deque[str] = deque(maxlen=ventana)
+        self._ventana = ventana
+        self._sucio = False
+        self._tarea: asyncio.Task | None = None
+        self._cargar()
+
+    def _cargar(self) -> None:
+        try:
+            with open(self.ruta, encoding="utf-8") as f:
+                estado = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Checkpoint ilegible ({e}); se empieza sin Last-Event-ID.")
+            return
+        self.ultimo_id = estado.get("ultimo_id")
+        for id_ in estado.get("ventana", []):
+            self._recordar(id_)
+            self._procesados.append(id_)
+
+    def _recordar(self, id_: str) -> None:
+        self._vistos.add(id_)
+        self._orden_vistos.append(id_)
+        if len(self._orden_vistos) > self._ventana:
+            self._vistos.discard(self._orden_vistos.popleft())
+
+    # --- Ciclo de vida de un evento ---
+
+    def duplicado(self, id_: str | None) -> bool:
+        """True si el id ya se vio (en vuelo o procesado) dentro de la ventana."""
+        if id_ is not None and id_ in self._vistos:
+            self.duplicados += 1
+            return True
+        return False
+
+    def recibido(self, id_: str | None) -> int:
+        """Registra un evento que entra a procesarse. Regresa su número de secuencia."""
+        if id_ is not None and id_ in self._cancelados:
+            # la repetición de un evento cancelado retoma su lugar (y su seq) en la marca de agua
+            self._recordar(id_)
+            return self._cancelados.pop(id_)
+        self._seq += 1
+        self._en_vuelo[self._seq] = [id_, False]
+        if id_ is not None:
+            self._recordar(id_)
+        return self._seq
+
+    def completado(self, seq: int) -> None:
+        """Marca el evento como procesado (o descartado a propósito) y avanza la marca de agua."""
+        entrada = self._en_vuelo.get(seq)
+        if entrada is None:
+            return
+        entrada[1] = True
+        if entrada[0] is not None:
+            self._procesados.append(entrada[0])
+        self._avanzar()
+
+    def cancelado(self, seq: int) -> None:
+        """
+        Deshace recibido(): el evento nunca llegó a la cola (el lector se canceló
+        esperando lugar). Se olvida su id para que la repetición del servidor no
+        cuente como duplicado, pero su lugar sigue sin terminar: la marca de agua
+        no pasa de él hasta que esa repetición se procese.
+        """
+        entrada = self._en_vuelo.get(seq)
+        if entrada is None or entrada[1]:
+            return
+        id_ = entrada[0]
+        if id_ is not None:
+            if id_ in self._vistos:
+                self._vistos.discard(id_)
+                self._orden_vistos.remove(id_)
+            self._cancelados[id_] = seq
+
+    def _avanzar(self) -> None:
+        # avanzamos mientras el más viejo en vuelo ya esté terminado
+        while self._en_vuelo:
+            seq_viejo, (id_, terminado) = next(iter(self._en_vuelo.items()))
+            if not terminado:
+                break
+            del self._en_vuelo[seq_viejo]
+            if id_ is not None:
+                self.ultimo_id = id_
+        self._sucio = True
+
+    def procesado(self, id_: str | None) -> None:
+        """Atajo para receptores sin cola: recibido + completado."""
+        self.completado(self.recibido(id_))
+
+    # --- Persistencia agrupada ---
+
+    def iniciar(self) -> None:
+        if self._tarea is None or self._tarea.done():
+            self._tarea = asyncio.get_running_loop().create_task(self._ciclo())
+
+    async def _ciclo(self) -> None:
+        while True:
+            await asyncio.sleep(self.intervalo)
+            await self.guardar()
+
+    async def guardar(self) -> None:
+        if not self._sucio:
+            return
+        self._sucio = False
+        estado = {"ultimo_id": self.ultimo_id, "ventana": list(self._procesados)}
+        try:
+            await asyncio.to_thread(self._escribir, estado)
+        except OSError as e:
+            self._sucio = True
+            print(f"⚠️ No se pudo guardar el checkpoint: {e}")
+
+    def _escribir(self, estado: dict) -> None:
+        temporal = f"{self.ruta}.tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(estado, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, self.ruta)
+
+    async def cerrar(self) -> None:
+        if self._tarea is not None:
+            self._tarea.cancel()
+            # una escritura en curso del .tmp debe terminar antes de la final
+            try:
+                await self._tarea
+            except asyncio.CancelledError:
+                pass
+            self._tarea = None
+        await self.guardar()
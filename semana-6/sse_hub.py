@@ -0,0 +1,444 @@
+"""
+HUB DE FAN-OUT SSE: UNA CONEXIÓN UPSTREAM, MUCHOS CONSUMIDORES — EcoMarket
+
+Problema: cada módulo que quiere alertas abre su propio stream (ServicioSSE,
+ReceptorAlertas, ReceptorAlertasV2...). Con N módulos son N sockets abiertos
+contra /eventos por proceso, N parsers y N reconexiones simultáneas cuando la
+red parpadea (ver notas 2 y 5 de semana-7/RETO IA #3/receptor_alertas_v2.py).
+
+DECISIONES DE DISEÑO:
+1. UNA CONEXIÓN POR HOST: hub_para(url) regresa siempre el mismo HubSSE para
+   el mismo esquema://host. El hub lee el stream upstream con el ParserSSE
+   compartido y reconecta solo con Last-Event-ID; los suscriptores no se
+   enteran del corte. Los filtros van por suscriptor, no en la URL: pedir
+   otra ruta u otra query al mismo host es un ValueError (serían dos streams).
+
+2. SUSCRIPTORES EN PROCESO O POR SOCKET LOCAL:
+   - En proceso: `async for evento in hub.suscribir(...)` entrega EventoSSE.
+   - Socket local: hub.servir(puerto) expone el mismo stream como SSE en
+     127.0.0.1, así que los receptores existentes solo cambian su URL.
+   Cada evento se serializa a bytes UNA vez y esos bytes se comparten entre
+   todos los sockets.
+
+3. FILTROS POR SUSCRIPTOR: por tipo de evento (`eventos={"stock-critico"}` o
+   `?eventos=stock-critico` en el socket) y/o un predicado sobre el EventoSSE.
+   Se evalúan al publicar: lo filtrado nunca entra a la cola del suscriptor.
+
+4. REPLAY EN BUFFER CIRCULAR: Se guardan los últimos `replay` eventos. Un
+   suscriptor que llega tarde (o que reconecta con Last-Event-ID) recibe lo
+   que sigue a su último id sin que el hub vuelva a pedirlo upstream.
+
+5. EXPULSIÓN DE CONSUMIDORES LENTOS: publicar nunca espera. Cada suscriptor
+   tiene una cola acotada; si se llena, se le expulsa (su iteración termina y
+   su socket se cierra) para que no frene a los demás ni acumule memoria. Puede
+   volver a suscribirse desde su `ultimo_id` y recuperar lo perdido del buffer;
+   hub.recibir(...) lo hace solo.
+
+6. HUECOS A LA VISTA: si el id pedido ya salió del buffer (o nunca pasó por
+   este hub) no se inventa un replay: no se entrega nada viejo, la
+   suscripción queda con `hueco=True`, el hub cuenta `huecos` y al socket
+   local se le manda un comentario ': hueco ...'. Quien no puede perder
+   eventos debe resincronizar por REST.
+
+7. LOS RECEPTORES LO USAN CON hub=: ReceptorAlertas (semana-6 #2 y #3) y
+   ReceptorAlertasV2 (#5) aceptan hub=hub_para(url); en vez de abrir su
+   stream leen de hub.recibir(). Quien crea el hub lo arranca con iniciar().
+"""
+
+import asyncio
+from collections import deque
+from urllib.parse import parse_qs, urlsplit
+
+from sse_parser import EventoSSE, ParserSSE
+from sse_reconexion import PoliticaReconexion, StreamCerrado
+from sse_watchdog import StreamMuerto, VigilanteSSE
+
+_PING = b": ping\n\n"
+
+
+def serializar(evento: EventoSSE) -> bytes:
+    """Formato text/event-stream de un evento (una línea 'data:' por cada línea)."""
+    partes = []
+    if evento.id is not None:
+        partes.append(f"id: {evento.id}\n")
+    if evento.event != "message":
+        partes.append(f"event: {evento.event}\n")
+    for linea in evento.data.split("\n"):
+        partes.append(f"data: {linea}\n")
+    partes.append("\n")
+    return "".join(partes).encode("utf-8")
+
+
+class SuscripcionSSE:
+    """Vista de un consumidor sobre el hub. Se itera con `async for`."""
+
+    def __init__(self, hub: "HubSSE", eventos=None, filtro=None, capacidad: int = 1000):
+        self._hub = hub
+        self.eventos = frozenset(eventos) if eventos else None
+        self.filtro = filtro
+        self.capacidad = capacidad
+        self._limite = capacidad             # + lo que venga del replay, que no cuenta como atraso
+        self.ultimo_id: str | None = None
+        self.entregados = 0
+        self.expulsado = False
+        self.hueco = False                   # el desde_id ya no estaba en el buffer
+        self._cola: deque = deque()          # (EventoSSE, bytes)
+        self._hay_datos = asyncio.Event()
+        self._cerrada = False
+
+    def acepta(self, evento: EventoSSE) -> bool:
+        if self.eventos is not None and evento.event not in self.eventos:
+            return False
+        return self.filtro is None or self.filtro(evento)
+
+    def _entregar(self, item: tuple) -> bool:
+        """Lo llama el hub al publicar. Regresa False si hubo que expulsar."""
+        if len(self._cola) >= self._limite:
+            self.expulsado = True
+            self._cola.clear()
+            self.cerrar()
+            return False
+        self._cola.append(item)
+        self._hay_datos.set()
+        return True
+
+    async def siguiente(self) -> tuple | None:
+        """Regresa (evento, bytes) o None si la suscripción terminó."""
+        while not self._cola:
+            if self._cerrada:
+                return None
+            self._hay_datos.clear()
+            await self._hay_datos.wait()
+        item = self._cola.popleft()
+        self.ultimo_id = item[0].id
+        self.entregados += 1
+        return item
+
+    def lote(self, maximo: int = 256) -> list:
+        """Lo que ya está en cola (hasta `maximo`), sin esperar. Para escribir en bloque."""
+        n = min(maximo, len(self._cola))
+        if not n:
+            return []
+        items = [self._cola.popleft() for _ in range(n)]
+        self.ultimo_id = items[-1][0].id
+        self.entregados += n
+        return items
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> EventoSSE:
+        item = await self.siguiente()
+        if item is None:
+            raise StopAsyncIteration
+        return item[0]
+
+    def cerrar(self) -> None:
+        if not self._cerrada:
+            self._cerrada = True
+            self._hay_datos.set()
+            self._hub._quitar(self)
+
+
+class HubSSE:
+    def __init__(self, url: str, replay: int = 1000, capacidad_suscriptor: int = 1000,
+                 intervalo_ping: float = 15.0):
+        """
+        :param url: endpoint upstream (p. ej. https://api.ecomarket.com/eventos).
+        :param replay: cuántos eventos recientes se guardan para los que llegan tarde.
+        :param capacidad_suscriptor: eventos pendientes tolerados antes de expulsar.
+        :param intervalo_ping: cada cuánto se manda ': ping' a los sockets locales (y
+                               el que se espera del upstream antes de darlo por muerto).
+        """
+        self.url = url
+        self.capacidad_suscriptor = capacidad_suscriptor
+        self.intervalo_ping = intervalo_ping
+        self.ultimo_id: str | None = None
+        self.retry_ms = 3000
+        self.activo = False
+        self.vigilante = VigilanteSSE(intervalo_ping)   # el upstream manda ': ping' al mismo ritmo
+        self.reconexion = PoliticaReconexion()
+
+        self._buffer: deque = deque(maxlen=replay)     # (EventoSSE, bytes)
+        self._suscriptores: list[SuscripcionSSE] = []
+        self._tarea: asyncio.Task | None = None
+        self._servidor: asyncio.AbstractServer | None = None
+        self.max_eventos_conexion: int | None = None
+
+        self.conexiones_upstream = 0
+        self.publicados = 0
+        self.expulsados = 0
+        self.huecos = 0
+
+    # --- Suscriptores ---
+
+    def suscribir(self, eventos=None, filtro=None, desde_id: str | None = None,
+                  capacidad: int | None = None) -> SuscripcionSSE:
+        """
+        Registra un consumidor. Con desde_id se le entrega primero lo que haya en
+        el buffer después de ese id; si el id ya salió de él no se entrega nada
+        viejo y la suscripción queda marcada con `hueco`.
+        """
+        sub = SuscripcionSSE(self, eventos, filtro, capacidad or self.capacidad_suscriptor)
+        if desde_id is not None:
+            replay = self._replay_desde(desde_id)
+            if replay is None:
+                sub.hueco = True
+                self.huecos += 1
+                print(f"🕳️ Replay incompleto: el id {desde_id} ya no está en el buffer "
+                      f"(se entrega desde el siguiente evento).")
+                replay = []
+            self._precargar(sub, replay)
+        self._suscriptores.append(sub)
+        return sub
+
+    @staticmethod
+    def _precargar(sub: SuscripcionSSE, replay: list) -> None:
+        pendientes = [item for item in replay if sub.acepta(item[0])]
+        sub._cola.extend(pendientes)
+        sub._limite += len(pendientes)
+        if pendientes:
+            sub._hay_datos.set()
+
+    def _replay_desde(self, desde_id: str) -> list | None:
+        """Lo que sigue a desde_id en el buffer, o None si el id no está (hueco)."""
+        if desde_id == self.ultimo_id:
+            return []
+        for pos in range(len(self._buffer) - 1, -1, -1):
+            if self._buffer[pos][0].id == desde_id:
+                return list(self._buffer)[pos + 1:]
+        return None
+
+    async def recibir(self, eventos=None, filtro=None, desde_id: str | None = None):
+        """
+        Como `async for evento in suscribir(...)`, pero si el consumidor es
+        expulsado vuelve a suscribirse desde su último id. Termina al detener el hub.
+        """
+        if desde_id is None:
+            desde_id = self.ultimo_id      # "desde ahora": lo que llegue después de esto
+        primera = True
+        while True:
+            sub = self.suscribir(eventos, filtro, desde_id)
+            if desde_id is None and not primera:
+                self._precargar(sub, list(self._buffer))   # aún no había ids: todo el buffer es nuevo
+            primera = False
+            try:
+                async for evento in sub:
+                    yield evento
+            finally:
+                sub.cerrar()        # también si el consumidor deja de iterar (aclose)
+            if not sub.expulsado:
+                return
+            desde_id = sub.ultimo_id or desde_id
+
+    def _quitar(self, sub: SuscripcionSSE) -> None:
+        try:
+            self._suscriptores.remove(sub)
+        except ValueError:
+            pass
+
+    def publicar(self, evento: EventoSSE) -> None:
+        """Reparte un evento a todos los suscriptores interesados sin esperar a ninguno."""
+        item = (evento, serializar(evento))
+        self._buffer.append(item)
+        self.publicados += 1
+        if evento.id is not None:
+            self.ultimo_id = evento.id
+        # copia: _entregar puede sacar suscriptores expulsados de la lista
+        for sub in list(self._suscriptores):
+            if sub.acepta(evento) and not sub._entregar(item):
+                self.expulsados += 1
+                print(f"🐢 Suscriptor expulsado por lento (último id entregado: {sub.ultimo_id}).")
+
+    # --- Upstream (una sola conexión) ---
+
+    def iniciar(self) -> None:
+        if self._tarea is None or self._tarea.done():
+            self.activo = True
+            self._tarea = asyncio.get_running_loop().create_task(self._ciclo_upstream())
+
+    async def _ciclo_upstream(self) -> None:
+        import httpx   # solo el lado upstream necesita httpx
+
+        while self.activo:
+            headers = {"Accept": "text/event-stream", "Cache-Control": "no-cache"}
+            if self.ultimo_id:
+                headers["Last-Event-ID"] = str(self.ultimo_id)
+            try:
+                async with httpx.AsyncClient(timeout=None) as client:
+                    async with client.stream("GET", self.url, headers=headers, timeout=10.0) as resp:
+                        if resp.status_code == 204:
+                            print("🛑 Upstream cerró el flujo (204).")
+                            break
+                        if resp.status_code != 200:
+                            raise Exception(f"HTTP {resp.status_code}")
+
+                        self.conexiones_upstream += 1
+                        self.reconexion.exito()
+                        print(f"🔗 Hub conectado a {self.url} ({len(self._suscriptores)} suscriptor(es)).")
+                        parser = ParserSSE(ultimo_id=self.ultimo_id)
+                        async for chunk in self.vigilante.vigilar(resp.aiter_bytes()):
+                            for evento in parser.alimentar(chunk):
+                                self.publicar(evento)
+                            if parser.retry is not None:
+                                self.retry_ms = parser.retry     # se reenvía a los sockets locales
+                                self.reconexion.retry(parser.retry)
+                        if self.activo:
+                            # cierre limpio (reinicio del servidor): mismo backoff con jitter
+                            raise StreamCerrado("el servidor cerró el stream")
+            except asyncio.CancelledError:
+                raise
+            except StreamMuerto as e:
+                espera = self.reconexion.fallo()
+                print(f"💀 Upstream mudo ({e}). Reconectando desde {self.ultimo_id} en {espera:.1f}s...")
+                await asyncio.sleep(espera)
+            except Exception as e:
+                espera = self.reconexion.fallo()
+                print(f"🔌 Hub sin upstream ({e}). Reintento {self.reconexion.fallos} en {espera:.1f}s...")
+                await asyncio.sleep(espera)
+
+    # --- Suscriptores por socket local ---
+
+    async def servir(self, puerto: int = 8765, host: str = "127.0.0.1",
+                     max_eventos_conexion: int | None = None) -> asyncio.AbstractServer:
+        """
+        Expone el hub como endpoint SSE local: GET /eventos?eventos=a,b (+ Last-Event-ID).
+        Con max_eventos_conexion se corta cada conexión tras N eventos (obliga a los
+        clientes a reconectar con Last-Event-ID; útil para pruebas de carga).
+        """
+        self.max_eventos_conexion = max_eventos_conexion
+        self._servidor = await asyncio.start_server(self._atender, host, puerto)
+        return self._servidor
+
+    async def _atender(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        sub = None
+        try:
+            linea = await reader.readline()
+            partes = linea.decode("latin-1").split()
+            if len(partes) < 2 or partes[0] != "GET":
+                writer.write(b"HTTP/1.1 405 Method Not Allowed\r\nConnection: close\r\n\r\n")
+                return
+            cabeceras = {}
+            while True:
+                linea = await reader.readline()
+                if linea in (b"\r\n", b"\n", b""):
+                    break
+                nombre, _, valor = linea.decode("latin-1").partition(":")
+                cabeceras[nombre.strip().lower()] = valor.strip()
+
+            consulta = parse_qs(urlsplit(partes[1]).query)
+            eventos = {e for v in consulta.get("eventos", []) for e in v.split(",") if e}
+            desde_id = cabeceras.get("last-event-id")
+            sub = self.suscribir(eventos or None, desde_id=desde_id)
+
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n"
+                + f"retry: {self.retry_ms}\n\n".encode()
+            )
+            if sub.hueco:
+                writer.write(f": hueco desde {desde_id}\n\n".encode())
+            await writer.drain()
+            limite = self.max_eventos_conexion
+            enviados = 0
+            while limite is None or enviados < limite:
+                # Lo acumulado se escribe en un solo write/drain; solo se espera si no hay nada
+                lote = sub.lote(256 if limite is None else min(256, limite - enviados))
+                if lote:
+                    writer.write(b"".join(item[1] for item in lote))
+                    enviados += len(lote)
+                else:
+                    try:
+                        item = await asyncio.wait_for(sub.siguiente(), self.intervalo_ping)
+                    except asyncio.TimeoutError:
+                        writer.write(_PING)
+                    else:
+                        if item is None:
+                            break    # expulsado o hub detenido
+                        writer.write(item[1])
+                        enviados += 1
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if sub is not None:
+                sub.cerrar()
+            writer.close()
+
+    # --- Ciclo de vida y métricas ---
+
+    async def detener(self) -> None:
+        self.activo = False
+        if self._tarea is not None:
+            self._tarea.cancel()
+            await asyncio.gather(self._tarea, return_exceptions=True)
+            self._tarea = None
+        if self._servidor is not None:
+            self._servidor.close()
+            await self._servidor.wait_closed()
+            self._servidor = None
+        for sub in list(self._suscriptores):
+            sub.cerrar()
+        if _HUBS.get(_origen(self.url)) is self:
+            del _HUBS[_origen(self.url)]
+
+    def metricas(self) -> dict:
+        return {
+            "conexiones_upstream": self.conexiones_upstream,
+            "suscriptores": len(self._suscriptores),
+            "publicados": self.publicados,
+            "expulsados": self.expulsados,
+            "huecos": self.huecos,
+            "buffer_replay": len(self._buffer),
+            "latidos": self.vigilante.metricas(),
+            "reconexion": self.reconexion.metricas(),
+            "pendientes": {i: len(s._cola) for i, s in enumerate(self._suscriptores)},
+        }
+
+
+_HUBS: dict[str, HubSSE] = {}
+
+
+def _origen(url: str) -> str:
+    partes = urlsplit(url)
+    return f"{partes.scheme}://{partes.netloc}"
+
+
+def hub_para(url: str, **opciones) -> HubSSE:
+    """Regresa el hub del host de esa URL (lo crea la primera vez): una conexión upstream por host."""
+    hub = _HUBS.get(_origen(url))
+    if hub is None:
+        hub = _HUBS[_origen(url)] = HubSSE(url, **opciones)
+    elif urlsplit(hub.url)[2:4] != urlsplit(url)[2:4]:
+        raise ValueError(f"Ya hay un hub para {_origen(url)} leyendo {hub.url}; "
+                         f"filtra con suscribir(eventos=...) en vez de abrir otro stream")
+    return hub
+
+
+async def main():
+    # Un proceso, varios módulos, un solo socket contra /eventos
+    hub = hub_para("https://api.ecomarket.com/eventos")
+    await hub.servir(8765)     # ReceptorAlertas("http://127.0.0.1:8765/eventos?eventos=stock-critico")
+    hub.iniciar()
+
+    async def modulo(nombre, **filtros):
+        async for evento in hub.suscribir(**filtros):
+            print(f"📬 [{nombre}] {evento.event} #{evento.id}: {evento.data}")
+
+    tareas = [
+        asyncio.create_task(modulo("compras", eventos={"stock-critico"})),
+        asyncio.create_task(modulo("precios", eventos={"precio-actualizado"})),
+    ]
+    try:
+        await asyncio.sleep(60)
+    finally:
+        await hub.detener()
+        await asyncio.gather(*tareas, return_exceptions=True)
+        print(f"📊 Métricas del hub: {hub.metricas()}")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
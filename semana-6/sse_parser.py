@@ -0,0 +1,150 @@
+"""
+PARSER SSE INCREMENTAL (BYTES) — compartido por todos los receptores EcoMarket
+
+Antes cada receptor parseaba línea por línea con startswith() y line.strip()
+sobre aiter_lines(): decodificación a texto de cada línea, un dict/lista por
+evento y un "".join() que además pegaba mal los 'data' multilínea (el estándar
+los une con "\n"). Cada receptor tenía su propia variante con bugs distintos.
+
+DECISIONES DE DISEÑO (estándar WHATWG text/event-stream):
+1. BYTES CRUDOS: Se alimenta con los chunks de aiter_bytes(). Se parte por
+   bloques (b"\n\n") en C y solo se decodifica UNA vez por evento, no por línea.
+   El bloque típico ([id] [event] data) se resuelve con una sola regex
+   compilada; los bloques raros (comentarios, retry, data multilínea) van por
+   el camino general línea por línea.
+
+2. FINES DE LÍNEA: Acepta LF, CRLF y CR solo. Un CR al final de un chunk se
+   recuerda para no contar doble si el LF llega en el siguiente chunk.
+
+3. CAMPOS: 'data' multilínea se une con "\n"; 'event' vacío = "message";
+   'id' persiste entre eventos (Last-Event-ID) y se ignora si trae NUL;
+   'retry' solo si son dígitos. Se quita UN espacio tras los dos puntos.
+   Un bloque sin 'data' no se despacha (pero sí actualiza el id).
+
+4. COMENTARIOS: Las líneas ':' (pings) se descartan, o se emiten como eventos
+   de tipo COMENTARIO si el receptor las necesita (keep-alive).
+"""
+
+import re
+from typing import NamedTuple
+
+COMENTARIO = ":"
+_BOM = b"\xef\xbb\xbf"
+
+# Forma canónica de un bloque: [id] [event] data, cada campo en una línea
+_BLOQUE_SIMPLE = re.compile(
+    rb"(?:id: ?([^\n\x00]*)\n)?(?:event: ?([^\n]*)\n)?data: ?([^\n]*)"
+)
+
+
+class EventoSSE(NamedTuple):
+    event: str
+    data: str
+    id: str | None = None
+
+
+# tuple.__new__ directo: crear el evento sin pasar por __new__ en Python
+_nuevo_evento = tuple.__new__
+
+
+class ParserSSE:
+    def __init__(self, emitir_comentarios: bool = False, ultimo_id: str | None = None):
+        self.emitir_comentarios = emitir_comentarios
+        self.ultimo_id = ultimo_id        # Last-Event-ID vigente (persiste entre eventos)
+        self.retry: int | None = None     # último 'retry:' del servidor, en ms
+        self._resto = b""
+        self._cr_pendiente = False
+        self._inicio = True
+        self._nombres: dict[bytes, str] = {}   # caché de nombres de evento ya decodificados
+
+    def alimentar(self, chunk: bytes) -> list[EventoSSE]:
+        """Procesa un chunk de bytes y regresa los eventos que quedaron completos."""
+        if self._inicio:
+            chunk = self._resto + chunk
+            if len(chunk) < len(_BOM) and _BOM.startswith(chunk):
+                # muy poco para decidir si es BOM; esperamos al siguiente chunk
+                self._resto = chunk
+                return []
+            self._resto = b""
+            if chunk.startswith(_BOM):
+                chunk = chunk[len(_BOM):]
+            self._inicio = False
+
+        if self._cr_pendiente:
+            self._cr_pendiente = False
+            if chunk[:1] == b"\n":
+                chunk = chunk[1:]
+        if b"\r" in chunk:
+            # el CR final ya cuenta como fin de línea; si el LF llega después, se ignora
+            self._cr_pendiente = chunk.endswith(b"\r")
+            chunk = chunk.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+
+        # Partimos por bloques (línea en blanco = fin de evento); el último queda pendiente
+        bloques = (self._resto + chunk if self._resto else chunk).split(b"\n\n")
+        self._resto = bloques.pop()
+
+        eventos = []
+        nombres = self._nombres
+        rapido = _BLOQUE_SIMPLE.fullmatch
+        for bloque in bloques:
+            # Camino rápido (casi todos los eventos): [id] [event] data en una línea,
+            # resuelto completo por la regex en C
+            m = rapido(bloque)
+            if m is not None:
+                id_, evento, crudo = m.groups()
+                if id_ is not None:
+                    self.ultimo_id = id_.decode("utf-8", "replace")
+            else:
+                evento, crudo = self._bloque_general(bloque, eventos)
+                if crudo is None:
+                    continue
+
+            nombre = nombres.get(evento)
+            if nombre is None:
+                nombre = nombres[evento] = evento.decode("utf-8", "replace") if evento else "message"
+            eventos.append(_nuevo_evento(EventoSSE, (nombre, crudo.decode("utf-8", "replace"), self.ultimo_id)))
+        return eventos
+
+    def _bloque_general(self, bloque: bytes, eventos: list) -> tuple[bytes | None, bytes | None]:
+        """
+        Procesa un bloque línea por línea (comentarios, retry, data multilínea...).
+        Regresa (evento, data), o (None, None) si el bloque no trae data.
+        """
+        data = []
+        evento = None
+        for linea in bloque.split(b"\n"):
+            if not linea:
+                # bloque que empieza con línea vacía (p. ej. "\n\n\n"); no trae nada
+                continue
+            pos = linea.find(b":")
+            if pos == 0:
+                if self.emitir_comentarios:
+                    texto = linea[1:].strip().decode("utf-8", "replace")
+                    eventos.append(_nuevo_evento(EventoSSE, (COMENTARIO, texto, self.ultimo_id)))
+                continue
+            if pos < 0:
+                campo, valor = linea, b""
+            else:
+                campo = linea[:pos]
+                valor = linea[pos + 2:] if linea[pos + 1:pos + 2] == b" " else linea[pos + 1:]
+
+            if campo == b"data":
+                data.append(valor)
+            elif campo == b"id":
+                if b"\0" not in valor:
+                    self.ultimo_id = valor.decode("utf-8", "replace")
+            elif campo == b"event":
+                evento = valor
+            elif campo == b"retry":
+                if valor.isdigit():
+                    self.retry = int(valor)
+
+        if not data:
+            return None, None
+        return evento, (data[0] if len(data) == 1 else b"\n".join(data))
+
+    def reiniciar(self) -> None:
+        """Descarta el bloque a medias (tras una reconexión). Conserva ultimo_id y retry."""
+        self._resto = b""
+        self._cr_pendiente = False
+        self._inicio = True
@@ -0,0 +1,358 @@
+"""
+PIPELINE SSE: LECTURA DESACOPLADA DEL PROCESAMIENTO — EcoMarket
+
+Problema (ver docstring de RETO IA #2/receptor_alertas.py): el despacho corría
+dentro del `async for` de lectura. Si un evento tardaba en procesarse, no se
+leía el siguiente chunk, el buffer TCP se llenaba y el servidor terminaba
+cortando la conexión por cliente lento.
+
+DECISIONES DE DISEÑO:
+1. DOS ETAPAS: El lector solo parsea y encola (microsegundos). Los workers
+   sacan de la cola y ejecutan el manejador.
+
+2. UNA COLA ACOTADA POR TIPO DE EVENTO: Un tipo pesado (precio-actualizado en
+   una venta flash) no retrasa a stock-critico. Cada tipo tiene N workers;
+   con 1 worker se conserva el orden de llegada dentro del tipo.
+   Ojo: un manejador SÍNCRONO corre en el hilo del loop; mientras corre, el
+   lector no lee, y varios workers no lo paralelizan. Con `ejecutor` (un
+   ThreadPoolExecutor) el worker lo manda al pool y lo espera: el loop sigue
+   leyendo y N workers son N hilos (el CPU puro en Python sigue compartiendo
+   el GIL, pero el loop recibe su turno). Sin ejecutor, workers > 1 solo se
+   acepta para manejadores async.
+
+3. POLÍTICA CUANDO LA COLA ESTÁ LLENA (configurable por tipo):
+   - BLOQUEAR: el lector espera (backpressure hacia el socket). No se pierde nada.
+   - DESCARTAR_NUEVO: se tira el evento que llega.
+   - DESCARTAR_VIEJO: se tira el más viejo de la cola y entra el nuevo.
+
+4. CHECKPOINT OPCIONAL: Con un CheckpointSSE (sse_checkpoint.py) el pipeline
+   descarta ids duplicados al encolar y avisa al checkpoint cuando cada evento
+   termina (o se descarta a propósito), para que Last-Event-ID solo avance
+   sobre eventos realmente procesados. Si el lector se cancela mientras
+   espera lugar en la cola (BLOQUEAR), el evento se devuelve al checkpoint
+   como no visto: la repetición tras reconectar sí se procesa.
+
+5. MÉTRICAS: retraso de lectura (cuánto estuvo el lector bloqueado esperando
+   lugar en la cola) vs. retraso de procesamiento (espera en cola + tiempo del
+   manejador), más descartados y profundidad por tipo.
+
+6. COALESCENCIA OPCIONAL: En una venta flash llegan decenas de
+   precio-actualizado del mismo producto en milisegundos y la UI se redibuja
+   con cada uno. Con `coalescer={"precio-actualizado": clave_por_campo("producto_id")}`
+   los eventos de ese tipo esperan `ventana_coalescencia` segundos (1/30 para
+   30 fps) y de cada clave solo pasa el ÚLTIMO: el estado final nunca se
+   pierde. stock-critico no se puede coalescer (cada alerta cuenta).
+   Quedarse solo con el último rompe los predicados sobre el cambio
+   ACUMULADO: cinco pasos de 2% en una ventana llegarían como un solo paso
+   de 2%. Con `fusionar={"precio-actualizado": conservar_primero("precio_anterior")}`
+   el evento que queda lleva el precio_anterior del PRIMERO de la ventana
+   (reemplazo con regex sobre el texto, sin decodificar el JSON).
+"""
+
+import asyncio
+import re
+import time
+
+BLOQUEAR = "bloquear"
+DESCARTAR_NUEVO = "descartar_nuevo"
+DESCARTAR_VIEJO = "descartar_viejo"
+POLITICAS = (BLOQUEAR, DESCARTAR_NUEVO, DESCARTAR_VIEJO)
+NUNCA_COALESCER = frozenset({"stock-critico"})
+
+
+def _patron_campo(campo: str) -> re.Pattern:
+    return re.compile(rf'"{re.escape(campo)}"\s*:\s*("(?:[^"\\]|\\.)*"|[^,}}\s]+)')
+
+
+def clave_por_campo(campo: str):
+    """
+    Clave de coalescencia: el valor de un campo del JSON (p. ej. producto_id),
+    leído con una regex sobre el texto crudo para no decodificar el evento entero.
+    """
+    patron = _patron_campo(campo)
+
+    def clave(evento):
+        m = patron.search(evento.data)
+        return m.group(1) if m else None   # sin clave: el evento pasa sin coalescer
+    return clave
+
+
+def conservar_primero(campo: str):
+    """
+    Fusión para la coalescencia: el evento que sobrevive lleva el valor de
+    `campo` del primero de la ventana (p. ej. precio_anterior).
+    """
+    patron = _patron_campo(campo)
+
+    def fusionar(anterior, nuevo):
+        m = patron.search(anterior.data)
+        if m is None:
+            return nuevo
+        original = m.group(0)
+        data, cambios = patron.subn(lambda _: original, nuevo.data, count=1)
+        return nuevo._replace(data=data) if cambios else nuevo
+    return fusionar
+
+
+class _Acumulado:
+    """Contador mínimo: total, suma y máximo (sin guardar cada muestra)."""
+    __slots__ = ("n", "suma", "maximo")
+
+    def __init__(self):
+        self.n = 0
+        self.suma = 0.0
+        self.maximo = 0.0
+
+    def agregar(self, valor: float) -> None:
+        self.n += 1
+        self.suma += valor
+        if valor > self.maximo:
+            self.maximo = valor
+
+    def resumen(self) -> dict:
+        promedio = self.suma / self.n if self.n else 0.0
+        return {"promedio_ms": round(promedio * 1000, 3), "max_ms": round(self.maximo * 1000, 3)}
+
+
+class PipelineSSE:
+    def __init__(
+        self,
+        manejador,
+        capacidad: int = 1000,
+        politica: str = BLOQUEAR,
+        politicas: dict | None = None,
+        workers: int = 1,
+        workers_por_tipo: dict | None = None,
+        checkpoint=None,
+        coalescer: dict | None = None,
+        ventana_coalescencia: float = 0.1,
+        ejecutor=None,
+        fusionar: dict | None = None,
+    ):
+        """
+        :param manejador: función (sync o async) que recibe un EventoSSE.
+        :param capacidad: tamaño máximo de la cola de cada tipo de evento.
+        :param politica: qué hacer con la cola llena (BLOQUEAR por defecto).
+        :param politicas: excepciones por tipo, p. ej. {"precio-actualizado": DESCARTAR_VIEJO}.
+        :param workers / workers_por_tipo: workers paralelos por tipo de evento.
+        :param checkpoint: CheckpointSSE opcional para dedupe y Last-Event-ID durable.
+        :param coalescer: {tipo: función evento -> clave}; de cada clave solo se procesa
+                          el último evento de cada ventana.
+        :param ventana_coalescencia: segundos que se juntan eventos antes de soltarlos.
+        :param ejecutor: Executor donde correr un manejador síncrono (fuera del loop).
+        :param fusionar: {tipo: función (anterior, nuevo) -> evento} al coalescer; sin
+                         ella gana el nuevo tal cual.
+        """
+        for p in [politica, *(politicas or {}).values()]:
+            if p not in POLITICAS:
+                raise ValueError(f"Política '{p}' no válida. Usa una de {POLITICAS}")
+        prohibidos = NUNCA_COALESCER.intersection(coalescer or {})
+        if prohibidos:
+            raise ValueError(f"No se puede coalescer {sorted(prohibidos)}: cada evento debe procesarse")
+        es_async = asyncio.iscoroutinefunction(manejador)
+        if not es_async and ejecutor is None and max([workers, *(workers_por_tipo or {}).values()]) > 1:
+            raise ValueError("Un manejador síncrono corre en el loop: varios workers no lo paralelizan. "
+                             "Pasa ejecutor=ThreadPoolExecutor(...) o usa un manejador async")
+        self.manejador = manejador
+        self._es_async = es_async
+        self.ejecutor = ejecutor
+        self.capacidad = capacidad
+        self.politica = politica
+        self.politicas = politicas or {}
+        self.workers = workers
+        self.workers_por_tipo = workers_por_tipo or {}
+        self.checkpoint = checkpoint
+        self.coalescer = coalescer or {}
+        self.ventana_coalescencia = ventana_coalescencia
+        self.fusionar = fusionar or {}
+
+        self._colas: dict[str, asyncio.Queue] = {}
+        self._tareas: list[asyncio.Task] = []
+        self._coalescencia: dict[str, dict] = {}          # tipo -> {clave: item} de la ventana actual
+        self._relojes: dict[str, asyncio.TimerHandle] = {}
+        self._vaciados: set[asyncio.Task] = set()
+
+        self.recibidos = 0
+        self.procesados = 0
+        self.errores = 0
+        self.descartados: dict[str, int] = {}
+        self.coalescidos: dict[str, int] = {}
+        self._espera_lectura = _Acumulado()
+        self._espera_cola = _Acumulado()
+        self._procesamiento = _Acumulado()
+
+    # --- Etapa 1: lector ---
+
+    async def encolar(self, evento) -> bool:
+        """Lo llama el lector por cada evento parseado. Regresa False si se descartó."""
+        seq = None
+        if self.checkpoint is not None:
+            if self.checkpoint.duplicado(evento.id):
+                return False
+            seq = self.checkpoint.recibido(evento.id)
+
+        self.recibidos += 1
+        item = (time.perf_counter(), evento, seq)
+
+        clave_de = self.coalescer.get(evento.event)
+        if clave_de is not None:
+            clave = clave_de(evento)
+            if clave is not None:
+                self._coalescer(evento.event, clave, item)
+                return True
+        return await self._poner(evento.event, item)
+
+    async def _poner(self, tipo: str, item: tuple) -> bool:
+        cola = self._colas.get(tipo) or self._crear_cola(tipo)
+        if not cola.full():
+            cola.put_nowait(item)
+            return True
+
+        politica = self.politicas.get(tipo, self.politica)
+        if politica == BLOQUEAR:
+            inicio = time.perf_counter()
+            try:
+                await cola.put(item)
+            except asyncio.CancelledError:
+                # nunca entró a la cola: ni está en vuelo ni se vio
+                if item[2] is not None:
+                    self.checkpoint.cancelado(item[2])
+                raise
+            self._espera_lectura.agregar(time.perf_counter() - inicio)
+            return True
+
+        self.descartados[tipo] = self.descartados.get(tipo, 0) + 1
+        if politica == DESCARTAR_NUEVO:
+            self._terminar(item[2])
+            return False
+        _, _, seq_viejo = cola.get_nowait()
+        cola.task_done()
+        self._terminar(seq_viejo)
+        cola.put_nowait(item)
+        return True
+
+    # --- Coalescencia ---
+
+    def _coalescer(self, tipo: str, clave, item: tuple) -> None:
+        pendientes = self._coalescencia.get(tipo)
+        if pendientes is None:
+            pendientes = self._coalescencia[tipo] = {}
+        anterior = pendientes.get(clave)
+        if anterior is not None:
+            fusion = self.fusionar.get(tipo)
+            if fusion is not None:
+                item = (item[0], fusion(anterior[1], item[1]), item[2])
+        pendientes[clave] = item
+        if anterior is not None:
+            # el nuevo reemplaza al viejo: para el checkpoint, el viejo ya terminó
+            self.coalescidos[tipo] = self.coalescidos.get(tipo, 0) + 1
+            self._terminar(anterior[2])
+        elif tipo not in self._relojes:
+            self._relojes[tipo] = asyncio.get_running_loop().call_later(
+                self.ventana_coalescencia, self._cerrar_ventana, tipo
+            )
+
+    def _cerrar_ventana(self, tipo: str) -> None:
+        del self._relojes[tipo]
+        tarea = asyncio.ensure_future(self._vaciar(tipo))
+        self._vaciados.add(tarea)
+        tarea.add_done_callback(self._vaciados.discard)
+
+    async def _vaciar(self, tipo: str) -> None:
+        """Pasa a la cola normal lo último de cada clave en la ventana que terminó."""
+        pendientes = self._coalescencia.pop(tipo, {})
+        for item in pendientes.values():
+            await self._poner(tipo, item)
+
+    def _terminar(self, seq) -> None:
+        if seq is not None:
+            self.checkpoint.completado(seq)
+
+    def _crear_cola(self, tipo: str) -> asyncio.Queue:
+        cola = asyncio.Queue(maxsize=self.capacidad)
+        self._colas[tipo] = cola
+        for i in range(self.workers_por_tipo.get(tipo, self.workers)):
+            self._tareas.append(asyncio.create_task(self._worker(cola), name=f"sse-{tipo}-{i}"))
+        return cola
+
+    # --- Etapa 2: workers ---
+
+    async def _worker(self, cola: asyncio.Queue) -> None:
+        while True:
+            encolado, evento, seq = await cola.get()
+            inicio = time.perf_counter()
+            self._espera_cola.agregar(inicio - encolado)
+            terminado = True
+            try:
+                if self._es_async:
+                    await self.manejador(evento)
+                elif self.ejecutor is not None:
+                    await asyncio.get_running_loop().run_in_executor(self.ejecutor, self.manejador, evento)
+                else:
+                    self.manejador(evento)
+            except asyncio.CancelledError:
+                # cancelado a medias: no cuenta como procesado para el checkpoint
+                terminado = False
+                raise
+            except Exception as e:
+                # Un manejador roto no debe matar al worker ni al stream
+                self.errores += 1
+                print(f"❌ Error procesando '{evento.event}': {e}")
+            finally:
+                self._procesamiento.agregar(time.perf_counter() - inicio)
+                if terminado:
+                    self.procesados += 1
+                    self._terminar(seq)
+                cola.task_done()
+            if not self._es_async and self.ejecutor is None:
+                # cola.get() no cede el loop si hay elementos: cedemos para que el lector respire
+                await asyncio.sleep(0)
+
+    async def detener(self, drenar: bool = True, timeout: float = 5.0) -> None:
+        """Detiene los workers; con drenar=True antes procesa lo que quedó en las colas."""
+        for reloj in self._relojes.values():
+            reloj.cancel()
+        self._relojes.clear()
+        if drenar:
+            # lo que esperaba en una ventana de coalescencia también se procesa
+            for tipo in list(self._coalescencia):
+                await self._vaciar(tipo)
+            await asyncio.gather(*self._vaciados, return_exceptions=True)
+        else:
+            # sin drenar, una ventana que se estaba vaciando (quizá bloqueada en una cola llena) se corta
+            for tarea in self._vaciados:
+                tarea.cancel()
+            await asyncio.gather(*self._vaciados, return_exceptions=True)
+        if drenar and self._colas:
+            try:
+                await asyncio.wait_for(
+                    asyncio.gather(*(c.join() for c in self._colas.values())), timeout
+                )
+            except asyncio.TimeoutError:
+                print(f"⚠️ Pipeline detenido con {self.pendientes()} evento(s) sin procesar.")
+        for tarea in self._tareas:
+            tarea.cancel()
+        await asyncio.gather(*self._tareas, return_exceptions=True)
+        self._tareas.clear()
+        self._colas.clear()
+        self._coalescencia.clear()
+
+    # --- Métricas ---
+
+    def pendientes(self) -> int:
+        en_ventana = sum(len(p) for p in self._coalescencia.values())
+        return en_ventana + sum(c.qsize() for c in self._colas.values())
+
+    def metricas(self) -> dict:
+        return {
+            "recibidos": self.recibidos,
+            "procesados": self.procesados,
+            "errores": self.errores,
+            "duplicados": self.checkpoint.duplicados if self.checkpoint is not None else 0,
+            "descartados": dict(self.descartados),
+            "coalescidos": dict(self.coalescidos),
+            "profundidad": {tipo: c.qsize() for tipo, c in self._colas.items()},
+            "retraso_lectura": {"bloqueos": self._espera_lectura.n, **self._espera_lectura.resumen()},
+            "retraso_cola": self._espera_cola.resumen(),
+            "procesamiento": self._procesamiento.resumen(),
+        }
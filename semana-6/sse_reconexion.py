@@ -0,0 +1,141 @@
+"""
+POLÍTICA DE RECONEXIÓN COMPARTIDA — EcoMarket
+
+Problema: cada receptor reconectaba a su manera (ServicioSSE 3s fijos,
+ReceptorAlertas retry_ms * 2**(n-1), ClienteSSEMultiplex min(30, 2**n)) y
+casi ninguno respetaba el 'retry:' del servidor. Ninguno tenía jitter: si el
+servidor se reinicia, miles de clientes caen al mismo tiempo y vuelven a
+tocar la puerta en los MISMOS instantes (t+3s, t+6s...), tirándolo otra vez.
+
+DECISIONES DE DISEÑO:
+1. JITTER DECORRELACIONADO: espera = min(tope, uniforme(base, anterior * 3)).
+   Cada cliente sigue su propia secuencia aleatoria, así que los reintentos
+   se reparten en el tiempo en vez de llegar en oleadas.
+
+2. RETRY DEL SERVIDOR: si el stream trae 'retry:', ese valor pasa a ser la
+   base (el servidor sabe cuánto tarda en volver). Sin él, base = 1s.
+
+3. PRIMER REINTENTO RÁPIDO: Si la conexión llevaba al menos `estable`
+   segundos viva, el primer reintento es casi inmediato (uniforme entre 0 y
+   `primer_reintento`, o alrededor del retry del servidor): un corte aislado
+   se recupera en milisegundos. Una conexión que se cae apenas abre no cuenta
+   como éxito, para no reintentar rápido en bucle contra un servidor roto.
+
+4. CIRCUIT BREAKER: Tras `umbral_circuito` fallos seguidos el circuito se
+   abre y se espera `enfriamiento` segundos (también con jitter) antes de un
+   único intento de prueba (semiabierto). Reemplaza al viejo "máximo 5
+   reintentos y me rindo": el cliente no agota batería ni golpea al servidor,
+   pero tampoco se queda desconectado para siempre.
+
+5. EL CIERRE LIMPIO TAMBIÉN ES UN FALLO: si el servidor termina el stream
+   normalmente (un reinicio ordenado), el `async with` sale sin excepción y
+   el receptor volvería a conectar al instante, todos a la vez. Los
+   receptores lanzan StreamCerrado en ese caso para que pase por fallo() y
+   su espera con jitter como cualquier otro corte (204 sigue siendo "no
+   reconectar").
+"""
+
+import asyncio
+import random
+import time
+
+CERRADO = "cerrado"
+ABIERTO = "abierto"
+
+
+class StreamCerrado(ConnectionError):
+    """El servidor terminó el stream sin error: se reconecta, pero con backoff."""
+
+
+class PoliticaReconexion:
+    def __init__(
+        self,
+        base: float = 1.0,
+        tope: float = 30.0,
+        primer_reintento: float = 0.5,
+        estable: float = 5.0,
+        umbral_circuito: int = 5,
+        enfriamiento: float = 60.0,
+        azar: random.Random | None = None,
+    ):
+        """
+        :param base: espera mínima entre reintentos (s) si el servidor no manda 'retry:'.
+        :param tope: espera máxima entre reintentos normales (s).
+        :param primer_reintento: espera máxima del primer reintento tras una conexión estable.
+        :param estable: segundos que debe durar una conexión para contar como éxito.
+        :param umbral_circuito: fallos seguidos que abren el circuito.
+        :param enfriamiento: segundos con el circuito abierto antes del intento de prueba.
+        """
+        self.base = base
+        self.tope = tope
+        self.primer_reintento = primer_reintento
+        self.estable = estable
+        self.umbral_circuito = umbral_circuito
+        self.enfriamiento = enfriamiento
+        self._azar = azar or random.Random()
+
+        self.retry_servidor: float | None = None
+        self.estado = CERRADO
+        self.fallos = 0                 # fallos seguidos
+        self._anterior: float | None = None
+        self._conectado_en: float | None = None
+
+        self.reintentos = 0
+        self.aperturas = 0
+
+    def retry(self, ms: int | None) -> None:
+        """Registra el 'retry:' del servidor (en ms), p. ej. desde ParserSSE.retry."""
+        if ms is not None:
+            self.retry_servidor = ms / 1000
+
+    def exito(self, ahora: float | None = None) -> None:
+        """Llamar cuando la conexión queda abierta (HTTP 200)."""
+        self._conectado_en = time.monotonic() if ahora is None else ahora
+
+    def fallo(self, ahora: float | None = None) -> float:
+        """Registra una caída o un intento fallido. Regresa cuántos segundos esperar."""
+        ahora = time.monotonic() if ahora is None else ahora
+        if self._conectado_en is not None and ahora - self._conectado_en >= self.estable:
+            # la conexión sí estaba sana: es un corte nuevo, se empieza de cero
+            self.fallos = 0
+            self._anterior = None
+            self.estado = CERRADO
+        self._conectado_en = None
+        self.fallos += 1
+        self.reintentos += 1
+
+        if self.estado == ABIERTO or self.fallos >= self.umbral_circuito:
+            # tras el enfriamiento se permite UN intento de prueba; si falla, se
+            # vuelve a enfriar, y si la conexión resulta estable el circuito se cierra
+            if self.estado != ABIERTO:
+                self.aperturas += 1
+                self.estado = ABIERTO
+            return self.enfriamiento * self._azar.uniform(0.5, 1.0)
+
+        base = self.retry_servidor if self.retry_servidor is not None else self.base
+        if self._anterior is None:
+            if self.retry_servidor is not None:
+                espera = self._azar.uniform(base / 2, base)
+            else:
+                espera = self._azar.uniform(0, self.primer_reintento)
+            # el siguiente ya crece desde la base, no desde el reintento rápido
+            self._anterior = base
+        else:
+            espera = min(self.tope, self._azar.uniform(base, self._anterior * 3))
+            self._anterior = espera
+        return espera
+
+    async def esperar(self) -> float:
+        """fallo() + dormir la espera. Regresa los segundos esperados."""
+        espera = self.fallo()
+        await asyncio.sleep(espera)
+        return espera
+
+    def metricas(self) -> dict:
+        return {
+            "estado": self.estado,
+            "fallos_seguidos": self.fallos,
+            "reintentos": self.reintentos,
+            "aperturas_circuito": self.aperturas,
+            "retry_servidor_s": self.retry_servidor,
+        }
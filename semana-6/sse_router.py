@@ -0,0 +1,132 @@
+"""
+ROUTER DE EVENTOS CON PATRONES Y PREDICADOS — EcoMarket
+
+Problema: el EventRouter de semana-7 guardaba UN handler por nombre exacto
+(`handlers[evento] = callback`), así que registrar dos veces el mismo evento
+pisaba al primero sin avisar, no había forma de decir "todo lo de stock-*" y
+los filtros de negocio ("solo si el precio cambió más de 5%") vivían dentro
+de cada handler. Lo que no tenía handler terminaba en un print por evento.
+
+DECISIONES DE DISEÑO:
+1. VARIOS HANDLERS POR PATRÓN: registrar() agrega, no reemplaza. El patrón
+   puede ser exacto ("stock-critico") o comodín estilo shell ("stock-*", "*").
+   Los handlers de un evento se ejecutan en orden de registro.
+
+2. TABLA DE DESPACHO COMPILADA: La primera vez que llega un nombre de evento se
+   calculan (una sola vez) los handlers cuyos patrones le aplican y se guarda
+   la tupla resultante. Después, rutear cuesta un lookup en dict sin importar
+   cuántos cientos de handlers haya registrados. Registrar o quitar invalida
+   la tabla.
+
+3. PREDICADOS SOBRE EL PAYLOAD: `cuando=` recibe una función data -> bool que
+   se evalúa solo para los handlers que ya coincidieron por nombre.
+   cambio_precio_mayor(0.05) cubre el caso de precio-actualizado.
+
+4. EVENTOS SIN HANDLER: se cuentan en `ignorados` y van a un manejador
+   configurable (sin_handler). Por defecto se avisa UNA vez por nombre de
+   evento en lugar de imprimir cada ocurrencia.
+"""
+
+from fnmatch import fnmatchcase
+
+_COMODINES = frozenset("*?[")
+_MAX_TABLA = 1024     # nombres distintos cacheados (protege contra nombres basura del servidor)
+
+
+def cambio_precio_mayor(umbral: float = 0.05):
+    """Predicado para precio-actualizado: |nuevo - anterior| / anterior > umbral."""
+    def predicado(data) -> bool:
+        anterior = data.get("precio_anterior")
+        nuevo = data.get("precio_nuevo")
+        if not anterior or nuevo is None:
+            return False
+        return abs(nuevo - anterior) / anterior > umbral
+    return predicado
+
+
+class EventRouter:
+    def __init__(self, sin_handler=None):
+        """
+        :param sin_handler: función (evento, data) para lo que ningún patrón cubre.
+                            Por defecto se avisa una vez por nombre de evento.
+        """
+        self._registros: list[tuple[str, object, object]] = []   # (patrón, callback, predicado)
+        self._tabla: dict[str, tuple] = {}
+        self.sin_handler = sin_handler
+        self._avisados: set[str] = set()
+
+        self.despachados = 0
+        self.ignorados = 0
+        self.errores = 0
+
+    def registrar(self, patron: str, callback, cuando=None) -> None:
+        """Agrega un handler para un evento exacto o un patrón ("stock-*")."""
+        self._registros.append((patron, callback, cuando))
+        self._tabla.clear()
+
+    def quitar(self, callback, patron: str | None = None) -> int:
+        """Quita las registraciones de ese callback (de un patrón o de todos). Regresa cuántas."""
+        antes = len(self._registros)
+        self._registros = [
+            r for r in self._registros
+            if not (r[1] is callback and (patron is None or r[0] == patron))
+        ]
+        self._tabla.clear()
+        return antes - len(self._registros)
+
+    def _compilar(self, evento: str) -> tuple:
+        handlers = tuple(
+            (callback, cuando)
+            for patron, callback, cuando in self._registros
+            if patron == evento or (_COMODINES.intersection(patron) and fnmatchcase(evento, patron))
+        )
+        if len(self._tabla) >= _MAX_TABLA:
+            self._tabla.clear()
+        self._tabla[evento] = handlers
+        return handlers
+
+    def handlers_de(self, evento: str) -> list:
+        handlers = self._tabla.get(evento)
+        if handlers is None:
+            handlers = self._compilar(evento)
+        return [callback for callback, _ in handlers]
+
+    def despachar(self, evento, data) -> int:
+        """Ejecuta los handlers que aplican al evento. Regresa cuántos corrieron."""
+        handlers = self._tabla.get(evento)
+        if handlers is None:
+            handlers = self._compilar(evento)
+        if not handlers:
+            self._ignorar(evento, data)
+            return 0
+
+        ejecutados = 0
+        for callback, cuando in handlers:
+            try:
+                if cuando is not None and not cuando(data):
+                    continue
+                callback(data)
+                ejecutados += 1
+            except Exception as e:
+                # Un handler roto no debe impedir que corran los demás
+                self.errores += 1
+                print(f"❌ ERROR en Handler [{evento}]: {e}")
+        self.despachados += ejecutados
+        return ejecutados
+
+    def _ignorar(self, evento, data) -> None:
+        self.ignorados += 1
+        if self.sin_handler is not None:
+            self.sin_handler(evento, data)
+        elif evento not in self._avisados:
+            self._avisados.add(evento)
+            print(f"🔍 Evento '{evento}' sin handler (se ignorarán los siguientes en silencio).")
+
+    def metricas(self) -> dict:
+        return {
+            "registros": len(self._registros),
+            "tabla": len(self._tabla),
+            "despachados": self.despachados,
+            "ignorados": self.ignorados,
+            "errores": self.errores,
+        }
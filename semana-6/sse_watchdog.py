@@ -0,0 +1,132 @@
+"""
+VIGILANTE DE LATIDOS SSE: DETECCIÓN RÁPIDA DE STREAMS MUERTOS — EcoMarket
+
+Problema: ServicioSSE notificaba `keep_alive` con cada ': ping' pero nadie lo
+usaba, y varios receptores leen con timeout=None. Una conexión TCP
+semiabierta (el router de la tienda se reinicia, el móvil cambia de red) no
+manda FIN ni RST: el `async for` se queda esperando bytes que nunca llegan y
+el receptor queda sordo por minutos sin enterarse.
+
+DECISIONES DE DISEÑO:
+1. CUALQUIER BYTE ES UN LATIDO: El servidor manda ': ping' cada
+   `intervalo_ping` segundos. Si pasan `multiplo` intervalos sin recibir NI
+   UN byte (evento o ping), el stream se declara muerto.
+
+2. SOLO CUENTA EL SILENCIO DEL SOCKET: El reloj corre mientras el lector
+   espera el siguiente chunk, no mientras procesa o espera lugar en la cola
+   (backpressure del pipeline). Un handler lento no dispara reconexiones.
+
+3. SIN COSTO POR CHUNK: Un único temporizador del loop revisa la marca de
+   tiempo y se reprograma; leer un chunk solo actualiza un float. Al vencer,
+   cancela la lectura y vigilar() lanza StreamMuerto (ConnectionError), que
+   los receptores atrapan para reconectar con Last-Event-ID pasando por
+   PoliticaReconexion.fallo(): si la conexión llevaba `estable` segundos
+   viva, el primer reintento es casi inmediato (con jitter); si no, la
+   espera crece como en cualquier otro fallo y puede abrir el circuito.
+
+4. MÉTRICAS PARA EL SLO: segundos desde el último byte y tiempo de detección
+   (silencio acumulado al declarar muerto el stream: el peor caso de latencia
+   de alerta que agrega una conexión semiabierta).
+"""
+
+import asyncio
+import time
+
+
+class StreamMuerto(ConnectionError):
+    """No llegó ningún byte (ni ping) dentro del límite del vigilante."""
+
+
+class VigilanteSSE:
+    def __init__(self, intervalo_ping: float = 15.0, multiplo: float = 2.0):
+        """
+        :param intervalo_ping: cada cuánto manda el servidor ': ping'.
+        :param multiplo: intervalos de silencio tolerados antes de declarar muerto el stream.
+        """
+        self.intervalo_ping = intervalo_ping
+        self.limite = intervalo_ping * multiplo
+        self.ultimo_byte: float | None = None      # time.monotonic() del último chunk
+        self.bytes_recibidos = 0
+        self.streams_muertos = 0
+        self._detecciones = 0
+        self._deteccion_total = 0.0
+        self.deteccion_ultima: float | None = None
+        self.deteccion_max = 0.0
+
+    async def vigilar(self, chunks):
+        """
+        Envuelve un iterador async de chunks (resp.aiter_bytes()). Entrega los
+        mismos chunks; si el socket calla más de `limite` segundos lanza StreamMuerto.
+        """
+        loop = asyncio.get_running_loop()
+        lector = asyncio.current_task()
+        estado = {"esperando": False, "desde": time.monotonic(), "muerto": False, "silencio": 0.0}
+        reloj = None
+
+        def revisar():
+            nonlocal reloj
+            ahora = time.monotonic()
+            if estado["esperando"]:
+                silencio = ahora - estado["desde"]
+                if silencio >= self.limite:
+                    estado["muerto"] = True
+                    estado["silencio"] = silencio
+                    lector.cancel()
+                    return
+                reloj = loop.call_later(self.limite - silencio, revisar)
+            else:
+                reloj = loop.call_later(self.limite, revisar)
+
+        reloj = loop.call_later(self.limite, revisar)
+        iterador = chunks.__aiter__()
+        try:
+            while True:
+                estado["desde"] = time.monotonic()
+                estado["esperando"] = True
+                try:
+                    chunk = await iterador.__anext__()
+                except StopAsyncIteration:
+                    return
+                except asyncio.CancelledError:
+                    if not estado["muerto"]:
+                        raise
+                    if hasattr(lector, "uncancel"):
+                        lector.uncancel()   # la cancelación fue nuestra, no del dueño de la tarea
+                    self._registrar_muerte(estado["silencio"])
+                    raise StreamMuerto(
+                        f"Sin bytes ni pings por {estado['silencio']:.1f}s (límite {self.limite:.1f}s)"
+                    ) from None
+                finally:
+                    estado["esperando"] = False
+                self.ultimo_byte = time.monotonic()
+                self.bytes_recibidos += len(chunk)
+                yield chunk
+        finally:
+            reloj.cancel()
+
+    def _registrar_muerte(self, silencio: float) -> None:
+        self.streams_muertos += 1
+        self._detecciones += 1
+        self._deteccion_total += silencio
+        self.deteccion_ultima = silencio
+        self.deteccion_max = max(self.deteccion_max, silencio)
+
+    def segundos_sin_bytes(self) -> float | None:
+        if self.ultimo_byte is None:
+            return None
+        return time.monotonic() - self.ultimo_byte
+
+    def metricas(self) -> dict:
+        sin_bytes = self.segundos_sin_bytes()
+        promedio = self._deteccion_total / self._detecciones if self._detecciones else 0.0
+        return {
+            "segundos_sin_bytes": round(sin_bytes, 3) if sin_bytes is not None else None,
+            "bytes_recibidos": self.bytes_recibidos,
+            "streams_muertos": self.streams_muertos,
+            "limite_s": self.limite,
+            "deteccion": {
+                "ultima_s": round(self.deteccion_ultima, 3) if self.deteccion_ultima is not None else None,
+                "promedio_s": round(promedio, 3),
+                "max_s": round(self.deteccion_max, 3),
+            },
+        }
@@ -0,0 +1,49 @@
+import asyncio
+from json import loads
+
+from servidor_carga_sse import GeneradorCarga, levantar
+from sse_hub import HubSSE
+from sse_parser import ParserSSE
+
+
+async def leer(puerto, ultimo_id=None):
+    """Una conexión completa (hasta que el servidor la cierre) -> eventos."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", puerto)
+    pedido = "GET /eventos HTTP/1.1\r\nHost: local\r\n"
+    if ultimo_id:
+        pedido += f"Last-Event-ID: {ultimo_id}\r\n"
+    writer.write((pedido + "\r\n").encode())
+    await reader.readuntil(b"\r\n\r\n")
+    parser = ParserSSE()
+    eventos = []
+    while chunk := await asyncio.wait_for(reader.read(65536), 5):
+        eventos.extend(parser.alimentar(chunk))
+    writer.close()
+    return eventos, parser.retry
+
+
+def test_payload_con_tamano_seq_y_ts():
+    generador = GeneradorCarga(HubSSE("carga://test"), tamano=300, proporcion_stock=0.5)
+    eventos = [generador.evento() for _ in range(4)]
+    assert [e.event for e in eventos] == ["precio-actualizado", "stock-critico"] * 2
+    assert [loads(e.data)["seq"] for e in eventos] == [1, 2, 3, 4]
+    assert all(abs(len(e.data) - 300) <= 2 and "ts" in loads(e.data) for e in eventos)
+
+
+def test_corte_forzado_y_replay_sin_huecos():
+    async def escenario():
+        hub, _, tarea = await levantar(puerto=0, tasa=2000, corte=50, retry_ms=250)
+        puerto = hub._servidor.sockets[0].getsockname()[1]
+        try:
+            primera, retry = await leer(puerto)
+            await asyncio.sleep(0.05)      # el generador sigue publicando mientras no estamos
+            segunda, _ = await leer(puerto, primera[-1].id)
+        finally:
+            tarea.cancel()
+            await hub.detener()
+        return primera, segunda, retry
+
+    primera, segunda, retry = asyncio.run(escenario())
+    assert len(primera) == len(segunda) == 50 and retry == 250
+    seqs = [loads(e.data)["seq"] for e in primera + segunda]
+    assert seqs == list(range(seqs[0], seqs[0] + 100))
@@ -0,0 +1,81 @@
+import asyncio
+import os
+
+from sse_checkpoint import CheckpointSSE
+from sse_parser import EventoSSE
+from sse_pipeline import PipelineSSE
+
+
+def test_marca_de_agua_no_avanza_con_huecos(tmp_path):
+    cp = CheckpointSSE(str(tmp_path / "cp.json"))
+    s1, s2, s3 = cp.recibido("1"), cp.recibido("2"), cp.recibido("3")
+    cp.completado(s2)
+    cp.completado(s3)
+    assert cp.ultimo_id is None   # el 1 sigue en vuelo
+    cp.completado(s1)
+    assert cp.ultimo_id == "3"
+
+
+def test_reinicio_retoma_y_descarta_repetidos(tmp_path):
+    ruta = str(tmp_path / "cp.json")
+
+    async def primera_vida():
+        cp = CheckpointSSE(ruta)
+        for i in range(1, 6):
+            cp.procesado(str(i))
+        await cp.cerrar()
+
+    asyncio.run(primera_vida())
+
+    cp = CheckpointSSE(ruta)
+    assert cp.ultimo_id == "5"
+    # el servidor repite el 5 tras reconectar; el 6 es nuevo
+    assert cp.duplicado("5")
+    assert not cp.duplicado("6")
+    assert cp.duplicados == 1
+
+
+def test_pipeline_con_checkpoint_a_alto_ritmo(tmp_path):
+    ruta = str(tmp_path / "cp.json")
+    procesados = []
+
+    async def escenario():
+        cp = CheckpointSSE(ruta, intervalo=0.05)
+        cp.iniciar()
+        pipeline = PipelineSSE(lambda ev: procesados.append(ev.id), checkpoint=cp, capacidad=50_000)
+        ciclo = cp._tarea
+        for i in range(20_000):
+            await pipeline.encolar(EventoSSE("stock-critico", "{}", str(i)))
+        # replay tras reconexión: los últimos 100 llegan de nuevo
+        for i in range(19_900, 20_000):
+            await pipeline.encolar(EventoSSE("stock-critico", "{}", str(i)))
+        await pipeline.detener()
+        await cp.cerrar()
+        return ciclo, pipeline.metricas()
+
+    ciclo, metricas = asyncio.run(escenario())
+    assert procesados == [str(i) for i in range(20_000)]
+    assert metricas["duplicados"] == 100
+    assert ciclo.done()           # cerrar() esperó al ciclo antes del guardado final
+    assert not os.path.exists(ruta + ".tmp")
+    assert CheckpointSSE(ruta).ultimo_id == "19999"
+
+
+def test_cancelado_libera_id_y_frena_la_marca_de_agua(tmp_path):
+    ruta = str(tmp_path / "cp.json")
+    cp = CheckpointSSE(ruta)
+    cp.procesado("0")
+    s1, s2, s3 = cp.recibido("1"), cp.recibido("2"), cp.recibido("3")
+    cp.completado(s2)
+    cp.cancelado(s1)
+    cp.completado(s3)
+    # "1" nunca se procesó: lo guardado debe hacer que el servidor lo repita
+    assert cp.ultimo_id == "0"
+    asyncio.run(cp.guardar())
+    assert CheckpointSSE(ruta).ultimo_id == "0"
+    # la repetición no es duplicado, retoma el lugar de "1" y destraba la marca
+    assert not cp.duplicado("1")
+    repetido = cp.recibido("1")
+    assert repetido == s1 and cp.ultimo_id == "0"
+    cp.completado(repetido)
+    assert cp.ultimo_id == "3"
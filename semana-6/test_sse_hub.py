@@ -0,0 +1,228 @@
+import asyncio
+import importlib.util
+import random
+import time
+from pathlib import Path
+
+import pytest
+
+import sse_hub
+from sse_hub import HubSSE, hub_para
+from sse_parser import EventoSSE, ParserSSE
+from sse_reconexion import PoliticaReconexion
+
+
+class ServidorQueCierra:
+    """Servidor SSE mínimo: contesta un evento y cierra la conexión limpiamente."""
+
+    def __init__(self, status=200):
+        self.status = status
+        self.conexiones = []      # (momento, línea de petición)
+
+    async def iniciar(self) -> int:
+        self._servidor = await asyncio.start_server(self._atender, "127.0.0.1", 0)
+        return self._servidor.sockets[0].getsockname()[1]
+
+    async def _atender(self, reader, writer):
+        peticion = (await reader.readuntil(b"\r\n\r\n")).split(b"\r\n")[0].decode()
+        self.conexiones.append((time.monotonic(), peticion))
+        n = len(self.conexiones)
+        status = self.status(peticion) if callable(self.status) else self.status
+        if status == 200:
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nConnection: close\r\n\r\n"
+                         + f'id: {n}\nevent: precio-actualizado\ndata: {{"n": {n}}}\n\n'.encode())
+        else:
+            writer.write(f"HTTP/1.1 {status} X\r\nContent-Length: 5\r\nConnection: close\r\n\r\nerror".encode())
+        await writer.drain()
+        writer.close()
+
+    async def detener(self):
+        self._servidor.close()
+        await self._servidor.wait_closed()
+
+    def pausas(self) -> list[float]:
+        momentos = [t for t, _ in self.conexiones]
+        return [b - a for a, b in zip(momentos, momentos[1:])]
+
+
+@pytest.fixture(autouse=True)
+def sin_hubs_globales():
+    yield
+    sse_hub._HUBS.clear()
+
+
+def publicar_varios(hub, n, tipo="precio-actualizado", inicio=1):
+    for i in range(inicio, inicio + n):
+        hub.publicar(EventoSSE(tipo, f'{{"n": {i}}}', str(i)))
+
+
+def test_un_hub_por_host():
+    assert hub_para("http://x/eventos") is hub_para("http://x/eventos")
+    assert hub_para("http://x/eventos") is not hub_para("http://y/eventos")
+    assert hub_para("http://x/eventos") is not hub_para("https://x/eventos")
+    with pytest.raises(ValueError):
+        hub_para("http://x/eventos?modulos=stock")   # sería un segundo stream contra el mismo host
+
+    async def detener():
+        await hub_para("http://x/eventos").detener()
+
+    asyncio.run(detener())
+    assert "http://x" not in sse_hub._HUBS and "http://y" in sse_hub._HUBS
+
+
+def test_filtros_por_suscriptor():
+    async def escenario():
+        hub = HubSSE("http://local/eventos")
+        stock = hub.suscribir(eventos={"stock-critico"})
+        caros = hub.suscribir(filtro=lambda ev: '"n": 2' in ev.data)
+        publicar_varios(hub, 3)
+        publicar_varios(hub, 1, tipo="stock-critico", inicio=4)
+        await hub.detener()
+        return [e.id async for e in stock], [e.id async for e in caros]
+
+    assert asyncio.run(escenario()) == (["4"], ["2"])
+
+
+def test_replay_para_el_que_llega_tarde():
+    async def escenario():
+        hub = HubSSE("http://local/eventos", replay=5)
+        publicar_varios(hub, 10)
+        desde_7 = hub.suscribir(desde_id="7")
+        al_dia = hub.suscribir(desde_id="10")
+        muy_viejo = hub.suscribir(desde_id="1")   # ya salió del buffer: hueco, nada viejo
+        publicar_varios(hub, 1, inicio=11)
+        await hub.detener()
+        return ([e.id async for e in desde_7], [e.id async for e in al_dia],
+                [e.id async for e in muy_viejo], (desde_7.hueco, al_dia.hueco, muy_viejo.hueco),
+                hub.metricas()["huecos"])
+
+    desde_7, al_dia, muy_viejo, huecos, total = asyncio.run(escenario())
+    assert desde_7 == ["8", "9", "10", "11"] and al_dia == ["11"] and muy_viejo == ["11"]
+    assert huecos == (False, False, True) and total == 1
+
+
+def test_recibir_se_resuscribe_tras_la_expulsion():
+    async def escenario():
+        hub = HubSSE("http://local/eventos", capacidad_suscriptor=3)
+        recibidos = []
+
+        async def consumidor():
+            async for evento in hub.recibir():
+                recibidos.append(evento.id)
+                await asyncio.sleep(0)
+
+        tarea = asyncio.create_task(consumidor())
+        await asyncio.sleep(0)
+        publicar_varios(hub, 10)   # de golpe: la cola de 3 se desborda y se expulsa
+        while len(recibidos) < 10:
+            await asyncio.sleep(0.01)
+        await hub.detener()
+        await tarea
+        return recibidos, hub.expulsados, hub.metricas()["suscriptores"]
+
+    recibidos, expulsados, suscriptores = asyncio.run(asyncio.wait_for(escenario(), 5))
+    assert expulsados >= 1
+    assert recibidos == [str(i) for i in range(1, 11)]   # lo perdido vuelve del buffer
+    assert suscriptores == 0
+
+
+def test_consumidor_lento_expulsado_sin_frenar_a_los_demas():
+    async def escenario():
+        hub = HubSSE("http://local/eventos", capacidad_suscriptor=10)
+        lento = hub.suscribir()
+        rapido = hub.suscribir()
+        recibidos = []
+        for i in range(1, 31):
+            hub.publicar(EventoSSE("precio-actualizado", "{}", str(i)))
+            recibidos.append((await rapido.__anext__()).id)
+            if i <= 2:
+                await lento.__anext__()   # el lento solo alcanza a leer los dos primeros
+        # el lento vuelve desde su último id y recupera lo perdido del buffer
+        recuperado = hub.suscribir(desde_id=lento.ultimo_id)
+        await hub.detener()
+        return lento.expulsado, recibidos, [e.id async for e in recuperado], hub.expulsados
+
+    expulsado, recibidos, recuperado, expulsados = asyncio.run(escenario())
+    assert expulsado and expulsados == 1
+    assert recibidos == [str(i) for i in range(1, 31)]
+    assert recuperado == [str(i) for i in range(3, 31)]
+
+
+def test_socket_local_con_last_event_id():
+    async def escenario():
+        hub = HubSSE("http://local/eventos")
+        servidor = await hub.servir(0)
+        puerto = servidor.sockets[0].getsockname()[1]
+        publicar_varios(hub, 3)
+
+        reader, writer = await asyncio.open_connection("127.0.0.1", puerto)
+        writer.write(b"GET /eventos?eventos=stock-critico,precio-actualizado HTTP/1.1\r\n"
+                     b"Last-Event-ID: 2\r\n\r\n")
+        await writer.drain()
+        publicar_varios(hub, 1, tipo="stock-critico", inicio=4)
+        publicar_varios(hub, 1, tipo="pedido-nuevo", inicio=5)    # filtrado
+
+        cabecera = await reader.readuntil(b"\r\n\r\n")
+        parser, eventos = ParserSSE(), []
+        while len(eventos) < 2:
+            eventos += parser.alimentar(await reader.read(4096))
+        writer.close()
+        await hub.detener()
+        return cabecera, eventos, hub.metricas()["conexiones_upstream"]
+
+    cabecera, eventos, upstream = asyncio.run(escenario())
+    assert cabecera.startswith(b"HTTP/1.1 200")
+    assert [(e.event, e.id) for e in eventos] == [("precio-actualizado", "3"), ("stock-critico", "4")]
+    assert upstream == 0
+
+
+def test_receptor_lee_del_hub_sin_abrir_stream():
+    pytest.importorskip("httpx")
+    # semana-7 #3 tiene un archivo con el mismo nombre: se carga por ruta
+    ruta = Path(__file__).resolve().parent / "RETO IA #5" / "receptor_alertas_v2.py"
+    spec = importlib.util.spec_from_file_location("receptor_alertas_v2_semana6", ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+
+    async def escenario():
+        hub = hub_para("http://local/eventos")
+        receptor = modulo.ReceptorAlertasV2(hub.url, hub=hub)
+        otro = modulo.ReceptorAlertasV2(hub.url, hub=hub)
+        vistos, otros = [], []
+        receptor.notifier.suscribir("precio-actualizado", vistos.append)
+        otro.notifier.suscribir("precio-actualizado", otros.append)
+        tareas = [asyncio.create_task(receptor.conectar()), asyncio.create_task(otro.conectar())]
+        while hub.metricas()["suscriptores"] < 2:
+            await asyncio.sleep(0.01)
+        publicar_varios(hub, 5)
+        while len(vistos) < 5 or len(otros) < 5:
+            await asyncio.sleep(0.01)
+        await hub.detener()
+        await asyncio.gather(*tareas)
+        return vistos, otros, receptor.ultimo_id, hub.conexiones_upstream
+
+    vistos, otros, ultimo_id, upstream = asyncio.run(asyncio.wait_for(escenario(), 5))
+    assert vistos == otros == [f'{{"n": {i}}}' for i in range(1, 6)]
+    assert ultimo_id == "5" and upstream == 0
+
+
+def test_cierre_limpio_del_upstream_reconecta_con_backoff():
+    pytest.importorskip("httpx")
+
+    async def escenario():
+        servidor = ServidorQueCierra()
+        puerto = await servidor.iniciar()
+        hub = HubSSE(f"http://127.0.0.1:{puerto}/eventos")
+        hub.reconexion = PoliticaReconexion(base=0.1, primer_reintento=0.1, azar=random.Random(7))
+        hub.iniciar()
+        await asyncio.sleep(0.6)
+        await hub.detener()
+        await servidor.detener()
+        return servidor, hub
+
+    servidor, hub = asyncio.run(escenario())
+    # sin backoff serían cientos de conexiones en 0.6 s (bucle caliente)
+    assert 2 <= len(servidor.conexiones) <= 8
+    assert hub.reconexion.reintentos >= len(servidor.conexiones) - 1
+    assert all(pausa >= 0.09 for pausa in servidor.pausas()[1:])   # tras el primer reintento rápido
+    assert hub.publicados == len(servidor.conexiones)
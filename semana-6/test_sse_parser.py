@@ -0,0 +1,62 @@
+from sse_parser import COMENTARIO, EventoSSE, ParserSSE
+
+
+def parsear_en_chunks(stream: bytes, tamano: int, **kwargs):
+    parser = ParserSSE(**kwargs)
+    eventos = []
+    for i in range(0, len(stream), tamano):
+        eventos.extend(parser.alimentar(stream[i:i + tamano]))
+    return parser, eventos
+
+
+STREAM = (
+    b"\xef\xbb\xbfid: 1\r\nevent: precio-actualizado\r\n"
+    b'data: {"producto_id": "A1",\r\ndata: "precio": 45.5}\r\n\r\n'
+    b": ping\n\n"
+    b"retry: 1500\rid: 2\revent: stock-critico\rdata: B7\r\r"
+    b"data:sin espacio\n\n"
+)
+
+ESPERADOS = [
+    EventoSSE("precio-actualizado", '{"producto_id": "A1",\n"precio": 45.5}', "1"),
+    EventoSSE("stock-critico", "B7", "2"),
+    EventoSSE("message", "sin espacio", "2"),
+]
+
+
+def test_crlf_cr_lf_y_data_multilinea():
+    parser, eventos = parsear_en_chunks(STREAM, len(STREAM))
+    assert eventos == ESPERADOS
+    assert parser.retry == 1500
+    assert parser.ultimo_id == "2"
+
+
+def test_resultado_no_depende_del_tamano_de_chunk():
+    # incluye cortes entre \r y \n y dentro del BOM
+    for tamano in (1, 2, 3, 7, 64):
+        assert parsear_en_chunks(STREAM, tamano)[1] == ESPERADOS
+
+
+def test_comentarios_opcionales_y_bloques_sin_data():
+    stream = b": ping\n\nid: 9\n\nevent: vacio\n\n"
+    parser, eventos = parsear_en_chunks(stream, 4, emitir_comentarios=True)
+    assert eventos == [EventoSSE(COMENTARIO, "ping", None)]
+    assert parser.ultimo_id == "9"
+
+
+def test_campos_invalidos_se_ignoran():
+    stream = b"retry: 1s\nid: a\x00b\ndata\ndata: x\n\n"
+    parser, eventos = parsear_en_chunks(stream, 5)
+    assert parser.retry is None
+    assert parser.ultimo_id is None
+    assert eventos == [EventoSSE("message", "\nx", None)]
+
+
+def test_lineas_en_blanco_extra_y_comentario_dentro_de_bloque():
+    stream = b"data: a\n\n\n\n: ping\ndata: b\n\n"
+    _, eventos = parsear_en_chunks(stream, 3, emitir_comentarios=True)
+    assert eventos == [
+        EventoSSE("message", "a"),
+        EventoSSE(COMENTARIO, "ping"),
+        EventoSSE("message", "b"),
+    ]
@@ -0,0 +1,260 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sse_parser import EventoSSE
+from sse_pipeline import (
+    BLOQUEAR, DESCARTAR_NUEVO, DESCARTAR_VIEJO, PipelineSSE, clave_por_campo, conservar_primero,
+)
+
+
+def evento(tipo, data, id=None):
+    return EventoSSE(tipo, data, id)
+
+
+def test_politica_no_valida():
+    with pytest.raises(ValueError):
+        PipelineSSE(print, politica="ignorar")
+
+
+def test_manejador_sincrono_con_varios_workers_requiere_ejecutor():
+    with pytest.raises(ValueError):
+        PipelineSSE(print, workers_por_tipo={"precio-actualizado": 4})
+    PipelineSSE(print, workers=4, ejecutor=ThreadPoolExecutor(1)).ejecutor.shutdown()
+
+
+def test_manejador_sincrono_en_ejecutor_no_bloquea_el_loop():
+    liberar = threading.Event()
+    juntos = threading.Barrier(2, timeout=5)
+    procesados = []
+
+    def bloqueante(ev):
+        if ev.data in ("0", "1"):
+            juntos.wait()      # los dos workers están dentro a la vez: hay paralelismo real
+        liberar.wait(5)
+        procesados.append(ev.data)
+
+    async def escenario():
+        with ThreadPoolExecutor(2) as pool:
+            pipeline = PipelineSSE(bloqueante, workers=2, ejecutor=pool)
+            for i in range(2):
+                await pipeline.encolar(evento("precio-actualizado", str(i)))
+            await asyncio.sleep(0.05)
+            # los manejadores siguen bloqueados en sus hilos y el loop sigue leyendo
+            for i in range(2, 6):
+                await pipeline.encolar(evento("precio-actualizado", str(i)))
+            en_curso = list(procesados)
+            liberar.set()
+            await pipeline.detener()
+            return en_curso, pipeline.metricas()
+
+    en_curso, metricas = asyncio.run(escenario())
+    assert en_curso == []
+    assert sorted(procesados) == [str(i) for i in range(6)]
+    assert metricas["procesados"] == 6
+
+
+def test_manejador_lento_no_frena_al_lector():
+    procesados = []
+
+    async def lento(ev):
+        await asyncio.sleep(0.01)
+        procesados.append(ev.data)
+
+    async def escenario():
+        pipeline = PipelineSSE(lento, capacidad=100)
+        inicio = time.perf_counter()
+        for i in range(20):
+            await pipeline.encolar(evento("precio-actualizado", str(i)))
+        lectura = time.perf_counter() - inicio
+        await pipeline.detener()
+        return lectura, pipeline.metricas()
+
+    lectura, metricas = asyncio.run(escenario())
+    assert lectura < 0.05
+    assert procesados == [str(i) for i in range(20)]
+    assert metricas["procesados"] == 20
+    assert metricas["retraso_lectura"]["bloqueos"] == 0
+
+
+def test_un_tipo_saturado_no_retrasa_a_otro():
+    orden = []
+
+    async def manejador(ev):
+        if ev.event == "precio-actualizado":
+            await asyncio.sleep(0.2)
+        orden.append(ev.event)
+
+    async def escenario():
+        pipeline = PipelineSSE(manejador)
+        await pipeline.encolar(evento("precio-actualizado", "1"))
+        await pipeline.encolar(evento("stock-critico", "2"))
+        await pipeline.detener()
+
+    asyncio.run(escenario())
+    assert orden == ["stock-critico", "precio-actualizado"]
+
+
+@pytest.mark.parametrize("politica, esperados", [
+    (DESCARTAR_NUEVO, ["0", "1"]),
+    (DESCARTAR_VIEJO, ["3", "4"]),
+    (BLOQUEAR, ["0", "1", "2", "3", "4"]),
+])
+def test_politicas_con_cola_llena(politica, esperados):
+    procesados = []
+
+    async def escenario():
+        pipeline = PipelineSSE(lambda ev: procesados.append(ev.data), capacidad=2, politica=politica)
+        # sin ceder el loop, el worker no alcanza a sacar nada: la cola se llena
+        for i in range(5):
+            await pipeline.encolar(evento("precio-actualizado", str(i)))
+        await pipeline.detener()
+        return pipeline.metricas()
+
+    metricas = asyncio.run(escenario())
+    assert procesados == esperados
+    assert sum(metricas["descartados"].values()) == 5 - len(esperados)
+
+
+def test_coalescencia_deja_solo_el_ultimo_por_producto():
+    procesados = []
+
+    async def escenario():
+        pipeline = PipelineSSE(
+            lambda ev: procesados.append((ev.event, ev.data)),
+            coalescer={"precio-actualizado": clave_por_campo("producto_id")},
+            ventana_coalescencia=0.02,
+        )
+        # ráfaga de venta flash: 1000 precios para 2 productos, más alertas de stock
+        for i in range(1000):
+            await pipeline.encolar(evento("precio-actualizado", f'{{"producto_id": "A{i % 2}", "precio": {i}}}'))
+            if i % 100 == 0:
+                await pipeline.encolar(evento("stock-critico", f'{{"producto_id": "A{i % 2}", "stock": {i}}}'))
+        await asyncio.sleep(0.05)
+        await pipeline.encolar(evento("precio-actualizado", '{"producto_id": "A0", "precio": 5}'))
+        await pipeline.detener()   # drena también lo que esperaba en la ventana
+        return pipeline.metricas()
+
+    metricas = asyncio.run(escenario())
+    precios = [d for t, d in procesados if t == "precio-actualizado"]
+    assert precios == [
+        '{"producto_id": "A0", "precio": 998}',
+        '{"producto_id": "A1", "precio": 999}',
+        '{"producto_id": "A0", "precio": 5}',
+    ]
+    assert sum(1 for t, _ in procesados if t == "stock-critico") == 10
+    assert metricas["coalescidos"] == {"precio-actualizado": 998}
+
+
+def test_stock_critico_nunca_se_coalesce():
+    with pytest.raises(ValueError):
+        PipelineSSE(print, coalescer={"stock-critico": clave_por_campo("producto_id")})
+
+
+def test_checkpoint_avanza_sobre_eventos_coalescidos(tmp_path):
+    from sse_checkpoint import CheckpointSSE
+
+    async def escenario():
+        cp = CheckpointSSE(str(tmp_path / "cp.json"))
+        pipeline = PipelineSSE(
+            lambda ev: None, checkpoint=cp, ventana_coalescencia=0.01,
+            coalescer={"precio-actualizado": clave_por_campo("producto_id")},
+        )
+        for i in range(1, 51):
+            await pipeline.encolar(evento("precio-actualizado", '{"producto_id": 7}', str(i)))
+        await pipeline.detener()
+        return cp.ultimo_id
+
+    assert asyncio.run(escenario()) == "50"
+
+
+def test_lector_cancelado_con_cola_llena_no_pierde_el_evento(tmp_path):
+    from sse_checkpoint import CheckpointSSE
+
+    procesados = []
+
+    async def escenario():
+        cp = CheckpointSSE(str(tmp_path / "cp.json"))
+        liberar = asyncio.Event()
+
+        async def manejador(ev):
+            await liberar.wait()
+            procesados.append(ev.id)
+
+        pipeline = PipelineSSE(manejador, capacidad=1, politica=BLOQUEAR, checkpoint=cp)
+
+        async def lector():
+            for i in (1, 2, 3):
+                await pipeline.encolar(evento("stock-critico", "{}", str(i)))
+
+        tarea = asyncio.create_task(lector())
+        # el worker toma el 1 y se queda en el manejador; el 2 llena la cola y el 3 espera
+        while pipeline.recibidos < 3:
+            await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        tarea.cancel()                      # p. ej. reconexión mientras el lector esperaba lugar
+        await asyncio.gather(tarea, return_exceptions=True)
+
+        repetido_es_duplicado = cp.duplicado("3")
+        liberar.set()
+        await pipeline.encolar(evento("stock-critico", "{}", "3"))   # replay del servidor
+        await pipeline.detener()
+        return repetido_es_duplicado, cp.ultimo_id
+
+    repetido_es_duplicado, ultimo_id = asyncio.run(escenario())
+    assert not repetido_es_duplicado
+    assert procesados == ["1", "2", "3"]
+    assert ultimo_id == "3"
+
+
+def test_coalescencia_conserva_el_precio_anterior_del_primero():
+    from sse_router import EventRouter, cambio_precio_mayor
+
+    alertas = []
+    router = EventRouter()
+    router.registrar("precio-actualizado", alertas.append, cuando=cambio_precio_mayor(0.05))
+
+    async def escenario():
+        pipeline = PipelineSSE(
+            lambda ev: router.despachar(ev.event, json.loads(ev.data)),
+            coalescer={"precio-actualizado": clave_por_campo("producto_id")},
+            fusionar={"precio-actualizado": conservar_primero("precio_anterior")},
+            ventana_coalescencia=0.01,
+        )
+        # cinco pasos de 2%: ninguno pasa el 5% solo, juntos suman ~10%
+        precio = 100.0
+        for _ in range(5):
+            nuevo = round(precio * 1.02, 2)
+            await pipeline.encolar(evento("precio-actualizado", json.dumps(
+                {"producto_id": 7, "precio_anterior": precio, "precio_nuevo": nuevo})))
+            precio = nuevo
+        await pipeline.detener()
+
+    asyncio.run(escenario())
+    assert len(alertas) == 1
+    assert alertas[0]["precio_anterior"] == 100.0 and alertas[0]["precio_nuevo"] > 110
+
+
+def test_detener_sin_drenar_corta_los_vaciados_pendientes():
+    async def escenario():
+        liberar = asyncio.Event()
+
+        async def atorado(ev):
+            await liberar.wait()
+
+        pipeline = PipelineSSE(
+            atorado, capacidad=1,
+            coalescer={"precio-actualizado": clave_por_campo("producto_id")}, ventana_coalescencia=0.001,
+        )
+        for i in range(5):
+            await pipeline.encolar(evento("precio-actualizado", f'{{"producto_id": {i}}}'))
+        await asyncio.sleep(0.05)           # la ventana se vacía y se bloquea con la cola llena
+        vaciados = set(pipeline._vaciados)
+        await pipeline.detener(drenar=False)
+        return vaciados
+
+    vaciados = asyncio.run(escenario())
+    assert vaciados and all(t.done() for t in vaciados)
@@ -0,0 +1,50 @@
+import random
+
+from sse_reconexion import ABIERTO, CERRADO, PoliticaReconexion
+
+
+def politica(**opciones):
+    return PoliticaReconexion(azar=random.Random(1), **opciones)
+
+
+def test_primer_reintento_rapido_y_luego_jitter_decorrelacionado():
+    p = politica(base=1.0, tope=30.0, primer_reintento=0.5, umbral_circuito=100)
+    esperas = [p.fallo(ahora=0) for _ in range(12)]
+    assert 0 <= esperas[0] <= 0.5
+    assert all(1.0 <= e <= 30.0 for e in esperas[1:])
+    assert max(esperas) > 10          # crece...
+    bajo_tope = [e for e in esperas if e < 30.0]
+    assert len(set(bajo_tope)) == len(bajo_tope) > 3     # ...pero sin escalones fijos
+
+
+def test_respeta_retry_del_servidor():
+    p = politica(umbral_circuito=100)
+    p.retry(5000)
+    esperas = [p.fallo(ahora=0) for _ in range(10)]
+    assert 2.5 <= esperas[0] <= 5.0
+    assert all(e >= 5.0 for e in esperas[1:])
+
+
+def test_conexion_estable_reinicia_y_la_inestable_no():
+    p = politica(estable=5.0, umbral_circuito=100)
+    for _ in range(4):
+        p.fallo(ahora=0)
+    p.exito(ahora=10)
+    p.fallo(ahora=11)                  # se cayó al segundo: sigue contando
+    assert p.fallos == 5
+    p.exito(ahora=20)
+    assert p.fallo(ahora=100) <= 0.5   # vivió 80s: corte nuevo, reintento rápido
+    assert p.fallos == 1
+
+
+def test_circuit_breaker_abre_enfria_y_cierra():
+    p = politica(umbral_circuito=3, enfriamiento=60.0, estable=5.0)
+    p.fallo(ahora=0)
+    p.fallo(ahora=0)
+    espera = p.fallo(ahora=0)
+    assert p.estado == ABIERTO and 30 <= espera <= 60
+    assert 30 <= p.fallo(ahora=60) <= 60   # el intento de prueba falló: otra vez a enfriar
+    assert p.aperturas == 1
+    p.exito(ahora=120)
+    p.fallo(ahora=200)
+    assert p.estado == CERRADO and p.fallos == 1
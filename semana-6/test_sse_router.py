@@ -0,0 +1,80 @@
+import sse_router
+from sse_router import EventRouter, cambio_precio_mayor
+
+
+def test_varios_handlers_y_comodines_en_orden_de_registro():
+    router = EventRouter()
+    llamadas = []
+    router.registrar("stock-critico", lambda d: llamadas.append("exacto"))
+    router.registrar("stock-*", lambda d: llamadas.append("prefijo"))
+    router.registrar("stock-critico", lambda d: llamadas.append("segundo"))
+    router.registrar("precio-*", lambda d: llamadas.append("precio"))
+
+    assert router.despachar("stock-critico", {}) == 3
+    assert llamadas == ["exacto", "prefijo", "segundo"]
+    assert router.despachar("stock-bajo", {}) == 1
+
+
+def test_predicado_de_cambio_de_precio():
+    router = EventRouter()
+    alertas = []
+    router.registrar("precio-actualizado", alertas.append, cuando=cambio_precio_mayor(0.05))
+    router.despachar("precio-actualizado", {"precio_anterior": 100, "precio_nuevo": 104})
+    router.despachar("precio-actualizado", {"precio_anterior": 100, "precio_nuevo": 94})
+    router.despachar("precio-actualizado", {"precio_anterior": 0, "precio_nuevo": 10})
+    assert alertas == [{"precio_anterior": 100, "precio_nuevo": 94}]
+
+
+def test_sin_handler_y_handler_roto():
+    ignorados = []
+    router = EventRouter(sin_handler=lambda ev, d: ignorados.append(ev))
+
+    def roto(data):
+        raise RuntimeError("falla")
+
+    sanos = []
+    router.registrar("pedido-nuevo", roto)
+    router.registrar("pedido-*", sanos.append)
+    router.despachar("pedido-nuevo", 1)
+    router.despachar("devolucion", 2)
+    assert sanos == [1]
+    assert ignorados == ["devolucion"]
+    assert router.metricas()["errores"] == 1
+
+
+def test_registrar_o_quitar_invalida_la_tabla():
+    router = EventRouter()
+    llamadas = []
+    handler = llamadas.append
+    router.despachar("stock-critico", 0)          # compila la tabla vacía
+    router.registrar("*", handler)
+    router.despachar("stock-critico", 1)
+    assert router.quitar(handler) == 1
+    router.despachar("stock-critico", 2)
+    assert llamadas == [1]
+
+
+def test_costo_por_evento_no_crece_con_los_handlers(monkeypatch):
+    comparaciones = []
+    original = sse_router.fnmatchcase
+    monkeypatch.setattr(sse_router, "fnmatchcase", lambda n, p: comparaciones.append(p) or original(n, p))
+    ajenos = {"predicado": 0, "handler": 0}
+
+    def contar(clave, resultado=None):
+        def llamada(data):
+            ajenos[clave] += 1
+            return resultado
+        return llamada
+
+    router = EventRouter()
+    for i in range(500):
+        router.registrar(f"modulo-{i}-*", contar("handler"), cuando=contar("predicado", True))
+    recibidos = []
+    router.registrar("stock-critico", recibidos.append)
+    for _ in range(20_000):
+        router.despachar("stock-critico", None)
+
+    # 500 patrones que no aplican se miran UNA vez (al compilar) y luego no cuestan nada
+    assert len(comparaciones) == 500
+    assert ajenos == {"predicado": 0, "handler": 0}
+    assert len(recibidos) == 20_000
@@ -0,0 +1,78 @@
+import asyncio
+import time
+
+import pytest
+from sse_watchdog import StreamMuerto, VigilanteSSE
+
+
+async def fuente(chunks, pausa_final=None):
+    """Simula resp.aiter_bytes(): manda chunks y luego se queda colgada (TCP semiabierto)."""
+    for chunk, espera in chunks:
+        await asyncio.sleep(espera)
+        yield chunk
+    if pausa_final is not None:
+        await asyncio.sleep(pausa_final)
+
+
+def test_stream_colgado_se_detecta_en_el_limite():
+    vigilante = VigilanteSSE(intervalo_ping=0.02, multiplo=2.0)
+
+    async def escenario():
+        recibidos = []
+        inicio = time.perf_counter()
+        with pytest.raises(StreamMuerto):
+            async for chunk in vigilante.vigilar(fuente([(b"id: 1\n", 0), (b": ping\n\n", 0.01)], 10)):
+                recibidos.append(chunk)
+        return recibidos, time.perf_counter() - inicio, asyncio.current_task().cancelling()
+
+    recibidos, duracion, cancelando = asyncio.run(escenario())
+    assert recibidos == [b"id: 1\n", b": ping\n\n"]
+    assert duracion < 0.5
+    assert cancelando == 0    # la tarea del lector sigue viva para reconectar
+    metricas = vigilante.metricas()
+    assert metricas["streams_muertos"] == 1
+    assert 0.04 <= metricas["deteccion"]["ultima_s"] < 0.2
+
+
+def test_pings_regulares_mantienen_vivo_el_stream():
+    vigilante = VigilanteSSE(intervalo_ping=0.02, multiplo=2.0)
+
+    async def escenario():
+        chunks = [(b": ping\n\n", 0.02)] * 10     # 0.2s en total, ~5 límites
+        return [c async for c in vigilante.vigilar(fuente(chunks))]
+
+    assert len(asyncio.run(escenario())) == 10
+    assert vigilante.streams_muertos == 0
+    assert vigilante.bytes_recibidos == 80
+
+
+def test_procesamiento_lento_no_cuenta_como_silencio():
+    vigilante = VigilanteSSE(intervalo_ping=0.01, multiplo=2.0)
+
+    async def escenario():
+        n = 0
+        async for _ in vigilante.vigilar(fuente([(b"a", 0), (b"b", 0)])):
+            await asyncio.sleep(0.1)     # handler/backpressure lento, el socket no calla
+            n += 1
+        return n
+
+    assert asyncio.run(escenario()) == 2
+    assert vigilante.streams_muertos == 0
+
+
+def test_cancelacion_externa_no_se_confunde():
+    vigilante = VigilanteSSE(intervalo_ping=10)
+
+    async def escenario():
+        async def leer():
+            async for _ in vigilante.vigilar(fuente([], 10)):
+                pass
+
+        tarea = asyncio.create_task(leer())
+        await asyncio.sleep(0.01)
+        tarea.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await tarea
+
+    asyncio.run(escenario())
+    assert vigilante.streams_muertos == 0
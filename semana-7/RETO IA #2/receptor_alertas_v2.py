@@ -1,24 +1,11 @@
 import asyncio
-import json
 import time
 from datetime import datetime
 
-# --- EVENT ROUTER (Semana Anterior) ---
-class EventRouter:
-    def __init__(self):
-        self.handlers = {}
-
-    def registrar(self, evento, callback):
-        self.handlers[evento] = callback
-
-    def despachar(self, evento, data):
-        if evento in self.handlers:
-            try:
-                self.handlers[evento](data)
-            except Exception as e:
-                print(f"❌ ERROR en Handler [{evento}]: {e}")
-        else:
-            print(f"🔍 Evento '{evento}' ignorado (sin handler).")
+from codec_json import loads
+from sse_parser import ParserSSE
+# EventRouter (Semana Anterior), ahora compartido y con tabla de despacho compilada
+from sse_router import EventRouter
 
 # --- CLIENTE SSE MULTIPLEX ---
 class ClienteSSEMultiplex:
@@ -28,7 +15,7 @@ class ClienteSSEMultiplex:
         self.router = router
         self.last_event_id = None
         self.activo = True
-        self._buffer = {"id": None, "event": "message", "data": []}
+        self._parser = ParserSSE()
 
     def construir_url(self):
         if not self.modulos:
@@ -36,51 +23,25 @@ class ClienteSSEMultiplex:
         query = ",".join(self.modulos)
         return f"{self.base_url}?modulos={query}"
 
-    def _parsear_linea(self, linea):
-        # Caso Frontera: Comentario o línea vacía
-        if not linea or linea.startswith(":"):
-            return None, None
-        
-        # Caso Frontera: Línea sin ":" (campo sin valor)
-        if ":" not in linea:
-            return linea, ""
-        
-        # Caso Frontera: Múltiples ":" (el valor contiene ":")
-        campo, valor = linea.split(":", 1)
-        return campo.strip(), valor.strip()
-
-    def _procesar_evento(self):
-        # Unimos las líneas de data acumuladas
-        raw_data = "".join(self._buffer["data"])
-        if not raw_data: return
+    def _procesar_evento(self, evento):
+        if not evento.data: return
 
         try:
-            parsed_data = json.loads(raw_data)
+            parsed_data = loads(evento.data)
             # Despachamos al router
-            self.router.despachar(self._buffer["event"], parsed_data)
-        except json.JSONDecodeError:
+            self.router.despachar(evento.event, parsed_data)
+        except ValueError:
             print("⚠️ Error: Data no es un JSON válido.")
-        
-        # Reset del buffer (Invariante de Estado Limpio)
-        self._buffer = {"id": None, "event": "message", "data": []}
 
     async def _leer_stream(self, stream_iterable):
         """Simula la lectura de líneas desde un socket o mock."""
         for linea in stream_iterable:
             if not self.activo: break
-            
-            # Línea vacía = Fin de bloque SSE
-            if not linea.strip():
-                self._procesar_evento()
-                continue
-            
-            campo, valor = self._parsear_linea(linea)
-            if campo == "id":
-                self.last_event_id = valor
-            elif campo == "event":
-                self._buffer["event"] = valor
-            elif campo == "data":
-                self._buffer["data"].append(valor)
+
+            # El parser compartido trabaja con bytes, como llegarían de aiter_bytes()
+            for evento in self._parser.alimentar(linea.encode() + b"\n"):
+                self.last_event_id = evento.id
+                self._procesar_evento(evento)
 
 # --- HANDLERS (Etapa 2) ---
 ultima_conexion_activa = None
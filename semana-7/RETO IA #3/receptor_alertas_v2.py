@@ -5,9 +5,12 @@
 
 1. CONSTANTES Y TOLERANCIA: 
    He definido el TIMEOUT en 10s para equilibrar la paciencia del cliente con la 
-   latencia real de redes móviles. El BACKOFF inicial de 1s permite reaccionar 
-   rápido a micro-cortes, mientras que el límite de 5 REINTENTOS evita que el 
-   dispositivo agote su batería si el servidor de EcoMarket sufre una caída mayor.
+   latencia real de redes móviles. Los reintentos los decide la 
+   PoliticaReconexion compartida: el primero es casi inmediato para reaccionar 
+   a micro-cortes, luego jitter decorrelacionado (miles de clientes no vuelven 
+   en el mismo segundo) y, tras 5 fallos seguidos, un circuit breaker que 
+   enfría un minuto para que el dispositivo no agote su batería si el servidor 
+   de EcoMarket sufre una caída mayor.
 
 2. TRADE-OFF DE CONEXIÓN ÚNICA: 
    Elegí una conexión multiplexada por eficiencia de recursos; abro un solo socket 
@@ -21,58 +24,158 @@
    eventos de "Stock Crítico" (que son vitales para la operación) sigan 
    fluyendo. La red no debe morir por errores en la lógica de negocio.
 
-4. LIMITACIÓN DE SUSCRIPCIÓN DINÁMICA: 
-   Mi diseño actual no permite añadir módulos (como 'devoluciones') sin reiniciar 
-   el socket. Si se requiere un cambio en caliente, fuerzo una reconexión 
-   usando el 'Last-Event-ID' para intentar recuperar los eventos que se 
-   emitieron durante el breve milisegundo de oscuridad.
+4. SUSCRIPCIÓN DINÁMICA SIN HUECOS (make-before-break): 
+   Para añadir módulos (como 'devoluciones') ya no corto el socket. 
+   cambiar_modulos() abre un segundo stream con el nuevo '?modulos=' y el 
+   'Last-Event-ID' actual, los dos conviven un momento y descarto por id lo 
+   que llegue repetido por ambos. Solo cuando el nuevo demuestra que ya 
+   alcanzó al viejo (repite un id que el viejo entregó) o pasa el tiempo 
+   máximo de solapamiento, cierro el viejo. Si el nuevo no logra conectar, 
+   el viejo sigue vivo: nunca hay un instante sin stream.
+   Un id cuenta como visto solo cuando ya entró a la cola: si el viejo se
+   cancela esperando lugar (cola llena), la copia del nuevo, que esperaba a
+   ver si el viejo lo lograba, es la que se encola. Cada stream lleva su
+   propia PoliticaReconexion; el nuevo hereda la suya al quedarse.
 
 5. INFRAESTRUCTURA HTTP/1.1 vs HTTP/2: 
    Aunque mi código es agnóstico, bajo HTTP/1.1 este stream ocupa permanentemente 
    una de las 6 ranuras de conexión del cliente. En HTTP/2, la multiplexación 
    sería real a nivel de protocolo, permitiendo que otros fetch de la app 
    viajen por el mismo "cable" sin ser bloqueados por el stream de SSE.
+   Del lado REST ya está disponible: transporte_http.crear_sesion("http2")
+   (semana-3) multiplexa las peticiones del cliente async en una conexión.
+
+6. DIAGNÓSTICO DEL LOOP:
+   Con diagnostico=DiagnosticoLoop() (semana-4) el cliente reporta el lag del
+   event loop, las tareas vivas y qué handler o worker se queda más tiempo por
+   paso; un handler síncrono lento sale en el log con su stack.
+
+7. LOG POR EVENTO SIN FRENAR EL STREAM:
+   Los handlers ya no hacen print por evento: registran JSON con
+   log_estructurado (semana-4), que encola y escribe desde otro hilo, con un
+   límite de 20 líneas por segundo por tipo. En una tormenta de eventos el
+   loop sigue leyendo el stream en vez de esperar a la terminal.
 ================================================================================
 """
 
 import asyncio
-import json
 import time
+from collections import deque
 import httpx
-
-# --- MOTOR DE RUTEO ---
-class EventRouter:
-    def __init__(self):
-        self.handlers = {}
-
-    def registrar(self, evento, callback):
-        self.handlers[evento] = callback
-
-    def despachar(self, evento, data):
-        if evento in self.handlers:
-            try:
-                self.handlers[evento](data)
-            except Exception as e:
-                print(f"❌ ERROR en Handler [{evento}]: {e}")
-        else:
-            print(f"🔍 Evento '{evento}' recibido pero ignorado.")
+from codec_json import JSONPerezoso
+from sse_parser import ParserSSE
+from sse_checkpoint import CheckpointSSE
+from sse_pipeline import BLOQUEAR, PipelineSSE, clave_por_campo, conservar_primero
+# Motor de ruteo compartido: varios handlers, patrones (stock-*) y predicados
+from sse_router import EventRouter, cambio_precio_mayor
+from sse_reconexion import PoliticaReconexion, StreamCerrado
+from sse_watchdog import StreamMuerto, VigilanteSSE
+from diagnostico_loop import DiagnosticoLoop
+from log_estructurado import RegistroEventos, configurar
 
 # --- CLIENTE MULTIPLEX ROBUSTO ---
 class ClienteSSEMultiplex:
-    def __init__(self, url_base, modulos, router):
+    def __init__(self, url_base, modulos, router, capacidad_cola=1000, politica_cola=BLOQUEAR,
+                 workers_por_tipo=None, ruta_checkpoint=None, ventana_ids=4096,
+                 coalescer=None, ventana_coalescencia=0.1, intervalo_ping=15.0, diagnostico=None,
+                 ejecutor=None, fusionar=None):
         self.url_base = url_base
-        self.modulos = modulos
+        self.modulos = list(modulos)
         self.router = router
-        self.ultimo_id = None
+        # Last-Event-ID durable: sobrevive reinicios y descarta ids repetidos del replay
+        self.checkpoint = CheckpointSSE(ruta_checkpoint) if ruta_checkpoint else None
+        self.ultimo_id = self.checkpoint.ultimo_id if self.checkpoint else None
         self.activo = True
-        self.reintentos = 0
-        self.MAX_REINTENTOS = 5
+        # Reintentos con jitter, 'retry:' del servidor y circuit breaker (ver nota 1)
+        self.reconexion = PoliticaReconexion()
+        # Un vigilante para todos los streams (también los dos del empalme)
+        self.vigilante = VigilanteSSE(intervalo_ping)
+        # Un stream, varias colas: un handler lento de precios no frena los de stock.
+        # Los handlers del router son síncronos: corren en el loop (y frenan la
+        # lectura mientras corren) salvo que se pase ejecutor=ThreadPoolExecutor(...)
+        self.pipeline = PipelineSSE(
+            lambda evento: self._procesar_bloque(evento.event, evento.data),
+            capacidad=capacidad_cola, politica=politica_cola, workers_por_tipo=workers_por_tipo,
+            checkpoint=self.checkpoint, coalescer=coalescer,
+            ventana_coalescencia=ventana_coalescencia, ejecutor=ejecutor, fusionar=fusionar,
+        )
+        # Ids ya encolados (ventana acotada): durante un cambio de módulos los dos
+        # streams repiten eventos y solo el primero en llegar se procesa
+        self._vistos = set()
+        self._orden_vistos = deque()
+        self._ventana_ids = ventana_ids
+        self._encolando = {}         # id -> Future mientras un stream lo encola
+        self.duplicados_empalme = 0
+        self._stream = None          # tarea del stream vigente
+        self._empalme = None         # (tarea nueva, evento "ya alcanzó al viejo") durante un cambio
+        # Lag del loop y handlers que lo acaparan (un handler síncrono lento frena todo el stream)
+        self.diagnostico = diagnostico
 
     async def iniciar(self):
         print(f"🚀 Conectando a módulos: {', '.join(self.modulos)}")
-        
-        while self.activo and self.reintentos < self.MAX_REINTENTOS:
-            url = f"{self.url_base}?modulos={','.join(self.modulos)}"
+        if self.checkpoint:
+            self.checkpoint.iniciar()
+        if self.diagnostico:
+            self.diagnostico.iniciar()
+        self._stream = asyncio.create_task(self._ciclo_conexion(self.modulos))
+        try:
+            # Si cambiar_modulos() reemplaza el stream, seguimos esperando al nuevo
+            while True:
+                tarea = self._stream
+                await asyncio.wait({tarea})
+                if tarea is self._stream:
+                    break
+        finally:
+            self._stream.cancel()
+            await self.pipeline.detener()
+            if self.checkpoint:
+                await self.checkpoint.cerrar()
+            print(f"📊 Métricas del pipeline: {self.pipeline.metricas()}")
+            print(f"💓 Métricas de latidos: {self.vigilante.metricas()}")
+            if self.diagnostico:
+                self.diagnostico.detener()
+                print(f"🩺 Diagnóstico del loop: {self.diagnostico.metricas()}")
+
+    async def cambiar_modulos(self, modulos, solapamiento_max=5.0, timeout_conexion=15.0):
+        """
+        Cambia la suscripción en caliente (make-before-break): conecta el stream
+        nuevo, lo solapa con el viejo y solo entonces cierra el viejo.
+        Regresa False (y se queda con el viejo) si el nuevo no conecta a tiempo.
+        """
+        modulos = list(modulos)
+        conectado = asyncio.Event()
+        alcanzado = asyncio.Event()
+        # reintentos propios: un fallo del nuevo no cuenta contra el viejo, ni al revés
+        reconexion = PoliticaReconexion()
+        nuevo = asyncio.create_task(self._ciclo_conexion(modulos, conectado, reconexion))
+        self._empalme = (nuevo, alcanzado)
+        try:
+            try:
+                await asyncio.wait_for(conectado.wait(), timeout_conexion)
+            except asyncio.TimeoutError:
+                nuevo.cancel()
+                print(f"⚠️ El stream con {', '.join(modulos)} no conectó; se conserva el actual.")
+                return False
+            try:
+                await asyncio.wait_for(alcanzado.wait(), solapamiento_max)
+            except asyncio.TimeoutError:
+                pass   # stream tranquilo: sin repetidos que comparar, el replay ya cubre el hueco
+        finally:
+            self._empalme = None
+
+        viejo, self._stream = self._stream, nuevo
+        self.modulos = modulos
+        self.reconexion = reconexion
+        if viejo is not None:
+            viejo.cancel()
+        print(f"🔀 Suscripción cambiada a: {', '.join(modulos)} "
+              f"({self.duplicados_empalme} repetido(s) descartado(s) en el empalme)")
+        return True
+
+    async def _ciclo_conexion(self, modulos, conectado=None, reconexion=None):
+        reconexion = reconexion or self.reconexion
+        while self.activo:
+            url = f"{self.url_base}?modulos={','.join(modulos)}"
             headers = {"Accept": "text/event-stream"}
             if self.ultimo_id:
                 headers["Last-Event-ID"] = self.ultimo_id
@@ -82,58 +185,109 @@ class ClienteSSEMultiplex:
                 async with httpx.AsyncClient(timeout=None) as client:
                     async with client.stream("GET", url, headers=headers, timeout=10.0) as resp:
                         if resp.status_code == 204: break
-                        
-                        self.reintentos = 0 # Reset tras éxito
-                        buffer_data = []
-                        current_event = "message"
+                        if resp.status_code != 200:
+                            # antes de exito()/conectado: un 503 no reemplaza a un stream que sí funciona
+                            raise Exception(f"HTTP {resp.status_code}")
 
-                        async for line in resp.aiter_lines():
-                            if not self.activo: break
-                            if not line.strip(): # Fin de bloque \n\n
-                                if buffer_data:
-                                    self._procesar_bloque(current_event, "".join(buffer_data))
-                                    buffer_data = []; current_event = "message"
-                                continue
+                        reconexion.exito()
+                        parser = ParserSSE(ultimo_id=self.ultimo_id)
+                        if conectado is not None:
+                            conectado.set()
 
-                            self._parsear_linea(line, buffer_data, current_event)
+                        # Bytes crudos -> parser compartido (id, event, data multilínea, CRLF)
+                        async for chunk in self.vigilante.vigilar(resp.aiter_bytes()):
+                            if not self.activo: break
+                            for evento in parser.alimentar(chunk):
+                                await self._recibir(evento)
+                            reconexion.retry(parser.retry)
+                        if self.activo:
+                            # cierre limpio (reinicio del servidor): mismo backoff con jitter
+                            raise StreamCerrado("el servidor cerró el stream")
 
+            except StreamMuerto as e:
+                # Conexión semiabierta: tras una conexión estable el reintento es casi inmediato
+                espera = reconexion.fallo()
+                print(f"💀 {e}. Reconectando desde {self.ultimo_id} en {espera:.1f}s...")
+                await asyncio.sleep(espera)
             except Exception as e:
-                self.reintentos += 1
-                espera = min(30, 2 ** self.reintentos)
-                print(f"🔌 Fallo de red ({e}). Reintento {self.reintentos} en {espera}s...")
+                espera = reconexion.fallo()
+                print(f"🔌 Fallo de red ({e}). Reintento {reconexion.fallos} en {espera:.1f}s "
+                      f"(circuito {reconexion.estado})...")
                 await asyncio.sleep(espera)
 
-    def _parsear_linea(self, line, buffer, event_name):
-        # Lógica de extracción de campos (id, event, data)
-        if line.startswith("id:"): self.ultimo_id = line[3:].strip()
-        elif line.startswith("event:"): # Nota: requiere mutar el nombre del evento
-            pass # Implementación interna del buffer
-        elif line.startswith("data:"): buffer.append(line[5:].strip())
+    async def _recibir(self, evento):
+        """Punto común de los streams: descarta ids repetidos y encola el resto."""
+        id_ = evento.id
+        if id_ is None:
+            await self.pipeline.encolar(evento)
+            return
+        while True:
+            if id_ in self._vistos:
+                self.duplicados_empalme += 1
+                if self._empalme is not None:
+                    # un repetido durante el cambio: el stream nuevo ya alcanzó al viejo
+                    self._empalme[1].set()
+                return
+            en_curso = self._encolando.get(id_)
+            if en_curso is None:
+                break
+            # el otro stream lo está encolando (cola llena): si lo cancelan a medias, va este
+            await asyncio.wait({en_curso})
+        listo = asyncio.get_running_loop().create_future()
+        self._encolando[id_] = listo
+        try:
+            await self.pipeline.encolar(evento)
+            # visto solo una vez dentro de la cola
+            self._vistos.add(id_)
+            self._orden_vistos.append(id_)
+            if len(self._orden_vistos) > self._ventana_ids:
+                self._vistos.discard(self._orden_vistos.popleft())
+            self.ultimo_id = id_
+        finally:
+            del self._encolando[id_]
+            listo.set_result(None)
 
     def _procesar_bloque(self, evento, raw_data):
-        try:
-            data = json.loads(raw_data)
-            self.router.despachar(evento, data)
-        except:
-            print("⚠️ Data fragmentada o inválida.")
+        # Payload perezoso: si ningún handler lo lee (evento ignorado o predicado
+        # que no aplica), el JSON nunca se decodifica. Un JSON inválido se reporta
+        # como error del handler que intentó leerlo.
+        self.router.despachar(evento, JSONPerezoso(raw_data))
 
 # --- IMPLEMENTACIÓN DE HANDLERS ---
+# Un log por evento, pero en ventas flash como máximo 20 por segundo por tipo
+# (los saltados salen como "omitidos"); el print por evento frenaba al loop
+eventos = RegistroEventos("receptor_alertas", por_segundo=20)
+
 def handle_precio(data):
-    # Lógica de validación > 5%
-    print(f"💰 Precio actualizado: {data.get('producto_id')}")
+    # Solo llega si el cambio supera 5% (predicado registrado en el router)
+    eventos.info("💰 Precio actualizado", producto_id=data.get("producto_id"))
 
 def handle_stock(data):
     # Lógica de urgencia (Crítico vs Bajo)
-    print(f"⚠️ Stock reportado: {data.get('stock_actual')}")
+    eventos.warning("⚠️ Stock reportado", producto_id=data.get("producto_id"),
+                    stock_actual=data.get("stock_actual"))
 
 # --- FLUJO DE VALIDACIÓN ---
 async def main():
     router = EventRouter()
-    router.registrar("precio-actualizado", handle_precio)
-    router.registrar("stock-critico", handle_stock)
+    router.registrar("precio-actualizado", handle_precio, cuando=cambio_precio_mayor(0.05))
+    router.registrar("stock-*", handle_stock)
 
-    cliente = ClienteSSEMultiplex("https://api.ecomarket.com/eventos", ["precios", "inventario"], router)
-    await cliente.iniciar()
+    # En ventas flash: un precio por producto cada 100 ms como máximo (stock-critico nunca se junta).
+    # El evento que queda conserva el precio_anterior del primero de la ventana: el predicado
+    # de 5% ve el cambio acumulado, no solo el último paso
+    cliente = ClienteSSEMultiplex(
+        "https://api.ecomarket.com/eventos", ["precios", "inventario"], router,
+        coalescer={"precio-actualizado": clave_por_campo("producto_id")},
+        fusionar={"precio-actualizado": conservar_primero("precio_anterior")},
+        diagnostico=DiagnosticoLoop(),
+    )
+    registro = configurar()
+    try:
+        await cliente.iniciar()
+    finally:
+        registro.detener()
+        print(f"📝 Log: {registro.metricas()} | por evento: {eventos.metricas()}")
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
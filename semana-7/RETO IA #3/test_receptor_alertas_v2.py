@@ -0,0 +1,184 @@
+import asyncio
+import importlib.util
+import random
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("httpx")
+
+AQUI = Path(__file__).resolve().parent
+RAIZ = AQUI.parents[1]
+for carpeta in (RAIZ / "semana-2", RAIZ / "semana-4", RAIZ / "semana-6"):
+    if str(carpeta) not in sys.path:
+        sys.path.insert(0, str(carpeta))
+
+from sse_checkpoint import CheckpointSSE   # noqa: E402
+from sse_hub import HubSSE                 # noqa: E402
+from sse_parser import EventoSSE           # noqa: E402
+from sse_reconexion import PoliticaReconexion   # noqa: E402
+from sse_router import EventRouter         # noqa: E402
+
+# semana-7 #2 tiene un archivo con el mismo nombre: se carga por ruta
+_spec = importlib.util.spec_from_file_location("receptor_alertas_v2_multiplex", AQUI / "receptor_alertas_v2.py")
+receptor = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(receptor)
+
+
+class ServidorQueCierra:
+    """Servidor SSE mínimo: contesta un evento y cierra la conexión limpiamente."""
+
+    def __init__(self, status=200):
+        self.status = status
+        self.conexiones = []      # (momento, línea de petición)
+
+    async def iniciar(self) -> int:
+        self._servidor = await asyncio.start_server(self._atender, "127.0.0.1", 0)
+        return self._servidor.sockets[0].getsockname()[1]
+
+    async def _atender(self, reader, writer):
+        peticion = (await reader.readuntil(b"\r\n\r\n")).split(b"\r\n")[0].decode()
+        self.conexiones.append((time.monotonic(), peticion))
+        n = len(self.conexiones)
+        status = self.status(peticion) if callable(self.status) else self.status
+        if status == 200:
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nConnection: close\r\n\r\n"
+                         + f'id: {n}\nevent: precio-actualizado\ndata: {{"n": {n}}}\n\n'.encode())
+        else:
+            writer.write(f"HTTP/1.1 {status} X\r\nContent-Length: 5\r\nConnection: close\r\n\r\nerror".encode())
+        await writer.drain()
+        writer.close()
+
+    async def detener(self):
+        self._servidor.close()
+        await self._servidor.wait_closed()
+
+    def pausas(self) -> list[float]:
+        momentos = [t for t, _ in self.conexiones]
+        return [b - a for a, b in zip(momentos, momentos[1:])]
+
+
+def test_cambiar_modulos_sin_huecos_ni_duplicados(tmp_path):
+    total = 3000
+    ruta = str(tmp_path / "cp.json")
+    recibidos = []
+
+    async def escenario():
+        hub = HubSSE("http://local/eventos", replay=total)
+        servidor = await hub.servir(0)
+        puerto = servidor.sockets[0].getsockname()[1]
+
+        router = EventRouter()
+        router.registrar("*", lambda data: recibidos.append(data["n"]))
+        # cola chica: el lector se bloquea seguido (BLOQUEAR) y el viejo se cancela esperando lugar
+        cliente = receptor.ClienteSSEMultiplex(
+            f"http://127.0.0.1:{puerto}/eventos", ["precios"], router,
+            capacidad_cola=2, ruta_checkpoint=ruta,
+        )
+        corriendo = asyncio.create_task(cliente.iniciar())
+        while not hub.metricas()["suscriptores"]:      # el primer stream no trae Last-Event-ID
+            await asyncio.sleep(0.01)
+
+        async def publicar(desde, hasta):
+            for i in range(desde, hasta + 1):
+                tipo = "stock-critico" if i % 7 == 0 else "precio-actualizado"
+                hub.publicar(EventoSSE(tipo, f'{{"n": {i}}}', str(i)))
+                if i % 50 == 0:
+                    await asyncio.sleep(0.001)
+
+        await publicar(1, total // 2)
+        # el stream nuevo se solapa con el viejo mientras sigue la ráfaga
+        cambio = asyncio.create_task(cliente.cambiar_modulos(["precios", "inventario"], solapamiento_max=1.0))
+        await publicar(total // 2 + 1, total)
+        cambiado = await cambio
+
+        for _ in range(500):
+            if len(recibidos) >= total and cliente.checkpoint.ultimo_id == str(total):
+                break
+            await asyncio.sleep(0.01)
+        cliente.activo = False
+        corriendo.cancel()
+        await asyncio.gather(corriendo, return_exceptions=True)
+        await hub.detener()
+        return cambiado, cliente.modulos
+
+    cambiado, modulos = asyncio.run(escenario())
+    assert cambiado and modulos == ["precios", "inventario"]
+    assert len(recibidos) == len(set(recibidos))            # sin duplicados
+    assert sorted(recibidos) == list(range(1, total + 1))   # sin huecos
+    assert CheckpointSSE(ruta).ultimo_id == str(total)      # la marca de agua no se congeló
+
+
+def test_cierre_limpio_reconecta_con_backoff():
+    async def escenario():
+        servidor = ServidorQueCierra()
+        puerto = await servidor.iniciar()
+        recibidos = []
+        router = EventRouter()
+        router.registrar("*", lambda data: recibidos.append(data["n"]))
+        cliente = receptor.ClienteSSEMultiplex(f"http://127.0.0.1:{puerto}/eventos", ["precios"], router)
+        cliente.reconexion = PoliticaReconexion(base=0.1, primer_reintento=0.1, azar=random.Random(3))
+        corriendo = asyncio.create_task(cliente.iniciar())
+        await asyncio.sleep(0.6)
+        cliente.activo = False
+        corriendo.cancel()
+        await asyncio.gather(corriendo, return_exceptions=True)
+        await servidor.detener()
+        return servidor, cliente, recibidos
+
+    servidor, cliente, recibidos = asyncio.run(escenario())
+    assert 2 <= len(servidor.conexiones) <= 8               # no es un bucle caliente
+    assert all(pausa >= 0.09 for pausa in servidor.pausas()[1:])
+    assert cliente.reconexion.reintentos >= len(servidor.conexiones) - 1
+    # cada reconexión pidió desde el último id recibido
+    assert recibidos == list(range(1, len(recibidos) + 1))
+
+
+def test_cambiar_modulos_conserva_el_stream_viejo_si_el_nuevo_da_503():
+    async def atender(reader, writer):
+        peticion = (await reader.readuntil(b"\r\n\r\n")).split(b"\r\n")[0].decode()
+        if "inventario" in peticion:
+            writer.write(b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 26\r\n"
+                         b"Connection: close\r\n\r\ndata: {\"n\": -1}\n\nid: 999\n")
+            await writer.drain()
+            writer.close()
+            return
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n\r\n")
+        n = 0
+        try:
+            while True:
+                n += 1
+                writer.write(f'id: {n}\nevent: precio-actualizado\ndata: {{"n": {n}}}\n\n'.encode())
+                await writer.drain()
+                await asyncio.sleep(0.02)
+        except (ConnectionError, asyncio.CancelledError):
+            writer.close()
+
+    async def escenario():
+        servidor = await asyncio.start_server(atender, "127.0.0.1", 0)
+        puerto = servidor.sockets[0].getsockname()[1]
+        recibidos = []
+        router = EventRouter()
+        router.registrar("*", lambda data: recibidos.append(data["n"]))
+        cliente = receptor.ClienteSSEMultiplex(f"http://127.0.0.1:{puerto}/eventos", ["precios"], router)
+        corriendo = asyncio.create_task(cliente.iniciar())
+        while not recibidos:
+            await asyncio.sleep(0.01)
+        viejo = cliente._stream
+        cambiado = await cliente.cambiar_modulos(["precios", "inventario"], timeout_conexion=0.5)
+        antes = len(recibidos)
+        await asyncio.sleep(0.2)
+        despues = len(recibidos)
+        sigue_vivo = cliente._stream is viejo and not viejo.done()
+        cliente.activo = False
+        corriendo.cancel()
+        await asyncio.gather(corriendo, return_exceptions=True)
+        servidor.close()
+        return cambiado, cliente.modulos, sigue_vivo, antes, despues, recibidos
+
+    cambiado, modulos, sigue_vivo, antes, despues, recibidos = asyncio.run(asyncio.wait_for(escenario(), 10))
+    assert not cambiado and modulos == ["precios"]
+    assert sigue_vivo and despues > antes                   # el viejo siguió entregando
+    assert -1 not in recibidos                              # el cuerpo del 503 no se parseó
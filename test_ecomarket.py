@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import ecomarket
+
+AQUI = os.path.dirname(os.path.abspath(__file__))
+# arranque en frío del CLI (sin contar el intérprete); holgado para máquinas lentas
+PRESUPUESTO_MS = float(os.environ.get("ECOMARKET_PRESUPUESTO_ARRANQUE_MS", "150"))
+PESADOS = {"aiohttp", "httpx", "requests", "pandas", "tabulate", "msgpack", "asyncio"}
+
+
+def importtime(*args) -> dict[str, int]:
+    """módulo -> microsegundos acumulados, de `python -X importtime ecomarket.py ...`."""
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", os.path.join(AQUI, "ecomarket.py"), *args],
+        capture_output=True, text=True, cwd=AQUI,
+    )
+    assert resultado.returncode == 0, resultado.stderr[-2000:]
+    tiempos = {}
+    for linea in resultado.stderr.splitlines():
+        if not linea.startswith("import time:") or "cumulative" in linea:
+            continue
+        _, acumulado, nombre = linea.split("|")
+        if not nombre.startswith("  "):              # solo los imports de primer nivel
+            tiempos[nombre.strip()] = int(acumulado)
+    return tiempos
+
+
+@pytest.mark.parametrize("args", [["--help"], ["monitor", "--help"], ["sse", "--help"],
+                                  ["sync", "--help"], ["bench", "--lista"]])
+def test_arranque_no_importa_dependencias_pesadas(args):
+    tiempos = importtime(*args)
+    assert not PESADOS & {nombre.split(".")[0] for nombre in tiempos}
+    assert sum(tiempos.values()) / 1000 < PRESUPUESTO_MS
+
+
+def test_bench_lista_encuentra_los_benchmarks_sin_importarlos():
+    disponibles = ecomarket.benchmarks()
+    assert disponibles["formatos"] == "semana-2/bench_formatos.py"
+    assert "sync_vs_async" in disponibles
+    assert all(os.path.exists(os.path.join(AQUI, ruta)) for ruta in disponibles.values())
+
+
+def test_subcomandos_y_opciones():
+    parser = ecomarket.crear_parser()
+    opciones = parser.parse_args(["bench", "formatos", "--productos", "100"])
+    assert opciones.nombre == "formatos" and opciones.args == ["--productos", "100"]
+    opciones = parser.parse_args(["monitor", "--tipo", "polling", "--duracion", "5"])
+    assert opciones.funcion is ecomarket.cmd_monitor and opciones.duracion == 5.0
+    with pytest.raises(SystemExit):
+        parser.parse_args(["sse", "--receptor", "otro"])